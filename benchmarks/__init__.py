@@ -0,0 +1,8 @@
+"""
+benchmarks 패키지
+
+성능 측정 도구 (테스트가 아니라 직접 실행)
+- python -m benchmarks.synthetic : 시드 고정 가상 데이터 DB/업로드 엑셀 생성
+- python -m benchmarks           : 핫패스 벤치마크 실행, 기준 결과 저장/비교
+- python -m benchmarks.loadtest  : AppTest 동시 사용자 부하 테스트 (재실행 p50/p95/p99, 오류율)
+"""
@@ -0,0 +1,449 @@
+"""
+benchmarks/loadtest.py
+
+앱 프로세스 하나를 기준으로 한 부하 테스트 (브라우저 없이 crm_app.py 실행)
+- 사용자 수를 늘려 가며 단계마다 두 가지를 측정해 p50/p95/p99, 오류율, 처리량 보고
+  app        : 한 프로세스(Streamlit Runtime 하나, 캐시된 DB 연결 공유)에서 사용자 수만큼
+               AppTest 세션을 만들어 시나리오를 번갈아 재실행 - 화면 재실행 지연 측정
+  repository : 사용자 수만큼의 스레드가 같은 DB에 시나리오의 조회/저장/내보내기/적재를
+               CRMRepository로 동시에 실행 - 동시 세션의 DB 경합과 처리량 측정
+
+Note:
+    - AppTest는 여러 스레드에서 동시에 스크립트를 컴파일하면 실패하므로 app 측정은 세션을
+      순서대로 재실행함 (재실행 지연은 세션 수에 따른 캐시/DB 크기 영향을 반영하지만,
+      재실행끼리 겹치지는 않음). 동시 실행 부하는 repository 측정으로 확인
+    - repository 측정의 스레드는 각자 DB 연결을 사용 (API 서버/배치 작업과 같은 방식)
+
+시나리오:
+    browse   : 기업/연락처/상담 목록, 통합 데이터 조회
+    edit     : 편집 모드 저장, 새 상담 이력 입력
+    download : 데이터셋별 다운로드 화면, 전체 백업
+    upload   : 업로드 적재 후 목록 화면 (AppTest는 파일 업로드 위젯을 지원하지 않아
+               적재는 업로드 화면과 같은 CRMRepository.ingest_files 경로로 직접 호출)
+
+사용 예:
+    python -m benchmarks.loadtest --users 1,2,4,8 --iterations 3
+    python -m benchmarks.loadtest --companies 5000 --journeys browse,download --json load.json
+    python -m benchmarks.loadtest --mode repository --users 1,4,16
+"""
+
+import argparse
+import io
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+
+from .synthetic import generate_dataset, build_database
+
+
+APP_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'crm_app.py')
+
+# AppTest 재실행 제한 시간 (초)
+RERUN_TIMEOUT = 120
+
+MODES = ['app', 'repository']
+
+
+class Session:
+    """
+    사용자 한 명의 AppTest 세션 (재실행마다 시간/오류 기록)
+
+    Args:
+        recorder (list): (시나리오, 단계, 시작 시각, 초, 오류 메시지) 기록 목록
+        journey (str): 시나리오 이름
+    """
+
+    def __init__(self, recorder, journey):
+        from streamlit.testing.v1 import AppTest
+
+        self.recorder = recorder
+        self.journey = journey
+        self.at = AppTest.from_file(APP_PATH, default_timeout=RERUN_TIMEOUT)
+        self.step('open', lambda at: at)
+
+    def step(self, name, action):
+        """
+        위젯 조작 후 재실행 한 번 측정
+
+        Args:
+            name (str): 단계 이름
+            action (callable): AppTest를 받아 위젯을 조작하고 실행 대상(AppTest 또는 위젯)을 반환
+        """
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            target = action(self.at)
+            target.run()
+            if self.at.exception:
+                error = str(self.at.exception[0].value)
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.append((self.journey, name, started_at, time.perf_counter() - started, error))
+        return error is None
+
+    def menu(self, name):
+        return self.step(f"menu:{name}", lambda at: at.sidebar.selectbox[0].select(name))
+
+
+def _find(elements, **attrs):
+    for element in elements:
+        if all(getattr(element, key, None) == value for key, value in attrs.items()):
+            return element
+    raise LookupError(f"위젯을 찾을 수 없습니다: {attrs}")
+
+
+def journey_browse(session, rng):
+    for menu in ["기업 목록 관리", "고객 연락처 관리", "상담 이력 관리", "통합 데이터 조회"]:
+        session.menu(menu)
+    session.menu("상담 이력 관리")
+    session.step('date_filter', lambda at: _find(at.checkbox, key="consult_date_filter").check())
+
+
+def journey_edit(session, rng):
+    session.menu("통합 데이터 조회")
+    session.step('edit_mode', lambda at: at.radio[0].set_value("편집 모드"))
+    session.step('edit_save', lambda at: _find(at.button, label="💾 변경사항 저장").click())
+    session.step('quick_mode', lambda at: at.radio[0].set_value("새 상담 추가"))
+
+    def fill(at):
+        companies = _find(at.selectbox, key="quick_company_select")
+        companies.select(companies.options[1 + rng.randrange(len(companies.options) - 1)])
+        _find(at.text_area, key="quick_content").input(f"부하 테스트 상담 {rng.randrange(10 ** 6)}")
+        return at
+    session.step('quick_fill', fill)
+    session.step('quick_save', lambda at: _find(at.button, label="💾 상담 이력 저장").click())
+
+
+def journey_download(session, rng):
+    session.menu("데이터 다운로드")
+    for option in ["기업 목록", "고객 연락처", "상담 이력", "통합 데이터"]:
+        session.step(
+            f"download:{option}",
+            lambda at, option=option: _find(at.selectbox, label="다운로드할 데이터 선택").select(option)
+        )
+    session.step('backup', lambda at: _find(at.button, label="전체 데이터 백업 다운로드").click())
+
+
+def journey_upload(session, rng, upload_data=None):
+    from database.connection import connect
+    from database.ingest import guess_mapping
+    from database.repository import CRMRepository
+
+    session.menu("상담 이력 관리")
+    df = upload_data.sample(n=min(len(upload_data), 500), random_state=rng.randrange(10 ** 6))
+    workbook = io.BytesIO()
+    df.to_excel(workbook, index=False)
+    workbook.name = "부하테스트.xlsx"
+
+    def ingest(at):
+        # 업로드 화면의 "상담 이력 저장"과 같은 적재 경로 (별도 연결, 앱과 같은 DB)
+        conn = connect()
+        try:
+            CRMRepository(conn).ingest_files([workbook], 'consultations', guess_mapping(df.columns, 'consultations'))
+        finally:
+            conn.close()
+        return at
+    session.step('upload_consultations', ingest)
+    session.menu("통합 데이터 조회")
+
+
+JOURNEYS = {
+    'browse': journey_browse,
+    'edit': journey_edit,
+    'download': journey_download,
+    'upload': journey_upload
+}
+
+
+def _percentiles(seconds):
+    values = np.array(seconds) * 1000
+    return {
+        'p50_ms': round(float(np.percentile(values, 50)), 1),
+        'p95_ms': round(float(np.percentile(values, 95)), 1),
+        'p99_ms': round(float(np.percentile(values, 99)), 1),
+        'max_ms': round(float(values.max()), 1)
+    }
+
+
+class RepositoryUser:
+    """
+    repository 측정의 사용자 한 명 (스레드마다 별도 DB 연결)
+
+    Args:
+        recorder (list): (시나리오, 단계, 시작 시각, 초, 오류 메시지) 기록 목록
+        journey (str): 시나리오 이름
+        conn (sqlite3.Connection): 이 사용자의 데이터베이스 연결
+    """
+
+    def __init__(self, recorder, journey, conn):
+        from database.repository import CRMRepository
+
+        self.recorder = recorder
+        self.journey = journey
+        self.repo = CRMRepository(conn)
+
+    def step(self, name, action):
+        """저장소 호출 한 번 측정 (action은 인자 없는 함수)"""
+        started_at = time.time()
+        started = time.perf_counter()
+        error = None
+        try:
+            action()
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        self.recorder.append((self.journey, name, started_at, time.perf_counter() - started, error))
+        return error is None
+
+
+def _checked(result):
+    """(성공 여부, 메시지)를 돌려주는 저장 함수의 실패를 예외로 변환"""
+    success, message = result
+    if not success:
+        raise RuntimeError(message)
+
+
+def repository_browse(user, rng, upload_data=None):
+    for view in ['list_companies', 'list_contacts', 'list_consultations', 'integrated_view']:
+        user.step(view, getattr(user.repo, view))
+    user.step('date_filter', lambda: user.repo.list_consultations('2024-07-01', '2025-06-30'))
+
+
+def repository_edit(user, rng, upload_data=None):
+    edited = user.repo.companies_for_edit()
+    row = edited.iloc[rng.randrange(len(edited))].to_dict()
+    user.step('edit_save', lambda: _checked(user.repo.update_company(row['업체코드'], row)))
+    user.step('quick_save', lambda: _checked(user.repo.insert_consultation({
+        '기업명': row['기업명'],
+        '상담날짜': datetime.now().strftime('%Y-%m-%d'),
+        '상담내역': f"부하 테스트 상담 {rng.randrange(10 ** 6)}"
+    })))
+
+
+def repository_download(user, rng, upload_data=None):
+    from database.export import create_excel_file
+
+    for dataset in ['companies', 'contacts', 'consultations', 'integrated']:
+        user.step(f"download:{dataset}", lambda dataset=dataset: create_excel_file(dict([user.repo.export(dataset)])))
+    user.step('backup', lambda: create_excel_file(user.repo.backup()))
+
+
+def repository_upload(user, rng, upload_data=None):
+    from database.ingest import guess_mapping
+
+    df = upload_data.sample(n=min(len(upload_data), 500), random_state=rng.randrange(10 ** 6))
+    workbook = io.BytesIO()
+    df.to_excel(workbook, index=False)
+    workbook.name = "부하테스트.xlsx"
+    mapping = guess_mapping(df.columns, 'consultations')
+    user.step('upload_consultations', lambda: user.repo.ingest_files([workbook], 'consultations', mapping))
+    user.step('list_consultations', user.repo.list_consultations)
+
+
+REPOSITORY_JOURNEYS = {
+    'browse': repository_browse,
+    'edit': repository_edit,
+    'download': repository_download,
+    'upload': repository_upload
+}
+
+
+def _summarize(users, records):
+    seconds = [record[3] for record in records]
+    errors = [record for record in records if record[4]]
+    elapsed = (max(r[2] + r[3] for r in records) - min(r[2] for r in records)) if records else 0
+    return {
+        'users': users,
+        'steps': len(records),
+        'errors': len(errors),
+        'error_rate': round(len(errors) / len(records), 4) if records else None,
+        'steps_per_sec': round(len(records) / elapsed, 2) if elapsed else None,
+        **(_percentiles(seconds) if seconds else {})
+    }
+
+
+def run_app_level(users, iterations, journeys, seed, upload_data):
+    """
+    app 측정 한 단계 실행 (현재 프로세스의 Streamlit Runtime 하나에서 AppTest 세션 users개)
+
+    Args:
+        users (int): 세션 수
+        iterations (int): 세션마다 시나리오 반복 횟수
+        journeys (list): 시나리오 이름 목록 (세션별로 순환)
+        seed (int): 난수 시드
+        upload_data (DataFrame): upload 시나리오용 상담 이력 데이터
+
+    Returns:
+        tuple: (요약 dict, 기록 목록)
+
+    Note:
+        - 반복마다 세션을 번갈아 가며 시나리오 하나씩 재실행 (재실행끼리는 겹치지 않음)
+        - 세션들은 앱 서버와 같이 cache_resource(DB 연결, 지표/스케줄러)와 cache_data를 공유
+    """
+    rngs = [random.Random(seed * 1000 + index) for index in range(users)]
+    records = []
+    for iteration in range(iterations):
+        for index in range(users):
+            name = journeys[(index + iteration) % len(journeys)]
+            try:
+                session = Session(records, name)
+                if name == 'upload':
+                    journey_upload(session, rngs[index], upload_data)
+                else:
+                    JOURNEYS[name](session, rngs[index])
+            except Exception as e:
+                records.append((name, 'session', time.time(), 0.0, f"{type(e).__name__}: {e}"))
+    return _summarize(users, records), records
+
+
+def run_repository_level(users, iterations, journeys, seed, upload_data, db_path=None):
+    """
+    repository 측정 한 단계 실행 (스레드 users개가 같은 DB에 동시에 시나리오 실행)
+
+    Args:
+        users (int): 동시 사용자(스레드) 수
+        iterations (int): 사용자마다 시나리오 반복 횟수
+        journeys (list): 시나리오 이름 목록 (사용자별로 순환)
+        seed (int): 난수 시드
+        upload_data (DataFrame): upload 시나리오용 상담 이력 데이터
+        db_path (str): 데이터베이스 파일 경로 (기본값: DB_PATH)
+
+    Returns:
+        tuple: (요약 dict, 기록 목록)
+
+    Example:
+        >>> summary, records = run_repository_level(4, 2, ['browse', 'edit'], 42, None, 'bench.db')
+        >>> summary['p95_ms']
+    """
+    from database.connection import connect
+
+    def user_worker(index):
+        rng = random.Random(seed * 1000 + index)
+        records = []
+        conn = connect(db_path)
+        try:
+            for iteration in range(iterations):
+                name = journeys[(index + iteration) % len(journeys)]
+                try:
+                    REPOSITORY_JOURNEYS[name](RepositoryUser(records, name, conn), rng, upload_data)
+                except Exception as e:
+                    records.append((name, 'session', time.time(), 0.0, f"{type(e).__name__}: {e}"))
+        finally:
+            conn.close()
+        return records
+
+    with ThreadPoolExecutor(max_workers=users) as executor:
+        results = list(executor.map(user_worker, range(users)))
+    records = [record for user_records in results for record in user_records]
+    return _summarize(users, records), records
+
+
+LEVEL_RUNNERS = {
+    'app': run_app_level,
+    'repository': run_repository_level
+}
+
+
+def _step_table(records):
+    df = pd.DataFrame(records, columns=['mode', 'journey', 'step', 'started_at', 'seconds', 'error'])
+    df['ms'] = df['seconds'] * 1000
+    table = df.groupby(['mode', 'journey', 'step']).agg(
+        steps=('ms', 'size'),
+        p50_ms=('ms', 'median'),
+        p95_ms=('ms', lambda s: s.quantile(0.95)),
+        errors=('error', lambda s: int(s.notna().sum()))
+    ).round(1).reset_index()
+    return table.sort_values('p95_ms', ascending=False, ignore_index=True)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.loadtest", description="CRM 앱 부하 테스트 (AppTest / 저장소 동시 실행)")
+    parser.add_argument("--users", default="1,2,4,8", help="사용자 수 단계 (쉼표 구분)")
+    parser.add_argument("--iterations", type=int, default=2, help="사용자마다 시나리오 반복 횟수")
+    parser.add_argument("--journeys", default=",".join(JOURNEYS), help="실행할 시나리오 (쉼표 구분)")
+    parser.add_argument("--mode", default=",".join(MODES), help="측정 방식 app, repository (쉼표 구분)")
+    parser.add_argument("--companies", type=int, default=1000, help="가상 DB 기업 수")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    args = parser.parse_args(argv)
+
+    levels = [int(value) for value in args.users.split(",") if value.strip()]
+    journeys = [name.strip() for name in args.journeys.split(",") if name.strip()]
+    modes = [name.strip() for name in args.mode.split(",") if name.strip()]
+    unknown = set(journeys) - set(JOURNEYS)
+    if unknown:
+        parser.error(f"알 수 없는 시나리오: {', '.join(sorted(unknown))}")
+    unknown = set(modes) - set(MODES)
+    if unknown:
+        parser.error(f"알 수 없는 측정 방식: {', '.join(sorted(unknown))}")
+
+    # 가상 DB에서 실행 (앱이 만드는 로그/지표 파일도 임시 폴더에)
+    # database 모듈은 경로 환경변수를 import 시점에 읽으므로 설정 후에 불러옴
+    workdir = tempfile.mkdtemp(prefix='crm_load_')
+    cwd = os.getcwd()
+    db_path = os.path.join(workdir, 'crm_database.db')
+    os.environ['CRM_DB_PATH'] = db_path
+    os.environ.setdefault('CRM_SLOW_QUERY_LOG', os.path.join(workdir, 'crm_slow_queries.log'))
+    os.environ.setdefault('CRM_METRICS_DB', os.path.join(workdir, 'crm_metrics.db'))
+    sys.path.insert(0, os.path.dirname(APP_PATH))
+
+    try:
+        data = generate_dataset(args.companies, seed=args.seed)
+        build_database(data, db_path)
+        upload_data = generate_dataset(max(args.companies // 10, 10), seed=args.seed + 1)['consultations']
+        os.chdir(workdir)
+
+        print(f"DB: 기업 {len(data['companies']):,}, 연락처 {len(data['contacts']):,}, 상담 {len(data['consultations']):,}")
+        summaries, all_records = [], []
+        for users in levels:
+            level = {'users': users}
+            for mode in modes:
+                if mode == 'repository':
+                    summary, records = run_repository_level(
+                        users, args.iterations, journeys, args.seed, upload_data, db_path
+                    )
+                else:
+                    summary, records = run_app_level(users, args.iterations, journeys, args.seed, upload_data)
+                level[mode] = summary
+                all_records.extend((users, mode) + record for record in records)
+                print(
+                    f"[{mode:<10}] 사용자 {users:>3}: 단계 {summary['steps']:>4}회, 오류율 {summary['error_rate']:.1%}, "
+                    f"p50 {summary.get('p50_ms', 0):,.0f}ms, p95 {summary.get('p95_ms', 0):,.0f}ms, "
+                    f"p99 {summary.get('p99_ms', 0):,.0f}ms, {summary['steps_per_sec']}회/초"
+                )
+            summaries.append(level)
+
+        print("\n단계별 (전체 사용자 수 합산, p95 순)")
+        print(_step_table([record[1:] for record in all_records]).head(15).to_string(index=False))
+
+        errors = [record for record in all_records if record[6]]
+        if errors:
+            print("\n오류 예시")
+            for users, mode, journey, step, _, _, error in errors[:5]:
+                print(f"  [{mode} {users}명] {journey}/{step}: {str(error)[:200]}")
+
+        if args.json:
+            result = {
+                'created_at': datetime.now().isoformat(timespec='seconds'),
+                'params': vars(args),
+                'levels': summaries
+            }
+            with open(os.path.join(cwd, args.json), 'w', encoding='utf-8') as f:
+                json.dump(result, f, ensure_ascii=False, indent=2)
+    finally:
+        os.chdir(cwd)
+        shutil.rmtree(workdir, ignore_errors=True)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
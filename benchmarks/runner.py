@@ -0,0 +1,461 @@
+"""
+benchmarks/runner.py
+
+핫패스 벤치마크 실행기 (pytest-benchmark와 같은 방식의 통계: min/median/mean/stddev)
+- 가상 데이터(benchmarks.synthetic)로 임시 DB를 만들고 업로드/목록/통합 조회/내보내기/
+  자동완성/편집 저장을 반복 측정
+- 결과를 JSON으로 저장하고 기준 결과(baseline)와 비교해 느려진 항목을 표시
+- 조회 화면 DataFrame 메모리(dtype 정책 적용 전/후)를 함께 기록
+
+pytest-benchmark 대신 자체 실행기를 쓰는 이유:
+    - 저장소에 테스트 의존성이 없고, 측정마다 필요한 준비(가상 DB 생성, 쓰기 측정용 DB 복사)를
+      측정 시간에서 빼야 하며, 시간 외에 세션 DataFrame 메모리도 같은 결과 파일에 남겨야 함
+    - 통계와 결과 JSON 구조는 pytest-benchmark와 비슷하게 맞춤 (min/median/mean/stddev/ops)
+
+기준 결과:
+    - benchmarks/baseline.json은 기본 설정(기업 2000, 5회, balanced)으로 저장해 함께 커밋
+    - 기준 결과가 있으면 실행할 때마다 비교표를 출력하고, --compare를 주면 회귀 시 종료 코드 1
+    - 측정 시간은 장비에 따라 다르므로 다른 장비에서는 --save-baseline으로 기준을 새로 만든 뒤 비교
+
+사용 예:
+    python -m benchmarks --save-baseline
+    python -m benchmarks --compare                           # 기준 대비 25% 이상 느려지면 종료 코드 1
+    python -m benchmarks -k upload --rounds 3
+    python -m benchmarks --profile safe --json safe.json   # PRAGMA 프로필별 비교
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import sqlite3
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from database.connection import init_database
+from database.dtypes import frame_memory
+from database.export import create_excel_file, write_export
+from database.ingest import IMPORTERS, guess_mapping
+from database.pragmas import bulk_load
+from database.repository import CRMRepository
+from database import pragmas, querylog
+
+from .synthetic import generate_dataset, build_database
+
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, 'baseline.json')
+
+# 기준 대비 중앙값이 이 비율 이상 느려지면 회귀로 판단
+DEFAULT_THRESHOLD = 0.25
+
+# 등록된 벤치마크 [(이름, 그룹, 함수)]
+BENCHMARKS = []
+
+
+def benchmark(name, group):
+    """
+    벤치마크 등록 데코레이터
+
+    Note:
+        - 함수는 context를 받아 (측정할 함수, 정리 함수 또는 None)을 반환
+        - 준비 작업(DB 복사 등)은 측정 시간에 포함되지 않음
+    """
+    def decorator(func):
+        BENCHMARKS.append((name, group, func))
+        return func
+    return decorator
+
+
+class BenchmarkContext:
+    """
+    벤치마크 공통 데이터 (가상 데이터셋과 미리 만든 DB 파일)
+
+    Args:
+        workdir (str): 임시 파일 폴더
+        companies (int): 기업 수
+        seed (int): 난수 시드
+    """
+
+    def __init__(self, workdir, companies, seed):
+        self.workdir = workdir
+        self.data = generate_dataset(companies, seed=seed)
+
+        # 기업만 들어 있는 DB (연락처/상담 업로드용)과 전체 DB
+        self.companies_db = os.path.join(workdir, 'companies_only.db')
+        build_database({'companies': self.data['companies']}, self.companies_db)
+        self.full_db = os.path.join(workdir, 'full.db')
+        build_database(self.data, self.full_db)
+
+        self.conn = init_database(self.full_db)
+        self.repo = CRMRepository(self.conn)
+        self._copies = 0
+
+    def copy_database(self, source):
+        """측정마다 새로 쓸 DB 복사본 연결 (쓰기 벤치마크용)"""
+        self._copies += 1
+        path = os.path.join(self.workdir, f"copy_{self._copies}.db")
+        src = sqlite3.connect(source)
+        dest = sqlite3.connect(path)
+        try:
+            src.backup(dest)
+        finally:
+            src.close()
+            dest.close()
+        return init_database(path)
+
+    def empty_database(self):
+        self._copies += 1
+        return init_database(os.path.join(self.workdir, f"empty_{self._copies}.db"))
+
+    def close(self):
+        self.conn.close()
+
+
+def _closer(conn):
+    def close():
+        path = conn.execute("PRAGMA database_list").fetchone()[2]
+        conn.close()
+        for suffix in ('', '-wal', '-shm'):
+            if os.path.exists(path + suffix):
+                os.remove(path + suffix)
+    return close
+
+
+# ----------------------------------------------------------------------
+# 업로드
+
+def _upload_case(kind, source):
+    def case(ctx):
+        conn = ctx.empty_database() if source is None else ctx.copy_database(getattr(ctx, source))
+        df = ctx.data[kind]
+        mapping = guess_mapping(df.columns, kind)
+        return (lambda: IMPORTERS[kind](conn, df, mapping)), _closer(conn)
+    return case
+
+
+benchmark('upload_companies', 'upload')(_upload_case('companies', None))
+benchmark('upload_contacts', 'upload')(_upload_case('contacts', 'companies_db'))
+benchmark('upload_consultations', 'upload')(_upload_case('consultations', 'companies_db'))
+
+
+def _bulk_upload_case(kind, source):
+    def case(ctx):
+        conn = ctx.empty_database() if source is None else ctx.copy_database(getattr(ctx, source))
+        df = ctx.data[kind]
+        mapping = guess_mapping(df.columns, kind)
+
+        def run():
+            # 업로드 저장과 같이 저장하는 동안만 bulk-load 프로필 적용 (체크포인트 포함)
+            with bulk_load(conn):
+                return IMPORTERS[kind](conn, df, mapping)
+        return run, _closer(conn)
+    return case
+
+
+benchmark('upload_companies_bulk', 'upload')(_bulk_upload_case('companies', None))
+benchmark('upload_consultations_bulk', 'upload')(_bulk_upload_case('consultations', 'companies_db'))
+
+
+# ----------------------------------------------------------------------
+# 목록 / 통합 조회
+
+@benchmark('list_companies', 'list')
+def _list_companies(ctx):
+    return ctx.repo.list_companies, None
+
+
+@benchmark('list_contacts', 'list')
+def _list_contacts(ctx):
+    return ctx.repo.list_contacts, None
+
+
+@benchmark('list_consultations', 'list')
+def _list_consultations(ctx):
+    return ctx.repo.list_consultations, None
+
+
+@benchmark('list_consultations_1y', 'list')
+def _list_consultations_range(ctx):
+    return (lambda: ctx.repo.list_consultations('2024-07-01', '2025-06-30')), None
+
+
+@benchmark('integrated_view', 'list')
+def _integrated_view(ctx):
+    return ctx.repo.integrated_view, None
+
+
+# ----------------------------------------------------------------------
+# 내보내기
+
+@benchmark('export_integrated_xlsx', 'export')
+def _export_xlsx(ctx):
+    def run():
+        sheet_name, df = ctx.repo.export('integrated')
+        return create_excel_file({sheet_name: df})
+    return run, None
+
+
+@benchmark('export_integrated_csv', 'export')
+def _export_csv(ctx):
+    path = os.path.join(ctx.workdir, 'export.csv')
+
+    def run():
+        sheet_name, df = ctx.repo.export('integrated')
+        return write_export({sheet_name: df}, path, 'csv')
+    return run, None
+
+
+@benchmark('export_backup_xlsx', 'export')
+def _export_backup(ctx):
+    return (lambda: create_excel_file(ctx.repo.backup())), None
+
+
+# ----------------------------------------------------------------------
+# 자동완성 / 편집 저장
+
+@benchmark('autocomplete', 'ui')
+def _autocomplete(ctx):
+    def run():
+        return (
+            ctx.repo.company_names(), ctx.repo.customer_names(),
+            ctx.repo.industries(), ctx.repo.positions()
+        )
+    return run, None
+
+
+@benchmark('edit_save_50', 'ui')
+def _edit_save(ctx):
+    conn = ctx.copy_database(ctx.full_db)
+    repo = CRMRepository(conn)
+    edited = repo.companies_for_edit().head(50)
+
+    def run():
+        # 편집 그리드 저장과 같은 방식으로 행마다 update_company 호출
+        for _, row in edited.iterrows():
+            success, message = repo.update_company(row['업체코드'], {**row.to_dict(), '고객구분': 'VIP'})
+            if not success:
+                raise RuntimeError(message)
+    return run, _closer(conn)
+
+
+# ----------------------------------------------------------------------
+# 세션 메모리 (dtype 정책)
+
+MEMORY_VIEWS = ['list_companies', 'list_contacts', 'list_consultations', 'integrated_view']
+
+
+def measure_memory(ctx):
+    """
+    조회 화면별 DataFrame 메모리 비교 (database.dtypes 정책 적용 전/후)
+
+    Returns:
+        dict: {화면: {'raw_bytes', 'compact_bytes', 'saved_ratio'}} ('session' = 화면 합계)
+    """
+    raw_repo = CRMRepository(ctx.conn, compact_dtypes=False)
+    compact_repo = CRMRepository(ctx.conn, compact_dtypes=True)
+    report = {}
+    for view in MEMORY_VIEWS:
+        raw = frame_memory(getattr(raw_repo, view)())
+        compact = frame_memory(getattr(compact_repo, view)())
+        report[view] = {'raw_bytes': raw, 'compact_bytes': compact}
+    report['session'] = {
+        key: sum(report[view][key] for view in MEMORY_VIEWS) for key in ('raw_bytes', 'compact_bytes')
+    }
+    for stats in report.values():
+        stats['saved_ratio'] = round(1 - stats['compact_bytes'] / stats['raw_bytes'], 4) if stats['raw_bytes'] else 0.0
+    return report
+
+
+# ----------------------------------------------------------------------
+# 실행 / 통계 / 비교
+
+def _stats(samples):
+    return {
+        'rounds': len(samples),
+        'min': min(samples),
+        'max': max(samples),
+        'mean': statistics.fmean(samples),
+        'median': statistics.median(samples),
+        'stddev': statistics.stdev(samples) if len(samples) > 1 else 0.0,
+        'ops': 1 / statistics.fmean(samples) if statistics.fmean(samples) > 0 else None
+    }
+
+
+def run_benchmarks(companies=2000, seed=42, rounds=5, warmup=1, keyword=None, verbose=True, profile=None):
+    """
+    벤치마크 실행
+
+    Args:
+        companies (int): 가상 기업 수
+        seed (int): 난수 시드
+        rounds (int): 측정 반복 횟수
+        warmup (int): 측정 전 버리는 실행 횟수
+        keyword (str): 이름에 이 문자열이 들어간 벤치마크만 실행
+        verbose (bool): 진행 상황 출력
+        profile (str): 측정에 쓸 연결 PRAGMA 프로필 (기본값: CRM_DB_PROFILE 또는 balanced)
+
+    Returns:
+        dict: 실행 환경, 파라미터, 벤치마크별 통계(초), 조회 화면 메모리(바이트)
+    """
+    # 측정 중에는 느린 쿼리 로그 파일을 남기지 않음
+    querylog.SLOW_QUERY_MS = float('inf')
+    profile = profile or pragmas.DB_PROFILE
+    pragmas.get_profile(profile)
+    pragmas.DB_PROFILE = profile
+
+    workdir = tempfile.mkdtemp(prefix='crm_bench_')
+    try:
+        started = time.perf_counter()
+        ctx = BenchmarkContext(workdir, companies, seed)
+        if verbose:
+            sizes = ", ".join(f"{kind} {len(df):,}" for kind, df in ctx.data.items())
+            print(f"데이터 준비 {time.perf_counter() - started:.1f}초 ({sizes})")
+
+        results = {}
+        for name, group, case in BENCHMARKS:
+            if keyword and keyword not in name:
+                continue
+            samples = []
+            for i in range(warmup + rounds):
+                func, cleanup = case(ctx)
+                try:
+                    t0 = time.perf_counter()
+                    func()
+                    elapsed = time.perf_counter() - t0
+                finally:
+                    if cleanup:
+                        cleanup()
+                if i >= warmup:
+                    samples.append(elapsed)
+            results[name] = {'group': group, **_stats(samples)}
+            if verbose:
+                print(f"  {name:<26} median {results[name]['median'] * 1000:9.2f}ms")
+
+        memory = measure_memory(ctx)
+        if verbose:
+            for view, stats in memory.items():
+                print(
+                    f"  {'memory:' + view:<26} {stats['raw_bytes'] / 1024 ** 2:8.2f}MB -> "
+                    f"{stats['compact_bytes'] / 1024 ** 2:8.2f}MB ({stats['saved_ratio']:.0%} 절감)"
+                )
+        ctx.close()
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    return {
+        'created_at': datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'sqlite': sqlite3.sqlite_version,
+            'pandas': pd.__version__
+        },
+        'params': {'companies': companies, 'seed': seed, 'rounds': rounds, 'profile': profile},
+        'benchmarks': results,
+        'memory': memory
+    }
+
+
+def compare_results(current, baseline, threshold=DEFAULT_THRESHOLD):
+    """
+    기준 결과와 비교
+
+    Args:
+        current (dict): run_benchmarks() 결과
+        baseline (dict): 저장된 기준 결과
+        threshold (float): 회귀 판단 비율 (0.25 = 25% 느려짐)
+
+    Returns:
+        pandas.DataFrame: 벤치마크, 기준_ms, 현재_ms, 비율, 회귀
+    """
+    rows = []
+    for name, stats in current['benchmarks'].items():
+        base = baseline.get('benchmarks', {}).get(name)
+        if base is None:
+            continue
+        ratio = stats['median'] / base['median'] if base['median'] else None
+        rows.append({
+            '벤치마크': name,
+            '기준_ms': round(base['median'] * 1000, 2),
+            '현재_ms': round(stats['median'] * 1000, 2),
+            '비율': round(ratio, 2) if ratio is not None else None,
+            '회귀': bool(ratio is not None and ratio > 1 + threshold)
+        })
+    return pd.DataFrame(rows, columns=['벤치마크', '기준_ms', '현재_ms', '비율', '회귀'])
+
+
+def baseline_warnings(current, baseline):
+    """
+    기준 결과와 측정 조건이 다른 항목
+
+    Args:
+        current (dict): run_benchmarks() 결과
+        baseline (dict): 저장된 기준 결과
+
+    Returns:
+        list: 경고 메시지 목록 (조건이 같으면 빈 목록)
+    """
+    warnings = []
+    params, base_params = current['params'], baseline.get('params', {})
+    if base_params.get('companies') != params['companies']:
+        warnings.append("기준 결과와 데이터 크기(--companies)가 다릅니다.")
+    if base_params.get('profile', 'balanced') != params['profile']:
+        warnings.append("기준 결과와 PRAGMA 프로필(--profile)이 다릅니다.")
+    machine, base_machine = current.get('machine', {}), baseline.get('machine', {})
+    if any(base_machine.get(key) != machine.get(key) for key in ('platform', 'python', 'sqlite')):
+        warnings.append("기준 결과와 실행 환경(플랫폼/Python/SQLite)이 달라 시간 비교가 부정확할 수 있습니다.")
+    return warnings
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks", description="CRM 핫패스 벤치마크")
+    parser.add_argument("--companies", type=int, default=2000, help="가상 기업 수 (기본값: 2000)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument("--warmup", type=int, default=1)
+    parser.add_argument("-k", dest="keyword", help="이름에 이 문자열이 들어간 벤치마크만 실행")
+    parser.add_argument("--profile", choices=sorted(pragmas.PRAGMA_PROFILES),
+                        help="연결 PRAGMA 프로필 (기본값: CRM_DB_PROFILE 또는 balanced)")
+    parser.add_argument("--json", help="결과 JSON 저장 경로")
+    parser.add_argument("--save-baseline", action="store_true", help="결과를 기준 결과로 저장")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE,
+                        help="기준 결과와 비교해 회귀가 있으면 종료 코드 1 (기본값: benchmarks/baseline.json)")
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="--save-baseline 저장 경로")
+    args = parser.parse_args(argv)
+
+    result = run_benchmarks(args.companies, args.seed, args.rounds, args.warmup, args.keyword, profile=args.profile)
+
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(result, f, ensure_ascii=False, indent=2)
+        print(f"기준 결과 저장: {args.baseline}")
+
+    # --compare가 없어도 커밋된 기준 결과가 있으면 비교표만 출력
+    baseline_path = args.compare or (DEFAULT_BASELINE if not args.save_baseline else None)
+    if baseline_path and os.path.exists(baseline_path):
+        with open(baseline_path, encoding='utf-8') as f:
+            baseline = json.load(f)
+        for warning in baseline_warnings(result, baseline):
+            print(f"⚠️ {warning}", file=sys.stderr)
+        comparison = compare_results(result, baseline, args.threshold)
+        print(f"\n기준 결과 비교: {baseline_path}")
+        print(comparison.to_string(index=False))
+        if comparison['회귀'].any():
+            print(f"회귀 {int(comparison['회귀'].sum())}건 (기준 대비 {args.threshold:.0%} 이상 느려짐)", file=sys.stderr)
+            if args.compare:
+                return 1
+    elif args.compare:
+        print(f"기준 결과 파일이 없습니다: {args.compare} (--save-baseline으로 먼저 저장)", file=sys.stderr)
+        return 2
+    return 0
@@ -0,0 +1,300 @@
+"""
+benchmarks/synthetic.py
+
+시드 고정 가상 CRM 데이터 생성
+- 한국식 이름/기업명/업종, 기업별 연락처·상담 건수 편중(소수 기업에 집중)
+- 상담 내용 길이는 로그정규 분포 (짧은 메모가 대부분, 가끔 긴 보고서)
+- 업로드 엑셀과 같은 한글 헤더의 DataFrame / xlsx 파일 / 데이터베이스로 저장
+
+사용 예:
+    python -m benchmarks.synthetic --companies 5000 --db bench.db
+    python -m benchmarks.synthetic --companies 1000 --workbooks uploads/
+"""
+
+import argparse
+import os
+from datetime import date, timedelta
+
+import numpy as np
+import pandas as pd
+
+
+# 성씨 (대략적인 인구 비율)
+SURNAMES = [
+    ('김', 21.5), ('이', 14.7), ('박', 8.4), ('최', 4.7), ('정', 4.3), ('강', 2.4),
+    ('조', 2.1), ('윤', 2.1), ('장', 2.0), ('임', 1.7), ('한', 1.5), ('오', 1.5),
+    ('서', 1.5), ('신', 1.5), ('권', 1.4), ('황', 1.4), ('안', 1.4), ('송', 1.3),
+    ('전', 1.1), ('홍', 1.1), ('유', 1.1), ('고', 0.9), ('문', 0.9), ('양', 0.8),
+    ('손', 0.8), ('배', 0.8), ('백', 0.7), ('허', 0.6), ('남', 0.6), ('진', 0.4)
+]
+GIVEN_SYLLABLES = list("민서지현준영수진우성호연은하도윤재혜경태희정승상훈동아예유주원석철미선")
+
+COMPANY_PREFIXES = [
+    "한빛", "대한", "세종", "미래", "동아", "삼성", "대성", "한국", "신화", "태양", "푸른",
+    "새한", "우리", "누리", "한솔", "제일", "동방", "광명", "청운", "하나", "영진", "성원",
+    "금강", "백두", "한결", "다온", "가온", "아름", "온누리", "케이"
+]
+COMPANY_SUFFIXES = [
+    "테크", "산업", "전자", "정밀", "화학", "시스템", "솔루션", "물산", "건설", "바이오",
+    "소프트", "네트웍스", "에너지", "제약", "식품", "로지스", "디자인", "모빌리티"
+]
+COMPANY_FORMS = [("(주)", 0.45), ("", 0.35), ("주식회사 ", 0.15), ("(유)", 0.05)]
+
+# 업종 (편중: 제조/IT가 대부분)
+INDUSTRIES = [
+    ("제조업", 30), ("정보통신업", 22), ("도매 및 소매업", 12), ("건설업", 8),
+    ("전문, 과학 및 기술 서비스업", 8), ("운수 및 창고업", 5), ("금융 및 보험업", 4),
+    ("보건업 및 사회복지 서비스업", 3), ("교육 서비스업", 3), ("숙박 및 음식점업", 2),
+    ("농업, 임업 및 어업", 1), ("전기, 가스, 증기 및 공기 조절 공급업", 2)
+]
+REGIONS = [
+    ("서울특별시", ["강남구", "서초구", "영등포구", "마포구", "금천구", "구로구", "송파구", "중구"], 40),
+    ("경기도", ["성남시 분당구", "수원시 영통구", "화성시", "안산시 단원구", "용인시 기흥구", "평택시"], 25),
+    ("인천광역시", ["남동구", "연수구", "서구"], 6),
+    ("부산광역시", ["해운대구", "강서구", "사상구"], 7),
+    ("대구광역시", ["달서구", "북구"], 5),
+    ("대전광역시", ["유성구", "대덕구"], 5),
+    ("광주광역시", ["광산구", "북구"], 4),
+    ("충청남도", ["천안시 서북구", "아산시"], 4),
+    ("경상남도", ["창원시 성산구", "김해시"], 4)
+]
+STREETS = ["테헤란로", "디지털로", "판교로", "산업로", "중앙로", "첨단로", "과학로", "공단로", "가산디지털1로"]
+PRODUCTS = [
+    "ERP", "MES", "그룹웨어", "보안 솔루션", "클라우드 호스팅", "산업용 센서", "PLC 모듈",
+    "물류 관리 시스템", "CRM", "빅데이터 분석", "교육 컨설팅", "인증 컨설팅", "스마트팩토리",
+    "자동화 설비", "전자결재", "데이터 바우처", "AI 비전 검사"
+]
+CUSTOMER_CATEGORIES = [("기존", 45), ("신규", 25), ("잠재", 25), ("VIP", 5)]
+POSITIONS = [
+    ("사원", 10), ("주임", 8), ("대리", 18), ("과장", 20), ("차장", 12), ("부장", 14),
+    ("팀장", 10), ("이사", 4), ("상무", 2), ("대표", 2)
+]
+ACQUISITION_PATHS = [("세미나", 25), ("소개", 20), ("홈페이지", 20), ("전시회", 15), ("기존 고객", 15), ("콜드콜", 5)]
+EMAIL_DOMAINS = ["gmail.com", "naver.com", "daum.net", "kakao.com", "hanmail.net"]
+
+CONSULTATION_PHRASES = [
+    "도입 일정 관련 문의", "견적서 요청하여 송부함", "담당자 변경 안내 받음", "데모 시연 진행",
+    "기존 시스템 연동 방안 논의", "예산 확정 후 재연락 예정", "계약 조건 협의 중",
+    "기술 지원 요청 건 확인", "유지보수 계약 갱신 문의", "교육 일정 조율", "추가 라이선스 검토",
+    "경쟁사 제품과 비교 검토 중", "현장 방문 일정 확정", "정부 지원사업 연계 가능 여부 문의",
+    "PoC 결과 공유", "보안 점검 결과 회신", "납품 일정 지연에 대한 양해 요청", "사용자 피드백 전달"
+]
+PROJECT_NAMES = [
+    "스마트공장 구축", "데이터바우처", "AI 바우처", "클라우드 전환", "ERP 고도화",
+    "보안 인증 획득", "수출 바우처", "R&D 과제", "디지털 전환 컨설팅", None
+]
+
+# 상담 날짜 기준일 (시드가 같으면 실행 날짜와 상관없이 같은 데이터)
+END_DATE = date(2025, 6, 30)
+
+# 날짜 표기 방식 (업로드 파일에 섞여 들어오는 비율)
+DATE_FORMATS = [("%Y.%m.%d", 0.6), ("%Y-%m-%d", 0.3), ("%Y%m%d", 0.1)]
+
+
+def _weighted(rng, items, size):
+    """(값, 가중치) 목록에서 size개 추출"""
+    values = [item[0] for item in items]
+    weights = np.array([item[-1] for item in items], dtype=float)
+    indexes = rng.choice(len(values), size=size, p=weights / weights.sum())
+    return [values[i] for i in indexes]
+
+
+def _person_names(rng, size):
+    surnames = _weighted(rng, SURNAMES, size)
+    first = rng.choice(GIVEN_SYLLABLES, size=size)
+    second = rng.choice(GIVEN_SYLLABLES, size=size)
+    return [f"{s}{a}{b}" for s, a, b in zip(surnames, first, second)]
+
+
+def _company_names(rng, size):
+    """중복 없는 기업명 size개"""
+    forms = _weighted(rng, COMPANY_FORMS, size * 2)
+    prefixes = rng.choice(COMPANY_PREFIXES, size=size * 2)
+    suffixes = rng.choice(COMPANY_SUFFIXES, size=size * 2)
+    names, seen = [], set()
+    for i, (form, prefix, suffix) in enumerate(zip(forms, prefixes, suffixes)):
+        name = f"{form}{prefix}{suffix}"
+        if name in seen:
+            name = f"{name}{i}"  # 조합이 겹치면 번호로 구분
+        seen.add(name)
+        names.append(name)
+        if len(names) == size:
+            break
+    while len(names) < size:
+        names.append(f"가상기업{len(names)}")
+    return names
+
+
+def _skewed_counts(rng, size, mean):
+    """평균이 mean인 편중 분포 (대부분 적고 소수 기업에 몰림)"""
+    counts = rng.pareto(1.6, size=size) + 1
+    return np.maximum(0, np.round(counts / counts.mean() * mean)).astype(int)
+
+
+def _consultation_texts(rng, size):
+    """상담 내용 (문장 수는 로그정규 분포)"""
+    sentence_counts = np.clip(np.round(rng.lognormal(mean=0.6, sigma=0.8, size=size)), 1, 40).astype(int)
+    phrases = np.array(CONSULTATION_PHRASES, dtype=object)
+    return [". ".join(rng.choice(phrases, size=n)) + "." for n in sentence_counts]
+
+
+def _format_dates(rng, days):
+    formats = _weighted(rng, DATE_FORMATS, len(days))
+    return [day.strftime(fmt) for day, fmt in zip(days, formats)]
+
+
+def generate_dataset(companies=1000, contacts_per_company=3, consultations_per_company=8, seed=42):
+    """
+    업로드 엑셀과 같은 한글 헤더로 가상 데이터 생성
+
+    Args:
+        companies (int): 기업 수
+        contacts_per_company (float): 기업당 평균 연락처 수
+        consultations_per_company (float): 기업당 평균 상담 건수
+        seed (int): 난수 시드 (같은 시드면 같은 데이터)
+
+    Returns:
+        dict: {'companies': DataFrame, 'contacts': DataFrame, 'consultations': DataFrame}
+
+    Example:
+        >>> data = generate_dataset(100, seed=1)
+        >>> list(data['companies'].columns)[:3]
+        ['업체코드', '기업명', '매출액']
+    """
+    rng = np.random.default_rng(seed)
+
+    # 기업
+    names = _company_names(rng, companies)
+    regions = _weighted(rng, [(region, region[2]) for region in REGIONS], companies)
+    addresses = [
+        f"{city} {rng.choice(districts)} {rng.choice(STREETS)} {rng.integers(1, 400)}"
+        for city, districts, _ in regions
+    ]
+    employees = np.round(rng.lognormal(mean=3.5, sigma=1.2, size=companies)).astype(int) + 1
+    revenue = np.round(employees * rng.lognormal(mean=19.5, sigma=0.6, size=companies), -6)
+    # 외감기업(약 30%)만 업체코드가 있음
+    codes = [f"C{i:07d}" if flag else None for i, flag in enumerate(rng.random(companies) < 0.3)]
+    companies_df = pd.DataFrame({
+        '업체코드': codes,
+        '기업명': names,
+        '매출액': [f"{value:,.0f}" for value in revenue],
+        '업종': _weighted(rng, INDUSTRIES, companies),
+        '종업원수': employees,
+        '주소': addresses,
+        '상품': [", ".join(rng.choice(PRODUCTS, size=rng.integers(1, 4), replace=False)) for _ in range(companies)],
+        '고객구분': _weighted(rng, CUSTOMER_CATEGORIES, companies)
+    })
+
+    # 연락처 (기업별 편중)
+    contact_counts = _skewed_counts(rng, companies, contacts_per_company)
+    contact_companies = np.repeat(names, contact_counts)
+    n_contacts = len(contact_companies)
+    customer_names = _person_names(rng, n_contacts)
+    phones = [f"010-{a:04d}-{b:04d}" for a, b in zip(rng.integers(0, 10000, n_contacts), rng.integers(0, 10000, n_contacts))]
+    domains = rng.choice(EMAIL_DOMAINS, size=n_contacts)
+    contacts_df = pd.DataFrame({
+        '기업명': contact_companies,
+        '고객명': customer_names,
+        '직위': _weighted(rng, POSITIONS, n_contacts),
+        '전화': phones,
+        '이메일': [f"user{i}@{domain}" for i, domain in enumerate(domains)],
+        '획득경로': _weighted(rng, ACQUISITION_PATHS, n_contacts)
+    })
+
+    # 상담 이력 (연락처가 많은 기업일수록 상담도 많게)
+    consult_counts = _skewed_counts(rng, companies, consultations_per_company)
+    consult_index = np.repeat(np.arange(companies), consult_counts)
+    n_consults = len(consult_index)
+    contact_lookup = contacts_df.groupby('기업명')['고객명'].agg(list).to_dict()
+    consult_customers = [
+        rng.choice(contact_lookup[names[i]]) if names[i] in contact_lookup else None
+        for i in consult_index
+    ]
+    # 최근일수록 상담이 많도록 3년 범위에서 지수 분포
+    offsets = np.minimum(rng.exponential(scale=300, size=n_consults).astype(int), 3 * 365)
+    days = [END_DATE - timedelta(days=int(offset)) for offset in offsets]
+    consultations_df = pd.DataFrame({
+        '기업명': [names[i] for i in consult_index],
+        '고객명': consult_customers,
+        '상담날짜': _format_dates(rng, days),
+        '상담내역': _consultation_texts(rng, n_consults),
+        '프로젝트명': _weighted(rng, [(name, 1) for name in PROJECT_NAMES], n_consults)
+    })
+
+    return {'companies': companies_df, 'contacts': contacts_df, 'consultations': consultations_df}
+
+
+def write_workbooks(data, directory):
+    """
+    가상 데이터를 업로드용 xlsx 파일로 저장
+
+    Args:
+        data (dict): generate_dataset() 결과
+        directory (str): 저장 폴더
+
+    Returns:
+        dict: {종류: 파일 경로}
+    """
+    os.makedirs(directory, exist_ok=True)
+    file_names = {'companies': "기업목록.xlsx", 'contacts': "고객연락처.xlsx", 'consultations': "상담이력.xlsx"}
+    paths = {}
+    for kind, df in data.items():
+        path = os.path.join(directory, file_names[kind])
+        df.to_excel(path, index=False, engine='xlsxwriter')
+        paths[kind] = path
+    return paths
+
+
+def build_database(data, db_path):
+    """
+    가상 데이터로 데이터베이스 생성 (앱 업로드와 같은 적재 경로 사용)
+
+    Args:
+        data (dict): generate_dataset() 결과
+        db_path (str): 데이터베이스 파일 경로 (이미 있으면 데이터가 추가됨)
+
+    Returns:
+        dict: 종류별 적재 결과
+    """
+    from database.connection import init_database
+    from database.ingest import IMPORTERS, guess_mapping
+
+    conn = init_database(db_path)
+    try:
+        return {
+            kind: IMPORTERS[kind](conn, df, guess_mapping(df.columns, kind))
+            for kind, df in data.items()
+        }
+    finally:
+        conn.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.synthetic", description="가상 CRM 데이터 생성")
+    parser.add_argument("--companies", type=int, default=1000)
+    parser.add_argument("--contacts-per-company", type=float, default=3)
+    parser.add_argument("--consultations-per-company", type=float, default=8)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="생성할 데이터베이스 파일")
+    parser.add_argument("--workbooks", help="업로드용 xlsx를 저장할 폴더")
+    args = parser.parse_args(argv)
+
+    if not args.db and not args.workbooks:
+        parser.error("--db 또는 --workbooks 중 하나 이상을 지정하세요.")
+
+    data = generate_dataset(
+        args.companies, args.contacts_per_company, args.consultations_per_company, args.seed
+    )
+    print(", ".join(f"{kind} {len(df):,}행" for kind, df in data.items()))
+
+    if args.workbooks:
+        for kind, path in write_workbooks(data, args.workbooks).items():
+            print(f"{path}")
+    if args.db:
+        for kind, result in build_database(data, args.db).items():
+            print(f"{args.db} {kind}: {result}")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
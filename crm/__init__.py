@@ -0,0 +1,7 @@
+"""
+crm 패키지
+
+Streamlit 없이 실행하는 CRM 도구들
+- python -m crm ... : 대량 가져오기/내보내기/유지보수 CLI
+- python -m crm serve : 외부 시스템 연동용 로컬 JSON HTTP API
+"""
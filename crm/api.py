@@ -0,0 +1,379 @@
+"""
+crm/api.py
+
+로컬 JSON HTTP API (표준 라이브러리 http.server 기반)
+
+엔드포인트:
+    GET  /health                              상태 확인
+    GET  /metrics                             Prometheus 텍스트 형식 지표
+    POST /companies | /contacts | /consultations
+         요청 본문: NDJSON (한 줄에 JSON 객체 하나, DB 필드명 또는 한글 헤더명)
+         응답 본문: NDJSON (배치별 처리 결과, 마지막 줄은 전체 요약)
+    GET  /companies | /contacts | /consultations?after=<키>&limit=<건수>
+         응답 본문: NDJSON (한 줄에 한 행), 다음 페이지 키는 X-Next-After 헤더
+    GET  /changes?after=<오프셋>&limit=<건수>&table=<테이블>
+         응답 본문: NDJSON (변경 로그 한 줄에 하나), 다음 오프셋은 X-Next-After,
+         남아 있는 가장 오래된 오프셋은 X-Oldest 헤더
+
+실행:
+    python -m crm serve --port 8502
+
+Note:
+    - 기본적으로 127.0.0.1에만 바인딩
+    - CRM_API_TOKEN 환경변수가 있으면 Authorization: Bearer <토큰> 필요
+    - 적재 요청도 파일 업로드와 같은 검증(database.validation)을 거치며,
+      검증에 실패한 행은 적재하지 않고 배치 결과의 rejected/errors로 반환
+    - 저장 여부도 파일 업로드 계획(database.ingest.plan_frame)과 같은 기준이라 같은 배치를
+      다시 보내도 중복 저장되지 않음 (기존 행과 같은 행은 unchanged, 저장한 행 수는 written)
+    - 도중에 실패하면 마지막 줄에 오류와 이미 저장된 행 수(committed_rows)를 반환
+"""
+
+import hmac
+import json
+import os
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+import pandas as pd
+
+from database.connection import DB_PATH, connect, init_database
+from database import metrics
+from database.ingest import IMPORT_FIELDS, IMPORTERS, guess_mapping, plan_frame
+from database.validation import validate_frame
+from database.export import PAGE_QUERIES, fetch_page
+from database.changelog import read_change_log
+
+
+# 요청 본문을 몇 행씩 묶어 적재할지
+BATCH_SIZE = 5000
+
+# 페이지 조회 기본/최대 건수
+DEFAULT_PAGE_SIZE = 1000
+MAX_PAGE_SIZE = 10000
+
+# 본문 읽기 블록 크기
+READ_BLOCK_SIZE = 64 * 1024
+
+# 배치 결과에 담을 오류 행 최대 수
+MAX_ERRORS_PER_BATCH = 100
+
+# 적재 함수 결과 중 실제로 저장한 행 수 항목
+WRITTEN_KEYS = ('inserted', 'updated', 'merged')
+
+
+class CRMRequestHandler(BaseHTTPRequestHandler):
+    """CRM API 요청 처리기 (클라이언트 연결마다 별도 DB 연결 사용)"""
+
+    protocol_version = "HTTP/1.1"
+    server_version = "CRMApi/1.0"
+
+    db_conn = None
+
+    # ------------------------------------------------------------------
+    # 공통 유틸리티
+
+    def _conn(self):
+        """현재 클라이언트 연결의 데이터베이스 연결 (처음 사용할 때 생성)"""
+        if self.db_conn is None:
+            self.db_conn = connect(self.server.db_path, self.server.profile)
+        return self.db_conn
+
+    def finish(self):
+        # 클라이언트 연결이 끝나면 DB 연결도 닫음 (처리 스레드는 연결마다 새로 생김)
+        try:
+            super().finish()
+        finally:
+            if self.db_conn is not None:
+                self.db_conn.close()
+                self.db_conn = None
+
+    def _authorized(self):
+        token = self.server.token
+        if not token:
+            return True
+        # 응답 시간으로 토큰을 추측할 수 없도록 상수 시간 비교
+        supplied = self.headers.get('Authorization', '').encode('utf-8')
+        if hmac.compare_digest(supplied, f"Bearer {token}".encode('utf-8')):
+            return True
+        self._send_json(401, {'error': '인증이 필요합니다.'})
+        return False
+
+    def _send_json(self, status, payload):
+        body = json.dumps(payload, ensure_ascii=False).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _start_stream(self, status=200, headers=None):
+        """chunked 인코딩 NDJSON 응답 시작"""
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/x-ndjson; charset=utf-8')
+        self.send_header('Transfer-Encoding', 'chunked')
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+
+    def _write_chunk(self, data):
+        if data:
+            self.wfile.write(f"{len(data):X}\r\n".encode('ascii') + data + b"\r\n")
+
+    def _end_stream(self):
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _iter_body_blocks(self):
+        """요청 본문을 블록 단위로 읽기 (Content-Length / chunked 모두 지원)"""
+        if 'chunked' in self.headers.get('Transfer-Encoding', '').lower():
+            while True:
+                size_line = self.rfile.readline().split(b';', 1)[0].strip()
+                size = int(size_line or b'0', 16)
+                if size == 0:
+                    # 트레일러 헤더까지 소비
+                    while self.rfile.readline() not in (b'\r\n', b'\n', b''):
+                        pass
+                    return
+                yield self.rfile.read(size)
+                self.rfile.readline()
+        else:
+            remaining = int(self.headers.get('Content-Length') or 0)
+            while remaining > 0:
+                block = self.rfile.read(min(READ_BLOCK_SIZE, remaining))
+                if not block:
+                    return
+                remaining -= len(block)
+                yield block
+
+    def _iter_records(self):
+        """NDJSON 요청 본문을 한 줄씩 JSON 객체로 변환"""
+        buffer = b''
+        line_no = 0
+        for block in self._iter_body_blocks():
+            buffer += block
+            *lines, buffer = buffer.split(b'\n')
+            for line in lines:
+                line_no += 1
+                if line.strip():
+                    yield line_no, json.loads(line)
+        if buffer.strip():
+            yield line_no + 1, json.loads(buffer)
+
+    # ------------------------------------------------------------------
+    # 라우팅
+
+    def _dataset(self):
+        path = urlparse(self.path).path.strip('/')
+        return path if path in IMPORTERS else None
+
+    def do_GET(self):
+        if not self._authorized():
+            return
+        parsed = urlparse(self.path)
+        if parsed.path == '/health':
+            self._send_json(200, {'status': 'ok'})
+            return
+        if parsed.path == '/metrics':
+            body = metrics.render_prometheus().encode('utf-8')
+            self.send_response(200)
+            self.send_header('Content-Type', metrics.PROMETHEUS_CONTENT_TYPE)
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+
+        params = parse_qs(parsed.query)
+        if parsed.path == '/changes':
+            try:
+                limit = min(int(params.get('limit', [DEFAULT_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+                page = read_change_log(
+                    self._conn(), int(params.get('after', [0])[0]), max(limit, 1), params.get('table')
+                )
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+            rows = page['rows']
+            headers = {'X-Row-Count': str(len(rows)), 'X-Next-After': str(page['next_after'])}
+            if page['oldest'] is not None:
+                headers['X-Oldest'] = str(page['oldest'])
+            self._start_stream(200, headers)
+        else:
+            dataset = self._dataset()
+            if dataset not in PAGE_QUERIES:
+                self._send_json(404, {'error': '알 수 없는 경로입니다.'})
+                return
+
+            try:
+                limit = min(int(params.get('limit', [DEFAULT_PAGE_SIZE])[0]), MAX_PAGE_SIZE)
+                rows, next_after = fetch_page(
+                    self._conn(), dataset, params.get('after', [None])[0], max(limit, 1)
+                )
+            except ValueError as e:
+                self._send_json(400, {'error': str(e)})
+                return
+
+            headers = {'X-Row-Count': str(len(rows))}
+            if next_after is not None:
+                headers['X-Next-After'] = str(next_after)
+            self._start_stream(200, headers)
+
+        lines = []
+        for row in rows:
+            lines.append(json.dumps(row, ensure_ascii=False))
+            if len(lines) >= 500:
+                self._write_chunk(("\n".join(lines) + "\n").encode('utf-8'))
+                lines = []
+        self._write_chunk(("\n".join(lines) + "\n").encode('utf-8') if lines else b'')
+        self._end_stream()
+
+    def do_POST(self):
+        if not self._authorized():
+            return
+        dataset = self._dataset()
+        if dataset is None:
+            self._send_json(404, {'error': '알 수 없는 경로입니다.'})
+            return
+
+        importer = IMPORTERS[dataset]
+        conn = self._conn()
+        started = time.perf_counter()
+        totals = {'rows': 0, 'batches': 0, 'written': 0, 'unchanged': 0, 'rejected': 0}
+        self._start_stream(200)
+
+        def flush(line_numbers, batch):
+            df, mapping, errors = validate_records(batch, dataset, line_numbers)
+            # 파일 업로드 계획과 같은 기준으로 바뀐 행만 저장 (재전송한 배치는 unchanged)
+            actions = plan_frame(conn, df, mapping, dataset)
+            changed = df[actions.isin(['insert', 'update'])]
+            result = importer(conn, changed, mapping) if len(changed) else {}
+            written = sum(result.get(key, 0) for key in WRITTEN_KEYS)
+            unchanged = int((actions == 'unchanged').sum())
+            totals['rows'] += len(batch)
+            totals['batches'] += 1
+            totals['written'] += written
+            totals['unchanged'] += unchanged
+            totals['rejected'] += len(errors)
+            for key, value in result.items():
+                totals[key] = totals.get(key, 0) + value
+            line = {
+                'batch': totals['batches'], 'rows': len(batch), 'written': written,
+                'unchanged': unchanged, 'rejected': len(errors), **result
+            }
+            if errors:
+                line['errors'] = errors[:MAX_ERRORS_PER_BATCH]
+            self._write_chunk((json.dumps(line, ensure_ascii=False) + "\n").encode('utf-8'))
+
+        line_numbers, batch = [], []
+        try:
+            for line_no, record in self._iter_records():
+                line_numbers.append(line_no)
+                batch.append(record)
+                if len(batch) >= BATCH_SIZE:
+                    flush(line_numbers, batch)
+                    line_numbers, batch = [], []
+            if batch:
+                flush(line_numbers, batch)
+        except Exception as e:
+            # 이미 커밋된 배치는 유지, 실패 지점과 사유를 마지막 줄로 반환
+            error = {'error': str(e), 'committed_rows': totals['written'], 'rejected': totals['rejected']}
+            self._write_chunk((json.dumps(error, ensure_ascii=False) + "\n").encode('utf-8'))
+            self._end_stream()
+            self.close_connection = True
+            return
+
+        elapsed = time.perf_counter() - started
+        summary = {
+            'done': True,
+            **totals,
+            'elapsed_sec': round(elapsed, 3),
+            'rows_per_sec': round(totals['rows'] / elapsed, 1) if elapsed > 0 else None
+        }
+        self._write_chunk((json.dumps(summary, ensure_ascii=False) + "\n").encode('utf-8'))
+        self._end_stream()
+
+    def log_message(self, format, *args):
+        if not self.server.quiet:
+            super().log_message(format, *args)
+
+
+def validate_records(records, kind, line_numbers=None):
+    """
+    NDJSON 레코드 검증 (파일 업로드와 같은 validate_frame() 경로)
+
+    Args:
+        records (list): JSON 객체 목록 (DB 필드명 또는 한글 헤더명)
+        kind (str): 'companies', 'contacts', 'consultations'
+        line_numbers (list): 레코드별 요청 본문 줄 번호 (기본값: 1부터 순서대로)
+
+    Returns:
+        tuple: (정상 행 DataFrame, 필드 매핑, 오류 목록 [{'line', 'error'}])
+            - 정상 행과 매핑은 적재 함수(IMPORTERS)에 그대로 전달
+
+    Example:
+        >>> df, mapping, errors = validate_records([{'기업명': '가나', '매출액': 'abc'}], 'companies')
+        >>> errors
+        [{'line': 1, 'error': '매출액은 숫자여야 합니다.'}]
+
+    Note:
+        - 필수 필드가 아예 없는 배치는 모든 행이 필수값 누락 오류로 거부됨
+    """
+    df = pd.DataFrame.from_records(records)
+    df = df.rename(columns=lambda column: str(column).strip())
+    mapping = guess_mapping(df.columns, kind)
+    required = IMPORT_FIELDS[kind]['required']
+    for field in required:
+        # 없는 필수 필드는 빈 컬럼으로 두어 행마다 필수값 오류로 보고
+        mapping.setdefault(field, field)
+    df = df.reindex(columns=list(dict.fromkeys(mapping.values())))
+    df.index = pd.Index(line_numbers or range(1, len(df) + 1))
+
+    valid, errors = validate_frame(df, mapping, required)
+    return valid, mapping, [
+        {'line': int(line_no), 'error': message} for line_no, message in errors['오류'].items()
+    ]
+
+
+def create_server(db_path=None, host='127.0.0.1', port=8502, quiet=False, profile=None):
+    """
+    API 서버 생성 (스키마 초기화 포함)
+
+    Args:
+        db_path (str): 데이터베이스 파일 경로
+        host (str): 바인딩 주소
+        port (int): 포트
+        quiet (bool): 요청 로그 출력 여부
+        profile (str): PRAGMA 프로필 (기본값: CRM_DB_PROFILE 또는 balanced)
+
+    Returns:
+        ThreadingHTTPServer: 서버 객체 (serve_forever()로 실행)
+    """
+    init_database(db_path, profile).close()
+    metrics.watch_database_file(db_path or DB_PATH)
+
+    server = ThreadingHTTPServer((host, port), CRMRequestHandler)
+    server.daemon_threads = True
+    server.db_path = db_path
+    server.profile = profile
+    server.token = os.environ.get('CRM_API_TOKEN')
+    server.quiet = quiet
+    return server
+
+
+def run_server(db_path=None, host='127.0.0.1', port=8502, profile=None):
+    """
+    API 서버 실행 (Ctrl+C로 종료)
+
+    Args:
+        db_path (str): 데이터베이스 파일 경로
+        host (str): 바인딩 주소
+        port (int): 포트
+        profile (str): PRAGMA 프로필
+    """
+    server = create_server(db_path, host, port, profile=profile)
+    print(f"📡 CRM API 서버: http://{host}:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
@@ -0,0 +1,453 @@
+"""
+crm/cli.py
+
+CRM 명령줄 도구 (브라우저/Streamlit 없이 실행)
+
+사용 예:
+    python -m crm import companies 기업목록.xlsx
+    python -m crm import consultations 지점A.xlsx 지점B.xlsx --map consultation_content=메모
+    python -m crm import consultations 2025-06/*.xlsx --all-sheets --workers 8
+    python -m crm import companies 기업목록.xlsx --dry-run
+    python -m crm delta companies --consumer erp -o 기업목록_변경분.xlsx
+    python -m crm changes --consumer dw --follow > changes.ndjson
+    python -m crm export integrated --format csv -o 통합데이터.csv
+    python -m crm archive --older-than-days 730
+    python -m crm snapshot -o backup.db
+    python -m crm vacuum
+    python -m crm maintain            # cron용: 기준을 넘은 유지보수 작업만 실행
+    python -m crm integrity --run     # 참조 무결성 전체 점검 후 문제 행 출력
+    python -m crm --profile bulk-load import consultations 2025/*.xlsx
+    python -m crm pragmas
+    python -m crm serve --port 8502
+    python -m crm metrics -o /var/lib/node_exporter/crm.prom
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime
+
+from database.archive import archive_consultations, archive_cutoff, get_archive_status
+from database.changelog import (
+    CHANGE_LOG_TABLES, read_change_log, get_change_log_offset, save_change_log_offset, compact_change_log
+)
+from database.connection import DB_PATH, init_database
+from database.ingest import IMPORTERS, guess_mapping, plan_ingest, commit_ingest_plan, read_upload_columns
+from database.integrity import get_integrity_status, get_integrity_issues, run_integrity_check
+from database.export import EXPORT_QUERIES, EXPORT_FORMATS, read_export, read_backup, write_export
+from database.mappings import find_mapping_profile
+from database.merge import merge_companies, read_merge_mapping
+from database.sync import DELTA_QUERIES, read_delta, delta_sheets, save_watermark
+from database import maintenance, metrics
+from database.pragmas import PRAGMA_PROFILES, get_pragma_settings
+
+
+def _parse_mapping_overrides(items):
+    """--map field=header 인자를 dict로 변환"""
+    overrides = {}
+    for item in items or []:
+        if '=' not in item:
+            raise ValueError(f"--map 형식은 field=header 입니다: {item}")
+        field, header = item.split('=', 1)
+        overrides[field.strip()] = header.strip()
+    return overrides
+
+
+def cmd_import(conn, args):
+    """파일에서 기업/연락처/상담 이력 가져오기 (여러 파일은 병렬로 읽고 한 번에 저장)"""
+    overrides = _parse_mapping_overrides(args.map)
+    sheet = None if args.all_sheets else (args.sheet if args.sheet is not None else 0)
+
+    # 첫 번째 파일 헤더에 맞는 저장된 매핑 프로필(없으면 헤더 자동 인식)을 모든 파일에 적용
+    columns = read_upload_columns(args.files[0], sheet_name=sheet or 0)
+    profile = find_mapping_profile(conn, args.kind, columns)
+    mapping = profile['mapping'] if profile else guess_mapping(columns, args.kind)
+    mapping.update(overrides)
+    if profile:
+        print(f"저장된 매핑 프로필 사용: {profile['name']}", file=sys.stderr)
+
+    started = time.perf_counter()
+    plan = plan_ingest(conn, args.files, args.kind, mapping, sheet_name=sheet, max_workers=args.workers)
+
+    for item in plan['sheets']:
+        label = item['file'] if item['sheet'] is None else f"{item['file']} [{item['sheet']}]"
+        if item['error']:
+            print(f"{label}: 건너뜀 ({item['error']})", file=sys.stderr)
+        else:
+            print(f"{label}: {item['rows']}행 (오류 {item['rejected']}행)")
+    print("계획: " + ", ".join(f"{key}={value}" for key, value in plan['counts'].items()))
+
+    errors = plan['errors']
+    if args.dry_run:
+        print(f"미리보기만 실행했습니다 (저장하지 않음, {time.perf_counter() - started:.1f}초)")
+    else:
+        result = commit_ingest_plan(conn, plan)
+        elapsed = time.perf_counter() - started
+        summary = ", ".join(
+            f"{key}={value}" for key, value in result.items() if key not in ('errors', 'sheets')
+        )
+        print(f"완료: {summary} ({elapsed:.1f}초)")
+    if not errors.empty:
+        if args.errors:
+            write_export({"오류": errors}, args.errors, 'xlsx')
+            print(f"오류 행 {len(errors)}건 저장: {args.errors}", file=sys.stderr)
+        else:
+            print(f"오류 행 {len(errors)}건 (--errors 파일.xlsx 로 오류 보고서 저장)", file=sys.stderr)
+    return 0
+
+
+def cmd_export(conn, args):
+    """데이터셋을 xlsx/csv/parquet로 내보내기"""
+    if args.dataset == 'backup':
+        sheets = read_backup(conn)
+    else:
+        sheet_name, _ = EXPORT_QUERIES[args.dataset]
+        sheets = {sheet_name: read_export(conn, args.dataset)}
+
+    output = args.output or f"{args.dataset}_{datetime.now().strftime('%Y%m%d_%H%M')}.{args.format}"
+    for path, size in write_export(sheets, output, args.format):
+        print(f"{path}: {size:,} bytes")
+    return 0
+
+
+def cmd_delta(conn, args):
+    """소비자의 마지막 동기화 이후 변경분 내보내기 (저장이 끝나면 기준 번호 갱신)"""
+    delta = read_delta(conn, args.consumer, args.dataset, since=args.since)
+    print(
+        f"변경 번호 {delta['since'] if delta['since'] is not None else '(전체)'} → {delta['watermark']}: "
+        f"변경 {len(delta['changed'])}행, 삭제 {len(delta['deleted'])}행"
+    )
+
+    output = args.output or (
+        f"{args.dataset}_{args.consumer}_변경분_{datetime.now().strftime('%Y%m%d_%H%M')}.{args.format}"
+    )
+    for path, size in write_export(delta_sheets(args.dataset, delta), output, args.format):
+        print(f"{path}: {size:,} bytes")
+
+    if args.no_commit:
+        print("기준 번호는 갱신하지 않았습니다 (--no-commit)", file=sys.stderr)
+    else:
+        save_watermark(conn, args.consumer, args.dataset, delta)
+    return 0
+
+
+def cmd_changes(conn, args):
+    """
+    변경 로그를 오프셋 이후부터 NDJSON으로 출력 (--consumer면 이어 읽고 오프셋 저장)
+
+    --follow 중 Ctrl+C로 멈추면 이미 출력한 기록까지 오프셋을 저장하고 정상 종료(0)
+    """
+    if args.after is not None:
+        after = args.after
+    else:
+        after = get_change_log_offset(conn, args.consumer) if args.consumer else 0
+
+    saved = after
+    warned = False
+    try:
+        while True:
+            page = read_change_log(conn, after, args.limit, args.table)
+            if not warned and page['oldest'] is not None and after + 1 < page['oldest']:
+                print(
+                    f"경고: {after + 1}~{page['oldest'] - 1}번 기록은 이미 정리되었습니다. "
+                    f"변경분 내보내기(delta)로 재동기화하세요.",
+                    file=sys.stderr
+                )
+                warned = True
+
+            # 출력한 기록까지만 오프셋을 옮김 (중간에 멈춰도 다음에 이어 읽기)
+            for row in page['rows']:
+                print(json.dumps(row, ensure_ascii=False))
+                after = row['id']
+            sys.stdout.flush()
+
+            if args.consumer and after != saved:
+                save_change_log_offset(conn, args.consumer, after)
+                saved = after
+            if len(page['rows']) >= args.limit:
+                continue
+            if not args.follow:
+                return 0
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        sys.stdout.flush()
+        if args.consumer and after != saved:
+            save_change_log_offset(conn, args.consumer, after)
+        return 0
+
+
+def cmd_compact_changes(conn, args):
+    """변경 로그 보관 정책 적용"""
+    result = compact_change_log(conn, args.retention_days, args.max_days)
+    print(f"변경 로그 정리: 읽음 처리 {result['acknowledged']}건, 기간 만료 {result['expired']}건")
+    return 0
+
+
+def cmd_archive(conn, args):
+    """기준일 이전 상담 이력을 아카이브 DB로 이동"""
+    if not args.status:
+        before_day = args.before or archive_cutoff(args.older_than_days)
+        result = archive_consultations(conn, before_day, args.batch_rows)
+        print(
+            f"보관 {result['archived']:,}건 (기준일 {result['cutoff']}, 배치 {result['batches']}회, "
+            f"남은 대상 {result['remaining']:,}건)"
+        )
+
+    status = get_archive_status(conn)
+    print(
+        f"아카이브 {status['path']}: {status['rows']:,}건 "
+        f"({status['oldest_day'] or '-'} ~ {status['newest_day'] or '-'}), {status['file_bytes']:,} bytes"
+    )
+    return 0
+
+
+def cmd_snapshot(conn, args):
+    """데이터베이스 스냅샷 생성"""
+    path = maintenance.snapshot(conn, args.output)
+    print(f"스냅샷 생성: {path}")
+    archive_path = maintenance.snapshot_archive_path(path)
+    if os.path.exists(archive_path):
+        print(f"아카이브 스냅샷 생성: {archive_path}")
+    return 0
+
+
+def cmd_maintenance(conn, args):
+    """VACUUM/ANALYZE/REINDEX 실행"""
+    task = {
+        'vacuum': maintenance.vacuum,
+        'analyze': maintenance.analyze,
+        'reindex': maintenance.rebuild_indexes
+    }[args.command]
+    result = task(conn)
+    maintenance.record_maintenance(conn, result, 'manual')
+    _print_maintenance_result(result)
+    return 0
+
+
+def _print_maintenance_result(result):
+    if result.get('error'):
+        print(f"{result['task']}: 실패 ({result['seconds']}초) - {result['error']}")
+        return
+    print(
+        f"{result['task']}: {result['seconds']}초, "
+        f"DB {result['db_bytes_before']:,} → {result['db_bytes_after']:,} bytes, "
+        f"WAL {result['wal_bytes_before']:,} → {result['wal_bytes_after']:,} bytes"
+    )
+
+
+def cmd_maintain(conn, args):
+    """유지보수 점검 후 기준을 넘은 작업 실행 (또는 --task로 지정한 작업, 실패한 작업이 있으면 종료 코드 1)"""
+    if args.log:
+        for task, reason, seconds, db_before, db_after, wal_before, wal_after, started_at, error in \
+                maintenance.get_maintenance_log(conn, args.log):
+            print(
+                f"{started_at} {task} ({reason}): {seconds}초, "
+                f"DB {db_before:,} → {db_after:,}, WAL {wal_before:,} → {wal_after:,}"
+                + (f" - 실패: {error}" if error else "")
+            )
+        return 0
+
+    if args.plan:
+        for task, reason in maintenance.plan_maintenance(conn):
+            print(f"{task}: {reason}")
+        return 0
+
+    results = maintenance.run_maintenance(conn, args.task)
+    if not results:
+        print("기준을 넘은 유지보수 작업이 없습니다.")
+    for result in results:
+        print(f"[{result['reason']}] ", end='')
+        _print_maintenance_result(result)
+    return 1 if any(result.get('error') for result in results) else 0
+
+
+def cmd_merge(conn, args):
+    """매핑 파일로 중복 기업 일괄 병합"""
+    result = merge_companies(conn, read_merge_mapping(args.mapping))
+    print(
+        f"병합 {result['merged']}건 (배치 {result['batch_id']}): "
+        f"연락처 {result['contacts_moved']}개, 상담 이력 {result['consultations_moved']}개 이전, "
+        f"중복 연락처 {result['contacts_deduplicated']}개 삭제"
+    )
+    for source, target, reason in result['skipped']:
+        print(f"  건너뜀 {source} → {target}: {reason}")
+    return 0
+
+
+def cmd_metrics(conn, args):
+    """Prometheus 텍스트 형식 지표 출력/저장 (DB 크기, 프로세스 메모리)"""
+    metrics.watch_database_file(args.db or DB_PATH)
+    if not args.output:
+        print(metrics.render_prometheus(), end='')
+        return 0
+
+    while True:
+        size = metrics.write_prometheus_file(args.output)
+        if not args.interval:
+            print(f"{args.output}: {size:,} bytes")
+            return 0
+        time.sleep(args.interval)
+
+
+def cmd_integrity(conn, args):
+    """참조 무결성 점검 결과 출력 (--run이면 전체 점검 후 출력, 문제 행이 있으면 종료 코드 1)"""
+    if args.run:
+        for result in run_integrity_check(conn, chunk_rows=args.chunk_rows):
+            print(
+                f"{result['check']}: {result['scanned']:,}행 점검 ({result['chunks']}청크, "
+                f"{result['seconds']}초), 문제 {result['issues']:,}건"
+            )
+
+    status = get_integrity_status(conn)
+    print(f"마지막 전체 점검: {status['checked_at'] or '아직 없음'}, 문제 행 {status['issues']:,}건")
+    if status['last_error']:
+        error = status['last_error']
+        print(f"마지막 점검 오류 ({error['at']}, {error['check']}): {error['error']}")
+    for table, row_id, company_code, company_id, problem, found_at in get_integrity_issues(conn, args.limit):
+        print(f"  {table} id={row_id} 업체코드={company_code} company_id={company_id}: {problem} ({found_at})")
+    return 1 if status['issues'] else 0
+
+
+def cmd_pragmas(conn, args):
+    """연결에 적용된 PRAGMA 설정 출력"""
+    for name, value in get_pragma_settings(conn).items():
+        print(f"{name}: {value}")
+    return 0
+
+
+def cmd_serve(conn, args):
+    """로컬 JSON HTTP API 서버 실행"""
+    from .api import run_server
+
+    run_server(args.db, args.host, args.port, args.profile)
+    return 0
+
+
+def build_parser():
+    """
+    명령줄 인자 파서 생성
+
+    Returns:
+        argparse.ArgumentParser: 파서
+    """
+    parser = argparse.ArgumentParser(prog="python -m crm", description="CRM 명령줄 도구")
+    parser.add_argument("--db", help="데이터베이스 파일 경로 (기본값: CRM_DB_PATH 또는 crm_database.db)")
+    parser.add_argument("--profile", choices=sorted(PRAGMA_PROFILES),
+                        help="연결 PRAGMA 프로필 (기본값: CRM_DB_PROFILE 또는 balanced)")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    p = subparsers.add_parser("import", help="파일에서 데이터 가져오기")
+    p.add_argument("kind", choices=sorted(IMPORTERS))
+    p.add_argument("files", nargs="+", help="xlsx/xls/csv 파일")
+    p.add_argument("--sheet", help="엑셀 시트 이름 (기본값: 첫 번째 시트)")
+    p.add_argument("--all-sheets", action="store_true", help="엑셀의 모든 시트 가져오기")
+    p.add_argument("--workers", type=int, help="파일 읽기 프로세스 수 (기본값: CPU 수)")
+    p.add_argument("--errors", metavar="XLSX", help="검증 오류 행 보고서 저장 경로")
+    p.add_argument("--dry-run", action="store_true", help="신규/업데이트/변경 없음/오류 건수만 계산하고 저장하지 않음")
+    p.add_argument("--map", action="append", metavar="FIELD=HEADER",
+                   help="헤더 자동 인식 대신 사용할 컬럼 매핑 (여러 번 지정 가능)")
+    p.set_defaults(func=cmd_import)
+
+    p = subparsers.add_parser("export", help="데이터 내보내기")
+    p.add_argument("dataset", choices=sorted(EXPORT_QUERIES) + ['backup'])
+    p.add_argument("--format", choices=EXPORT_FORMATS, default="xlsx")
+    p.add_argument("-o", "--output", help="저장 경로")
+    p.set_defaults(func=cmd_export)
+
+    p = subparsers.add_parser("delta", help="마지막 동기화 이후 변경분 내보내기")
+    p.add_argument("dataset", choices=sorted(DELTA_QUERIES))
+    p.add_argument("--consumer", required=True, help="소비자 이름 (소비자별로 기준 번호 저장)")
+    p.add_argument("--format", choices=EXPORT_FORMATS, default="xlsx")
+    p.add_argument("-o", "--output", help="저장 경로")
+    p.add_argument("--since", type=int, help="기준 변경 번호 직접 지정 (이 번호 이후 변경분)")
+    p.add_argument("--no-commit", action="store_true", help="내보내기만 하고 기준 번호는 갱신하지 않음")
+    p.set_defaults(func=cmd_delta)
+
+    p = subparsers.add_parser("changes", help="변경 로그를 오프셋 이후부터 NDJSON으로 출력")
+    p.add_argument("--after", type=int, help="이 id 이후부터 (기본값: 소비자 오프셋 또는 처음)")
+    p.add_argument("--consumer", help="소비자 이름 (오프셋을 이어 읽고 출력 후 저장)")
+    p.add_argument("--table", action="append", choices=[table for table, _ in CHANGE_LOG_TABLES],
+                   help="테이블 제한 (여러 번 지정 가능)")
+    p.add_argument("--limit", type=int, default=1000, help="한 번에 읽을 건수")
+    p.add_argument("--follow", action="store_true", help="새 기록을 계속 기다리며 출력")
+    p.add_argument("--interval", type=float, default=2.0, help="--follow 조회 간격 (초)")
+    p.set_defaults(func=cmd_changes)
+
+    p = subparsers.add_parser("compact-changes", help="변경 로그 보관 정책 적용")
+    p.add_argument("--retention-days", type=int, help="모든 소비자가 읽은 기록 보관 기간 (일)")
+    p.add_argument("--max-days", type=int, help="읽지 않은 소비자가 있어도 정리하는 기간 (일)")
+    p.set_defaults(func=cmd_compact_changes)
+
+    p = subparsers.add_parser("archive", help="오래된 상담 이력을 아카이브 DB로 이동")
+    p.add_argument("--before", help="기준일 YYYY-MM-DD (이 날짜 이전 상담 이력을 이동)")
+    p.add_argument("--older-than-days", type=int, help="기준 기간 (기본값: CRM_ARCHIVE_AFTER_DAYS 또는 730일)")
+    p.add_argument("--batch-rows", type=int, default=5000, help="트랜잭션당 이동 행 수")
+    p.add_argument("--status", action="store_true", help="이동하지 않고 아카이브 현황만 출력")
+    p.set_defaults(func=cmd_archive)
+
+    p = subparsers.add_parser("snapshot", help="데이터베이스 스냅샷 생성")
+    p.add_argument("-o", "--output", help="스냅샷 파일 경로")
+    p.set_defaults(func=cmd_snapshot)
+
+    for name, help_text in [
+        ("vacuum", "VACUUM 및 ANALYZE 실행"),
+        ("analyze", "쿼리 통계 갱신 (ANALYZE)"),
+        ("reindex", "인덱스 재구성 (REINDEX)")
+    ]:
+        p = subparsers.add_parser(name, help=help_text)
+        p.set_defaults(func=cmd_maintenance)
+
+    p = subparsers.add_parser("pragmas", help="연결에 적용된 PRAGMA 설정 출력")
+    p.set_defaults(func=cmd_pragmas)
+
+    p = subparsers.add_parser("maintain", help="유지보수 점검 후 기준을 넘은 작업 실행 (cron용)")
+    p.add_argument("--task", action="append", choices=sorted(maintenance.MAINTENANCE_FUNCTIONS),
+                   help="기준과 관계없이 실행할 작업 (여러 번 지정 가능)")
+    p.add_argument("--plan", action="store_true", help="실행하지 않고 실행 대상만 출력")
+    p.add_argument("--log", type=int, nargs="?", const=20, metavar="N", help="최근 유지보수 기록 N건 출력")
+    p.set_defaults(func=cmd_maintain)
+
+    p = subparsers.add_parser("integrity", help="참조 무결성(기업이 없는 연락처/상담 이력) 점검 결과 출력")
+    p.add_argument("--run", action="store_true", help="저장된 결과 대신 지금 전체 점검 실행")
+    p.add_argument("--chunk-rows", type=int, help="트랜잭션당 점검 행 수 (기본값: CRM_INTEGRITY_CHUNK_ROWS 또는 10000)")
+    p.add_argument("--limit", type=int, default=20, help="출력할 문제 행 수")
+    p.set_defaults(func=cmd_integrity)
+
+    p = subparsers.add_parser("merge", help="매핑 파일로 중복 기업 병합")
+    p.add_argument("mapping", help="원본/대상 업체코드 매핑 파일 (xlsx/csv)")
+    p.set_defaults(func=cmd_merge)
+
+    p = subparsers.add_parser("metrics", help="Prometheus 텍스트 형식 지표 출력")
+    p.add_argument("-o", "--output", help="저장 경로 (textfile collector용, 생략하면 화면 출력)")
+    p.add_argument("--interval", type=int, default=0, help="지정하면 N초마다 파일을 다시 저장")
+    p.set_defaults(func=cmd_metrics)
+
+    p = subparsers.add_parser("serve", help="로컬 JSON HTTP API 서버 실행 (/metrics 포함)")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8502)
+    p.set_defaults(func=cmd_serve)
+
+    return parser
+
+
+def main(argv=None):
+    """
+    CLI 진입점
+
+    Args:
+        argv (list): 명령줄 인자 (기본값: sys.argv[1:])
+
+    Returns:
+        int: 종료 코드 (0: 성공, 1: 실패)
+    """
+    args = build_parser().parse_args(argv)
+    conn = init_database(args.db, args.profile)
+    try:
+        return args.func(conn, args)
+    except Exception as e:
+        print(f"오류: {e}", file=sys.stderr)
+        return 1
+    finally:
+        conn.close()
@@ -1,18 +1,35 @@
 import streamlit as st
 import pandas as pd
-import sqlite3
-import io
 from datetime import datetime
+import hashlib
+import io
 import re
 
 # 데이터베이스 관련 함수들 import 
 from database_utils import (
     init_database, 
-    generate_company_code, 
-    parse_revenue, 
     get_writable_connection, 
-    test_write_permission
+    test_write_permission,
+    cached_data,
+    start_metrics_exporters,
+    start_maintenance_scheduler,
+    start_integrity_checker
+)
+from database import CRMRepository, read_merge_mapping
+from database.querylog import (
+    SLOW_QUERY_MS,
+    set_query_page,
+    get_query_timings,
+    get_latency_histogram,
+    get_slow_queries,
+    reset_query_timings,
+    explain_query_plan
 )
+from database.export import create_excel_file
+from database.ingest import guess_mapping
+from database.mappings import header_fingerprint
+from database.sync import delta_sheets
+from database.profiling import PROFILE_ENABLED, RenderProfiler, get_render_summary, get_recent_runs
 
 # 페이지 설정
 st.set_page_config(
@@ -21,134 +38,213 @@ st.set_page_config(
     layout="wide"
 )
 
-# 기업명으로 업체코드 찾기
-def find_company_code(conn, company_name):
-    """기업명으로 업체코드를 찾고, 없으면 새로 생성"""
-    cursor = conn.execute("SELECT company_code FROM companies WHERE company_name = ?", (company_name,))
-    result = cursor.fetchone()
-    if result:
-        return result[0]
-    else:
-        # 새로운 업체코드 생성
-        new_code = generate_company_code()
-        return new_code
+# 데이터베이스 초기화
+conn = init_database()
+repo = CRMRepository(conn)
+
+# 지표 내보내기 (CRM_METRICS_PORT / CRM_METRICS_FILE)
+start_metrics_exporters()
+
+# 유지보수 스케줄러 (CRM_MAINTENANCE_INTERVAL, 0이면 사용 안 함)
+start_maintenance_scheduler()
+
+# 참조 무결성 백그라운드 점검 (CRM_INTEGRITY_INTERVAL, 0이면 사용 안 함)
+start_integrity_checker()
 
 # 자동완성용 데이터 가져오기 함수들
-@st.cache_data(ttl=300)  # 5분간 캐시
+@cached_data("company_names", ttl=300)  # 5분간 캐시
 def get_company_names():
     """기업명 목록 가져오기"""
     try:
-        conn = sqlite3.connect('crm_database.db', check_same_thread=False)
-        cursor = conn.execute("SELECT DISTINCT company_name FROM companies WHERE company_name IS NOT NULL ORDER BY company_name")
-        result = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return result
-    except:
+        return repo.company_names()
+    except Exception:
         return []
 
-@st.cache_data(ttl=300)  # 5분간 캐시
+@cached_data("customer_names", ttl=300)  # 5분간 캐시
 def get_customer_names():
     """고객명 목록 가져오기"""
     try:
-        conn = sqlite3.connect('crm_database.db', check_same_thread=False)
-        cursor = conn.execute("SELECT DISTINCT customer_name FROM customer_contacts WHERE customer_name IS NOT NULL ORDER BY customer_name")
-        result = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return result
-    except:
+        return repo.customer_names()
+    except Exception:
         return []
 
-@st.cache_data(ttl=300)  # 5분간 캐시
+@cached_data("industries", ttl=300)  # 5분간 캐시
 def get_industries():
     """업종 목록 가져오기"""
     try:
-        conn = sqlite3.connect('crm_database.db', check_same_thread=False)
-        cursor = conn.execute("SELECT DISTINCT industry FROM companies WHERE industry IS NOT NULL ORDER BY industry")
-        result = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return result
-    except:
+        return repo.industries()
+    except Exception:
         return []
 
-@st.cache_data(ttl=300)  # 5분간 캐시
+@cached_data("positions", ttl=300)  # 5분간 캐시
 def get_positions():
     """직위 목록 가져오기"""
     try:
-        conn = sqlite3.connect('crm_database.db', check_same_thread=False)
-        cursor = conn.execute("SELECT DISTINCT position FROM customer_contacts WHERE position IS NOT NULL ORDER BY position")
-        result = [row[0] for row in cursor.fetchall()]
-        conn.close()
-        return result
-    except:
+        return repo.positions()
+    except Exception:
         return []
 
-# 데이터 업데이트 함수들
-def update_company_data(conn, company_code, updated_data):
-    """기업 데이터 업데이트"""
-    try:
-        conn.execute('''
-            UPDATE companies SET 
-            company_name = ?, revenue_2024 = ?, industry = ?, 
-            employee_count = ?, address = ?, products = ?, 
-            customer_category = ?, updated_at = CURRENT_TIMESTAMP
-            WHERE company_code = ?
-        ''', (
-            updated_data.get('기업명'),
-            parse_revenue(updated_data.get('매출액_2024')),
-            updated_data.get('업종'),
-            int(updated_data.get('종업원수')) if updated_data.get('종업원수') else None,
-            updated_data.get('주소'),
-            updated_data.get('상품'),
-            updated_data.get('고객구분'),
-            company_code
-        ))
-        conn.commit()
-        return True, "기업 정보가 업데이트되었습니다."
-    except Exception as e:
-        return False, f"업데이트 실패: {str(e)}"
-
-def insert_new_consultation(conn, consultation_data):
-    """새로운 상담 이력 추가"""
-    try:
-        # 기업명으로 기업코드 찾기 또는 생성
-        company_name = consultation_data.get('기업명')
-        company_code = find_company_code(conn, company_name)
-        
-        # 기업이 없으면 기본 정보로 생성
-        existing_company = conn.execute("SELECT company_code FROM companies WHERE company_code = ?", (company_code,)).fetchone()
-        if not existing_company:
-            conn.execute('''
-                INSERT INTO companies (company_code, company_name)
-                VALUES (?, ?)
-            ''', (company_code, company_name))
-        
-        # 상담 이력 추가
-        conn.execute('''
-            INSERT INTO consultations 
-            (company_code, customer_name, consultation_date, consultation_content, project_name)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (
-            company_code,
-            consultation_data.get('고객명'),
-            consultation_data.get('상담날짜'),
-            consultation_data.get('상담내역'),
-            consultation_data.get('프로젝트명')
-        ))
-        conn.commit()
-        return True, "새로운 상담 이력이 추가되었습니다."
-    except Exception as e:
-        return False, f"추가 실패: {str(e)}"
-
-# 데이터베이스 초기화
-conn = init_database()
-
 # 사이드바 메뉴
 st.sidebar.title("📋 메뉴")
 menu = st.sidebar.selectbox(
     "작업을 선택하세요",
-    ["기업 목록 관리", "고객 연락처 관리", "상담 이력 관리", "통합 데이터 조회", "데이터 다운로드"]
+    ["기업 목록 관리", "고객 연락처 관리", "상담 이력 관리", "통합 데이터 조회", "데이터 다운로드", "시스템 관리"]
 )
 
+# 이후 실행되는 쿼리를 현재 페이지로 기록
+set_query_page(menu)
+
+# 재실행 구간별 프로파일링 (CRM_PROFILE=1 또는 ?profile=1)
+profiler = RenderProfiler(
+    menu,
+    enabled=PROFILE_ENABLED or st.query_params.get("profile") == "1"
+).activate()
+
+def show_dataframe(df, **kwargs):
+    """st.dataframe 표시 (프로파일링 시 render 구간으로 측정)"""
+    with profiler.section("render", len(df)):
+        st.dataframe(df, **kwargs)
+
+# 세션별로 보관할 업로드 파일 파싱 결과 수
+UPLOAD_CACHE_SIZE = 3
+
+def read_upload_cached(uploaded_file):
+    """업로드 파일 첫 시트 읽기 (파일 내용 해시로 session_state에 캐시, 매핑을 바꿔도 다시 읽지 않음)"""
+    data = uploaded_file.getvalue()
+    digest = hashlib.sha1(data).hexdigest()
+    cache = st.session_state.setdefault("upload_cache", {})
+    if digest not in cache:
+        if len(cache) >= UPLOAD_CACHE_SIZE:
+            cache.pop(next(iter(cache)))
+        cache[digest] = pd.read_excel(io.BytesIO(data))
+    return cache[digest]
+
+def mapping_selectors(df, kind, fields):
+    """
+    컬럼 매핑 선택 (저장된 매핑 프로필 → 헤더 자동 인식 순으로 기본값 지정)
+
+    Args:
+        df (DataFrame): 업로드 데이터
+        kind (str): 'companies', 'contacts', 'consultations'
+        fields (list): [(필드, 라벨, 위젯 키, 필수 여부)]
+
+    Returns:
+        tuple: ({필드: 컬럼명} - "선택안함" 제외, 기본값으로 쓴 매핑)
+    """
+    profile = repo.find_mapping_profile(kind, df.columns)
+    defaults = profile['mapping'] if profile else guess_mapping(df.columns, kind)
+    if profile:
+        st.success(f"💾 저장된 매핑 '{profile['name']}'을(를) 적용했습니다. 확인 후 바로 저장하세요.")
+
+    # 헤더가 다른 파일을 올리면 위젯을 새로 만들어 기본값이 다시 적용되도록 키에 헤더 지문 포함
+    suffix = header_fingerprint(df.columns)[:8]
+    columns = list(df.columns)
+    optional_columns = ["선택안함"] + columns
+    mapping = {}
+
+    col1, col2 = st.columns(2)
+    with col1:
+        st.write("**필수 매핑**")
+        for field, label, key, required in fields:
+            if required:
+                default = defaults.get(field)
+                mapping[field] = st.selectbox(
+                    label, columns,
+                    index=columns.index(default) if default in columns else 0,
+                    key=f"{key}_{suffix}"
+                )
+    with col2:
+        st.write("**선택 매핑**")
+        for field, label, key, required in fields:
+            if not required:
+                default = defaults.get(field)
+                mapping[field] = st.selectbox(
+                    label, optional_columns,
+                    index=optional_columns.index(default) if default in optional_columns else 0,
+                    key=f"{key}_{suffix}"
+                )
+
+    return {field: col for field, col in mapping.items() if col != "선택안함"}, defaults
+
+def upload_sheet_option(files, key):
+    """여러 파일 업로드 안내 및 읽을 시트 선택 (None이면 모든 시트)"""
+    if len(files) > 1:
+        st.info(f"📂 파일 {len(files)}개: 첫 번째 파일로 컬럼 매핑을 정하면 모든 파일에 같은 매핑을 적용합니다.")
+    all_sheets = st.checkbox("모든 시트 가져오기", key=f"{key}_all_sheets")
+    return None if all_sheets else 0
+
+# 미리보기 처리 방식별 표시 이름
+PLAN_LABELS = {
+    'insert': "신규",
+    'update': "업데이트",
+    'unchanged': "변경 없음",
+    'skipped': "제외",
+    'rejected': "오류"
+}
+
+def preview_upload(files, kind, mapping, sheet_name, key):
+    """
+    업로드 미리보기 (dry-run): 저장하지 않고 신규/업데이트/변경 없음/오류 건수와 예시 행 표시
+
+    Args:
+        files (list): 업로드된 파일 목록
+        kind (str): 'companies', 'contacts', 'consultations'
+        mapping (dict): {필드: 컬럼명}
+        sheet_name (str or int): 읽을 시트 (None이면 모든 시트)
+        key (str): 위젯/session_state 키 접두어
+
+    Returns:
+        dict: 현재 파일/매핑/시트 설정으로 계산한 계획 (미리보기 전이거나 설정이 바뀌었으면 None)
+
+    Note:
+        - 계획은 session_state에 보관하고, 저장 버튼은 파일을 다시 읽거나 비교하지 않고 그대로 사용
+    """
+    signature = (
+        tuple(hashlib.sha1(f.getvalue()).hexdigest() for f in files),
+        tuple(sorted(mapping.items())), sheet_name
+    )
+    if st.button("🔍 미리보기 (저장하지 않음)", key=f"{key}_preview"):
+        st.session_state[f"{key}_plan"] = (signature, repo.plan_ingest(files, kind, mapping, sheet_name=sheet_name))
+
+    stored = st.session_state.get(f"{key}_plan")
+    if not stored or stored[0] != signature:
+        return None
+
+    plan = stored[1]
+    cols = st.columns(len(PLAN_LABELS))
+    for col, (action, label) in zip(cols, PLAN_LABELS.items()):
+        col.metric(label, f"{plan['counts'][action]:,}")
+    for action, label in PLAN_LABELS.items():
+        if plan['counts'][action]:
+            with st.expander(f"{label} 예시 ({plan['counts'][action]:,}건 중 최대 {len(plan['samples'][action])}건)"):
+                show_dataframe(plan['samples'][action], use_container_width=True)
+    return plan
+
+def commit_upload(files, kind, mapping, sheet_name, key, plan):
+    """미리보기 계획 저장 (미리보기 없이 누르면 계획을 계산해 바로 저장)"""
+    if plan is None:
+        plan = repo.plan_ingest(files, kind, mapping, sheet_name=sheet_name)
+    st.session_state.pop(f"{key}_plan", None)
+    return repo.commit_ingest_plan(plan)
+
+def show_ingest_report(result, key):
+    """여러 파일 적재 중 건너뛴 파일/시트와 검증 오류 행 표시 (오류 행은 엑셀로 다운로드)"""
+    for item in result['sheets']:
+        if item['error']:
+            label = item['file'] if item['sheet'] is None else f"{item['file']} [{item['sheet']}]"
+            st.warning(f"⚠️ {label}: {item['error']}")
+    
+    if result['rejected']:
+        st.warning(f"⚠️ {result['rejected']}개 행은 검증 오류로 저장하지 않았습니다. 오류 보고서를 받아 수정 후 다시 업로드하세요.")
+        show_dataframe(result['errors'].head(100), use_container_width=True)
+        st.download_button(
+            label="📥 오류 행 다운로드 (엑셀)",
+            data=create_excel_file({"오류": result['errors']}),
+            file_name=f"업로드_오류_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+            key=f"{key}_errors"
+        )
+
 # 메인 타이틀
 st.title("🏢 기업 상담 관리 시스템")
 st.markdown("---")
@@ -157,104 +253,68 @@ st.markdown("---")
 if menu == "기업 목록 관리":
     st.header("📋 기업 목록 관리")
     
-    tab1, tab2 = st.tabs(["엑셀 업로드", "현재 기업 목록"])
+    tab1, tab2, tab3 = st.tabs(["엑셀 업로드", "현재 기업 목록", "기업 병합"])
     
     with tab1:
         st.subheader("기업 목록 엑셀 업로드")
-        uploaded_file = st.file_uploader(
-            "기업 목록 엑셀 파일을 업로드하세요",
+        uploaded_files = st.file_uploader(
+            "기업 목록 엑셀 파일을 업로드하세요 (여러 파일 선택 가능)",
             type=['xlsx', 'xls'],
+            accept_multiple_files=True,
             key="company_upload"
         )
         
-        if uploaded_file is not None:
+        if uploaded_files:
             try:
-                df = pd.read_excel(uploaded_file)
+                df = read_upload_cached(uploaded_files[0])
                 st.success("✅ 파일을 성공적으로 읽었습니다!")
                 
                 # 데이터 미리보기
                 st.subheader("업로드된 데이터 미리보기")
-                st.dataframe(df, use_container_width=True)
+                show_dataframe(df, use_container_width=True)
+                upload_sheet = upload_sheet_option(uploaded_files, "company_upload")
                 
                 # 컬럼 매핑
                 st.subheader("컬럼 매핑")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("**필수 매핑**")
-                    company_name_col = st.selectbox("기업명 컬럼", df.columns, key="company_name_mapping")
-                
-                with col2:
-                    st.write("**선택 매핑**")
-                    revenue_col = st.selectbox("매출액 컬럼", ["선택안함"] + list(df.columns), key="revenue_mapping")
-                    industry_col = st.selectbox("업종 컬럼", ["선택안함"] + list(df.columns), key="industry_mapping")
-                    employee_col = st.selectbox("종업원수 컬럼", ["선택안함"] + list(df.columns), key="employee_mapping")
-                    address_col = st.selectbox("주소 컬럼", ["선택안함"] + list(df.columns), key="address_mapping")
-                    products_col = st.selectbox("상품 컬럼", ["선택안함"] + list(df.columns), key="products_mapping")
-                    category_col = st.selectbox("고객구분 컬럼", ["선택안함"] + list(df.columns), key="category_mapping")
+                mapping, defaults = mapping_selectors(df, 'companies', [
+                    ('company_name', "기업명 컬럼", "company_name_mapping", True),
+                    ('revenue_2024', "매출액 컬럼", "revenue_mapping", False),
+                    ('industry', "업종 컬럼", "industry_mapping", False),
+                    ('employee_count', "종업원수 컬럼", "employee_mapping", False),
+                    ('address', "주소 컬럼", "address_mapping", False),
+                    ('products', "상품 컬럼", "products_mapping", False),
+                    ('customer_category', "고객구분 컬럼", "category_mapping", False)
+                ])
                 
                 # 업체코드 처리
                 st.subheader("업체코드 설정")
+                default_code_col = defaults.get('company_code')
                 code_option = st.radio(
                     "업체코드 처리 방식",
-                    ["자동 생성", "파일에서 가져오기"]
+                    ["자동 생성", "파일에서 가져오기"],
+                    index=1 if default_code_col is not None else 0
                 )
                 
                 if code_option == "파일에서 가져오기":
-                    code_col = st.selectbox("업체코드 컬럼", df.columns, key="code_mapping")
+                    code_columns = list(df.columns)
+                    code_col = st.selectbox(
+                        "업체코드 컬럼", code_columns,
+                        index=code_columns.index(default_code_col) if default_code_col in code_columns else 0,
+                        key="code_mapping"
+                    )
+                    mapping['company_code'] = code_col
                 
-                # 데이터 저장
+                # 미리보기 후 데이터 저장
+                plan = preview_upload(uploaded_files, 'companies', mapping, upload_sheet, "company_upload")
                 if st.button("데이터베이스에 저장", type="primary"):
                     try:
-                        success_count = 0
-                        update_count = 0
-                        
-                        for _, row in df.iterrows():
-                            company_name = row[company_name_col]
-                            if pd.isna(company_name) or company_name == "":
-                                continue
-                            
-                            # 업체코드 결정
-                            if code_option == "자동 생성":
-                                company_code = find_company_code(conn, company_name)
-                                if company_code.startswith("AUTO"):
-                                    # 새로운 기업인 경우
-                                    company_code = generate_company_code()
-                            else:
-                                company_code = row[code_col] if not pd.isna(row[code_col]) else generate_company_code()
-                            
-                            # 데이터 준비
-                            revenue = parse_revenue(row[revenue_col] if revenue_col != "선택안함" else None)
-                            industry = row[industry_col] if industry_col != "선택안함" and not pd.isna(row[industry_col]) else None
-                            employee_count = int(row[employee_col]) if employee_col != "선택안함" and not pd.isna(row[employee_col]) else None
-                            address = row[address_col] if address_col != "선택안함" and not pd.isna(row[address_col]) else None
-                            products = row[products_col] if products_col != "선택안함" and not pd.isna(row[products_col]) else None
-                            customer_category = row[category_col] if category_col != "선택안함" and not pd.isna(row[category_col]) else None
-                            
-                            # 기존 데이터 확인
-                            existing = conn.execute("SELECT company_code FROM companies WHERE company_code = ?", (company_code,)).fetchone()
-                            
-                            if existing:
-                                # 업데이트
-                                conn.execute('''
-                                    UPDATE companies SET 
-                                    company_name = ?, revenue_2024 = ?, industry = ?, 
-                                    employee_count = ?, address = ?, products = ?, 
-                                    customer_category = ?, updated_at = CURRENT_TIMESTAMP
-                                    WHERE company_code = ?
-                                ''', (company_name, revenue, industry, employee_count, address, products, customer_category, company_code))
-                                update_count += 1
-                            else:
-                                # 신규 삽입
-                                conn.execute('''
-                                    INSERT INTO companies 
-                                    (company_code, company_name, revenue_2024, industry, employee_count, address, products, customer_category)
-                                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                                ''', (company_code, company_name, revenue, industry, employee_count, address, products, customer_category))
-                                success_count += 1
-                        
-                        conn.commit()
-                        st.success(f"✅ 처리 완료! 신규 저장: {success_count}개, 업데이트: {update_count}개")
+                        result = commit_upload(uploaded_files, 'companies', mapping, upload_sheet, "company_upload", plan)
+                        repo.save_mapping_profile('companies', df.columns, mapping, name=uploaded_files[0].name)
+                        st.success(
+                            f"✅ 처리 완료! 신규 저장: {result.get('inserted', 0)}개, 업데이트: {result.get('updated', 0)}개, "
+                            f"변경 없음: {result['unchanged']}개"
+                        )
+                        show_ingest_report(result, "company_upload")
                         
                         # 캐시 클리어
                         get_company_names.clear()
@@ -270,10 +330,10 @@ if menu == "기업 목록 관리":
         st.subheader("현재 저장된 기업 목록")
         
         # 데이터 조회
-        companies_df = pd.read_sql_query("SELECT * FROM companies ORDER BY updated_at DESC", conn)
+        companies_df = repo.list_companies()
         
         if not companies_df.empty:
-            st.dataframe(companies_df, use_container_width=True)
+            show_dataframe(companies_df, use_container_width=True)
             
             # 통계 정보
             col1, col2, col3 = st.columns(3)
@@ -288,6 +348,84 @@ if menu == "기업 목록 관리":
                     st.metric("평균 매출액", f"{avg_revenue:,.0f}" if not pd.isna(avg_revenue) else "N/A")
         else:
             st.info("저장된 기업 목록이 없습니다.")
+    
+    with tab3:
+        st.subheader("중복 기업 병합")
+        st.info("💡 원본 기업의 연락처와 상담 이력을 대상 기업으로 옮기고 원본 기업은 삭제합니다. 대상 기업의 빈 정보는 원본 값으로 보완됩니다.")
+        
+        merge_df = repo.company_choices()
+        
+        if not merge_df.empty:
+            company_labels = {
+                row.company_code: f"{row.company_name} ({row.company_code})"
+                for row in merge_df.itertuples()
+            }
+            
+            col1, col2 = st.columns(2)
+            with col1:
+                source_code = st.selectbox(
+                    "원본 기업 (삭제됨)",
+                    list(company_labels.keys()),
+                    format_func=company_labels.get,
+                    key="merge_source"
+                )
+            with col2:
+                target_code = st.selectbox(
+                    "대상 기업 (유지됨)",
+                    list(company_labels.keys()),
+                    format_func=company_labels.get,
+                    key="merge_target"
+                )
+            
+            if st.button("기업 병합", type="primary", key="merge_single"):
+                if source_code == target_code:
+                    st.error("원본과 대상 기업이 같습니다.")
+                else:
+                    try:
+                        result = repo.merge_companies([(source_code, target_code)])
+                        st.success(f"✅ 병합 완료! 연락처 {result['contacts_moved']}개, 상담 이력 {result['consultations_moved']}개를 이전하고 중복 연락처 {result['contacts_deduplicated']}개를 삭제했습니다.")
+                        get_company_names.clear()
+                        get_industries.clear()
+                    except Exception as e:
+                        st.error(f"병합 중 오류 발생: {str(e)}")
+        else:
+            st.info("병합할 기업이 없습니다.")
+        
+        st.markdown("---")
+        st.subheader("매핑 파일로 일괄 병합")
+        st.write("`원본업체코드`, `대상업체코드` (또는 `source_code`, `target_code`) 컬럼이 있는 엑셀/CSV 파일을 업로드하세요.")
+        mapping_file = st.file_uploader(
+            "병합 매핑 파일",
+            type=['xlsx', 'xls', 'csv'],
+            key="merge_mapping_upload"
+        )
+        
+        if mapping_file is not None:
+            try:
+                pairs = read_merge_mapping(mapping_file)
+                st.write(f"매핑 {len(pairs)}건을 읽었습니다.")
+                
+                if st.button("일괄 병합 실행", type="primary", key="merge_bulk"):
+                    result = repo.merge_companies(pairs)
+                    st.success(f"✅ {result['merged']}개 기업 병합 완료! 연락처 {result['contacts_moved']}개, 상담 이력 {result['consultations_moved']}개를 이전하고 중복 연락처 {result['contacts_deduplicated']}개를 삭제했습니다.")
+                    if result['skipped']:
+                        st.warning(f"{len(result['skipped'])}건은 건너뛰었습니다.")
+                        show_dataframe(
+                            pd.DataFrame(result['skipped'], columns=["원본업체코드", "대상업체코드", "사유"]),
+                            use_container_width=True
+                        )
+                    get_company_names.clear()
+                    get_industries.clear()
+            except Exception as e:
+                st.error(f"병합 매핑 처리 오류: {str(e)}")
+        
+        st.markdown("---")
+        st.subheader("최근 병합 기록")
+        merge_history = repo.merge_history()
+        if not merge_history.empty:
+            show_dataframe(merge_history, use_container_width=True)
+        else:
+            st.info("병합 기록이 없습니다.")
 
 # 2. 고객 연락처 관리
 elif menu == "고객 연락처 관리":
@@ -297,75 +435,46 @@ elif menu == "고객 연락처 관리":
     
     with tab1:
         st.subheader("고객 연락처 엑셀 업로드")
-        contact_file = st.file_uploader(
-            "고객 연락처 엑셀 파일을 업로드하세요",
+        contact_files = st.file_uploader(
+            "고객 연락처 엑셀 파일을 업로드하세요 (여러 파일 선택 가능)",
             type=['xlsx', 'xls'],
+            accept_multiple_files=True,
             key="contact_upload"
         )
         
-        if contact_file is not None:
+        if contact_files:
             try:
-                df = pd.read_excel(contact_file)
+                df = read_upload_cached(contact_files[0])
                 st.success("✅ 파일을 성공적으로 읽었습니다!")
                 
                 st.subheader("업로드된 데이터 미리보기")
-                st.dataframe(df, use_container_width=True)
+                show_dataframe(df, use_container_width=True)
+                upload_sheet = upload_sheet_option(contact_files, "contact_upload")
                 
                 # 컬럼 매핑
                 st.subheader("컬럼 매핑")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("**필수 매핑**")
-                    company_name_col = st.selectbox("기업명 컬럼", df.columns, key="contact_company_mapping")
-                    customer_name_col = st.selectbox("고객명 컬럼", df.columns, key="contact_customer_mapping")
-                
-                with col2:
-                    st.write("**선택 매핑**")
-                    position_col = st.selectbox("직위 컬럼", ["선택안함"] + list(df.columns), key="position_mapping")
-                    phone_col = st.selectbox("전화 컬럼", ["선택안함"] + list(df.columns), key="phone_mapping")
-                    email_col = st.selectbox("이메일 컬럼", ["선택안함"] + list(df.columns), key="email_mapping")
-                    path_col = st.selectbox("획득경로 컬럼", ["선택안함"] + list(df.columns), key="path_mapping")
+                mapping, _ = mapping_selectors(df, 'contacts', [
+                    ('company_name', "기업명 컬럼", "contact_company_mapping", True),
+                    ('customer_name', "고객명 컬럼", "contact_customer_mapping", True),
+                    ('position', "직위 컬럼", "position_mapping", False),
+                    ('phone', "전화 컬럼", "phone_mapping", False),
+                    ('email', "이메일 컬럼", "email_mapping", False),
+                    ('acquisition_path', "획득경로 컬럼", "path_mapping", False)
+                ])
                 
+                plan = preview_upload(contact_files, 'contacts', mapping, upload_sheet, "contact_upload")
                 if st.button("연락처 저장", type="primary"):
                     try:
-                        success_count = 0
-                        for _, row in df.iterrows():
-                            company_name = row[company_name_col]
-                            customer_name = row[customer_name_col]
-                            
-                            if pd.isna(company_name) or pd.isna(customer_name) or company_name == "" or customer_name == "":
-                                continue
-                            
-                            # 기업 코드 찾기
-                            company_code = find_company_code(conn, company_name)
-                            
-                            # 기업이 없으면 기본 정보로 생성
-                            existing_company = conn.execute("SELECT company_code FROM companies WHERE company_code = ?", (company_code,)).fetchone()
-                            if not existing_company:
-                                conn.execute('''
-                                    INSERT INTO companies (company_code, company_name)
-                                    VALUES (?, ?)
-                                ''', (company_code, company_name))
-                            
-                            # 연락처 정보 준비
-                            position = row[position_col] if position_col != "선택안함" and not pd.isna(row[position_col]) else None
-                            phone = row[phone_col] if phone_col != "선택안함" and not pd.isna(row[phone_col]) else None
-                            email = row[email_col] if email_col != "선택안함" and not pd.isna(row[email_col]) else None
-                            acquisition_path = row[path_col] if path_col != "선택안함" and not pd.isna(row[path_col]) else None
-                            
-                            # 연락처 저장
-                            conn.execute('''
-                                INSERT INTO customer_contacts 
-                                (company_code, customer_name, position, phone, email, acquisition_path)
-                                VALUES (?, ?, ?, ?, ?, ?)
-                            ''', (company_code, customer_name, position, phone, email, acquisition_path))
-                            success_count += 1
-                        
-                        conn.commit()
-                        st.success(f"✅ {success_count}개의 연락처를 저장했습니다!")
+                        result = commit_upload(contact_files, 'contacts', mapping, upload_sheet, "contact_upload", plan)
+                        repo.save_mapping_profile('contacts', df.columns, mapping, name=contact_files[0].name)
+                        st.success(
+                            f"✅ 신규 연락처 {result.get('inserted', 0)}개, 기존 연락처 갱신 {result.get('merged', 0)}개 "
+                            f"(변경 없음 {result['unchanged']}개)"
+                        )
+                        show_ingest_report(result, "contact_upload")
                         
                         # 캐시 클리어
+                        get_company_names.clear()
                         get_customer_names.clear()
                         get_positions.clear()
                         
@@ -378,15 +487,10 @@ elif menu == "고객 연락처 관리":
     with tab2:
         st.subheader("현재 저장된 연락처 목록")
         
-        contacts_df = pd.read_sql_query('''
-            SELECT cc.*, c.company_name 
-            FROM customer_contacts cc
-            JOIN companies c ON cc.company_code = c.company_code
-            ORDER BY cc.updated_at DESC
-        ''', conn)
+        contacts_df = repo.list_contacts()
         
         if not contacts_df.empty:
-            st.dataframe(contacts_df, use_container_width=True)
+            show_dataframe(contacts_df, use_container_width=True)
             st.metric("총 연락처 수", len(contacts_df))
         else:
             st.info("저장된 연락처가 없습니다.")
@@ -399,71 +503,45 @@ elif menu == "상담 이력 관리":
     
     with tab1:
         st.subheader("상담 이력 엑셀 업로드")
-        consultation_file = st.file_uploader(
-            "상담 이력 엑셀 파일을 업로드하세요",
+        consultation_files = st.file_uploader(
+            "상담 이력 엑셀 파일을 업로드하세요 (여러 파일 선택 가능)",
             type=['xlsx', 'xls'],
+            accept_multiple_files=True,
             key="consultation_upload"
         )
         
-        if consultation_file is not None:
+        if consultation_files:
             try:
-                df = pd.read_excel(consultation_file)
+                df = read_upload_cached(consultation_files[0])
                 st.success("✅ 파일을 성공적으로 읽었습니다!")
                 
                 st.subheader("업로드된 데이터 미리보기")
-                st.dataframe(df, use_container_width=True)
+                show_dataframe(df, use_container_width=True)
+                upload_sheet = upload_sheet_option(consultation_files, "consultation_upload")
                 
                 # 컬럼 매핑
                 st.subheader("컬럼 매핑")
-                col1, col2 = st.columns(2)
-                
-                with col1:
-                    st.write("**필수 매핑**")
-                    company_name_col = st.selectbox("기업명 컬럼", df.columns, key="consult_company_mapping")
-                    content_col = st.selectbox("상담내역 컬럼", df.columns, key="consult_content_mapping")
-                
-                with col2:
-                    st.write("**선택 매핑**")
-                    customer_col = st.selectbox("고객명 컬럼", ["선택안함"] + list(df.columns), key="consult_customer_mapping")
-                    date_col = st.selectbox("날짜 컬럼", ["선택안함"] + list(df.columns), key="consult_date_mapping")
-                    project_col = st.selectbox("프로젝트 컬럼", ["선택안함"] + list(df.columns), key="consult_project_mapping")
+                mapping, _ = mapping_selectors(df, 'consultations', [
+                    ('company_name', "기업명 컬럼", "consult_company_mapping", True),
+                    ('consultation_content', "상담내역 컬럼", "consult_content_mapping", True),
+                    ('customer_name', "고객명 컬럼", "consult_customer_mapping", False),
+                    ('consultation_date', "날짜 컬럼", "consult_date_mapping", False),
+                    ('project_name', "프로젝트 컬럼", "consult_project_mapping", False)
+                ])
                 
+                plan = preview_upload(consultation_files, 'consultations', mapping, upload_sheet, "consultation_upload")
                 if st.button("상담 이력 저장", type="primary"):
                     try:
-                        success_count = 0
-                        for _, row in df.iterrows():
-                            company_name = row[company_name_col]
-                            consultation_content = row[content_col]
-                            
-                            if pd.isna(company_name) or pd.isna(consultation_content) or company_name == "" or consultation_content == "":
-                                continue
-                            
-                            # 기업 코드 찾기
-                            company_code = find_company_code(conn, company_name)
-                            
-                            # 기업이 없으면 기본 정보로 생성
-                            existing_company = conn.execute("SELECT company_code FROM companies WHERE company_code = ?", (company_code,)).fetchone()
-                            if not existing_company:
-                                conn.execute('''
-                                    INSERT INTO companies (company_code, company_name)
-                                    VALUES (?, ?)
-                                ''', (company_code, company_name))
-                            
-                            # 상담 정보 준비
-                            customer_name = row[customer_col] if customer_col != "선택안함" and not pd.isna(row[customer_col]) else None
-                            consultation_date = row[date_col] if date_col != "선택안함" and not pd.isna(row[date_col]) else None
-                            project_name = row[project_col] if project_col != "선택안함" and not pd.isna(row[project_col]) else None
-                            
-                            # 상담 이력 저장
-                            conn.execute('''
-                                INSERT INTO consultations 
-                                (company_code, customer_name, consultation_date, consultation_content, project_name)
-                                VALUES (?, ?, ?, ?, ?)
-                            ''', (company_code, customer_name, consultation_date, consultation_content, project_name))
-                            success_count += 1
-                        
-                        conn.commit()
-                        st.success(f"✅ {success_count}개의 상담 이력을 저장했습니다!")
+                        result = commit_upload(
+                            consultation_files, 'consultations', mapping, upload_sheet, "consultation_upload", plan
+                        )
+                        repo.save_mapping_profile('consultations', df.columns, mapping, name=consultation_files[0].name)
+                        st.success(
+                            f"✅ {result.get('inserted', 0)}개의 상담 이력을 저장했습니다! "
+                            f"(이미 있는 상담 이력 {result['unchanged']}개 제외)"
+                        )
+                        show_ingest_report(result, "consultation_upload")
+                        get_company_names.clear()
                         
                     except Exception as e:
                         st.error(f"저장 중 오류 발생: {str(e)}")
@@ -526,7 +604,7 @@ elif menu == "상담 이력 관리":
                         '프로젝트명': project_name if project_name else None
                     }
                     
-                    success, message = insert_new_consultation(conn, consultation_data)
+                    success, message = repo.insert_consultation(consultation_data)
                     if success:
                         st.success(message)
                         # 캐시 클리어
@@ -542,17 +620,36 @@ elif menu == "상담 이력 관리":
     with tab3:
         st.subheader("상담 이력 조회")
         
-        consultations_df = pd.read_sql_query('''
-            SELECT c.company_name, con.customer_name, con.consultation_date, 
-                   con.consultation_content, con.project_name, con.created_at
-            FROM consultations con
-            JOIN companies c ON con.company_code = c.company_code
-            ORDER BY con.consultation_date DESC, con.created_at DESC
-        ''', conn)
+        use_date_filter = st.checkbox("기간으로 조회", key="consult_date_filter")
+        include_archive = st.checkbox(
+            "보관된 이력 포함", key="consult_include_archive",
+            help="오래된 상담 이력은 별도 보관 파일로 옮겨집니다. 체크하면 보관된 이력까지 함께 조회합니다."
+        )
+        
+        if use_date_filter:
+            today = datetime.now().date()
+            date_range = st.date_input(
+                "상담 기간",
+                value=(today.replace(year=today.year - 1), today),
+                key="consult_date_range"
+            )
+            start_date, end_date = (date_range[0], date_range[-1]) if date_range else (today, today)
+            start_day, end_day = start_date.strftime("%Y-%m-%d"), end_date.strftime("%Y-%m-%d")
+            
+            consultations_df = repo.list_consultations(start_day, end_day, include_archive)
+            
+            monthly_df = repo.monthly_consultation_counts(start_day, end_day, include_archive)
+        else:
+            consultations_df = repo.list_consultations(include_archive=include_archive)
+            monthly_df = None
         
         if not consultations_df.empty:
-            st.dataframe(consultations_df, use_container_width=True)
+            show_dataframe(consultations_df, use_container_width=True)
             st.metric("총 상담 건수", len(consultations_df))
+            
+            if monthly_df is not None and not monthly_df.empty:
+                st.subheader("월별 상담 건수")
+                st.bar_chart(monthly_df.set_index("월"))
         else:
             st.info("저장된 상담 이력이 없습니다.")
 
@@ -571,32 +668,10 @@ elif menu == "통합 데이터 조회":
         # 기존 조회 기능
         st.subheader("통합 데이터 조회")
         
-        # 통합 데이터 쿼리
-        integrated_df = pd.read_sql_query('''
-            SELECT 
-                c.company_name as 기업명,
-                c.revenue_2024 as 매출액_2024,
-                c.industry as 업종,
-                c.employee_count as 종업원수,
-                c.address as 주소,
-                c.products as 상품,
-                c.customer_category as 고객구분,
-                cc.customer_name as 고객명,
-                cc.position as 직위,
-                cc.phone as 전화,
-                cc.email as 이메일,
-                cc.acquisition_path as 획득경로,
-                con.consultation_date as 상담날짜,
-                con.consultation_content as 상담내역,
-                con.project_name as 프로젝트명
-            FROM companies c
-            LEFT JOIN customer_contacts cc ON c.company_code = cc.company_code
-            LEFT JOIN consultations con ON c.company_code = con.company_code
-            ORDER BY c.company_name, con.consultation_date DESC
-        ''', conn)
+        integrated_df = repo.integrated_view()
         
         if not integrated_df.empty:
-            st.dataframe(integrated_df, use_container_width=True)
+            show_dataframe(integrated_df, use_container_width=True)
             
             # 요약 통계
             st.subheader("요약 통계")
@@ -620,19 +695,7 @@ elif menu == "통합 데이터 조회":
         st.info("💡 **기업 정보만 편집 가능합니다.** 연락처와 상담 이력은 각각의 메뉴에서 관리하세요.")
         
         # 기업 데이터만 조회 (편집용)
-        companies_df = pd.read_sql_query('''
-            SELECT 
-                company_code as 업체코드,
-                company_name as 기업명,
-                revenue_2024 as 매출액_2024,
-                industry as 업종,
-                employee_count as 종업원수,
-                address as 주소,
-                products as 상품,
-                customer_category as 고객구분
-            FROM companies 
-            ORDER BY company_name
-        ''', conn)
+        companies_df = repo.companies_for_edit()
         
         if not companies_df.empty:
             # 자동완성 데이터 준비
@@ -683,13 +746,14 @@ elif menu == "통합 데이터 조회":
             }
             
             # 편집 가능한 데이터 에디터
-            edited_df = st.data_editor(
-                companies_df,
-                column_config=column_config,
-                use_container_width=True,
-                num_rows="dynamic",  # 행 추가/삭제 가능
-                key="companies_editor"
-            )
+            with profiler.section("render", len(companies_df)):
+                edited_df = st.data_editor(
+                    companies_df,
+                    column_config=column_config,
+                    use_container_width=True,
+                    num_rows="dynamic",  # 행 추가/삭제 가능
+                    key="companies_editor"
+                )
             
             # 변경사항 저장
             col1, col2, col3 = st.columns([1, 1, 2])
@@ -698,6 +762,7 @@ elif menu == "통합 데이터 조회":
                 if st.button("💾 변경사항 저장", type="primary"):
                     try:
                         write_conn = get_writable_connection()
+                        write_repo = CRMRepository(write_conn)
                         
                         changes_count = 0
                         errors = []
@@ -723,7 +788,7 @@ elif menu == "통합 데이터 조회":
                                     '고객구분': edited_row.고객구분
                                 }
                                 
-                                success, message = update_company_data(write_conn, company_code, updated_data)
+                                success, message = write_repo.update_company(company_code, updated_data)
                                 if success:
                                     changes_count += 1
                                 else:
@@ -830,7 +895,7 @@ elif menu == "통합 데이터 조회":
                             '프로젝트명': project_name if project_name else None
                         }
                         
-                        success, message = insert_new_consultation(conn, consultation_data)
+                        success, message = repo.insert_consultation(consultation_data)
                         if success:
                             st.success(message)
                             # 입력 필드 초기화를 위한 rerun
@@ -855,22 +920,10 @@ elif menu == "통합 데이터 조회":
         st.markdown("---")
         st.subheader("📋 최근 상담 이력 (최근 10건)")
         
-        recent_consultations = pd.read_sql_query('''
-            SELECT 
-                c.company_name as 기업명,
-                con.customer_name as 고객명,
-                con.consultation_date as 상담날짜,
-                con.consultation_content as 상담내역,
-                con.project_name as 프로젝트명,
-                con.created_at as 등록일시
-            FROM consultations con
-            JOIN companies c ON con.company_code = c.company_code
-            ORDER BY con.created_at DESC
-            LIMIT 10
-        ''', conn)
+        recent_consultations = repo.recent_consultations(limit=10)
         
         if not recent_consultations.empty:
-            st.dataframe(recent_consultations, use_container_width=True)
+            show_dataframe(recent_consultations, use_container_width=True)
         else:
             st.info("최근 상담 이력이 없습니다.")
 
@@ -878,264 +931,301 @@ elif menu == "통합 데이터 조회":
 elif menu == "데이터 다운로드":
     st.header("💾 데이터 다운로드")
     
-    # 다운로드 옵션
+    # 다운로드 옵션: (데이터셋, 제목, 건수 단위, 버튼 라벨, 빈 데이터 안내)
+    download_options = {
+        "통합 데이터": ('integrated', "📊 통합 데이터 다운로드", "개의 레코드가", "📥 통합 데이터 엑셀 다운로드", "다운로드할 데이터가 없습니다."),
+        "기업 목록": ('companies', "🏢 기업 목록 다운로드", "개의 기업이", "📥 기업 목록 엑셀 다운로드", "다운로드할 기업 목록이 없습니다."),
+        "고객 연락처": ('contacts', "👥 고객 연락처 다운로드", "개의 연락처가", "📥 고객 연락처 엑셀 다운로드", "다운로드할 연락처가 없습니다."),
+        "상담 이력": ('consultations', "📞 상담 이력 다운로드", "개의 상담 이력이", "📥 상담 이력 엑셀 다운로드", "다운로드할 상담 이력이 없습니다.")
+    }
+    
     download_option = st.selectbox(
         "다운로드할 데이터 선택",
-        ["통합 데이터", "기업 목록", "고객 연락처", "상담 이력"]
+        list(download_options.keys())
     )
     
-    # 엑셀 파일 생성 함수
-    def create_excel_file(dataframes_dict):
-        """여러 시트를 가진 엑셀 파일 생성"""
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            for sheet_name, df in dataframes_dict.items():
-                df.to_excel(writer, sheet_name=sheet_name, index=False)
-                
-                # 워크시트 포맷팅
-                workbook = writer.book
-                worksheet = writer.sheets[sheet_name]
-                
-                # 헤더 포맷
-                header_format = workbook.add_format({
-                    'bold': True,
-                    'text_wrap': True,
-                    'valign': 'top',
-                    'fg_color': '#D7E4BC',
-                    'border': 1
-                })
-                
-                # 헤더 적용
-                for col_num, value in enumerate(df.columns.values):
-                    worksheet.write(0, col_num, value, header_format)
-                
-                # 열 너비 자동 조정
-                for i, col in enumerate(df.columns):
-                    max_length = max(
-                        df[col].astype(str).str.len().max(),
-                        len(str(col))
-                    )
-                    worksheet.set_column(i, i, min(max_length + 2, 50))
-        
-        return output.getvalue()
+    dataset, title, count_label, button_label, empty_message = download_options[download_option]
+    st.subheader(title)
     
-    if download_option == "통합 데이터":
-        st.subheader("📊 통합 데이터 다운로드")
+    sheet_name, export_df = repo.export(dataset)
+    
+    if not export_df.empty:
+        show_dataframe(export_df.head(), use_container_width=True)
+        st.info(f"총 {len(export_df)}{count_label} 있습니다.")
         
-        # 통합 데이터 쿼리
-        integrated_df = pd.read_sql_query('''
-            SELECT 
-                c.company_name as 기업명,
-                c.revenue_2024 as 매출액_2024,
-                c.industry as 업종,
-                c.employee_count as 종업원수,
-                c.address as 주소,
-                c.products as 상품,
-                c.customer_category as 고객구분,
-                cc.customer_name as 고객명,
-                cc.position as 직위,
-                cc.phone as 전화,
-                cc.email as 이메일,
-                cc.acquisition_path as 획득경로,
-                con.consultation_date as 상담날짜,
-                con.consultation_content as 상담내역,
-                con.project_name as 프로젝트명
-            FROM companies c
-            LEFT JOIN customer_contacts cc ON c.company_code = cc.company_code
-            LEFT JOIN consultations con ON c.company_code = con.company_code
-            ORDER BY c.company_name, con.consultation_date DESC
-        ''', conn)
+        with profiler.section("excel", len(export_df)):
+            excel_data = create_excel_file({sheet_name: export_df})
         
-        if not integrated_df.empty:
-            st.dataframe(integrated_df.head(), use_container_width=True)
-            st.info(f"총 {len(integrated_df)}개의 레코드가 있습니다.")
-            
-            # 다운로드 버튼
-            excel_data = create_excel_file({"통합데이터": integrated_df})
-            
+        st.download_button(
+            label=button_label,
+            data=excel_data,
+            file_name=f"{sheet_name}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+    else:
+        st.warning(empty_message)
+    
+    # 변경분 다운로드 (소비자별 기준 번호 이후 추가/수정/삭제된 행만)
+    st.markdown("---")
+    st.subheader("🔄 변경분 다운로드")
+    st.write("마지막으로 받은 이후 추가/수정/삭제된 행만 다운로드합니다. 받는 곳(소비자)마다 기준 번호를 따로 저장합니다.")
+    
+    delta_datasets = {"기업 목록": 'companies', "고객 연락처": 'contacts', "상담 이력": 'consultations'}
+    col1, col2 = st.columns(2)
+    with col1:
+        consumer = st.text_input("소비자 이름", placeholder="예: erp, 영업지원팀", key="delta_consumer").strip()
+    with col2:
+        delta_option = st.selectbox("변경분 데이터 선택", list(delta_datasets.keys()), key="delta_dataset")
+    delta_dataset = delta_datasets[delta_option]
+    
+    if consumer:
+        if st.button("변경분 만들기", key="delta_build"):
+            st.session_state["delta_result"] = (consumer, delta_dataset, repo.delta(consumer, delta_dataset))
+        
+        stored = st.session_state.get("delta_result")
+        if stored and stored[:2] == (consumer, delta_dataset):
+            delta = stored[2]
+            st.info(
+                f"변경 번호 {delta['since'] if delta['since'] is not None else '(처음 - 전체)'} 이후 "
+                f"변경 {len(delta['changed'])}행, 삭제 {len(delta['deleted'])}행"
+            )
             st.download_button(
-                label="📥 통합 데이터 엑셀 다운로드",
-                data=excel_data,
-                file_name=f"통합데이터_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+                label="📥 변경분 엑셀 다운로드",
+                data=create_excel_file(delta_sheets(delta_dataset, delta)),
+                file_name=f"{delta_option}_변경분_{consumer}_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+                key="delta_download"
             )
-        else:
-            st.warning("다운로드할 데이터가 없습니다.")
+            st.caption("받은 파일을 반영한 뒤 아래 버튼을 눌러야 다음 변경분이 이 시점부터 계산됩니다.")
+            if st.button("✅ 전달 완료 (기준 번호 갱신)", key="delta_commit"):
+                repo.save_sync_watermark(consumer, delta_dataset, delta)
+                st.session_state.pop("delta_result", None)
+                st.success(f"✅ '{consumer}'의 {delta_option} 기준 번호를 {delta['watermark']}(으)로 갱신했습니다.")
+    
+    sync_df = repo.sync_status()
+    if not sync_df.empty:
+        with st.expander("소비자별 동기화 현황"):
+            show_dataframe(sync_df, use_container_width=True)
+    
+    # 전체 데이터 백업
+    st.markdown("---")
+    st.subheader("💾 전체 데이터 백업")
+    st.write("모든 데이터를 하나의 엑셀 파일로 다운로드합니다.")
     
-    elif download_option == "기업 목록":
-        st.subheader("🏢 기업 목록 다운로드")
+    if st.button("전체 데이터 백업 다운로드"):
+        # 통합 데이터 + 모든 테이블 데이터로 다중 시트 엑셀 파일 생성
+        backup_sheets = repo.backup()
+        with profiler.section("excel", sum(len(df) for df in backup_sheets.values())):
+            excel_backup = create_excel_file(backup_sheets)
         
-        companies_df = pd.read_sql_query('''
-            SELECT 
-                company_name as 기업명,
-                company_code as 업체코드,
-                revenue_2024 as 매출액_2024,
-                industry as 업종,
-                employee_count as 종업원수,
-                address as 주소,
-                products as 상품,
-                customer_category as 고객구분,
-                created_at as 등록일,
-                updated_at as 수정일
-            FROM companies 
-            ORDER BY company_name
-        ''', conn)
+        st.download_button(
+            label="📥 전체 데이터 백업 다운로드",
+            data=excel_backup,
+            file_name=f"CRM_전체백업_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
+            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        )
+
+# 6. 시스템 관리
+elif menu == "시스템 관리":
+    st.header("🛠️ 시스템 관리")
+    
+    tab1, tab2, tab3, tab4, tab5, tab6 = st.tabs(
+        ["쿼리 성능", "느린 쿼리 로그", "렌더링 프로파일", "매핑 프로필", "상담 이력 보관", "DB 유지보수"]
+    )
+    
+    with tab1:
+        st.subheader("쿼리별 실행 시간")
+        st.caption("앱 프로세스가 시작된 이후 누적된 통계입니다. p50/p95는 히스토그램 구간 기준 추정값입니다.")
         
-        if not companies_df.empty:
-            st.dataframe(companies_df.head(), use_container_width=True)
-            st.info(f"총 {len(companies_df)}개의 기업이 있습니다.")
-            
-            excel_data = create_excel_file({"기업목록": companies_df})
+        timings_df = get_query_timings()
+        
+        if not timings_df.empty:
+            show_dataframe(timings_df.drop(columns=['sql']), use_container_width=True)
             
-            st.download_button(
-                label="📥 기업 목록 엑셀 다운로드",
-                data=excel_data,
-                file_name=f"기업목록_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            # 누적 실행 시간 상위 쿼리 상세
+            st.subheader("상위 쿼리 실행 계획")
+            top_df = timings_df.head(10)
+            selected = st.selectbox(
+                "쿼리 선택",
+                list(top_df.index),
+                format_func=lambda i: f"{top_df.loc[i, 'query']} ({top_df.loc[i, 'page']}) - 누적 {top_df.loc[i, 'total_ms']:,.0f}ms",
+                key="explain_query"
             )
+            
+            query_row = top_df.loc[selected]
+            st.bar_chart(get_latency_histogram(query_row['query'], query_row['page']).set_index('구간(ms)'))
+            
+            if query_row['sql']:
+                st.code(query_row['sql'], language="sql")
+                try:
+                    show_dataframe(explain_query_plan(conn, query_row['sql']), use_container_width=True)
+                except Exception as e:
+                    st.error(f"실행 계획 조회 실패: {str(e)}")
+            else:
+                st.info("기록된 SQL이 없습니다.")
+            
+            if st.button("통계 초기화"):
+                reset_query_timings()
+                st.rerun()
         else:
-            st.warning("다운로드할 기업 목록이 없습니다.")
+            st.info("기록된 쿼리가 없습니다.")
     
-    elif download_option == "고객 연락처":
-        st.subheader("👥 고객 연락처 다운로드")
+    with tab2:
+        st.subheader(f"느린 쿼리 ({SLOW_QUERY_MS:.0f}ms 이상)")
+        slow_queries = get_slow_queries()
         
-        contacts_df = pd.read_sql_query('''
-            SELECT 
-                c.company_name as 기업명,
-                c.company_code as 업체코드,
-                cc.customer_name as 고객명,
-                cc.position as 직위,
-                cc.phone as 전화,
-                cc.email as 이메일,
-                cc.acquisition_path as 획득경로,
-                cc.created_at as 등록일,
-                cc.updated_at as 수정일
-            FROM customer_contacts cc
-            JOIN companies c ON cc.company_code = c.company_code
-            ORDER BY c.company_name, cc.customer_name
-        ''', conn)
+        if slow_queries:
+            slow_df = pd.DataFrame(slow_queries)
+            slow_df['sql'] = slow_df['sql'].apply(lambda statements: "; ".join(statements))
+            show_dataframe(slow_df, use_container_width=True)
+        else:
+            st.info("기록된 느린 쿼리가 없습니다.")
+    
+    with tab3:
+        st.subheader("페이지별 재실행 소요 시간")
+        st.caption(
+            "CRM_PROFILE=1 환경변수 또는 주소에 ?profile=1을 붙이면 측정합니다. "
+            "fetch: 조회, frame: DataFrame 구성, render: 표 렌더링, excel: 엑셀 생성, "
+            "sidebar: 사이드바, total: 재실행 전체 (구간은 서로 겹칠 수 있음)"
+        )
         
-        if not contacts_df.empty:
-            st.dataframe(contacts_df.head(), use_container_width=True)
-            st.info(f"총 {len(contacts_df)}개의 연락처가 있습니다.")
+        hours = st.selectbox("조회 기간", [1, 24, 24 * 7], index=1, format_func=lambda h: f"최근 {h}시간", key="profile_hours")
+        render_summary = get_render_summary(hours)
+        
+        if not render_summary.empty:
+            show_dataframe(render_summary, use_container_width=True)
             
-            excel_data = create_excel_file({"고객연락처": contacts_df})
+            total_df = render_summary[render_summary['구간'] == 'total'].set_index('페이지')
+            if not total_df.empty:
+                st.subheader("페이지별 평균 재실행 시간 (ms)")
+                st.bar_chart(total_df[['평균_ms', 'p95_ms']])
             
-            st.download_button(
-                label="📥 고객 연락처 엑셀 다운로드",
-                data=excel_data,
-                file_name=f"고객연락처_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+            st.subheader("최근 재실행")
+            show_dataframe(get_recent_runs(), use_container_width=True)
         else:
-            st.warning("다운로드할 연락처가 없습니다.")
+            st.info("측정된 재실행이 없습니다." if profiler.enabled else "프로파일링이 꺼져 있습니다.")
     
-    elif download_option == "상담 이력":
-        st.subheader("📞 상담 이력 다운로드")
+    with tab4:
+        st.subheader("저장된 컬럼 매핑 프로필")
+        st.caption("업로드 저장에 성공하면 파일 헤더별로 매핑이 저장되고, 같은 양식의 파일을 올리면 자동으로 적용됩니다.")
         
-        consultations_df = pd.read_sql_query('''
-            SELECT 
-                c.company_name as 기업명,
-                c.company_code as 업체코드,
-                con.customer_name as 고객명,
-                con.consultation_date as 상담날짜,
-                con.consultation_content as 상담내역,
-                con.project_name as 프로젝트명,
-                con.created_at as 등록일,
-                con.updated_at as 수정일
-            FROM consultations con
-            JOIN companies c ON con.company_code = c.company_code
-            ORDER BY con.consultation_date DESC, c.company_name
-        ''', conn)
+        profiles_df = repo.mapping_profiles()
         
-        if not consultations_df.empty:
-            st.dataframe(consultations_df.head(), use_container_width=True)
-            st.info(f"총 {len(consultations_df)}개의 상담 이력이 있습니다.")
-            
-            excel_data = create_excel_file({"상담이력": consultations_df})
+        if not profiles_df.empty:
+            show_dataframe(profiles_df, use_container_width=True)
             
-            st.download_button(
-                label="📥 상담 이력 엑셀 다운로드",
-                data=excel_data,
-                file_name=f"상담이력_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+            profile_id = st.selectbox(
+                "삭제할 프로필",
+                profiles_df['ID'].tolist(),
+                format_func=lambda i: f"{i}: {profiles_df.set_index('ID').loc[i, '이름']} ({profiles_df.set_index('ID').loc[i, '대상']})",
+                key="delete_mapping_profile"
             )
+            if st.button("프로필 삭제"):
+                repo.delete_mapping_profile(profile_id)
+                st.rerun()
         else:
-            st.warning("다운로드할 상담 이력이 없습니다.")
+            st.info("저장된 매핑 프로필이 없습니다.")
     
-    # 전체 데이터 백업
-    st.markdown("---")
-    st.subheader("💾 전체 데이터 백업")
-    st.write("모든 데이터를 하나의 엑셀 파일로 다운로드합니다.")
+    with tab5:
+        st.subheader("오래된 상담 이력 보관")
+        st.caption("기준일 이전 상담 이력을 별도 보관 파일로 옮깁니다. 보관된 이력은 상담 이력 조회에서 '보관된 이력 포함'을 선택하면 볼 수 있습니다.")
+        
+        archive = repo.archive_status()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("보관된 상담 건수", f"{archive['rows']:,}")
+        col2.metric("보관 기간", f"{archive['oldest_day']} ~ {archive['newest_day']}" if archive['rows'] else "-")
+        col3.metric("보관 파일 크기", f"{archive['file_bytes'] / 1024:.1f} KB")
+        st.caption(f"보관 파일: {archive['path']}")
+        
+        today = datetime.now().date()
+        cutoff_date = st.date_input(
+            "기준일 (이 날짜 이전 상담 이력을 보관)",
+            value=today.replace(year=today.year - 2),
+            key="archive_cutoff"
+        )
+        if st.button("📦 보관 실행", key="archive_run"):
+            with st.spinner("상담 이력을 보관 파일로 옮기는 중..."):
+                result = repo.archive_consultations(cutoff_date.strftime("%Y-%m-%d"))
+            st.success(f"상담 이력 {result['archived']:,}건을 보관했습니다. (기준일 {result['cutoff']})")
     
-    if st.button("전체 데이터 백업 다운로드"):
-        # 모든 테이블 데이터 가져오기
-        companies_df = pd.read_sql_query("SELECT * FROM companies", conn)
-        contacts_df = pd.read_sql_query("SELECT * FROM customer_contacts", conn)
-        consultations_df = pd.read_sql_query("SELECT * FROM consultations", conn)
+    with tab6:
+        st.subheader("데이터베이스 유지보수")
+        st.caption("앱이 주기적으로 점검해서 한가한 시간대이거나 WAL 크기/변경량/빈 페이지 기준을 넘으면 자동으로 실행합니다.")
         
-        # 통합 데이터도 포함
-        integrated_df = pd.read_sql_query('''
-            SELECT 
-                c.company_name as 기업명,
-                c.revenue_2024 as 매출액_2024,
-                c.industry as 업종,
-                c.employee_count as 종업원수,
-                c.address as 주소,
-                c.products as 상품,
-                c.customer_category as 고객구분,
-                cc.customer_name as 고객명,
-                cc.position as 직위,
-                cc.phone as 전화,
-                cc.email as 이메일,
-                cc.acquisition_path as 획득경로,
-                con.consultation_date as 상담날짜,
-                con.consultation_content as 상담내역,
-                con.project_name as 프로젝트명
-            FROM companies c
-            LEFT JOIN customer_contacts cc ON c.company_code = cc.company_code
-            LEFT JOIN consultations con ON c.company_code = con.company_code
-            ORDER BY c.company_name, con.consultation_date DESC
-        ''', conn)
+        status = repo.maintenance_status()
+        col1, col2, col3 = st.columns(3)
+        col1.metric("DB 파일 크기", f"{status['db_bytes'] / 1024:.1f} KB")
+        col2.metric("WAL 파일 크기", f"{status['wal_bytes'] / 1024:.1f} KB")
+        col3.metric("빈 페이지 비율", f"{status['freelist_ratio']:.1%}")
         
-        # 다중 시트 엑셀 파일 생성
-        backup_data = {
-            "통합데이터": integrated_df,
-            "기업목록": companies_df,
-            "고객연락처": contacts_df,
-            "상담이력": consultations_df
-        }
+        with st.expander("연결 PRAGMA 설정"):
+            st.caption("CRM_DB_PROFILE 환경변수로 프로필(safe / balanced / bulk-load)을 바꿀 수 있습니다. 대량 업로드는 저장하는 동안만 bulk-load가 적용됩니다.")
+            st.table(pd.DataFrame(list(repo.pragma_settings().items()), columns=["설정", "값"]).astype(str))
         
-        excel_backup = create_excel_file(backup_data)
+        if status['planned']:
+            st.info("지금 실행 대상: " + ", ".join(f"{task} ({reason})" for task, reason in status['planned']))
         
-        st.download_button(
-            label="📥 전체 데이터 백업 다운로드",
-            data=excel_backup,
-            file_name=f"CRM_전체백업_{datetime.now().strftime('%Y%m%d_%H%M')}.xlsx",
-            mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+        tasks = st.multiselect(
+            "실행할 작업 (비우면 기준을 넘은 작업만 실행)",
+            ["cleanup", "checkpoint", "analyze", "optimize", "vacuum", "reindex"],
+            key="maintenance_tasks"
         )
+        if st.button("🧹 유지보수 실행", key="maintenance_run"):
+            with st.spinner("유지보수 작업 실행 중..."):
+                results = repo.run_maintenance(tasks or None)
+            succeeded = [r for r in results if not r.get('error')]
+            if succeeded:
+                st.success(", ".join(f"{r['task']} {r['seconds']}초" for r in succeeded))
+            for r in results:
+                if r.get('error'):
+                    st.error(f"{r['task']} 실패: {r['error']}")
+            if not results:
+                st.info("기준을 넘은 작업이 없습니다.")
+        
+        log_df = repo.maintenance_log()
+        if not log_df.empty:
+            st.subheader("최근 유지보수 기록")
+            show_dataframe(log_df, use_container_width=True)
+        
+        st.subheader("참조 무결성 점검")
+        st.caption("연락처/상담 이력 중 기업이 없거나 기업 키(company_id)가 어긋난 행을 백그라운드에서 나눠서 점검합니다.")
+        
+        if st.button("🔍 지금 전체 점검", key="integrity_run"):
+            with st.spinner("참조 무결성 점검 중..."):
+                results = repo.run_integrity_check()
+            st.success(", ".join(f"{r['check']} {r['scanned']:,}행 {r['seconds']}초" for r in results))
+        
+        integrity = repo.integrity_status()
+        col1, col2 = st.columns(2)
+        col1.metric("문제 행 수", f"{integrity['issues']:,}")
+        col2.metric("마지막 전체 점검", integrity['checked_at'] or "점검 중")
+        if integrity['last_error']:
+            error = integrity['last_error']
+            st.error(f"마지막 점검 오류 ({error['at']}, {error['check']}): {error['error']}")
+        
+        if integrity['issues']:
+            show_dataframe(repo.integrity_issues(), use_container_width=True)
 
 # 사이드바에 시스템 정보 표시
 st.sidebar.markdown("---")
 st.sidebar.subheader("📈 시스템 현황")
+set_query_page("사이드바")
 
-try:
-    # 현재 데이터 통계
-    companies_count = conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0]
-    contacts_count = conn.execute("SELECT COUNT(*) FROM customer_contacts").fetchone()[0]
-    consultations_count = conn.execute("SELECT COUNT(*) FROM consultations").fetchone()[0]
+with profiler.section("sidebar"):
+    try:
+        # 현재 데이터 통계
+        counts = repo.counts()
     
-    st.sidebar.metric("등록된 기업 수", companies_count)
-    st.sidebar.metric("등록된 연락처 수", contacts_count)
-    st.sidebar.metric("등록된 상담 건수", consultations_count)
+        st.sidebar.metric("등록된 기업 수", counts['companies'])
+        st.sidebar.metric("등록된 연락처 수", counts['contacts'])
+        st.sidebar.metric("등록된 상담 건수", counts['consultations'])
     
-    # 데이터베이스 파일 정보
-    import os
-    db_size = os.path.getsize('crm_database.db') if os.path.exists('crm_database.db') else 0
-    st.sidebar.metric("DB 파일 크기", f"{db_size / 1024:.1f} KB")
+        # 데이터베이스 파일 정보
+        db_size = repo.file_sizes()['db_bytes']
+        st.sidebar.metric("DB 파일 크기", f"{db_size / 1024:.1f} KB")
     
-except Exception as e:
-    st.sidebar.error("시스템 정보를 불러올 수 없습니다.")
+    except Exception as e:
+        st.sidebar.error("시스템 정보를 불러올 수 없습니다.")
 
 st.sidebar.markdown("---")
 st.sidebar.info("""
@@ -1200,3 +1290,8 @@ if __name__ == "__main__":
         
         **시작하려면 왼쪽 메뉴에서 원하는 기능을 선택하세요!**
         """)
+
+# 재실행 프로파일 저장
+profile_result = profiler.finish()
+if profile_result:
+    st.sidebar.caption(f"⏱️ 재실행 {profile_result['total']:,.0f}ms")
@@ -5,19 +5,49 @@ CRM 애플리케이션의 데이터베이스 관련 모듈들
 """
 
 from .connection import (
+    DB_PATH,
+    connect,
     init_database,
     generate_company_code,
+    allocate_company_codes,
     parse_revenue,
     get_table_info,
     check_database_health,
-    test_connection
+    test_connection,
+    transaction
+)
+from .merge import (
+    merge_companies,
+    read_merge_mapping,
+    get_merge_history
+)
+from .repository import CRMRepository
+from .querylog import (
+    set_query_page,
+    get_query_timings,
+    get_slow_queries,
+    reset_query_timings,
+    explain_query_plan
 )
 
 __all__ = [
+    'DB_PATH',
+    'connect',
     'init_database',
     'generate_company_code', 
+    'allocate_company_codes',
     'parse_revenue',
     'get_table_info',
     'check_database_health',
-    'test_connection'
+    'test_connection',
+    'transaction',
+    'merge_companies',
+    'read_merge_mapping',
+    'get_merge_history',
+    'CRMRepository',
+    'set_query_page',
+    'get_query_timings',
+    'get_slow_queries',
+    'reset_query_timings',
+    'explain_query_plan'
 ]
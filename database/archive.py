@@ -0,0 +1,260 @@
+"""
+database/archive.py
+
+오래된 상담 이력 보관(아카이브)
+- 기준일 이전 상담 이력을 별도 아카이브 DB 파일로 배치 단위 이동
+- 아카이브 파일은 ATTACH DATABASE로 같은 연결에 붙여서 조회 (스키마 이름: archive)
+- 화면/목록 조회는 기본적으로 운영 테이블만 읽고, 전체 이력 요청 시에만 아카이브를 합쳐서 조회
+
+Note:
+    - 이동은 "아카이브에 쓰기 → 운영 테이블에서 삭제" 순서이고 id 기준 덮어쓰기라서
+      중간에 실패해도 다시 실행하면 됨 (WAL 모드에서는 파일 간 원자성이 보장되지 않음)
+    - 이동으로 생긴 삭제는 변경 로그에 ARCHIVE로 기록하고 삭제 기록(deleted_rows)은 남기지 않음
+      (다운스트림에서는 삭제가 아니라 보관된 이력)
+"""
+
+import os
+from datetime import date, timedelta
+
+from .connection import transaction
+from .maintenance import get_database_path
+
+
+# 아카이브 스키마 이름
+ARCHIVE_SCHEMA = 'archive'
+
+# 아카이브 파일 경로 (기본값: 운영 DB 파일 옆 <이름>_archive.db)
+ARCHIVE_DB_PATH = os.environ.get('CRM_ARCHIVE_DB_PATH')
+
+# 기준일: 상담 날짜가 이 기간(일)보다 오래된 이력을 보관
+ARCHIVE_AFTER_DAYS = int(os.environ.get('CRM_ARCHIVE_AFTER_DAYS', '730'))
+
+# 한 트랜잭션에서 옮기는 행 수 (쓰기 잠금 시간 제한)
+ARCHIVE_BATCH_ROWS = 5000
+
+
+def get_archive_path(conn):
+    """
+    아카이브 파일 경로
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        str: 경로 (CRM_ARCHIVE_DB_PATH, 없으면 운영 DB 파일 옆 <이름>_archive.db)
+    """
+    if ARCHIVE_DB_PATH:
+        return ARCHIVE_DB_PATH
+    path = get_database_path(conn)
+    if not path:
+        return ':memory:'
+    return f"{os.path.splitext(path)[0]}_archive.db"
+
+
+def is_archive_attached(conn):
+    """아카이브 DB가 연결에 붙어 있는지 여부"""
+    return any(name == ARCHIVE_SCHEMA for _, name, _ in conn.execute("PRAGMA database_list").fetchall())
+
+
+def has_archive(conn):
+    """아카이브 DB가 붙어 있거나 아카이브 파일이 있는지 여부 (보관한 적이 있는지)"""
+    path = get_archive_path(conn)
+    return is_archive_attached(conn) or (path != ':memory:' and os.path.exists(path))
+
+
+def attach_archive(conn, path=None):
+    """
+    아카이브 DB를 연결에 붙이고 보관 테이블 준비 (이미 붙어 있으면 테이블만 확인)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        path (str): 아카이브 파일 경로 (기본값: get_archive_path())
+
+    Returns:
+        str: 붙인 아카이브 파일 경로
+
+    Note:
+        - archive.consultations는 운영 테이블 컬럼 + archived_at
+        - 운영 테이블에 컬럼이 추가되면 아카이브 테이블에도 같은 컬럼을 추가
+          (company_id는 추가할 때 업체코드로 채움)
+    """
+    if not is_archive_attached(conn):
+        path = path or get_archive_path(conn)
+        conn.execute(f"ATTACH DATABASE ? AS {ARCHIVE_SCHEMA}", (path,))
+        conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.journal_mode=WAL")
+
+    columns = conn.execute("PRAGMA main.table_info(consultations)").fetchall()
+    definitions = [
+        f"{name} {col_type}{' PRIMARY KEY' if pk else ''}"
+        for _, name, col_type, _, _, pk in columns
+    ]
+    conn.execute(f'''
+        CREATE TABLE IF NOT EXISTS {ARCHIVE_SCHEMA}.consultations (
+            {', '.join(definitions)},
+            archived_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+    archived_columns = {
+        row[1] for row in conn.execute(f"PRAGMA {ARCHIVE_SCHEMA}.table_info(consultations)").fetchall()
+    }
+    for _, name, col_type, _, _, _ in columns:
+        if name not in archived_columns:
+            conn.execute(f"ALTER TABLE {ARCHIVE_SCHEMA}.consultations ADD COLUMN {name} {col_type}")
+    if 'company_id' not in archived_columns:
+        conn.execute(f'''
+            UPDATE {ARCHIVE_SCHEMA}.consultations SET company_id = (
+                SELECT c.company_id FROM main.companies c WHERE c.company_code = consultations.company_code
+            )
+        ''')
+
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_consultations_day
+        ON consultations(consultation_day)
+    ''')
+    conn.execute(f"DROP INDEX IF EXISTS {ARCHIVE_SCHEMA}.idx_archive_consultations_company_day")
+    conn.execute(f'''
+        CREATE INDEX IF NOT EXISTS {ARCHIVE_SCHEMA}.idx_archive_consultations_company_id_day
+        ON consultations(company_id, consultation_day)
+    ''')
+
+    for _, name, file_path in conn.execute("PRAGMA database_list").fetchall():
+        if name == ARCHIVE_SCHEMA:
+            return file_path or ''
+    return ''
+
+
+def archive_cutoff(older_than_days=None):
+    """
+    보관 기준일 (이 날짜보다 앞선 상담 이력을 보관)
+
+    Args:
+        older_than_days (int): 기간 (기본값: ARCHIVE_AFTER_DAYS)
+
+    Returns:
+        str: 기준일 YYYY-MM-DD
+    """
+    days = ARCHIVE_AFTER_DAYS if older_than_days is None else older_than_days
+    return (date.today() - timedelta(days=int(days))).strftime("%Y-%m-%d")
+
+
+def archive_consultations(conn, before_day=None, batch_rows=ARCHIVE_BATCH_ROWS, max_batches=None):
+    """
+    기준일 이전 상담 이력을 아카이브 DB로 이동 (배치 단위)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        before_day (str): 기준일 YYYY-MM-DD (기본값: archive_cutoff())
+        batch_rows (int): 배치당 행 수
+        max_batches (int): 최대 배치 수 (None이면 끝까지)
+
+    Returns:
+        dict: {'cutoff': 기준일, 'archived': 이동한 행 수, 'batches': 배치 수, 'remaining': 남은 대상 행 수}
+
+    Example:
+        >>> archive_consultations(conn, before_day="2023-01-01")
+        {'cutoff': '2023-01-01', 'archived': 12000, 'batches': 3, 'remaining': 0}
+
+    Note:
+        - consultation_day 인덱스 범위 조회로 대상 선택 (상담 날짜를 알 수 없는 행은 제외)
+        - 배치마다 트랜잭션을 나눠서 앱의 쓰기가 오래 막히지 않음
+    """
+    cutoff = before_day or archive_cutoff()
+    attach_archive(conn)
+
+    columns = [row[1] for row in conn.execute("PRAGMA main.table_info(consultations)").fetchall()]
+    column_list = ', '.join(columns)
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS archive_batch (id INTEGER PRIMARY KEY)")
+
+    archived = 0
+    batches = 0
+    while max_batches is None or batches < max_batches:
+        with transaction(conn):
+            conn.execute("DELETE FROM temp.archive_batch")
+            moved = conn.execute('''
+                INSERT INTO temp.archive_batch (id)
+                SELECT id FROM main.consultations
+                WHERE consultation_day < ?
+                ORDER BY consultation_day
+                LIMIT ?
+            ''', (cutoff, int(batch_rows))).rowcount
+            if not moved:
+                break
+
+            last_log_id = conn.execute("SELECT COALESCE(MAX(id), 0) FROM main.change_log").fetchone()[0]
+            last_seq = conn.execute("SELECT value FROM main.change_counter WHERE id = 1").fetchone()[0]
+
+            conn.execute(f'''
+                INSERT OR REPLACE INTO {ARCHIVE_SCHEMA}.consultations ({column_list})
+                SELECT {column_list} FROM main.consultations
+                WHERE id IN (SELECT id FROM temp.archive_batch)
+            ''')
+            conn.execute("DELETE FROM main.consultations WHERE id IN (SELECT id FROM temp.archive_batch)")
+
+            # 삭제 트리거가 남긴 기록을 보관 이동으로 정정
+            conn.execute('''
+                UPDATE main.change_log SET op = 'ARCHIVE'
+                WHERE id > ? AND table_name = 'consultations' AND op = 'DELETE'
+            ''', (last_log_id,))
+            conn.execute('''
+                DELETE FROM main.deleted_rows
+                WHERE dataset = 'consultations' AND change_seq > ?
+            ''', (last_seq,))
+
+        archived += moved
+        batches += 1
+
+    remaining = conn.execute(
+        "SELECT COUNT(*) FROM main.consultations WHERE consultation_day < ?", (cutoff,)
+    ).fetchone()[0]
+    return {'cutoff': cutoff, 'archived': archived, 'batches': batches, 'remaining': remaining}
+
+
+def get_archive_status(conn):
+    """
+    아카이브 현황
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: {'path', 'rows', 'oldest_day', 'newest_day', 'file_bytes'} (아카이브 파일이 없으면 rows 0)
+    """
+    if not has_archive(conn):
+        return {'path': get_archive_path(conn), 'rows': 0, 'oldest_day': None, 'newest_day': None, 'file_bytes': 0}
+
+    path = attach_archive(conn)
+    rows, oldest_day, newest_day = conn.execute(f'''
+        SELECT COUNT(*), MIN(consultation_day), MAX(consultation_day)
+        FROM {ARCHIVE_SCHEMA}.consultations
+    ''').fetchone()
+    return {
+        'path': path,
+        'rows': rows,
+        'oldest_day': oldest_day,
+        'newest_day': newest_day,
+        'file_bytes': os.path.getsize(path) if path and os.path.exists(path) else 0
+    }
+
+
+def consultations_source(include_archive):
+    """
+    상담 이력 조회 대상 (FROM 절에 그대로 사용)
+
+    Args:
+        include_archive (bool): 아카이브 포함 여부 (True면 attach_archive() 이후 사용)
+
+    Returns:
+        str: 'main.consultations' 또는 운영 + 아카이브 UNION ALL 서브쿼리
+    """
+    if not include_archive:
+        return "main.consultations"
+    return f'''(
+        SELECT id, company_id, company_code, customer_name, consultation_date, consultation_day,
+               consultation_content, project_name, created_at, updated_at
+        FROM main.consultations
+        UNION ALL
+        SELECT id, company_id, company_code, customer_name, consultation_date, consultation_day,
+               consultation_content, project_name, created_at, updated_at
+        FROM {ARCHIVE_SCHEMA}.consultations
+    )'''
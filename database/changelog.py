@@ -0,0 +1,241 @@
+"""
+database/changelog.py
+
+변경 로그(CDC) - 데이터 웨어하우스 등 다운스트림 적재용
+- companies / customer_contacts / consultations 트리거가 추가/수정/삭제를 change_log에 한 줄씩 기록
+- 수정은 실제로 값이 바뀐 컬럼만 {컬럼: 새 값} JSON으로 기록
+- 소비자는 오프셋(change_log.id) 이후 기록만 읽음 (소비자별 오프셋 저장 가능)
+- 보관 정책에 따라 오래된 기록 정리 (compact_change_log)
+
+Note:
+    - 트리거는 schema v5에서 설치 (install_change_log_triggers)
+    - 테이블 컬럼이 바뀌는 마이그레이션 뒤에는 install_change_log_triggers()를 다시 호출해야 함
+"""
+
+import json
+import os
+
+from .connection import transaction
+
+
+# 변경 로그 대상 (테이블, 키 컬럼)
+CHANGE_LOG_TABLES = [
+    ('companies', 'company_code'),
+    ('customer_contacts', 'id'),
+    ('consultations', 'id'),
+]
+
+# 변경 내용에서 제외하는 관리용 컬럼 (값만 바뀐 수정은 기록하지 않음)
+# company_id는 내부 조인 키 (다운스트림은 업체코드 사용)
+UNTRACKED_COLUMNS = {'created_at', 'updated_at', 'change_seq', 'company_id'}
+
+# 모든 소비자가 읽은 기록의 보관 기간 (일)
+CHANGE_LOG_RETENTION_DAYS = int(os.environ.get('CRM_CHANGE_LOG_RETENTION_DAYS', '7'))
+
+# 읽지 않은 소비자가 있어도 이 기간이 지나면 정리 (일) - 그보다 오래 멈춘 소비자는 변경분 내보내기로 재동기화
+CHANGE_LOG_MAX_DAYS = int(os.environ.get('CRM_CHANGE_LOG_MAX_DAYS', '90'))
+
+
+def _tracked_columns(conn, table):
+    columns = [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+    return [col for col in columns if col not in UNTRACKED_COLUMNS]
+
+
+def install_change_log_triggers(conn):
+    """
+    변경 로그 트리거 (재)설치 - 현재 테이블 컬럼 기준
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (마이그레이션 트랜잭션 내부에서 호출)
+
+    Note:
+        - UPDATE 트리거는 change_seq가 그대로인 수정(사용자 수정)에서만 실행
+          (schema v4의 change_seq/updated_at 갱신 트리거가 일으키는 내부 UPDATE는 기록하지 않음)
+        - 바뀐 컬럼이 없는 수정(updated_at만 갱신하는 upsert 등)은 기록하지 않음
+    """
+    for table, key in CHANGE_LOG_TABLES:
+        columns = _tracked_columns(conn, table)
+        for op in ('insert', 'update', 'delete'):
+            conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_changelog_{op}")
+
+        new_values = ", ".join(f"'{col}', NEW.{col}" for col in columns)
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_changelog_insert
+            AFTER INSERT ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, op, row_key, changed)
+                VALUES ('{table}', 'INSERT', NEW.{key}, json_object({new_values}));
+            END
+        ''')
+
+        changed_values = "\n                    UNION ALL ".join(
+            f"SELECT '{col}' AS k, NEW.{col} AS v WHERE NEW.{col} IS NOT OLD.{col}" for col in columns
+        )
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_changelog_update
+            AFTER UPDATE ON {table}
+            WHEN NEW.change_seq IS OLD.change_seq
+            BEGIN
+                INSERT INTO change_log (table_name, op, row_key, changed)
+                SELECT '{table}', 'UPDATE', NEW.{key}, changed
+                FROM (
+                    SELECT json_group_object(k, v) AS changed, COUNT(*) AS n
+                    FROM ({changed_values})
+                )
+                WHERE n > 0;
+            END
+        ''')
+
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_changelog_delete
+            AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO change_log (table_name, op, row_key)
+                VALUES ('{table}', 'DELETE', OLD.{key});
+            END
+        ''')
+
+
+def ensure_change_log_offsets(conn):
+    """
+    소비자별 변경 로그 오프셋 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_log_offsets (
+            consumer TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+
+
+def get_change_log_offset(conn, consumer):
+    """
+    소비자가 마지막으로 읽은 변경 로그 id
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        consumer (str): 소비자 이름
+
+    Returns:
+        int: 마지막으로 읽은 id (기록이 없으면 0)
+    """
+    ensure_change_log_offsets(conn)
+    row = conn.execute(
+        "SELECT last_id FROM change_log_offsets WHERE consumer = ?", (consumer,)
+    ).fetchone()
+    return row[0] if row else 0
+
+
+def save_change_log_offset(conn, consumer, last_id):
+    """
+    소비자 오프셋 저장 (반영이 끝난 뒤 호출)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        consumer (str): 소비자 이름
+        last_id (int): 마지막으로 반영한 변경 로그 id
+    """
+    ensure_change_log_offsets(conn)
+    with transaction(conn):
+        conn.execute('''
+            INSERT INTO change_log_offsets (consumer, last_id) VALUES (?, ?)
+            ON CONFLICT(consumer) DO UPDATE SET
+                last_id = excluded.last_id,
+                updated_at = CURRENT_TIMESTAMP
+        ''', (consumer, int(last_id)))
+
+
+def read_change_log(conn, after=0, limit=1000, tables=None):
+    """
+    오프셋 이후 변경 로그 조회 (기본키 범위 조회)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        after (int): 마지막으로 읽은 id (0이면 처음부터)
+        limit (int): 최대 건수
+        tables (list): 테이블 제한 (None이면 전체)
+
+    Returns:
+        dict: {
+            'rows': [{'id', 'table', 'op', 'key', 'changed', 'changed_at'}],
+            'next_after': 다음 조회에 쓸 오프셋 (읽은 기록이 없으면 after 그대로),
+            'oldest': 남아 있는 가장 오래된 id (None이면 로그가 비어 있음)
+        }
+
+    Example:
+        >>> page = read_change_log(conn, after=0, limit=500)
+        >>> page = read_change_log(conn, after=page['next_after'], limit=500)
+
+    Note:
+        - after + 1 < oldest 이면 읽기 전에 정리된 기록이 있음 (변경분 내보내기로 재동기화 필요)
+        - 테이블 제한 시에도 next_after는 마지막으로 읽은 기록 기준
+    """
+    after = int(after or 0)
+    params = [after]
+    table_filter = ""
+    if tables:
+        table_filter = f"AND table_name IN ({', '.join('?' * len(tables))})"
+        params.extend(tables)
+    params.append(int(limit))
+
+    rows = [
+        {
+            'id': row_id,
+            'table': table,
+            'op': op,
+            'key': key,
+            'changed': json.loads(changed) if changed else None,
+            'changed_at': changed_at
+        }
+        for row_id, table, op, key, changed, changed_at in conn.execute(f'''
+            SELECT id, table_name, op, row_key, changed, changed_at
+            FROM change_log
+            WHERE id > ? {table_filter}
+            ORDER BY id
+            LIMIT ?
+        ''', params)
+    ]
+    oldest = conn.execute("SELECT MIN(id) FROM change_log").fetchone()[0]
+    return {
+        'rows': rows,
+        'next_after': rows[-1]['id'] if rows else after,
+        'oldest': oldest
+    }
+
+
+def compact_change_log(conn, retention_days=None, max_days=None):
+    """
+    변경 로그 정리 (보관 정책)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        retention_days (int): 모든 소비자가 읽은 기록의 보관 기간 (기본값: CHANGE_LOG_RETENTION_DAYS)
+        max_days (int): 읽지 않은 소비자가 있어도 정리하는 기간 (기본값: CHANGE_LOG_MAX_DAYS)
+
+    Returns:
+        dict: {'acknowledged': 읽음 처리된 기록 정리 수, 'expired': 기간 만료 정리 수}
+
+    Note:
+        - 오프셋을 저장한 소비자가 없으면 보관 기간만 적용
+        - 최대 보관 기간이 지나 정리된 구간을 아직 읽지 않은 소비자는 read_change_log()의 oldest로 확인 가능
+    """
+    retention_days = CHANGE_LOG_RETENTION_DAYS if retention_days is None else retention_days
+    max_days = CHANGE_LOG_MAX_DAYS if max_days is None else max_days
+    ensure_change_log_offsets(conn)
+
+    with transaction(conn):
+        acknowledged = conn.execute('''
+            DELETE FROM change_log
+            WHERE changed_at < datetime('now', ?)
+              AND id <= COALESCE((SELECT MIN(last_id) FROM change_log_offsets), id)
+        ''', (f'-{int(retention_days)} days',)).rowcount
+        expired = conn.execute(
+            "DELETE FROM change_log WHERE changed_at < datetime('now', ?)",
+            (f'-{int(max_days)} days',)
+        ).rowcount
+
+    return {'acknowledged': acknowledged, 'expired': expired}
@@ -7,93 +7,167 @@ database/connection.py
 - 데이터 파싱 유틸리티
 """
 
-import streamlit as st
+import os
 import sqlite3
+import time
 import uuid
+from contextlib import contextmanager
 import pandas as pd
 
+from .metrics import LOCK_WAIT
+from .pragmas import apply_profile
 
-@st.cache_resource
-def init_database():
+
+# 데이터베이스 파일 경로 (CRM_DB_PATH 환경변수로 변경 가능)
+DB_PATH = os.environ.get('CRM_DB_PATH', 'crm_database.db')
+
+
+def connect(db_path=None, profile=None):
     """
-    SQLite 데이터베이스 연결 생성 및 테이블 초기화
+    SQLite 데이터베이스 연결 생성 (Streamlit 없이 사용 가능)
     
+    Args:
+        db_path (str): 데이터베이스 파일 경로 (기본값: DB_PATH)
+        profile (str): PRAGMA 프로필 'safe', 'balanced', 'bulk-load' (기본값: CRM_DB_PROFILE 또는 balanced)
+        
     Returns:
-        sqlite3.Connection: 데이터베이스 연결 객체
+        sqlite3.Connection: autocommit 모드 데이터베이스 연결
         
     Note:
-        - @st.cache_resource로 캐시되어 앱 전체에서 재사용
-        - 테이블이 없으면 자동으로 생성
+        - 쓰기는 transaction()으로 묶어서 수행
+        - WAL 모드로 앱/CLI/배치 작업의 동시 접근 지원 (프로필 설정은 database.pragmas)
         - 멀티스레드 환경 지원 (check_same_thread=False)
+        - 외래키 강제(PRAGMA foreign_keys=ON) - 연결마다 켜야 적용됨
+        - 쿼리 계측용 SQL 추적 콜백 설치
     """
-    conn = sqlite3.connect('crm_database.db', check_same_thread=False)
+    conn = sqlite3.connect(
+        db_path or DB_PATH,
+        check_same_thread=False,
+        timeout=30.0,
+        isolation_level=None
+    )
+    try:
+        apply_profile(conn, profile)
+        conn.execute("PRAGMA foreign_keys=ON")
+    except Exception:
+        conn.close()
+        raise
     
-    # 기업 테이블 생성
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS companies (
-            company_code TEXT PRIMARY KEY,
-            company_name TEXT NOT NULL,
-            revenue_2024 REAL,
-            industry TEXT,
-            employee_count INTEGER,
-            address TEXT,
-            products TEXT,
-            customer_category TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    ''')
+    # 실행된 SQL 수집 (database.querylog)
+    from .querylog import install_query_trace
+    install_query_trace(conn)
+    return conn
+
+
+def init_database(db_path=None, profile=None):
+    """
+    SQLite 데이터베이스 연결 생성 및 테이블 초기화
     
-    # 고객 연락처 테이블 생성
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS customer_contacts (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            company_code TEXT,
-            customer_name TEXT NOT NULL,
-            position TEXT,
-            phone TEXT,
-            email TEXT,
-            acquisition_path TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (company_code) REFERENCES companies(company_code)
-        )
-    ''')
+    Args:
+        db_path (str): 데이터베이스 파일 경로 (기본값: DB_PATH)
+        profile (str): PRAGMA 프로필 (기본값: CRM_DB_PROFILE 또는 balanced)
     
-    # 상담 이력 테이블 생성
-    conn.execute('''
-        CREATE TABLE IF NOT EXISTS consultations (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            company_code TEXT,
-            customer_name TEXT,
-            consultation_date TEXT,
-            consultation_content TEXT NOT NULL,
-            project_name TEXT,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (company_code) REFERENCES companies(company_code)
-        )
-    ''')
+    Returns:
+        sqlite3.Connection: 데이터베이스 연결 객체
+        
+    Note:
+        - 테이블이 없으면 자동으로 생성하고 마이그레이션 적용
+        - Streamlit 앱에서는 database_utils.init_database()가 이 연결을 캐시
+    """
+    conn = connect(db_path, profile)
+    
+    # 테이블 생성 및 스키마 마이그레이션
+    from .schema import init_schema
+    init_schema(conn)
     
-    conn.commit()
     return conn
 
 
 def generate_company_code():
     """
-    자동 업체코드 생성
+    자동 업체코드 생성 (데이터베이스 없이 만드는 임시 코드)
     
     Returns:
         str: AUTO + 8자리 랜덤 문자열 (예: AUTO12AB34CD)
         
     Note:
-        - 외감기업이 아닌 경우 자동으로 업체코드 생성
-        - UUID4의 앞 8자리를 대문자로 변환하여 사용
-        - 매번 호출 시 새로운 코드 생성
+        - UUID4의 앞 8자리(32비트)라 기업이 많아지면 충돌할 수 있고 중복 확인도 하지 않음
+        - 저장할 기업의 코드는 allocate_company_codes()로 발급
     """
     return f"AUTO{str(uuid.uuid4())[:8].upper()}"
 
 
+# 발급 업체코드 형식: AUTO + 10자리 일련번호 (기존 8자리 랜덤 코드와 길이가 달라 겹치지 않음)
+COMPANY_CODE_PREFIX = 'AUTO'
+COMPANY_CODE_DIGITS = 10
+
+
+def ensure_code_sequences(conn):
+    """
+    코드 일련번호 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS code_sequences (
+            name TEXT PRIMARY KEY,
+            next_value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO code_sequences (name, next_value) VALUES ('company', 1)")
+
+
+def allocate_company_codes(conn, count):
+    """
+    중복 없는 자동 업체코드를 한 번에 여러 개 발급 (블록 단위)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        count (int): 필요한 코드 수
+
+    Returns:
+        list: 업체코드 목록 (예: ['AUTO0000000001', 'AUTO0000000002'])
+
+    Example:
+        >>> with transaction(conn):
+        ...     codes = allocate_company_codes(conn, len(new_names))
+
+    Note:
+        - 일련번호 블록을 UPDATE 한 번으로 예약하고, 블록 범위에 이미 있는 코드를
+          인덱스 범위 조회 한 번으로 확인 (행마다 조회하지 않음)
+        - 사용자가 같은 형식의 코드를 직접 넣어 둔 경우에만 건너뛰고 모자란 만큼 다시 예약
+        - 쓰기 트랜잭션 안에서 예약하므로 동시에 적재해도 같은 블록을 받지 않음
+          (트랜잭션 밖에서 호출하면 자체 트랜잭션으로 실행)
+        - 롤백되면 예약도 함께 취소됨
+    """
+    if count <= 0:
+        return []
+    if not conn.in_transaction:
+        with transaction(conn):
+            return allocate_company_codes(conn, count)
+
+    ensure_code_sequences(conn)
+    codes = []
+    while len(codes) < count:
+        needed = count - len(codes)
+        conn.execute(
+            "UPDATE code_sequences SET next_value = next_value + ? WHERE name = 'company'", (needed,)
+        )
+        end = conn.execute("SELECT next_value FROM code_sequences WHERE name = 'company'").fetchone()[0]
+        block = [
+            f"{COMPANY_CODE_PREFIX}{value:0{COMPANY_CODE_DIGITS}d}" for value in range(end - needed, end)
+        ]
+        taken = {
+            row[0] for row in conn.execute(
+                "SELECT company_code FROM companies WHERE company_code BETWEEN ? AND ?",
+                (block[0], block[-1])
+            )
+        }
+        codes.extend(code for code in block if code not in taken)
+    return codes
+
+
 def parse_revenue(revenue_str):
     """
     매출액 문자열을 숫자로 변환
@@ -130,6 +204,38 @@ def parse_revenue(revenue_str):
         return None
 
 
+@contextmanager
+def transaction(conn):
+    """
+    명시적 쓰기 트랜잭션 (BEGIN IMMEDIATE ~ COMMIT)
+    
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        
+    Example:
+        >>> with transaction(conn):
+        ...     conn.execute("UPDATE companies SET ...")
+        
+    Note:
+        - autocommit 연결(isolation_level=None)과 기본 연결 모두에서 동작
+        - 블록 안에서 예외가 발생하면 전체 롤백 후 예외를 다시 발생
+        - 진행 중인 암묵적 트랜잭션이 있으면 먼저 커밋
+        - 쓰기 잠금을 얻기까지 기다린 시간은 crm_db_lock_wait_seconds 지표로 기록
+    """
+    if conn.in_transaction:
+        conn.commit()
+    started = time.perf_counter()
+    conn.execute("BEGIN IMMEDIATE")
+    LOCK_WAIT.observe(time.perf_counter() - started)
+    try:
+        yield conn
+    except Exception:
+        conn.rollback()
+        raise
+    else:
+        conn.commit()
+
+
 # 데이터베이스 연결 정보 조회 함수들
 
 def get_table_info(conn):
@@ -186,12 +292,21 @@ def check_database_health(conn):
         
     Returns:
         dict: 데이터베이스 상태 정보
+            (foreign_key_errors는 백그라운드 무결성 점검이 저장한 문제 행 수,
+            integrity_checked_at은 마지막 전체 점검 완료 시각 - 아직 없으면 None,
+            integrity_error는 점검 스레드의 마지막 오류 {'check', 'error', 'at'} - 없으면 None)
         
     Example:
         >>> health = check_database_health(conn)
         >>> print(health['status'])
         'healthy'
+        
+    Note:
+        - 외래키 위반은 테이블을 다시 읽지 않고 database.integrity 점검 결과만 조회
+          (PRAGMA foreign_key_check는 전체 테이블을 읽으므로 큰 DB에서 느림)
     """
+    from .integrity import get_integrity_status
+
     try:
         # 기본 연결 테스트
         conn.execute("SELECT 1").fetchone()
@@ -208,13 +323,13 @@ def check_database_health(conn):
             if not result:
                 missing_tables.append(table)
         
-        # 외래키 제약 조건 확인
-        foreign_key_check = conn.execute("PRAGMA foreign_key_check").fetchall()
+        # 외래키 제약 조건 확인 (저장된 점검 결과)
+        integrity = get_integrity_status(conn)
         
         # 상태 판단
         if missing_tables:
             status = 'missing_tables'
-        elif foreign_key_check:
+        elif integrity['issues']:
             status = 'foreign_key_errors'
         else:
             status = 'healthy'
@@ -222,7 +337,9 @@ def check_database_health(conn):
         return {
             'status': status,
             'missing_tables': missing_tables,
-            'foreign_key_errors': len(foreign_key_check),
+            'foreign_key_errors': integrity['issues'],
+            'integrity_checked_at': integrity['checked_at'],
+            'integrity_error': integrity['last_error'],
             'connection_ok': True
         }
         
@@ -0,0 +1,144 @@
+"""
+database/dates.py
+
+상담 날짜 정규화 유틸리티
+- 엑셀/직접 입력/문자열 등 다양한 날짜 값을 ISO 형식(YYYY-MM-DD)으로 변환
+- pandas 벡터 연산으로 한 번에 처리 (행 단위 루프 없음)
+"""
+
+from datetime import date
+
+import pandas as pd
+
+
+# 화면 표시 및 기존 consultation_date 컬럼 형식
+DISPLAY_DATE_FORMAT = "%Y.%m.%d"
+
+# 정렬/인덱스용 consultation_day 컬럼 형식
+ISO_DATE_FORMAT = "%Y-%m-%d"
+
+# 엑셀 날짜 일련번호 기준일 및 허용 범위 (1954년 ~ 2119년)
+EXCEL_EPOCH = "1899-12-30"
+EXCEL_SERIAL_RANGE = (20000, 80000)
+
+
+def parse_dates(values):
+    """
+    날짜 값들을 Timestamp로 일괄 변환
+
+    Args:
+        values (iterable): 날짜 값 (Timestamp, datetime, 문자열, 엑셀 일련번호 등)
+
+    Returns:
+        pandas.Series: datetime64 시리즈 (변환 실패 값은 NaT)
+
+    Example:
+        >>> parse_dates(["2024.03.05", "2024-3-5", "20240305", 45356]).dt.strftime("%Y-%m-%d").tolist()
+        ['2024-03-05', '2024-03-05', '2024-03-05', '2024-03-05']
+
+    Note:
+        - 지원 형식: YYYY.MM.DD, YYYY-MM-DD, YYYY/MM/DD, YYYYMMDD, 끝의 '.' 허용
+        - 시간이 포함된 값은 날짜만 사용
+        - 그 외 형식은 개별 파싱으로 한 번 더 시도
+    """
+    raw = pd.Series(values, dtype=object)
+    if isinstance(values, pd.Series):
+        raw.index = values.index
+    result = pd.Series(pd.NaT, index=raw.index, dtype="datetime64[ns]")
+    if raw.empty:
+        return result
+
+    # 1) 이미 날짜 타입인 값
+    is_datetime = raw.map(lambda v: isinstance(v, date))
+    if is_datetime.any():
+        result[is_datetime] = pd.to_datetime(raw[is_datetime], errors='coerce').dt.normalize()
+
+    # 2) 엑셀 날짜 일련번호
+    numeric = pd.to_numeric(raw.where(~is_datetime), errors='coerce')
+    low, high = EXCEL_SERIAL_RANGE
+    is_serial = numeric.between(low, high)
+    if is_serial.any():
+        result[is_serial] = pd.to_datetime(
+            numeric[is_serial].astype(float).round(), unit='D', origin=EXCEL_EPOCH
+        )
+
+    # 3) 문자열: 구분자를 '-'로 통일한 뒤 고정 형식으로 파싱
+    is_text = ~is_datetime & ~is_serial & raw.notna()
+    if is_text.any():
+        original = raw[is_text].astype(str).str.strip()
+        text = (
+            original.str.split(' ').str[0]
+            .str.replace(r'\.0$', '', regex=True)
+            .str.rstrip('.')
+            .str.replace(r'[./]', '-', regex=True)
+            .str.replace(r'^(\d{4})(\d{2})(\d{2})$', r'\1-\2-\3', regex=True)
+        )
+        parsed = pd.to_datetime(text, format=ISO_DATE_FORMAT, errors='coerce')
+
+        # 고정 형식으로 실패한 소수 값만 개별 파싱
+        leftover = parsed.isna() & (text != '')
+        if leftover.any():
+            parsed[leftover] = original[leftover].map(_parse_single)
+        result[is_text] = parsed
+
+    return result
+
+
+def _parse_single(value):
+    """고정 형식으로 파싱되지 않은 날짜 문자열 하나를 파싱 (실패 시 NaT)"""
+    try:
+        parsed = pd.to_datetime(value)
+    except (ValueError, TypeError, OverflowError):
+        return pd.NaT
+    if pd.isna(parsed) or not (1900 <= parsed.year <= 2200):
+        return pd.NaT
+    return parsed.normalize()
+
+
+def normalize_dates(values):
+    """
+    날짜 값들을 consultation_day 저장 형식(YYYY-MM-DD)으로 일괄 변환
+
+    Args:
+        values (iterable): 날짜 값
+
+    Returns:
+        pandas.Series: ISO 날짜 문자열 시리즈 (변환 실패 값은 None)
+    """
+    parsed = parse_dates(values)
+    return parsed.dt.strftime(ISO_DATE_FORMAT).astype(object).where(parsed.notna(), None)
+
+
+def format_display_dates(values):
+    """
+    날짜 값들을 consultation_date 표시 형식(YYYY.MM.DD)으로 일괄 변환
+
+    Args:
+        values (iterable): 날짜 값
+
+    Returns:
+        pandas.Series: 표시용 날짜 문자열 (변환 실패 값은 원래 값을 문자열로 유지)
+
+    Note:
+        - 엑셀 업로드 시 Timestamp가 그대로 저장되어 형식이 섞이는 문제 방지
+    """
+    raw = pd.Series(values, dtype=object)
+    if isinstance(values, pd.Series):
+        raw.index = values.index
+    parsed = parse_dates(raw)
+    display = parsed.dt.strftime(DISPLAY_DATE_FORMAT)
+    fallback = raw.where(raw.isna(), raw.astype(str))
+    return display.where(parsed.notna(), fallback).astype(object).where(raw.notna(), None)
+
+
+def to_iso_date(value):
+    """
+    단일 날짜 값을 ISO 형식으로 변환 (직접 입력용)
+
+    Args:
+        value (any): 날짜 값
+
+    Returns:
+        str or None: YYYY-MM-DD 문자열
+    """
+    return normalize_dates([value]).iloc[0]
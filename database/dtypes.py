@@ -0,0 +1,101 @@
+"""
+database/dtypes.py
+
+조회 화면용 DataFrame 메모리 절감 (dtype 정책)
+- 반복 값이 많은 컬럼(업종, 고객구분, 직위, 획득경로, 통합 조회의 기업명 등)은 category
+- 그 밖의 텍스트는 Arrow 문자열 (pyarrow가 없으면 그대로 둠)
+- 종업원수/ID 같은 정수 컬럼은 값 범위에 맞는 nullable 정수(Int8~Int64)
+
+Note:
+    - 읽기 전용 화면/내보내기에만 적용 (편집 그리드에 category를 쓰면 새 값을 입력할 수 없음)
+    - 매출액(REAL)은 float32로 줄이면 원 단위 정밀도가 깨지므로 float64 유지
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+
+# CRM_COMPACT_DTYPES=0 이면 변환하지 않음 (비교 측정용)
+COMPACT_DTYPES = os.environ.get('CRM_COMPACT_DTYPES', '1') != '0'
+
+# category 후보 컬럼 (영문 원본 컬럼명과 한글 별칭)
+CATEGORY_COLUMNS = {
+    'company_name', 'industry', 'customer_category', 'position', 'acquisition_path',
+    'customer_name', 'project_name',
+    '기업명', '업종', '고객구분', '직위', '획득경로', '고객명', '프로젝트명'
+}
+
+# 고유값 비율이 이 값 이하일 때만 category로 변환 (기업 목록의 기업명처럼 값이 모두 다르면 오히려 커짐)
+CATEGORY_MAX_RATIO = 0.5
+
+# 정수로 줄일 컬럼 (SQLite에서 NULL이 섞이면 float64로 읽힘)
+INTEGER_COLUMNS = {'id', 'employee_count', '종업원수'}
+
+
+def _arrow_string_dtype():
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return None
+    return 'string[pyarrow]'
+
+
+STRING_DTYPE = _arrow_string_dtype()
+
+
+def _is_text(series):
+    return pd.api.types.is_object_dtype(series) or pd.api.types.is_string_dtype(series)
+
+
+def _to_nullable_int(series):
+    values = series.dropna()
+    if not pd.api.types.is_numeric_dtype(series) or not np.array_equal(values, values.round()):
+        return series
+    if values.empty:
+        return series.astype('Int8')
+    low, high = values.min(), values.max()
+    for dtype in ('Int8', 'Int16', 'Int32', 'Int64'):
+        info = np.iinfo(dtype.lower())
+        if info.min <= low and high <= info.max:
+            return series.astype(dtype)
+    return series
+
+
+def compact_frame(df):
+    """
+    조회 결과 DataFrame의 dtype을 메모리가 적은 형식으로 변환
+
+    Args:
+        df (pandas.DataFrame): 조회 결과 (object/str/float64 컬럼)
+
+    Returns:
+        pandas.DataFrame: 변환된 DataFrame (같은 값, 다른 dtype)
+
+    Example:
+        >>> df = compact_frame(repo_df)
+        >>> df['업종'].dtype
+        CategoricalDtype(...)
+    """
+    if df.empty:
+        return df
+
+    converted = {}
+    for col in df.columns:
+        series = df[col]
+        if col in INTEGER_COLUMNS:
+            converted[col] = _to_nullable_int(series)
+        elif _is_text(series):
+            if col in CATEGORY_COLUMNS and series.nunique() <= len(series) * CATEGORY_MAX_RATIO:
+                converted[col] = series.astype('category')
+            elif STRING_DTYPE and pd.api.types.infer_dtype(series, skipna=True) in ('string', 'empty'):
+                converted[col] = series.astype(STRING_DTYPE)
+    if not converted:
+        return df
+    return df.assign(**converted)
+
+
+def frame_memory(df):
+    """DataFrame 메모리 사용량 (바이트, 문자열 내용 포함)"""
+    return int(df.memory_usage(deep=True).sum())
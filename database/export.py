@@ -0,0 +1,312 @@
+"""
+database/export.py
+
+데이터 내보내기
+- 다운로드/CLI에서 공통으로 사용하는 내보내기 쿼리
+- 엑셀(xlsx), CSV, Parquet 파일 생성
+- 아카이브 DB가 있으면 보관된 상담 이력까지 내보내고 백업에 별도 시트로 포함
+"""
+
+import io
+import os
+import pandas as pd
+
+from .archive import ARCHIVE_SCHEMA, attach_archive, consultations_source, has_archive
+from .metrics import EXPORT_BYTES
+
+
+# 내보내기 데이터셋별 (시트명, 쿼리)
+# 연락처/상담 이력은 LEFT JOIN (기업이 없는 행도 업체코드와 함께 내보냄)
+# {consultations}는 상담 이력 조회 대상 (export_query()에서 운영 테이블 또는 운영 + 아카이브로 채움)
+EXPORT_QUERIES = {
+    'integrated': ("통합데이터", '''
+        SELECT
+            c.company_name as 기업명,
+            c.revenue_2024 as 매출액_2024,
+            c.industry as 업종,
+            c.employee_count as 종업원수,
+            c.address as 주소,
+            c.products as 상품,
+            c.customer_category as 고객구분,
+            cc.customer_name as 고객명,
+            cc.position as 직위,
+            cc.phone as 전화,
+            cc.email as 이메일,
+            cc.acquisition_path as 획득경로,
+            con.consultation_date as 상담날짜,
+            con.consultation_content as 상담내역,
+            con.project_name as 프로젝트명
+        FROM companies c
+        LEFT JOIN customer_contacts cc ON c.company_id = cc.company_id
+        LEFT JOIN {consultations} con ON c.company_id = con.company_id
+        ORDER BY c.company_name, con.consultation_day DESC
+    '''),
+    'companies': ("기업목록", '''
+        SELECT
+            company_name as 기업명,
+            company_code as 업체코드,
+            revenue_2024 as 매출액_2024,
+            industry as 업종,
+            employee_count as 종업원수,
+            address as 주소,
+            products as 상품,
+            customer_category as 고객구분,
+            created_at as 등록일,
+            updated_at as 수정일
+        FROM companies
+        ORDER BY company_name
+    '''),
+    'contacts': ("고객연락처", '''
+        SELECT
+            c.company_name as 기업명,
+            cc.company_code as 업체코드,
+            cc.customer_name as 고객명,
+            cc.position as 직위,
+            cc.phone as 전화,
+            cc.email as 이메일,
+            cc.acquisition_path as 획득경로,
+            cc.created_at as 등록일,
+            cc.updated_at as 수정일
+        FROM customer_contacts cc
+        LEFT JOIN companies c ON cc.company_id = c.company_id
+        ORDER BY c.company_name, cc.customer_name
+    '''),
+    'consultations': ("상담이력", '''
+        SELECT
+            c.company_name as 기업명,
+            con.company_code as 업체코드,
+            con.customer_name as 고객명,
+            con.consultation_date as 상담날짜,
+            con.consultation_content as 상담내역,
+            con.project_name as 프로젝트명,
+            con.created_at as 등록일,
+            con.updated_at as 수정일
+        FROM {consultations} con
+        LEFT JOIN companies c ON con.company_id = c.company_id
+        ORDER BY con.consultation_day DESC, c.company_name
+    ''')
+}
+
+# 원본 테이블 백업용 (시트명, 테이블명)
+BACKUP_TABLES = [
+    ("기업목록", 'companies'),
+    ("고객연락처", 'customer_contacts'),
+    ("상담이력", 'consultations')
+]
+
+# 아카이브 DB 원본 테이블 백업 시트명
+ARCHIVE_BACKUP_SHEET = "보관상담이력"
+
+EXPORT_FORMATS = ['xlsx', 'csv', 'parquet']
+
+
+def export_query(conn, dataset, include_archive=None):
+    """
+    내보내기 데이터셋의 시트명과 쿼리
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        dataset (str): 'integrated', 'companies', 'contacts', 'consultations'
+        include_archive (bool): 보관된 상담 이력 포함 여부 (None이면 아카이브가 있을 때 포함)
+
+    Returns:
+        tuple: (시트명, 쿼리)
+
+    Note:
+        - 내보내기/백업은 아카이브로 옮긴 상담 이력까지 포함 (화면 조회는 include_archive=False)
+    """
+    sheet_name, query = EXPORT_QUERIES[dataset]
+    if include_archive is None:
+        include_archive = has_archive(conn)
+    if include_archive:
+        attach_archive(conn)
+    return sheet_name, query.format(consultations=consultations_source(include_archive))
+
+
+def backup_queries(conn):
+    """
+    전체 백업용 (시트명, 쿼리) 목록 (통합 데이터 + 원본 테이블 + 아카이브 원본 테이블)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        list: [(시트명, 쿼리)]
+    """
+    queries = [export_query(conn, 'integrated')]
+    queries.extend((sheet_name, f"SELECT * FROM main.{table}") for sheet_name, table in BACKUP_TABLES)
+    if has_archive(conn):
+        queries.append((ARCHIVE_BACKUP_SHEET, f"SELECT * FROM {ARCHIVE_SCHEMA}.consultations"))
+    return queries
+
+
+def read_export(conn, dataset):
+    """
+    내보내기 데이터셋 조회
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        dataset (str): 'integrated', 'companies', 'contacts', 'consultations'
+
+    Returns:
+        pandas.DataFrame: 한글 컬럼명으로 된 데이터 (상담 이력은 보관된 이력 포함)
+    """
+    _, query = export_query(conn, dataset)
+    return pd.read_sql_query(query, conn)
+
+
+def read_backup(conn):
+    """
+    전체 백업용 시트 구성 (통합 데이터 + 원본 테이블, 아카이브가 있으면 보관상담이력 시트 추가)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: {시트명: DataFrame}
+    """
+    return {sheet_name: pd.read_sql_query(query, conn) for sheet_name, query in backup_queries(conn)}
+
+
+def create_excel_file(dataframes_dict):
+    """
+    여러 시트를 가진 엑셀 파일 생성
+
+    Args:
+        dataframes_dict (dict): {시트명: DataFrame}
+
+    Returns:
+        bytes: xlsx 파일 내용
+    """
+    output = io.BytesIO()
+    with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
+        for sheet_name, df in dataframes_dict.items():
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+
+            # 워크시트 포맷팅
+            workbook = writer.book
+            worksheet = writer.sheets[sheet_name]
+
+            # 헤더 포맷
+            header_format = workbook.add_format({
+                'bold': True,
+                'text_wrap': True,
+                'valign': 'top',
+                'fg_color': '#D7E4BC',
+                'border': 1
+            })
+
+            # 헤더 적용
+            for col_num, value in enumerate(df.columns.values):
+                worksheet.write(0, col_num, value, header_format)
+
+            # 열 너비 자동 조정
+            for i, col in enumerate(df.columns):
+                max_length = max(
+                    df[col].astype(str).str.len().max() if not df.empty else 0,
+                    len(str(col))
+                )
+                worksheet.set_column(i, i, min(max_length + 2, 50))
+
+    data = output.getvalue()
+    EXPORT_BYTES.inc(len(data), format='xlsx')
+    return data
+
+
+def write_export(dataframes_dict, path, fmt='xlsx'):
+    """
+    데이터를 파일로 저장
+
+    Args:
+        dataframes_dict (dict): {시트명: DataFrame}
+        path (str): 저장 경로 (xlsx는 파일, csv/parquet는 시트가 여럿이면 시트명을 붙인 파일들)
+        fmt (str): 'xlsx', 'csv', 'parquet'
+
+    Returns:
+        list: (생성된 파일 경로, 바이트 수) 목록
+
+    Note:
+        - CSV는 엑셀 호환을 위해 utf-8-sig로 저장
+        - Parquet는 pyarrow 패키지가 필요
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"지원하지 않는 형식입니다: {fmt}")
+
+    if fmt == 'xlsx':
+        with open(path, 'wb') as f:
+            f.write(create_excel_file(dataframes_dict))
+        return [(path, os.path.getsize(path))]
+
+    base, ext = os.path.splitext(path)
+    ext = ext or f".{fmt}"
+    written = []
+    for sheet_name, df in dataframes_dict.items():
+        target = f"{base}{ext}" if len(dataframes_dict) == 1 else f"{base}_{sheet_name}{ext}"
+        if fmt == 'csv':
+            df.to_csv(target, index=False, encoding='utf-8-sig')
+        else:
+            try:
+                df.to_parquet(target, index=False)
+            except ImportError as e:
+                raise ImportError("Parquet 내보내기에는 pyarrow 패키지가 필요합니다.") from e
+        size = os.path.getsize(target)
+        EXPORT_BYTES.inc(size, format=fmt)
+        written.append((target, size))
+    return written
+
+
+# API 페이지 조회용 (테이블, 정렬 키, 쿼리) - 키 기준 페이지네이션
+PAGE_QUERIES = {
+    'companies': ('company_code', '''
+        SELECT * FROM companies
+        WHERE company_code > ?
+        ORDER BY company_code
+        LIMIT ?
+    '''),
+    'contacts': ('id', '''
+        SELECT cc.*, c.company_name
+        FROM customer_contacts cc
+        LEFT JOIN companies c ON c.company_id = cc.company_id
+        WHERE cc.id > ?
+        ORDER BY cc.id
+        LIMIT ?
+    '''),
+    'consultations': ('id', '''
+        SELECT con.*, c.company_name
+        FROM consultations con
+        LEFT JOIN companies c ON c.company_id = con.company_id
+        WHERE con.id > ?
+        ORDER BY con.id
+        LIMIT ?
+    ''')
+}
+
+
+def fetch_page(conn, dataset, after=None, limit=1000):
+    """
+    키 기준 페이지 조회 (OFFSET 없이 기본키 인덱스 범위 스캔)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        dataset (str): 'companies', 'contacts', 'consultations'
+        after (str or int): 이전 페이지의 마지막 키 (None이면 처음부터)
+        limit (int): 최대 행 수
+
+    Returns:
+        tuple: (행 dict 목록, 다음 페이지 키 또는 None)
+
+    Example:
+        >>> rows, next_after = fetch_page(conn, 'companies', limit=500)
+        >>> rows, next_after = fetch_page(conn, 'companies', after=next_after, limit=500)
+    """
+    key, query = PAGE_QUERIES[dataset]
+    if after is None:
+        after = '' if key == 'company_code' else 0
+    elif key == 'id':
+        after = int(after)
+
+    cursor = conn.execute(query, (after, limit))
+    columns = [col[0] for col in cursor.description]
+    rows = [dict(zip(columns, row)) for row in cursor.fetchall()]
+    next_after = rows[-1][key] if len(rows) == limit else None
+    return rows, next_after
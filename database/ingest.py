@@ -0,0 +1,832 @@
+"""
+database/ingest.py
+
+기업/연락처/상담 이력 일괄 적재
+- 엑셀 업로드, CLI, API가 공통으로 사용하는 쓰기 경로
+- 컬럼 단위 변환 후 executemany / INSERT ... SELECT로 한 번에 저장
+- 기업명 → 업체코드 조회는 배치당 한 번만 수행
+- 여러 파일/시트는 프로세스 풀에서 읽고 검증한 뒤 한 연결에서 배치 단위로 저장
+- 저장 전 계획(plan_ingest)으로 신규/업데이트/변경 없음/오류 건수를 미리 계산하고, 저장은 그 계획을 그대로 사용
+"""
+
+import functools
+import io
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from .connection import transaction, allocate_company_codes
+from .pragmas import BULK_LOAD_MIN_ROWS, bulk_load
+from .dates import normalize_dates, format_display_dates
+from .metrics import record_ingest
+from .validation import validate_frame, build_error_report, build_contact_keys
+
+
+# 여러 파일 적재 시 한 트랜잭션으로 저장할 최대 행 수
+INGEST_BATCH_ROWS = 50000
+
+# 적재 대상별 필드 (DB 컬럼명 기준)
+IMPORT_FIELDS = {
+    'companies': {
+        'required': ['company_name'],
+        'optional': ['company_code', 'revenue_2024', 'industry', 'employee_count',
+                     'address', 'products', 'customer_category']
+    },
+    'contacts': {
+        'required': ['company_name', 'customer_name'],
+        'optional': ['position', 'phone', 'email', 'acquisition_path']
+    },
+    'consultations': {
+        'required': ['company_name', 'consultation_content'],
+        'optional': ['customer_name', 'consultation_date', 'project_name']
+    }
+}
+
+# 파일 헤더 → 필드 자동 매칭에 사용하는 별칭
+FIELD_ALIASES = {
+    'company_name': ['기업명', '회사명', '업체명', 'company_name'],
+    'company_code': ['업체코드', '기업코드', 'company_code'],
+    'revenue_2024': ['매출액_2024', '매출액', 'revenue_2024', 'revenue'],
+    'industry': ['업종', 'industry'],
+    'employee_count': ['종업원수', '직원수', 'employee_count'],
+    'address': ['주소', 'address'],
+    'products': ['상품', '상품/서비스', 'products'],
+    'customer_category': ['고객구분', 'customer_category'],
+    'customer_name': ['고객명', '담당자', '담당자명', 'customer_name'],
+    'position': ['직위', '직책', 'position'],
+    'phone': ['전화', '전화번호', '연락처', 'phone'],
+    'email': ['이메일', 'email', 'e-mail'],
+    'acquisition_path': ['획득경로', 'acquisition_path'],
+    'consultation_date': ['상담날짜', '날짜', '상담일', 'consultation_date'],
+    'consultation_content': ['상담내역', '상담내용', 'consultation_content'],
+    'project_name': ['프로젝트명', '프로젝트', 'project_name']
+}
+
+
+def guess_mapping(columns, kind):
+    """
+    파일 헤더로 필드 매핑 추정
+
+    Args:
+        columns (iterable): 파일 컬럼명 목록
+        kind (str): 'companies', 'contacts', 'consultations'
+
+    Returns:
+        dict: {필드: 파일 컬럼명} (찾지 못한 필드는 제외)
+
+    Example:
+        >>> guess_mapping(["회사명", "매출액"], "companies")
+        {'company_name': '회사명', 'revenue_2024': '매출액'}
+    """
+    normalized = {str(col).strip().lower(): col for col in columns}
+    fields = IMPORT_FIELDS[kind]['required'] + IMPORT_FIELDS[kind]['optional']
+    mapping = {}
+    for field in fields:
+        for alias in FIELD_ALIASES.get(field, [field]):
+            if alias.lower() in normalized:
+                mapping[field] = normalized[alias.lower()]
+                break
+    return mapping
+
+
+def _text_column(df, mapping, field):
+    """매핑된 컬럼을 문자열(또는 None) 값으로 변환, 매핑이 없으면 None"""
+    column = mapping.get(field)
+    if column is None:
+        return pd.Series(None, index=df.index, dtype=object)
+    values = df[column]
+    if pd.api.types.is_float_dtype(values):
+        # 엑셀에서 실수로 읽힌 코드/전화번호 등의 '.0' 제거
+        values = values.astype(object).map(lambda v: int(v) if pd.notna(v) and float(v).is_integer() else v)
+    text = values.astype(str).str.strip()
+    return text.astype(object).where(values.notna() & (text != ''), None)
+
+
+def parse_revenue_column(values):
+    """
+    매출액 컬럼 일괄 변환 (parse_revenue의 벡터 버전)
+
+    Args:
+        values (pandas.Series): 매출액 데이터
+
+    Returns:
+        pandas.Series: float 값 (변환 실패 시 None)
+    """
+    cleaned = values.astype(str).str.replace(',', '', regex=False).str.replace(' ', '', regex=False)
+    parsed = pd.to_numeric(cleaned.where(values.notna()), errors='coerce')
+    return parsed.astype(object).where(parsed.notna(), None)
+
+
+def _integer_column(values):
+    """정수 컬럼 일괄 변환 (변환 실패 시 None)"""
+    parsed = pd.to_numeric(values, errors='coerce')
+    return parsed.astype(object).where(parsed.notna(), None).map(
+        lambda v: int(v) if v is not None else None
+    )
+
+
+def prepare_frame(df, mapping, kind):
+    """
+    업로드 DataFrame을 DB 필드 기준 DataFrame으로 변환
+
+    Args:
+        df (pandas.DataFrame): 원본 데이터
+        mapping (dict): {필드: 원본 컬럼명}
+        kind (str): 'companies', 'contacts', 'consultations'
+
+    Returns:
+        pandas.DataFrame: 필수 값이 비어 있지 않은 행만 남긴 정규화 데이터
+
+    Note:
+        - 필수 필드 매핑이 없으면 ValueError 발생
+        - 원본 행 번호는 인덱스로 유지
+    """
+    spec = IMPORT_FIELDS[kind]
+    missing = [field for field in spec['required'] if not mapping.get(field)]
+    if missing:
+        raise ValueError(f"필수 컬럼 매핑이 없습니다: {', '.join(missing)}")
+
+    prepared = pd.DataFrame(index=df.index)
+    for field in spec['required'] + spec['optional']:
+        if field == 'revenue_2024':
+            prepared[field] = (
+                parse_revenue_column(df[mapping[field]]) if mapping.get(field)
+                else pd.Series(None, index=df.index, dtype=object)
+            )
+        elif field == 'employee_count':
+            prepared[field] = (
+                _integer_column(df[mapping[field]]) if mapping.get(field)
+                else pd.Series(None, index=df.index, dtype=object)
+            )
+        elif field == 'consultation_date':
+            if mapping.get(field):
+                prepared['consultation_date'] = format_display_dates(df[mapping[field]])
+                prepared['consultation_day'] = normalize_dates(df[mapping[field]])
+            else:
+                prepared['consultation_date'] = None
+                prepared['consultation_day'] = None
+        else:
+            prepared[field] = _text_column(df, mapping, field)
+
+    if kind == 'contacts':
+        keys = build_contact_keys(prepared['customer_name'], prepared['phone'], prepared['email'])
+        prepared['contact_key'] = keys.astype(object).where(keys.notna(), None)
+
+    keep = pd.Series(True, index=prepared.index)
+    for field in spec['required']:
+        keep &= prepared[field].notna()
+    return prepared[keep]
+
+
+def lookup_company_codes(conn, company_names):
+    """
+    기업명 목록에 해당하는 기존 업체코드 조회 (한 번의 조인)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        company_names (iterable): 기업명
+
+    Returns:
+        dict: {기업명: 업체코드} (같은 이름이 여럿이면 가장 작은 코드)
+    """
+    conn.execute("CREATE TEMP TABLE IF NOT EXISTS lookup_names (company_name TEXT PRIMARY KEY)")
+    conn.execute("DELETE FROM temp.lookup_names")
+    conn.executemany(
+        "INSERT OR IGNORE INTO temp.lookup_names (company_name) VALUES (?)",
+        [(name,) for name in company_names]
+    )
+    code_map = dict(conn.execute('''
+        SELECT c.company_name, MIN(c.company_code)
+        FROM companies c
+        JOIN temp.lookup_names n ON n.company_name = c.company_name
+        GROUP BY c.company_name
+    ''').fetchall())
+    conn.execute("DELETE FROM temp.lookup_names")
+    return code_map
+
+
+def resolve_company_codes(conn, company_names):
+    """
+    기업명 목록을 업체코드로 변환하고 없는 기업은 일괄 생성
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 내부에서 호출)
+        company_names (pandas.Series): 기업명
+
+    Returns:
+        tuple: (업체코드 Series, 새로 생성된 기업 수)
+    """
+    unique_names = pd.unique(company_names.dropna())
+    code_map = lookup_company_codes(conn, unique_names)
+
+    new_names = [name for name in unique_names if name not in code_map]
+    new_companies = list(zip(allocate_company_codes(conn, len(new_names)), new_names))
+    if new_companies:
+        conn.executemany(
+            "INSERT INTO companies (company_code, company_name) VALUES (?, ?)",
+            new_companies
+        )
+        code_map.update({name: code for code, name in new_companies})
+
+    return company_names.map(code_map), len(new_companies)
+
+
+def _records(frame, columns):
+    """DataFrame을 executemany용 튜플 목록으로 변환"""
+    return list(frame[columns].itertuples(index=False, name=None))
+
+
+def _track_ingest(kind):
+    """적재 함수의 처리 행 수/소요 시간을 지표로 기록하는 데코레이터"""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(conn, df, mapping):
+            started = time.perf_counter()
+            result = func(conn, df, mapping)
+            record_ingest(kind, len(df), time.perf_counter() - started)
+            return result
+        return wrapper
+    return decorator
+
+
+@_track_ingest('companies')
+def import_companies(conn, df, mapping):
+    """
+    기업 목록 일괄 저장 (업체코드 기준 upsert)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        df (pandas.DataFrame): 업로드 데이터
+        mapping (dict): {필드: 원본 컬럼명}, company_code 매핑이 없으면 자동 생성
+
+    Returns:
+        dict: {'inserted': 신규 건수, 'updated': 업데이트 건수, 'skipped': 제외 건수}
+
+    Note:
+        - 업체코드가 비어 있으면 기존 기업명과 일치하는 기업의 코드를 사용
+        - 업데이트 시 매핑된 컬럼만 덮어씀
+        - 같은 업체코드가 여러 번 나오면 마지막 행 기준
+    """
+    prepared = prepare_frame(df, mapping, 'companies')
+    skipped = len(df) - len(prepared)
+    if prepared.empty:
+        return {'inserted': 0, 'updated': 0, 'skipped': skipped}
+
+    columns = ['company_code', 'company_name', 'revenue_2024', 'industry',
+               'employee_count', 'address', 'products', 'customer_category']
+    update_columns = ['company_name'] + [
+        field for field in columns[2:] if mapping.get(field)
+    ]
+
+    with transaction(conn):
+        # 업체코드가 없는 행은 같은 기업명을 가진 기존 기업의 코드 사용
+        missing_code = prepared['company_code'].isna()
+        if missing_code.any():
+            existing = lookup_company_codes(conn, pd.unique(prepared.loc[missing_code, 'company_name']))
+            prepared.loc[missing_code, 'company_code'] = (
+                prepared.loc[missing_code, 'company_name'].map(existing)
+            )
+
+        missing_code = prepared['company_code'].isna()
+        if missing_code.any():
+            # 파일 안에서 같은 기업명은 같은 코드 사용
+            new_names = pd.unique(prepared.loc[missing_code, 'company_name'])
+            new_codes = dict(zip(new_names, allocate_company_codes(conn, len(new_names))))
+            prepared.loc[missing_code, 'company_code'] = (
+                prepared.loc[missing_code, 'company_name'].map(new_codes)
+            )
+        prepared = prepared.drop_duplicates('company_code', keep='last')
+
+        conn.execute(f'''
+            CREATE TEMP TABLE IF NOT EXISTS staging_companies AS
+            SELECT {", ".join(columns)} FROM companies WHERE 0
+        ''')
+        conn.execute("DELETE FROM temp.staging_companies")
+        conn.executemany(
+            f"INSERT INTO temp.staging_companies ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            _records(prepared, columns)
+        )
+
+        updated = conn.execute('''
+            SELECT COUNT(*) FROM temp.staging_companies s
+            JOIN companies c ON c.company_code = s.company_code
+        ''').fetchone()[0]
+
+        update_sql = ", ".join(f"{col} = excluded.{col}" for col in update_columns)
+        conn.execute(f'''
+            INSERT INTO companies ({", ".join(columns)})
+            SELECT {", ".join(columns)} FROM temp.staging_companies WHERE true
+            ON CONFLICT(company_code) DO UPDATE SET
+            {update_sql}, updated_at = CURRENT_TIMESTAMP
+        ''')
+        conn.execute("DELETE FROM temp.staging_companies")
+
+    return {'inserted': len(prepared) - updated, 'updated': updated, 'skipped': skipped}
+
+
+@_track_ingest('contacts')
+def import_contacts(conn, df, mapping):
+    """
+    고객 연락처 일괄 저장 (기업별 연락처 식별 키 기준 upsert)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        df (pandas.DataFrame): 업로드 데이터
+        mapping (dict): {필드: 원본 컬럼명}
+
+    Returns:
+        dict: {'inserted': 신규 건수, 'merged': 기존 연락처에 합친 건수,
+               'new_companies': 새로 만든 기업 수, 'skipped': 제외 건수}
+
+    Note:
+        - 식별 키는 정규화된 이메일, 없으면 전화번호 + 이름 (database.validation.build_contact_keys)
+        - 같은 기업에 같은 키의 연락처가 있으면 값이 있는 컬럼만 덮어씀 (빈 값으로 지우지 않음)
+        - 키가 없는 행(이메일/전화 모두 없음)은 그대로 추가
+    """
+    prepared = prepare_frame(df, mapping, 'contacts')
+    skipped = len(df) - len(prepared)
+    if prepared.empty:
+        return {'inserted': 0, 'merged': 0, 'new_companies': 0, 'skipped': skipped}
+
+    columns = ['company_code', 'contact_key', 'customer_name', 'position', 'phone', 'email', 'acquisition_path']
+    fill_sql = ",\n".join(
+        f"{col} = COALESCE(excluded.{col}, {col})" for col in ['position', 'phone', 'email', 'acquisition_path']
+    )
+    with transaction(conn):
+        prepared['company_code'], new_companies = resolve_company_codes(conn, prepared['company_name'])
+        before = conn.execute("SELECT COUNT(*) FROM customer_contacts").fetchone()[0]
+        conn.executemany(f'''
+            INSERT INTO customer_contacts ({", ".join(columns)}) VALUES ({", ".join('?' * len(columns))})
+            ON CONFLICT(company_code, contact_key) WHERE contact_key IS NOT NULL DO UPDATE SET
+            customer_name = excluded.customer_name,
+            {fill_sql},
+            updated_at = CURRENT_TIMESTAMP
+        ''', _records(prepared, columns))
+        inserted = conn.execute("SELECT COUNT(*) FROM customer_contacts").fetchone()[0] - before
+
+    return {
+        'inserted': inserted, 'merged': len(prepared) - inserted,
+        'new_companies': new_companies, 'skipped': skipped
+    }
+
+
+@_track_ingest('consultations')
+def import_consultations(conn, df, mapping):
+    """
+    상담 이력 일괄 저장
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        df (pandas.DataFrame): 업로드 데이터
+        mapping (dict): {필드: 원본 컬럼명}
+
+    Returns:
+        dict: {'inserted': 저장 건수, 'new_companies': 새로 만든 기업 수, 'skipped': 제외 건수}
+
+    Note:
+        - 날짜는 표시용(consultation_date)과 정렬용(consultation_day)으로 함께 저장
+    """
+    prepared = prepare_frame(df, mapping, 'consultations')
+    skipped = len(df) - len(prepared)
+    if prepared.empty:
+        return {'inserted': 0, 'new_companies': 0, 'skipped': skipped}
+
+    columns = ['company_code', 'customer_name', 'consultation_date', 'consultation_day',
+               'consultation_content', 'project_name']
+    with transaction(conn):
+        prepared['company_code'], new_companies = resolve_company_codes(conn, prepared['company_name'])
+        conn.executemany(
+            f"INSERT INTO consultations ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+            _records(prepared, columns)
+        )
+
+    return {'inserted': len(prepared), 'new_companies': new_companies, 'skipped': skipped}
+
+
+# 적재 대상별 함수
+IMPORTERS = {
+    'companies': import_companies,
+    'contacts': import_contacts,
+    'consultations': import_consultations
+}
+
+
+def read_upload_file(source, sheet_name=0):
+    """
+    업로드 파일(xlsx/xls/csv) 읽기
+
+    Args:
+        source (str or file-like): 파일 경로 또는 업로드된 파일 객체
+        sheet_name (str or int): 엑셀 시트 (기본값: 첫 번째 시트, None이면 모든 시트)
+
+    Returns:
+        pandas.DataFrame: 파일 데이터 (sheet_name=None인 엑셀은 {시트명: DataFrame})
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    if str(name).lower().endswith('.csv'):
+        # 전화번호/업체코드의 앞자리 0 보존을 위해 문자열로 읽음
+        return pd.read_csv(source, dtype=str)
+    return pd.read_excel(source, sheet_name=sheet_name)
+
+
+def read_upload_columns(source, sheet_name=0):
+    """
+    업로드 파일의 헤더(컬럼명)만 읽기 (매핑 추정용)
+
+    Args:
+        source (str or file-like): 파일 경로 또는 업로드된 파일 객체
+        sheet_name (str or int): 엑셀 시트 (기본값: 첫 번째 시트)
+
+    Returns:
+        list: 컬럼명 목록 (앞뒤 공백 제거)
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    if str(name).lower().endswith('.csv'):
+        df = pd.read_csv(source, dtype=str, nrows=0)
+    else:
+        df = pd.read_excel(source, sheet_name=sheet_name, nrows=0)
+    if hasattr(source, 'seek'):
+        source.seek(0)
+    return [str(column).strip() for column in df.columns]
+
+
+def _parse_upload(name, data, sheet_name, kind, mapping, validate=True):
+    """
+    (프로세스 풀 작업) 파일 하나를 읽어 시트별로 매핑된 컬럼만 남기고 검증
+
+    Returns:
+        list: (시트명, 정상 행 DataFrame 또는 None, 오류 보고서 DataFrame 또는 None, 제외 사유) 목록
+    """
+    source = name
+    if data is not None:
+        source = io.BytesIO(data)
+        source.name = name
+    try:
+        frames = read_upload_file(source, sheet_name=sheet_name)
+    except Exception as e:
+        return [(None, None, None, f"파일 읽기 오류: {e}")]
+    if not isinstance(frames, dict):
+        # CSV 또는 시트 하나만 읽은 경우
+        frames = {sheet_name: frames}
+
+    parsed = []
+    for sheet, df in frames.items():
+        df = df.rename(columns=lambda column: str(column).strip())
+        missing = [
+            mapping[field] for field in IMPORT_FIELDS[kind]['required']
+            if field in mapping and mapping[field] not in df.columns
+        ]
+        if missing:
+            parsed.append((sheet, None, None, f"필수 컬럼 없음: {', '.join(missing)}"))
+            continue
+        # 선택 컬럼이 없는 시트는 빈 값으로 채움
+        df = df.reindex(columns=list(dict.fromkeys(mapping.values())))
+        errors = None
+        if validate:
+            df, errors = validate_frame(df, mapping, IMPORT_FIELDS[kind]['required'])
+            errors = build_error_report(errors, name, sheet)
+        parsed.append((sheet, df, errors, None))
+    return parsed
+
+
+def _parse_sources(sources, kind, mapping, sheet_name, max_workers, validate):
+    """업로드 파일을 읽어 (파일명, _parse_upload 결과)를 파일 순서대로 반환 (2개 이상이면 프로세스 풀)"""
+    tasks = []
+    for source in sources:
+        if isinstance(source, str):
+            tasks.append((source, None))
+        else:
+            tasks.append((getattr(source, 'name', 'upload.xlsx'), source.getvalue()))
+
+    workers = min(len(tasks), max_workers or os.cpu_count() or 1)
+    if workers <= 1:
+        return [(name, _parse_upload(name, data, sheet_name, kind, mapping, validate)) for name, data in tasks]
+
+    # Streamlit 서버 같은 멀티스레드 프로세스에서 fork하지 않도록 spawn 사용
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as executor:
+        results = executor.map(
+            _parse_upload,
+            [name for name, _ in tasks], [data for _, data in tasks],
+            [sheet_name] * len(tasks), [kind] * len(tasks), [mapping] * len(tasks),
+            [validate] * len(tasks)
+        )
+        return list(zip([name for name, _ in tasks], results))
+
+
+def _stage_rows(conn, table, source_table, prepared, columns):
+    """계획 계산용 임시 테이블에 (row_id + 컬럼) 저장 (원본 테이블의 컬럼 affinity 유지)"""
+    conn.execute(f'''
+        CREATE TEMP TABLE IF NOT EXISTS {table} AS
+        SELECT NULL AS row_id, {", ".join(columns)} FROM {source_table} WHERE 0
+    ''')
+    conn.execute(f"DELETE FROM temp.{table}")
+    conn.executemany(
+        f"INSERT INTO temp.{table} (row_id, {', '.join(columns)}) VALUES (?, {', '.join('?' * len(columns))})",
+        [(int(row_id),) + row for row_id, row in zip(prepared.index, _records(prepared, columns))]
+    )
+
+
+def _plan_companies(conn, prepared, mapping):
+    """기업 행별 처리 방식: 업체코드(없으면 기존 기업명) 기준으로 기존 기업과 조인해 매핑된 컬럼 비교"""
+    codes = prepared['company_code'].copy()
+    missing = codes.isna()
+    if missing.any():
+        codes[missing] = prepared.loc[missing, 'company_name'].map(
+            lookup_company_codes(conn, pd.unique(prepared.loc[missing, 'company_name']))
+        )
+
+    # 같은 업체코드(새 기업은 같은 기업명)가 여러 번 나오면 마지막 행만 저장됨
+    keys = codes.where(codes.notna(), '\x00' + prepared['company_name'].astype(str))
+    last = ~keys.duplicated(keep='last')
+    actions = pd.Series('skipped', index=prepared.index, dtype=object)
+    actions[last & codes.isna()] = 'insert'
+
+    # 필터한 행의 인덱스에 맞춰 코드 지정 (빈 프레임에 Series를 assign하면 Series 인덱스 전체가 들어옴)
+    known = last & codes.notna()
+    existing = prepared[known].assign(company_code=codes[known])
+    if existing.empty:
+        return actions
+
+    compare = ['company_name'] + [
+        field for field in ['revenue_2024', 'industry', 'employee_count', 'address', 'products', 'customer_category']
+        if mapping.get(field)
+    ]
+    _stage_rows(conn, 'plan_companies', 'companies', existing, ['company_code'] + compare)
+    changed = " OR ".join(f"s.{col} IS NOT c.{col}" for col in compare)
+    rows = conn.execute(f'''
+        SELECT s.row_id, c.company_code IS NULL, {changed}
+        FROM temp.plan_companies s
+        LEFT JOIN companies c ON c.company_code = s.company_code
+    ''').fetchall()
+    conn.execute("DELETE FROM temp.plan_companies")
+
+    joined = pd.DataFrame(rows, columns=['row_id', 'is_new', 'is_changed']).set_index('row_id')
+    planned = pd.Series('unchanged', index=joined.index, dtype=object)
+    planned[joined['is_changed'] == 1] = 'update'
+    planned[joined['is_new'] == 1] = 'insert'
+    actions[planned.index] = planned
+    return actions
+
+
+def _plan_contacts(conn, prepared):
+    """연락처 행별 처리 방식: 식별 키로 기존 연락처와 조인 (키가 없는 행은 전체 컬럼 중복 여부로 판단)"""
+    unkeyed = prepared['contact_key'].isna()
+    actions = pd.Series('insert', index=prepared.index, dtype=object)
+    if unkeyed.any():
+        actions[unkeyed] = _plan_appends(conn, prepared[unkeyed], 'contacts')
+
+    keyed = prepared[~unkeyed]
+    codes = keyed['company_name'].map(lookup_company_codes(conn, pd.unique(keyed['company_name'])))
+    existing = keyed[codes.notna()].assign(company_code=codes[codes.notna()])
+    if existing.empty:
+        return actions
+
+    columns = ['company_code', 'contact_key', 'customer_name', 'position', 'phone', 'email', 'acquisition_path']
+    _stage_rows(conn, 'plan_contacts', 'customer_contacts', existing, columns)
+    changed = " OR ".join(
+        ["s.customer_name IS NOT t.customer_name"]
+        + [f"COALESCE(s.{col}, t.{col}) IS NOT t.{col}" for col in ['position', 'phone', 'email', 'acquisition_path']]
+    )
+    rows = conn.execute(f'''
+        SELECT s.row_id, t.id IS NULL, {changed}
+        FROM temp.plan_contacts s
+        LEFT JOIN customer_contacts t ON t.company_code = s.company_code AND t.contact_key = s.contact_key
+    ''').fetchall()
+    conn.execute("DELETE FROM temp.plan_contacts")
+
+    joined = pd.DataFrame(rows, columns=['row_id', 'is_new', 'is_changed']).set_index('row_id')
+    planned = pd.Series('unchanged', index=joined.index, dtype=object)
+    planned[joined['is_changed'] == 1] = 'update'
+    planned[joined['is_new'] == 1] = 'insert'
+    actions[planned.index] = planned
+    return actions
+
+
+# 연락처(식별 키 없음)/상담 이력: 모든 컬럼이 같은 행이 이미 있으면 다시 저장하지 않음
+APPEND_TABLES = {
+    'contacts': ('customer_contacts',
+                 ['company_code', 'customer_name', 'position', 'phone', 'email', 'acquisition_path']),
+    'consultations': ('consultations',
+                      ['company_code', 'customer_name', 'consultation_date', 'consultation_day',
+                       'consultation_content', 'project_name'])
+}
+
+
+def _plan_appends(conn, prepared, kind):
+    """연락처/상담 이력 행별 처리 방식: 기존 행과 전체 컬럼 조인으로 중복 여부 판단"""
+    table, columns = APPEND_TABLES[kind]
+    actions = pd.Series('insert', index=prepared.index, dtype=object)
+
+    # 기존 기업에 속한 행만 중복 후보 (새 기업의 행은 모두 신규)
+    codes = prepared['company_name'].map(lookup_company_codes(conn, pd.unique(prepared['company_name'])))
+    existing = prepared[codes.notna()].assign(company_code=codes[codes.notna()])
+    if existing.empty:
+        return actions
+
+    _stage_rows(conn, f'plan_{table}', table, existing, columns)
+    matched = " AND ".join(
+        f"t.{col} = s.{col}" if col == 'company_code' else f"t.{col} IS s.{col}" for col in columns
+    )
+    duplicates = [row_id for (row_id,) in conn.execute(f'''
+        SELECT DISTINCT s.row_id
+        FROM temp.plan_{table} s
+        JOIN {table} t ON {matched}
+    ''')]
+    conn.execute(f"DELETE FROM temp.plan_{table}")
+
+    actions[duplicates] = 'unchanged'
+    return actions
+
+
+# 계획의 행별 처리 방식 ('skipped': 필수 값 없음/파일 안 중복으로 저장되지 않는 행)
+PLAN_ACTIONS = ['insert', 'update', 'unchanged', 'skipped']
+
+
+def plan_frame(conn, frame, mapping, kind):
+    """
+    검증된 행의 처리 방식 계산 (DB는 바꾸지 않음)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        frame (pandas.DataFrame): 검증을 통과한 행 (원본 컬럼)
+        mapping (dict): {필드: 원본 컬럼명}
+        kind (str): 'companies', 'contacts', 'consultations'
+
+    Returns:
+        pandas.Series: frame 인덱스별 처리 방식 (PLAN_ACTIONS)
+
+    Note:
+        - plan_ingest()와 API 적재가 같은 기준으로 insert/update만 저장
+          (같은 배치를 다시 보내도 상담 이력이 중복 저장되지 않음)
+    """
+    actions = pd.Series('skipped', index=frame.index, dtype=object)
+    prepared = prepare_frame(frame, mapping, kind) if not frame.empty else frame
+    if not prepared.empty:
+        if kind == 'companies':
+            planned = _plan_companies(conn, prepared, mapping)
+        elif kind == 'contacts':
+            planned = _plan_contacts(conn, prepared)
+        else:
+            planned = _plan_appends(conn, prepared, kind)
+        actions[planned.index] = planned
+    return actions
+
+# 미리보기에 보여줄 처리 방식별 예시 행 수
+PLAN_SAMPLE_ROWS = 5
+
+
+def plan_ingest(conn, sources, kind, mapping, sheet_name=None, max_workers=None, validate=True,
+                sample_rows=PLAN_SAMPLE_ROWS):
+    """
+    여러 파일/시트 적재 계획 계산 (dry-run, DB는 바꾸지 않음)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        sources (list): 파일 경로 또는 업로드된 파일 객체 목록 (xlsx/xls/csv)
+        kind (str): 'companies', 'contacts', 'consultations'
+        mapping (dict): 모든 파일에 적용할 {필드: 컬럼명}
+        sheet_name (str or int): 읽을 시트 (None이면 모든 시트)
+        max_workers (int): 읽기 프로세스 수 (기본값: CPU 수, 1이면 프로세스 풀 없이 실행)
+        validate (bool): 저장 전 검증/정규화 (database.validation)
+        sample_rows (int): 처리 방식별 예시 행 수
+
+    Returns:
+        dict: {
+            'kind', 'mapping',
+            'frame': 검증을 통과한 행 (원본 컬럼), 'actions': 행별 처리 방식 Series,
+            'counts': {'insert', 'update', 'unchanged', 'skipped', 'rejected'},
+            'samples': {처리 방식: 예시 DataFrame}, 'errors': 오류 행 보고서, 'sheets': 파일/시트별 결과
+        }
+
+    Example:
+        >>> plan = plan_ingest(conn, ["지점A.xlsx"], "companies", mapping)
+        >>> plan['counts']
+        {'insert': 12, 'update': 3, 'unchanged': 140, 'skipped': 0, 'rejected': 2}
+        >>> commit_ingest_plan(conn, plan)
+
+    Note:
+        - 기업: 업체코드(없으면 기존 기업명)로 기존 기업과 조인해 매핑된 컬럼이 다르면 update, 같으면 unchanged
+        - 연락처: 같은 기업에 같은 식별 키(이메일 또는 전화번호 + 이름)가 있으면 값이 달라질 때 update
+        - 상담 이력(과 식별 키가 없는 연락처): 같은 기업에 모든 컬럼이 같은 행이 이미 있으면 unchanged
+          (다시 올려도 중복 저장 안 함)
+        - 비교는 임시 테이블 조인 한 번으로 수행
+    """
+    # 파일마다 헤더 앞뒤 공백이 달라도 같은 매핑이 적용되도록 정리
+    mapping = {field: str(column).strip() for field, column in mapping.items() if column}
+    missing = [field for field in IMPORT_FIELDS[kind]['required'] if not mapping.get(field)]
+    if missing:
+        raise ValueError(f"필수 컬럼 매핑이 없습니다: {', '.join(missing)}")
+
+    frames = []
+    reports = []
+    sheets = []
+    for name, parsed in _parse_sources(sources, kind, mapping, sheet_name, max_workers, validate):
+        for sheet, df, errors, error in parsed:
+            rejected = 0 if errors is None else len(errors)
+            sheets.append({
+                'file': name, 'sheet': sheet, 'rows': 0 if df is None else len(df) + rejected,
+                'rejected': rejected, 'error': error
+            })
+            if rejected:
+                reports.append(errors)
+            if df is not None and not df.empty:
+                frames.append(df)
+
+    frame = (
+        pd.concat(frames, ignore_index=True) if frames
+        else pd.DataFrame(columns=list(dict.fromkeys(mapping.values())))
+    )
+    errors = pd.concat(reports, ignore_index=True) if reports else pd.DataFrame()
+
+    actions = plan_frame(conn, frame, mapping, kind)
+    counts = {action: int((actions == action).sum()) for action in PLAN_ACTIONS}
+    counts['rejected'] = len(errors)
+    samples = {action: frame[actions == action].head(sample_rows) for action in PLAN_ACTIONS}
+    samples['rejected'] = errors.head(sample_rows)
+
+    return {
+        'kind': kind, 'mapping': mapping,
+        'frame': frame, 'actions': actions,
+        'counts': counts, 'samples': samples,
+        'errors': errors, 'sheets': sheets
+    }
+
+
+def commit_ingest_plan(conn, plan, batch_rows=INGEST_BATCH_ROWS):
+    """
+    plan_ingest()로 계산한 계획 저장 (파일을 다시 읽거나 비교하지 않음)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        plan (dict): plan_ingest() 결과
+        batch_rows (int): 한 트랜잭션으로 저장할 최대 행 수
+
+    Returns:
+        dict: 적재 함수 결과 합계 + 'batches', 'unchanged', 'rejected', 'errors', 'sheets'
+            ('skipped'는 계획 기준: 필수 값 없음 + 파일 안 중복)
+
+    Note:
+        - insert/update로 계획된 행만 적재 함수에 넘김 (unchanged/skipped/rejected 행은 저장하지 않음)
+        - 미리보기 뒤에 다른 사용자가 같은 기업을 바꿨어도 업체코드 upsert라 결과는 일관됨
+        - 이미 저장된 배치는 이후 배치가 실패해도 유지
+        - 저장할 행이 BULK_LOAD_MIN_ROWS 이상이면 저장하는 동안만 bulk-load 프로필 적용 (database.pragmas)
+    """
+    importer = IMPORTERS[plan['kind']]
+    frame = plan['frame'][plan['actions'].isin(['insert', 'update'])]
+
+    totals = {'batches': 0}
+    with bulk_load(conn, BULK_LOAD_MIN_ROWS and len(frame) >= BULK_LOAD_MIN_ROWS):
+        for start in range(0, len(frame), batch_rows):
+            result = importer(conn, frame.iloc[start:start + batch_rows], plan['mapping'])
+            for key, value in result.items():
+                totals[key] = totals.get(key, 0) + value
+            totals['batches'] += 1
+
+    totals['skipped'] = plan['counts']['skipped']
+    totals['unchanged'] = plan['counts']['unchanged']
+    totals['rejected'] = plan['counts']['rejected']
+    totals['errors'] = plan['errors']
+    totals['sheets'] = plan['sheets']
+    return totals
+
+
+def ingest_files(conn, sources, kind, mapping, sheet_name=None, max_workers=None, batch_rows=INGEST_BATCH_ROWS,
+                 validate=True):
+    """
+    여러 파일/시트를 한 번에 적재 (읽기는 병렬, 저장은 한 연결에서 순서대로)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        sources (list): 파일 경로 또는 업로드된 파일 객체 목록 (xlsx/xls/csv)
+        kind (str): 'companies', 'contacts', 'consultations'
+        mapping (dict): 모든 파일에 적용할 {필드: 컬럼명}
+        sheet_name (str or int): 읽을 시트 (None이면 모든 시트)
+        max_workers (int): 읽기 프로세스 수 (기본값: CPU 수, 1이면 프로세스 풀 없이 실행)
+        batch_rows (int): 한 트랜잭션으로 저장할 최대 행 수
+        validate (bool): 저장 전 검증/정규화 (database.validation)
+
+    Returns:
+        dict: 적재 함수 결과 합계 + 'batches'
+            + 'unchanged': 기존 데이터와 같아서 저장하지 않은 행 수
+            + 'rejected': 검증 오류로 저장하지 않은 행 수
+            + 'errors': 오류 행 보고서 DataFrame (파일, 시트, 행, 오류, 원본 컬럼)
+            + 'sheets': [{'file', 'sheet', 'rows', 'rejected', 'error'}]
+
+    Example:
+        >>> result = ingest_files(conn, ["지점A.xlsx", "지점B.xlsx"], "consultations", mapping)
+        >>> result['inserted'], len(result['sheets'])
+        (5210, 6)
+
+    Note:
+        - plan_ingest() + commit_ingest_plan() (미리보기 없이 바로 저장)
+        - 시트는 파일 순서, 시트 순서대로 저장 (기업 upsert의 '마지막 행 기준'이 일정하게 유지됨)
+        - 필수 컬럼이 없는 시트(설명 시트 등)는 건너뛰고 사유를 기록
+        - 검증 오류가 있는 행만 제외하고 나머지 행은 저장
+    """
+    plan = plan_ingest(conn, sources, kind, mapping, sheet_name=sheet_name, max_workers=max_workers,
+                       validate=validate)
+    return commit_ingest_plan(conn, plan, batch_rows=batch_rows)
@@ -0,0 +1,395 @@
+"""
+database/integrity.py
+
+참조 무결성 점검 (고아 연락처/상담 이력)
+- 하위 테이블을 id 범위 단위(청크)로 나눠 점검하고 결과를 integrity_issues에 저장
+- 점검 위치(커서)를 integrity_checks에 저장하므로 중간에 멈춰도 다음 청크부터 이어서 점검
+- 백그라운드 스레드가 청크 사이에 쉬면서 점검 (앱 쓰기를 오래 막지 않음)
+- 점검 중 오류는 마지막 오류와 시각을 integrity_checks에 남겨 상태 확인에서 보여줌
+- 상태 확인(check_database_health)은 저장된 결과만 읽으므로 DB 크기와 관계없이 바로 반환
+
+Note:
+    - 외래키 강제(PRAGMA foreign_keys=ON)는 연결마다 켜지만 켜기 전에 들어간 행이나
+      마이그레이션 중(외래키 꺼짐)에 생긴 행은 검사하지 않으므로 이 점검으로 찾음
+    - 아카이브 DB의 상담 이력은 다른 파일이라 외래키 대상이 아님 (점검 제외)
+"""
+
+import logging
+import os
+import threading
+import time
+
+from .connection import transaction
+
+
+logger = logging.getLogger('crm.integrity')
+
+# 청크 사이 대기 시간 (초, 0이면 앱에서 점검 스레드를 시작하지 않음)
+# 청크마다 쓰기 잠금(BEGIN IMMEDIATE)을 잡으므로 앱 쓰기와 겹치지 않게 넉넉히 쉼
+INTEGRITY_INTERVAL = float(os.environ.get('CRM_INTEGRITY_INTERVAL', '30'))
+
+# 한 번에(한 트랜잭션에서) 점검하는 행 수
+INTEGRITY_CHUNK_ROWS = int(os.environ.get('CRM_INTEGRITY_CHUNK_ROWS', '10000'))
+
+# 전체 점검을 마친 뒤 다시 처음부터 점검하기까지의 간격 (초, 기본 하루)
+INTEGRITY_PASS_INTERVAL = int(os.environ.get('CRM_INTEGRITY_PASS_INTERVAL', '86400'))
+
+# 점검 대상 하위 테이블 (점검 이름, 테이블) - 업체코드가 기업에 없거나 company_id가 어긋난 행
+INTEGRITY_CHECKS = {
+    'contacts_company': 'customer_contacts',
+    'consultations_company': 'consultations',
+}
+
+# 문제 유형
+MISSING_COMPANY = '기업 없음'
+STALE_COMPANY_ID = 'company_id 불일치'
+
+
+def ensure_integrity_tables(conn):
+    """
+    무결성 점검 진행/결과 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS integrity_checks (
+            check_name TEXT PRIMARY KEY,
+            last_id INTEGER NOT NULL DEFAULT 0,
+            pass_started_at TIMESTAMP,
+            last_issues INTEGER,
+            last_completed_at TIMESTAMP,
+            last_seconds REAL,
+            last_error TEXT,
+            last_error_at TIMESTAMP
+        )
+    ''')
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(integrity_checks)")}
+    for column, column_type in (('last_error', 'TEXT'), ('last_error_at', 'TIMESTAMP')):
+        if column not in columns:
+            conn.execute(f"ALTER TABLE integrity_checks ADD COLUMN {column} {column_type}")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS integrity_issues (
+            check_name TEXT NOT NULL,
+            row_id INTEGER NOT NULL,
+            company_code TEXT,
+            company_id INTEGER,
+            problem TEXT NOT NULL,
+            found_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (check_name, row_id)
+        )
+    ''')
+
+
+def _check_state(conn, check_name):
+    """점검 커서와 진행 중인 점검 시작 시각"""
+    conn.execute("INSERT OR IGNORE INTO integrity_checks (check_name) VALUES (?)", (check_name,))
+    return conn.execute(
+        "SELECT last_id, pass_started_at FROM integrity_checks WHERE check_name = ?", (check_name,)
+    ).fetchone()
+
+
+def scan_chunk(conn, check_name, chunk_rows=None):
+    """
+    점검 하나의 다음 청크 점검 (id 범위 조회)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        check_name (str): INTEGRITY_CHECKS의 점검 이름
+        chunk_rows (int): 청크 행 수 (기본값: INTEGRITY_CHUNK_ROWS)
+
+    Returns:
+        dict: {'check': 점검 이름, 'scanned': 점검한 행 수, 'issues': 이번 청크에서 찾은 문제 수,
+               'completed': 이번 청크로 전체 점검이 끝났는지 여부}
+
+    Note:
+        - 청크 범위(이전 커서 초과 ~ 청크 마지막 id)의 이전 결과를 지우고 새 결과로 교체
+          (고친 행은 다음 점검에서 결과에서 빠짐)
+        - 마지막 청크에서는 이후 id의 결과(삭제된 행)까지 정리하고 커서를 처음으로 되돌림
+        - 청크를 마치면 저장된 마지막 오류를 지움
+    """
+    table = INTEGRITY_CHECKS[check_name]
+    chunk_rows = int(chunk_rows or INTEGRITY_CHUNK_ROWS)
+    ensure_integrity_tables(conn)
+
+    with transaction(conn):
+        last_id, pass_started_at = _check_state(conn, check_name)
+        if pass_started_at is None:
+            conn.execute('''
+                UPDATE integrity_checks SET pass_started_at = strftime('%Y-%m-%d %H:%M:%f', 'now')
+                WHERE check_name = ?
+            ''', (check_name,))
+
+        scanned, end_id = conn.execute(f'''
+            SELECT COUNT(*), MAX(id) FROM (
+                SELECT id FROM {table} WHERE id > ? ORDER BY id LIMIT ?
+            )
+        ''', (last_id, chunk_rows)).fetchone()
+        completed = scanned < chunk_rows
+
+        # 청크 범위의 이전 결과 교체 (마지막 청크는 범위 끝까지)
+        if completed:
+            conn.execute(
+                "DELETE FROM integrity_issues WHERE check_name = ? AND row_id > ?", (check_name, last_id)
+            )
+        else:
+            conn.execute(
+                "DELETE FROM integrity_issues WHERE check_name = ? AND row_id > ? AND row_id <= ?",
+                (check_name, last_id, end_id)
+            )
+
+        issues = 0
+        if scanned:
+            issues = conn.execute(f'''
+                INSERT INTO integrity_issues (check_name, row_id, company_code, company_id, problem)
+                SELECT ?, t.id, t.company_code, t.company_id,
+                       CASE WHEN c.company_id IS NULL THEN ? ELSE ? END
+                FROM {table} t
+                LEFT JOIN companies c ON c.company_code = t.company_code
+                WHERE t.id > ? AND t.id <= ?
+                  AND (
+                      (t.company_code IS NOT NULL AND c.company_id IS NULL)
+                      OR t.company_id IS NOT c.company_id
+                  )
+            ''', (check_name, MISSING_COMPANY, STALE_COMPANY_ID, last_id, end_id)).rowcount
+
+        if completed:
+            conn.execute('''
+                UPDATE integrity_checks SET
+                    last_id = 0,
+                    last_issues = (SELECT COUNT(*) FROM integrity_issues WHERE check_name = ?),
+                    last_completed_at = CURRENT_TIMESTAMP,
+                    last_seconds = round((julianday('now') - julianday(pass_started_at)) * 86400, 3),
+                    pass_started_at = NULL,
+                    last_error = NULL,
+                    last_error_at = NULL
+                WHERE check_name = ?
+            ''', (check_name, check_name))
+        else:
+            conn.execute('''
+                UPDATE integrity_checks SET last_id = ?, last_error = NULL, last_error_at = NULL
+                WHERE check_name = ?
+            ''', (end_id, check_name))
+
+    return {'check': check_name, 'scanned': scanned, 'issues': issues, 'completed': completed}
+
+
+def record_integrity_error(conn, check_names, error):
+    """
+    점검 실패를 integrity_checks에 기록 (다음 청크가 성공하면 지워짐)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        check_names (list): 실패한 점검 이름
+        error (Exception): 발생한 예외
+    """
+    if conn.in_transaction:
+        conn.rollback()
+    message = f"{type(error).__name__}: {error}"
+    ensure_integrity_tables(conn)
+    with transaction(conn):
+        for check_name in check_names:
+            conn.execute("INSERT OR IGNORE INTO integrity_checks (check_name) VALUES (?)", (check_name,))
+            conn.execute('''
+                UPDATE integrity_checks SET last_error = ?, last_error_at = CURRENT_TIMESTAMP
+                WHERE check_name = ?
+            ''', (message, check_name))
+
+
+def pending_checks(conn, pass_interval=None):
+    """
+    지금 점검할 대상
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        pass_interval (int): 전체 점검 간격 (초, 기본값: INTEGRITY_PASS_INTERVAL)
+
+    Returns:
+        list: 점검 이름 목록 (진행 중이거나, 점검한 적이 없거나, 마지막 완료 후 간격이 지난 점검)
+    """
+    pass_interval = INTEGRITY_PASS_INTERVAL if pass_interval is None else pass_interval
+    ensure_integrity_tables(conn)
+    state = {
+        name: (pass_started_at, due)
+        for name, pass_started_at, due in conn.execute('''
+            SELECT check_name, pass_started_at,
+                   last_completed_at IS NULL OR last_completed_at <= datetime('now', ?)
+            FROM integrity_checks
+        ''', (f'-{int(pass_interval)} seconds',))
+    }
+    return [
+        name for name in INTEGRITY_CHECKS
+        if name not in state or state[name][0] is not None or state[name][1]
+    ]
+
+
+def run_integrity_check(conn, checks=None, chunk_rows=None):
+    """
+    전체 점검을 지금 끝까지 실행 (진행 중인 점검은 이어서 마무리)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        checks (list): 점검 이름 (None이면 전체)
+        chunk_rows (int): 청크 행 수 (기본값: INTEGRITY_CHUNK_ROWS)
+
+    Returns:
+        list: [{'check', 'scanned', 'issues', 'chunks', 'seconds'}] - issues는 점검 후 남은 문제 수
+
+    Example:
+        >>> for result in run_integrity_check(conn):
+        ...     print(result['check'], result['issues'])
+    """
+    results = []
+    for check_name in checks or INTEGRITY_CHECKS:
+        started = time.perf_counter()
+        scanned = 0
+        chunks = 0
+        while True:
+            chunk = scan_chunk(conn, check_name, chunk_rows)
+            scanned += chunk['scanned']
+            chunks += 1
+            if chunk['completed']:
+                break
+        issues = conn.execute(
+            "SELECT COUNT(*) FROM integrity_issues WHERE check_name = ?", (check_name,)
+        ).fetchone()[0]
+        results.append({
+            'check': check_name,
+            'scanned': scanned,
+            'issues': issues,
+            'chunks': chunks,
+            'seconds': round(time.perf_counter() - started, 3)
+        })
+    return results
+
+
+def get_integrity_status(conn):
+    """
+    저장된 점검 결과 요약 (테이블을 다시 읽지 않음)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: {
+            'issues': 현재 저장된 문제 수,
+            'checked_at': 모든 점검이 한 번 이상 끝난 경우 가장 오래된 완료 시각 (로컬 시각), 아니면 None,
+            'last_error': 가장 최근 점검 오류 {'check', 'error', 'at'} (로컬 시각), 없으면 None,
+            'checks': [{'check', 'table', 'issues', 'completed_at', 'seconds', 'in_progress_id',
+                        'last_error', 'last_error_at'}]
+        }
+    """
+    ensure_integrity_tables(conn)
+    counts = dict(conn.execute(
+        "SELECT check_name, COUNT(*) FROM integrity_issues GROUP BY check_name"
+    ).fetchall())
+    state = {
+        row[0]: row[1:]
+        for row in conn.execute('''
+            SELECT check_name, last_id, pass_started_at, datetime(last_completed_at, 'localtime'), last_seconds,
+                   last_error, datetime(last_error_at, 'localtime')
+            FROM integrity_checks
+        ''')
+    }
+
+    checks = []
+    for name, table in INTEGRITY_CHECKS.items():
+        last_id, pass_started_at, completed_at, seconds, error, error_at = state.get(
+            name, (0, None, None, None, None, None)
+        )
+        checks.append({
+            'check': name,
+            'table': table,
+            'issues': counts.get(name, 0),
+            'completed_at': completed_at,
+            'seconds': seconds,
+            'in_progress_id': last_id if pass_started_at is not None else None,
+            'last_error': error,
+            'last_error_at': error_at
+        })
+
+    completed = [check['completed_at'] for check in checks]
+    errors = [check for check in checks if check['last_error']]
+    last_error = max(errors, key=lambda check: check['last_error_at'] or '', default=None)
+    return {
+        'issues': sum(counts.values()),
+        'checked_at': min(completed) if all(completed) else None,
+        'last_error': last_error and {
+            'check': last_error['check'], 'error': last_error['last_error'], 'at': last_error['last_error_at']
+        },
+        'checks': checks
+    }
+
+
+def get_integrity_issues(conn, limit=100):
+    """
+    저장된 문제 행 목록
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        limit (int): 최대 건수
+
+    Returns:
+        list: [(테이블, 행 id, 업체코드, company_id, 문제, 발견일시)] 점검/행 id 순
+    """
+    ensure_integrity_tables(conn)
+    tables = ' '.join(f"WHEN '{name}' THEN '{table}'" for name, table in INTEGRITY_CHECKS.items())
+    return conn.execute(f'''
+        SELECT CASE check_name {tables} END, row_id, company_code, company_id, problem,
+               datetime(found_at, 'localtime')
+        FROM integrity_issues
+        ORDER BY check_name, row_id
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def start_integrity_checker(db_path, interval=None, chunk_rows=None, pass_interval=None):
+    """
+    백그라운드 스레드에서 청크 단위로 무결성 점검
+
+    Args:
+        db_path (str): 데이터베이스 파일 경로 (스레드 전용 연결을 따로 엶)
+        interval (float): 청크 사이 대기 시간 (초, 기본값: INTEGRITY_INTERVAL)
+        chunk_rows (int): 청크 행 수 (기본값: INTEGRITY_CHUNK_ROWS)
+        pass_interval (int): 전체 점검 간격 (초, 기본값: INTEGRITY_PASS_INTERVAL)
+
+    Returns:
+        threading.Event: set()하면 중지
+
+    Note:
+        - 점검할 대상이 없으면 전체 점검 간격의 1/10(최소 interval)만큼 쉬고 다시 확인
+        - 작업 중 오류(잠금 대기 초과 등)는 로그와 integrity_checks에 남기고 다음 청크에서 다시 시도
+          (어떤 예외에도 스레드는 계속 동작)
+    """
+    from .connection import connect
+
+    interval = INTEGRITY_INTERVAL if interval is None else interval
+    pass_interval = INTEGRITY_PASS_INTERVAL if pass_interval is None else pass_interval
+    idle = max(interval, pass_interval / 10)
+    stop = threading.Event()
+
+    def loop():
+        conn = connect(db_path)
+        try:
+            wait = interval
+            while not stop.wait(wait):
+                # 실패를 기록할 점검 (대상 조회 단계에서 실패하면 전체)
+                failed = list(INTEGRITY_CHECKS)
+                try:
+                    pending = pending_checks(conn, pass_interval)
+                    for check_name in pending:
+                        failed = [check_name]
+                        scan_chunk(conn, check_name, chunk_rows)
+                    wait = interval if pending else idle
+                except Exception as e:
+                    logger.exception("참조 무결성 점검 실패")
+                    try:
+                        record_integrity_error(conn, failed, e)
+                    except Exception:
+                        logger.exception("참조 무결성 점검 오류 기록 실패")
+                    wait = interval
+        finally:
+            conn.close()
+
+    threading.Thread(target=loop, name='crm-integrity', daemon=True).start()
+    return stop
@@ -0,0 +1,485 @@
+"""
+database/maintenance.py
+
+데이터베이스 유지보수 작업
+- 스냅샷(온라인 백업)
+- VACUUM / ANALYZE / PRAGMA optimize / WAL 체크포인트 / 인덱스 재구성
+- 유지보수 스케줄러: 한가한 시간대이거나 크기/단편화 기준을 넘으면 자동 실행하고 maintenance_log에 기록
+"""
+
+import logging
+import os
+import sqlite3
+import threading
+import time
+from datetime import datetime
+
+
+logger = logging.getLogger('crm.maintenance')
+
+
+# 스케줄러 점검 주기 (초, 0이면 앱에서 스케줄러를 시작하지 않음)
+MAINTENANCE_INTERVAL = int(os.environ.get('CRM_MAINTENANCE_INTERVAL', '600'))
+
+# 한가한 시간대 (시작시-종료시, 로컬 시각 기준, 예: 2-5는 02:00~04:59)
+MAINTENANCE_HOURS = os.environ.get('CRM_MAINTENANCE_HOURS', '2-5')
+
+# WAL 파일이 이 크기(MB)를 넘으면 시간대와 관계없이 체크포인트(TRUNCATE)
+WAL_CHECKPOINT_MB = float(os.environ.get('CRM_MAINTENANCE_WAL_MB', '64'))
+
+# 마지막 ANALYZE 이후 변경 행 수가 이만큼 쌓이면 시간대와 관계없이 ANALYZE
+ANALYZE_AFTER_CHANGES = int(os.environ.get('CRM_MAINTENANCE_ANALYZE_CHANGES', '20000'))
+
+# 빈 페이지 비율이 이 값을 넘으면 한가한 시간대에 VACUUM
+VACUUM_FREELIST_RATIO = float(os.environ.get('CRM_MAINTENANCE_FREELIST_RATIO', '0.2'))
+
+# 스케줄러가 실행하는 작업 순서 (정리 → 체크포인트 → 통계 → 압축)
+MAINTENANCE_TASKS = ['cleanup', 'checkpoint', 'analyze', 'optimize', 'vacuum']
+
+
+def get_database_path(conn):
+    """
+    연결된 main 데이터베이스 파일 경로 조회
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        str: 파일 경로 (메모리 DB는 빈 문자열)
+    """
+    for _, name, path in conn.execute("PRAGMA database_list").fetchall():
+        if name == 'main':
+            return path or ''
+    return ''
+
+
+def get_file_sizes(conn):
+    """
+    데이터베이스 파일 및 WAL 파일 크기 조회
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: {'db_bytes': DB 파일 크기, 'wal_bytes': WAL 파일 크기}
+    """
+    path = get_database_path(conn)
+    db_bytes = os.path.getsize(path) if path and os.path.exists(path) else 0
+    wal_path = f"{path}-wal"
+    wal_bytes = os.path.getsize(wal_path) if path and os.path.exists(wal_path) else 0
+    return {'db_bytes': db_bytes, 'wal_bytes': wal_bytes}
+
+
+def snapshot_archive_path(dest_path):
+    """스냅샷과 함께 만드는 아카이브 스냅샷 경로 (<이름>_archive.db, database.archive 기본 경로 규칙과 같음)"""
+    return f"{os.path.splitext(dest_path)[0]}_archive.db"
+
+
+def snapshot(conn, dest_path=None):
+    """
+    운영 중인 데이터베이스의 일관된 스냅샷 파일 생성
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        dest_path (str): 저장 경로 (기본값: crm_snapshot_YYYYmmdd_HHMMSS.db)
+
+    Returns:
+        str: 생성된 스냅샷 경로
+
+    Note:
+        - sqlite3 온라인 백업 API 사용 (쓰기 중에도 일관성 보장)
+        - 아카이브 DB가 있으면 snapshot_archive_path() 경로에 함께 백업
+          (스냅샷 파일을 운영 DB로 쓰면 보관된 상담 이력도 그대로 이어짐)
+    """
+    from .archive import ARCHIVE_SCHEMA, attach_archive, has_archive
+
+    dest_path = dest_path or f"crm_snapshot_{datetime.now().strftime('%Y%m%d_%H%M%S')}.db"
+    target = sqlite3.connect(dest_path)
+    try:
+        conn.backup(target)
+    finally:
+        target.close()
+
+    if has_archive(conn):
+        attach_archive(conn)
+        target = sqlite3.connect(snapshot_archive_path(dest_path))
+        try:
+            conn.backup(target, name=ARCHIVE_SCHEMA)
+        finally:
+            target.close()
+    return dest_path
+
+
+def get_fragmentation(conn):
+    """
+    페이지 단편화 정보
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: {'page_count': 전체 페이지 수, 'freelist_count': 빈 페이지 수, 'freelist_ratio': 빈 페이지 비율}
+    """
+    page_count = conn.execute("PRAGMA page_count").fetchone()[0]
+    freelist_count = conn.execute("PRAGMA freelist_count").fetchone()[0]
+    return {
+        'page_count': page_count,
+        'freelist_count': freelist_count,
+        'freelist_ratio': freelist_count / page_count if page_count else 0.0
+    }
+
+
+def _run(conn, task, statements):
+    """유지보수 SQL 실행 후 소요 시간과 전후 파일 크기 반환"""
+    before = get_file_sizes(conn)
+    started = time.perf_counter()
+    for sql in statements:
+        if callable(sql):
+            sql(conn)
+        else:
+            conn.execute(sql).fetchall()
+    elapsed = time.perf_counter() - started
+    after = get_file_sizes(conn)
+    return {
+        'task': task,
+        'seconds': round(elapsed, 3),
+        'db_bytes_before': before['db_bytes'],
+        'db_bytes_after': after['db_bytes'],
+        'wal_bytes_before': before['wal_bytes'],
+        'wal_bytes_after': after['wal_bytes']
+    }
+
+
+def vacuum(conn):
+    """
+    VACUUM 후 ANALYZE 실행 (파일 압축 및 통계 갱신)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+
+    Returns:
+        dict: 작업 결과 (소요 시간, 전후 파일 크기)
+
+    Note:
+        - WAL 모드에서는 VACUUM 결과가 WAL에 먼저 쓰이므로 체크포인트까지 해야 파일 크기가 줄어듦
+    """
+    return _run(conn, 'vacuum', ["VACUUM", "ANALYZE", "PRAGMA wal_checkpoint(TRUNCATE)"])
+
+
+def analyze(conn):
+    """
+    ANALYZE 실행 (쿼리 플래너 통계 갱신)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: 작업 결과
+    """
+    return _run(conn, 'analyze', ["ANALYZE"])
+
+
+def rebuild_indexes(conn):
+    """
+    전체 인덱스 재구성 (REINDEX)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: 작업 결과
+    """
+    return _run(conn, 'reindex', ["REINDEX"])
+
+
+def optimize(conn):
+    """
+    PRAGMA optimize 실행 (통계가 오래된 테이블만 ANALYZE)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: 작업 결과
+    """
+    return _run(conn, 'optimize', ["PRAGMA optimize"])
+
+
+def checkpoint(conn):
+    """
+    WAL 체크포인트 후 WAL 파일 비우기 (wal_checkpoint(TRUNCATE))
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+
+    Returns:
+        dict: 작업 결과
+
+    Note:
+        - 읽는 중인 연결이 있으면 일부만 반영되고 WAL 크기가 그대로일 수 있음 (다음 점검에서 재시도)
+    """
+    return _run(conn, 'checkpoint', ["PRAGMA wal_checkpoint(TRUNCATE)"])
+
+
+def cleanup(conn):
+    """
+    보관 정책이 지난 변경 로그와 모든 소비자가 받아 간 삭제 기록 정리
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: 작업 결과
+    """
+    from .changelog import compact_change_log
+    from .sync import prune_tombstones
+
+    return _run(conn, 'cleanup', [compact_change_log, prune_tombstones])
+
+
+# 작업 이름별 실행 함수
+MAINTENANCE_FUNCTIONS = {
+    'cleanup': cleanup,
+    'checkpoint': checkpoint,
+    'analyze': analyze,
+    'optimize': optimize,
+    'vacuum': vacuum,
+    'reindex': rebuild_indexes
+}
+
+
+def ensure_maintenance_log(conn):
+    """
+    유지보수 기록 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS maintenance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            task TEXT NOT NULL,
+            reason TEXT,
+            seconds REAL,
+            db_bytes_before INTEGER,
+            db_bytes_after INTEGER,
+            wal_bytes_before INTEGER,
+            wal_bytes_after INTEGER,
+            change_seq INTEGER,
+            started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            error TEXT
+        )
+    ''')
+    # error 컬럼이 없던 기존 기록 테이블
+    if 'error' not in {row[1] for row in conn.execute("PRAGMA table_info(maintenance_log)")}:
+        conn.execute("ALTER TABLE maintenance_log ADD COLUMN error TEXT")
+
+
+def record_maintenance(conn, result, reason):
+    """
+    유지보수 작업 결과 기록
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        result (dict): vacuum()/analyze() 등의 결과 (실패한 작업은 'error' 포함)
+        reason (str): 실행 이유 (예: 'manual', 'WAL 80.0MB')
+    """
+    ensure_maintenance_log(conn)
+    change_seq = conn.execute("SELECT value FROM change_counter WHERE id = 1").fetchone()
+    conn.execute('''
+        INSERT INTO maintenance_log (
+            task, reason, seconds, db_bytes_before, db_bytes_after,
+            wal_bytes_before, wal_bytes_after, change_seq, error
+        ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', (
+        result['task'], reason, result['seconds'],
+        result['db_bytes_before'], result['db_bytes_after'],
+        result['wal_bytes_before'], result['wal_bytes_after'],
+        change_seq[0] if change_seq else 0, result.get('error')
+    ))
+
+
+def _in_maintenance_hours(now):
+    start, end = (int(part) for part in MAINTENANCE_HOURS.split('-'))
+    if start <= end:
+        return start <= now.hour < end
+    return now.hour >= start or now.hour < end
+
+
+def _last_run(conn, task):
+    """작업의 마지막 성공 실행 (실행일시, 당시 변경 번호), 기록이 없으면 (None, 0)"""
+    row = conn.execute('''
+        SELECT started_at, change_seq FROM maintenance_log
+        WHERE task = ? AND error IS NULL ORDER BY id DESC LIMIT 1
+    ''', (task,)).fetchone()
+    return (row[0], row[1] or 0) if row else (None, 0)
+
+
+def plan_maintenance(conn, now=None):
+    """
+    지금 실행해야 할 유지보수 작업 판단
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        now (datetime): 기준 시각 (기본값: 현재 로컬 시각)
+
+    Returns:
+        list: [(작업 이름, 실행 이유)] (MAINTENANCE_TASKS 순서)
+
+    Note:
+        - 시간대와 관계없이: WAL이 WAL_CHECKPOINT_MB 초과 → checkpoint,
+          마지막 ANALYZE 이후 변경이 ANALYZE_AFTER_CHANGES 이상 → analyze
+        - 한가한 시간대(MAINTENANCE_HOURS)에 하루 한 번: cleanup, checkpoint, optimize
+        - 한가한 시간대에 빈 페이지 비율이 VACUUM_FREELIST_RATIO 이상 → vacuum
+    """
+    now = now or datetime.now()
+    ensure_maintenance_log(conn)
+    in_window = _in_maintenance_hours(now)
+    today = now.strftime("%Y-%m-%d")
+    sizes = get_file_sizes(conn)
+    row = conn.execute("SELECT value FROM change_counter WHERE id = 1").fetchone()
+    change_seq = row[0] if row else 0
+
+    def ran_today(task):
+        # maintenance_log.started_at은 UTC이므로 로컬 날짜로 변환해서 비교
+        started_at, _ = _last_run(conn, task)
+        if started_at is None:
+            return False
+        local_day = conn.execute("SELECT date(?, 'localtime')", (started_at,)).fetchone()[0]
+        return local_day == today
+
+    planned = {}
+    wal_mb = sizes['wal_bytes'] / (1024 * 1024)
+    if wal_mb >= WAL_CHECKPOINT_MB:
+        planned['checkpoint'] = f"WAL {wal_mb:.1f}MB"
+    elif in_window and sizes['wal_bytes'] and not ran_today('checkpoint'):
+        planned['checkpoint'] = "한가한 시간대"
+
+    _, analyzed_seq = _last_run(conn, 'analyze')
+    if change_seq - analyzed_seq >= ANALYZE_AFTER_CHANGES:
+        planned['analyze'] = f"변경 {change_seq - analyzed_seq:,}건"
+
+    if in_window:
+        for task in ('cleanup', 'optimize'):
+            if not ran_today(task) and task not in planned:
+                planned[task] = "한가한 시간대"
+
+        fragmentation = get_fragmentation(conn)
+        if fragmentation['freelist_ratio'] >= VACUUM_FREELIST_RATIO and not ran_today('vacuum'):
+            planned['vacuum'] = f"빈 페이지 {fragmentation['freelist_ratio']:.0%}"
+
+    # VACUUM이 ANALYZE까지 실행하므로 중복 제거
+    if 'vacuum' in planned:
+        planned.pop('analyze', None)
+        planned.pop('optimize', None)
+
+    return [(task, planned[task]) for task in MAINTENANCE_TASKS if task in planned]
+
+
+def run_maintenance(conn, tasks=None, now=None):
+    """
+    유지보수 작업 실행 및 기록
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        tasks (list): 실행할 작업 이름 (None이면 plan_maintenance() 결과)
+        now (datetime): 계획 기준 시각
+
+    Returns:
+        list: 작업 결과 dict 목록 (각 결과에 'reason' 포함, 실패한 작업은 'error' 포함)
+
+    Example:
+        >>> for result in run_maintenance(conn):
+        ...     print(result['task'], result['reason'], result['seconds'])
+
+    Note:
+        - 작업이 실패해도(잠금 대기 초과 등) 오류 내용을 maintenance_log에 남기고 다음 작업 진행
+          (실패한 작업은 하루 한 번 기준에서 실행한 것으로 보지 않아 다음 점검에서 다시 시도)
+    """
+    if tasks is None:
+        planned = plan_maintenance(conn, now)
+    else:
+        planned = [(task, 'manual') for task in tasks]
+
+    results = []
+    for task, reason in planned:
+        before = get_file_sizes(conn)
+        started = time.perf_counter()
+        try:
+            result = MAINTENANCE_FUNCTIONS[task](conn)
+        except Exception as e:
+            if conn.in_transaction:
+                conn.rollback()
+            logger.warning("유지보수 작업 %s 실패: %s", task, e)
+            after = get_file_sizes(conn)
+            result = {
+                'task': task,
+                'seconds': round(time.perf_counter() - started, 3),
+                'db_bytes_before': before['db_bytes'],
+                'db_bytes_after': after['db_bytes'],
+                'wal_bytes_before': before['wal_bytes'],
+                'wal_bytes_after': after['wal_bytes'],
+                'error': f"{type(e).__name__}: {e}"
+            }
+        record_maintenance(conn, result, reason)
+        result['reason'] = reason
+        results.append(result)
+    return results
+
+
+def get_maintenance_log(conn, limit=50):
+    """
+    최근 유지보수 기록
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        limit (int): 최대 건수
+
+    Returns:
+        list: [(작업, 이유, 소요 시간(초), DB 크기 전/후, WAL 크기 전/후, 실행일시, 오류)] 최신 순
+            (오류는 실패한 작업만, 성공하면 None)
+    """
+    ensure_maintenance_log(conn)
+    return conn.execute('''
+        SELECT task, reason, seconds, db_bytes_before, db_bytes_after,
+               wal_bytes_before, wal_bytes_after, datetime(started_at, 'localtime'), error
+        FROM maintenance_log
+        ORDER BY id DESC
+        LIMIT ?
+    ''', (limit,)).fetchall()
+
+
+def start_maintenance_scheduler(db_path, interval=None):
+    """
+    백그라운드 스레드에서 주기적으로 유지보수 점검/실행
+
+    Args:
+        db_path (str): 데이터베이스 파일 경로 (스레드 전용 연결을 따로 엶)
+        interval (int): 점검 주기 (초, 기본값: MAINTENANCE_INTERVAL)
+
+    Returns:
+        threading.Event: set()하면 중지
+
+    Note:
+        - 앱 연결과 분리된 연결을 사용하므로 VACUUM/체크포인트가 앱 트랜잭션과 섞이지 않음
+        - 작업 실패는 maintenance_log에 오류와 함께 기록되고 다음 점검에서 다시 시도
+        - 점검 자체가 실패해도 스레드는 멈추지 않고 로그(crm.maintenance)에 남긴 뒤 다음 주기에 재시도
+    """
+    from .connection import connect
+
+    interval = MAINTENANCE_INTERVAL if interval is None else interval
+    stop = threading.Event()
+
+    def loop():
+        conn = connect(db_path)
+        try:
+            while not stop.wait(interval):
+                try:
+                    run_maintenance(conn)
+                except Exception:
+                    logger.exception("유지보수 점검 실패")
+        finally:
+            conn.close()
+
+    threading.Thread(target=loop, name='crm-maintenance', daemon=True).start()
+    return stop
@@ -0,0 +1,183 @@
+"""
+database/mappings.py
+
+업로드 컬럼 매핑 프로필
+- 파일 헤더 지문(fingerprint)별로 마지막에 사용한 {필드: 컬럼명} 매핑 저장
+- 같은 양식의 파일을 다시 올리면 저장된 매핑을 자동으로 적용
+"""
+
+import hashlib
+import json
+
+import pandas as pd
+
+from .connection import transaction
+
+
+def ensure_mapping_profiles(conn):
+    """
+    매핑 프로필 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS mapping_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            kind TEXT NOT NULL,
+            fingerprint TEXT NOT NULL,
+            name TEXT,
+            headers TEXT NOT NULL,
+            mapping TEXT NOT NULL,
+            use_count INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_used_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE (kind, fingerprint)
+        )
+    ''')
+
+
+def _normalize_headers(columns):
+    return sorted({str(column).strip().lower() for column in columns if str(column).strip()})
+
+
+def header_fingerprint(columns):
+    """
+    파일 헤더 지문 (컬럼 순서/대소문자/앞뒤 공백과 무관)
+
+    Args:
+        columns (iterable): 컬럼명 목록
+
+    Returns:
+        str: 16자리 16진수 문자열
+
+    Example:
+        >>> header_fingerprint(["기업명", "상담내역"]) == header_fingerprint([" 상담내역", "기업명"])
+        True
+    """
+    joined = "\x1f".join(_normalize_headers(columns))
+    return hashlib.sha1(joined.encode('utf-8')).hexdigest()[:16]
+
+
+def _row_to_profile(row):
+    profile_id, name, fingerprint, mapping, use_count, last_used_at = row
+    return {
+        'id': profile_id,
+        'name': name,
+        'fingerprint': fingerprint,
+        'mapping': json.loads(mapping),
+        'use_count': use_count,
+        'last_used_at': last_used_at
+    }
+
+
+def find_mapping_profile(conn, kind, columns):
+    """
+    파일 헤더에 맞는 저장된 매핑 프로필 찾기
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        kind (str): 'companies', 'contacts', 'consultations'
+        columns (iterable): 업로드 파일 컬럼명
+
+    Returns:
+        dict: {'id', 'name', 'fingerprint', 'mapping', 'use_count', 'last_used_at'} 또는 None
+
+    Note:
+        - 헤더 지문이 같은 프로필을 우선 사용
+        - 없으면 매핑된 컬럼이 모두 파일에 있는 프로필 중 가장 최근에 쓴 것 사용
+          (지점 파일에 참고용 컬럼이 하나 더 붙은 경우 등)
+        - 매핑 컬럼명은 현재 파일의 실제 컬럼명으로 바꿔서 반환
+    """
+    ensure_mapping_profiles(conn)
+    actual = {str(column).strip().lower(): column for column in columns}
+
+    row = conn.execute('''
+        SELECT id, name, fingerprint, mapping, use_count, last_used_at
+        FROM mapping_profiles WHERE kind = ? AND fingerprint = ?
+    ''', (kind, header_fingerprint(columns))).fetchone()
+    candidates = [row] if row else conn.execute('''
+        SELECT id, name, fingerprint, mapping, use_count, last_used_at
+        FROM mapping_profiles WHERE kind = ?
+        ORDER BY last_used_at DESC, id DESC
+    ''', (kind,)).fetchall()
+
+    for candidate in candidates:
+        profile = _row_to_profile(candidate)
+        headers = {field: str(column).strip().lower() for field, column in profile['mapping'].items()}
+        if all(header in actual for header in headers.values()):
+            profile['mapping'] = {field: actual[header] for field, header in headers.items()}
+            return profile
+    return None
+
+
+def save_mapping_profile(conn, kind, columns, mapping, name=None):
+    """
+    매핑 프로필 저장 (같은 헤더 지문이 있으면 매핑을 갱신하고 사용 횟수 증가)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        kind (str): 'companies', 'contacts', 'consultations'
+        columns (iterable): 업로드 파일 컬럼명
+        mapping (dict): {필드: 컬럼명}
+        name (str): 프로필 이름 (예: 첫 업로드 파일명, 갱신 시 None이면 기존 이름 유지)
+
+    Returns:
+        str: 헤더 지문
+    """
+    ensure_mapping_profiles(conn)
+    fingerprint = header_fingerprint(columns)
+    mapping = {field: str(column) for field, column in mapping.items() if column}
+    with transaction(conn):
+        conn.execute('''
+            INSERT INTO mapping_profiles (kind, fingerprint, name, headers, mapping, use_count)
+            VALUES (?, ?, ?, ?, ?, 1)
+            ON CONFLICT(kind, fingerprint) DO UPDATE SET
+                mapping = excluded.mapping,
+                name = COALESCE(excluded.name, mapping_profiles.name),
+                use_count = mapping_profiles.use_count + 1,
+                last_used_at = CURRENT_TIMESTAMP
+        ''', (
+            kind, fingerprint, name,
+            json.dumps(_normalize_headers(columns), ensure_ascii=False),
+            json.dumps(mapping, ensure_ascii=False)
+        ))
+    return fingerprint
+
+
+def get_mapping_profiles(conn, kind=None):
+    """
+    저장된 매핑 프로필 목록
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        kind (str): 적재 대상으로 제한 (None이면 전체)
+
+    Returns:
+        pandas.DataFrame: ID, 대상, 이름, 헤더지문, 매핑, 사용횟수, 최근사용
+    """
+    ensure_mapping_profiles(conn)
+    return pd.read_sql_query('''
+        SELECT id as ID, kind as 대상, name as 이름, fingerprint as 헤더지문,
+               mapping as 매핑, use_count as 사용횟수, last_used_at as 최근사용
+        FROM mapping_profiles
+        WHERE ? IS NULL OR kind = ?
+        ORDER BY last_used_at DESC, id DESC
+    ''', conn, params=(kind, kind))
+
+
+def delete_mapping_profile(conn, profile_id):
+    """
+    매핑 프로필 삭제
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        profile_id (int): 프로필 ID
+
+    Returns:
+        bool: 삭제 여부
+    """
+    ensure_mapping_profiles(conn)
+    with transaction(conn):
+        deleted = conn.execute("DELETE FROM mapping_profiles WHERE id = ?", (int(profile_id),)).rowcount
+    return deleted > 0
@@ -0,0 +1,389 @@
+"""
+database/merge.py
+
+중복 기업 병합 도구
+- 원본 업체코드의 연락처/상담 이력을 대상 업체코드로 일괄 이전
+- 테이블당 한 번의 UPDATE로 참조를 재지정 (행 단위 루프 없음)
+- 보관된(아카이브) 상담 이력도 같은 트랜잭션에서 재지정
+- 병합 감사 기록(company_merge_log) 보관
+"""
+
+import os
+import uuid
+import pandas as pd
+
+from .archive import ARCHIVE_SCHEMA, attach_archive, has_archive
+from .connection import transaction
+
+
+# 매핑 파일에서 인식하는 컬럼명 (원본, 대상)
+MAPPING_COLUMN_ALIASES = [
+    ('source_code', 'target_code'),
+    ('원본업체코드', '대상업체코드'),
+    ('원본코드', '대상코드'),
+]
+
+
+def ensure_merge_log(conn):
+    """
+    병합 감사 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS company_merge_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            batch_id TEXT NOT NULL,
+            source_code TEXT NOT NULL,
+            target_code TEXT NOT NULL,
+            source_name TEXT,
+            target_name TEXT,
+            contacts_moved INTEGER DEFAULT 0,
+            consultations_moved INTEGER DEFAULT 0,
+            source_snapshot TEXT,
+            merged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            contacts_deduplicated INTEGER DEFAULT 0
+        )
+    ''')
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(company_merge_log)")}
+    if 'contacts_deduplicated' not in columns:
+        conn.execute("ALTER TABLE company_merge_log ADD COLUMN contacts_deduplicated INTEGER DEFAULT 0")
+
+
+def resolve_merge_pairs(pairs):
+    """
+    병합 쌍 정리 (자기 자신 병합 제거, 연쇄 병합 해소, 순환 검출)
+
+    Args:
+        pairs (iterable): (원본 업체코드, 대상 업체코드) 튜플 목록
+
+    Returns:
+        tuple: (정리된 {원본: 최종 대상} dict, 건너뛴 항목 목록)
+
+    Example:
+        >>> resolve_merge_pairs([("A", "B"), ("B", "C")])
+        ({'A': 'C', 'B': 'C'}, [])
+
+    Note:
+        - 같은 원본이 서로 다른 대상으로 지정되면 첫 번째 항목만 사용
+        - A→B, B→A 같은 순환은 모두 건너뜀
+    """
+    mapping = {}
+    skipped = []
+
+    for source, target in pairs:
+        source = str(source).strip() if not pd.isna(source) else ""
+        target = str(target).strip() if not pd.isna(target) else ""
+
+        if not source or not target:
+            skipped.append((source, target, "업체코드 누락"))
+        elif source == target:
+            skipped.append((source, target, "자기 자신으로 병합"))
+        elif source in mapping and mapping[source] != target:
+            skipped.append((source, target, f"중복 지정 (이미 {mapping[source]}로 병합)"))
+        else:
+            mapping[source] = target
+
+    # 연쇄 병합(A→B→C)을 최종 대상으로 압축
+    resolved = {}
+    for source in mapping:
+        seen = {source}
+        target = mapping[source]
+        while target in mapping:
+            if target in seen:
+                target = None
+                break
+            seen.add(target)
+            target = mapping[target]
+
+        if target is None:
+            skipped.append((source, mapping[source], "순환 병합"))
+        else:
+            resolved[source] = target
+
+    return resolved, skipped
+
+
+def merge_companies(conn, pairs):
+    """
+    중복 기업 병합 (대량 처리 가능)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        pairs (iterable): (원본 업체코드, 대상 업체코드) 튜플 목록
+
+    Returns:
+        dict: 병합 결과 (batch_id, merged, contacts_moved, contacts_deduplicated, consultations_moved, skipped)
+            (contacts_deduplicated는 대상 기업에 같은 식별 키가 있어 옮기지 않고 삭제한 연락처,
+            consultations_moved는 보관된 상담 이력 포함)
+
+    Example:
+        >>> result = merge_companies(conn, [("AUTO12AB34CD", "1234567890")])
+        >>> print(result['merged'])
+        1
+
+    Note:
+        - 매핑을 임시 테이블에 적재한 뒤 테이블당 UPDATE 한 번으로 참조 재지정
+        - 대상 기업의 빈 속성은 원본 기업 값으로 보완
+        - 원본 기업은 삭제되고 스냅샷은 company_merge_log에 보관
+        - 전체가 하나의 트랜잭션이므로 실패 시 아무것도 반영되지 않음
+        - 아카이브 파일이 있으면 붙여서 archive.consultations의 업체코드/company_id도 대상 기업으로 변경
+          (보관된 이력이 삭제된 원본 기업을 가리키지 않도록, ATTACH는 트랜잭션 밖에서만 가능)
+    """
+    resolved, skipped = resolve_merge_pairs(pairs)
+    batch_id = uuid.uuid4().hex[:12]
+    result = {
+        'batch_id': batch_id,
+        'merged': 0,
+        'contacts_moved': 0,
+        'contacts_deduplicated': 0,
+        'consultations_moved': 0,
+        'skipped': skipped
+    }
+
+    if not resolved:
+        return result
+
+    ensure_merge_log(conn)
+    with_archive = has_archive(conn)
+    if with_archive:
+        attach_archive(conn)
+
+    # 보관된 상담 이력 건수 (아카이브가 있을 때만)
+    archived_join = f'''
+            LEFT JOIN (
+                SELECT company_id, COUNT(*) AS cnt FROM {ARCHIVE_SCHEMA}.consultations
+                WHERE company_id IN (SELECT source_id FROM temp.merge_map)
+                GROUP BY company_id
+            ) acon ON acon.company_id = m.source_id''' if with_archive else ""
+    archived_count = " + COALESCE(acon.cnt, 0)" if with_archive else ""
+
+    with transaction(conn):
+        conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS merge_map (
+                source_code TEXT PRIMARY KEY,
+                target_code TEXT NOT NULL,
+                source_id INTEGER
+            )
+        ''')
+        conn.execute("DELETE FROM temp.merge_map")
+        conn.executemany(
+            "INSERT INTO temp.merge_map (source_code, target_code) VALUES (?, ?)",
+            list(resolved.items())
+        )
+
+        # 존재하지 않는 원본/대상 업체코드 제외
+        missing = conn.execute('''
+            SELECT m.source_code, m.target_code,
+                   CASE WHEN s.company_code IS NULL THEN '원본 기업 없음' ELSE '대상 기업 없음' END
+            FROM temp.merge_map m
+            LEFT JOIN companies s ON s.company_code = m.source_code
+            LEFT JOIN companies t ON t.company_code = m.target_code
+            WHERE s.company_code IS NULL OR t.company_code IS NULL
+        ''').fetchall()
+        if missing:
+            skipped.extend(missing)
+            conn.executemany(
+                "DELETE FROM temp.merge_map WHERE source_code = ?",
+                [(row[0],) for row in missing]
+            )
+
+        # 하위 테이블은 company_id 인덱스로 찾음
+        conn.execute('''
+            UPDATE temp.merge_map SET source_id = (
+                SELECT company_id FROM companies WHERE company_code = merge_map.source_code
+            )
+        ''')
+
+        # 대상 기업(또는 같은 대상으로 합쳐지는 다른 원본 기업)에 같은 식별 키의 연락처가 있는
+        # 원본 연락처는 옮기지 않고 삭제 (기업별 contact_key 고유 인덱스 유지) - 감사 기록에서
+        # 이전 건수와 나눠 세도록 먼저 골라 둠
+        conn.execute('''
+            CREATE TEMP TABLE IF NOT EXISTS merge_duplicates (
+                id INTEGER PRIMARY KEY,
+                source_id INTEGER NOT NULL
+            )
+        ''')
+        conn.execute("DELETE FROM temp.merge_duplicates")
+        conn.execute('''
+            INSERT INTO temp.merge_duplicates (id, source_id)
+            SELECT id, company_id FROM customer_contacts
+            WHERE contact_key IS NOT NULL
+              AND company_id IN (SELECT source_id FROM temp.merge_map)
+              AND EXISTS (
+                  SELECT 1
+                  FROM temp.merge_map m
+                  JOIN customer_contacts o ON o.contact_key = customer_contacts.contact_key
+                  LEFT JOIN temp.merge_map om ON om.source_code = o.company_code
+                  WHERE m.source_code = customer_contacts.company_code
+                    AND COALESCE(om.target_code, o.company_code) = m.target_code
+                    AND (om.source_code IS NULL OR o.id < customer_contacts.id)
+              )
+        ''')
+
+        # 감사 기록 (이전될 건수, 중복으로 삭제될 연락처 수와 원본 스냅샷 포함)
+        conn.execute(f'''
+            INSERT INTO company_merge_log
+            (batch_id, source_code, target_code, source_name, target_name,
+             contacts_moved, contacts_deduplicated, consultations_moved, source_snapshot)
+            SELECT ?, m.source_code, m.target_code, s.company_name, t.company_name,
+                   COALESCE(cc.cnt, 0) - COALESCE(dup.cnt, 0), COALESCE(dup.cnt, 0),
+                   COALESCE(con.cnt, 0){archived_count},
+                   json_object(
+                       'company_name', s.company_name,
+                       'revenue_2024', s.revenue_2024,
+                       'industry', s.industry,
+                       'employee_count', s.employee_count,
+                       'address', s.address,
+                       'products', s.products,
+                       'customer_category', s.customer_category,
+                       'created_at', s.created_at
+                   )
+            FROM temp.merge_map m
+            JOIN companies s ON s.company_code = m.source_code
+            JOIN companies t ON t.company_code = m.target_code
+            LEFT JOIN (
+                SELECT company_id, COUNT(*) AS cnt FROM customer_contacts
+                WHERE company_id IN (SELECT source_id FROM temp.merge_map)
+                GROUP BY company_id
+            ) cc ON cc.company_id = m.source_id
+            LEFT JOIN (
+                SELECT source_id, COUNT(*) AS cnt FROM temp.merge_duplicates GROUP BY source_id
+            ) dup ON dup.source_id = m.source_id
+            LEFT JOIN (
+                SELECT company_id, COUNT(*) AS cnt FROM consultations
+                WHERE company_id IN (SELECT source_id FROM temp.merge_map)
+                GROUP BY company_id
+            ) con ON con.company_id = m.source_id{archived_join}
+        ''', (batch_id,))
+
+        # 대상 기업의 빈 속성을 원본 기업 값으로 보완
+        fill_columns = [
+            'revenue_2024', 'industry', 'employee_count',
+            'address', 'products', 'customer_category'
+        ]
+        fill_sql = ",\n".join(
+            f'''{col} = COALESCE({col}, (
+                    SELECT s.{col} FROM temp.merge_map m
+                    JOIN companies s ON s.company_code = m.source_code
+                    WHERE m.target_code = companies.company_code AND s.{col} IS NOT NULL
+                    LIMIT 1))'''
+            for col in fill_columns
+        )
+        conn.execute(f'''
+            UPDATE companies SET
+            {fill_sql},
+            updated_at = CURRENT_TIMESTAMP
+            WHERE company_code IN (SELECT target_code FROM temp.merge_map)
+        ''')
+
+        conn.execute("DELETE FROM customer_contacts WHERE id IN (SELECT id FROM temp.merge_duplicates)")
+
+        # 참조 재지정: 테이블당 UPDATE 한 번 (company_id는 change_seq 트리거가 새 업체코드로 갱신)
+        for table in ('customer_contacts', 'consultations'):
+            conn.execute(f'''
+                UPDATE {table} SET
+                company_code = (
+                    SELECT target_code FROM temp.merge_map
+                    WHERE source_id = {table}.company_id
+                ),
+                updated_at = CURRENT_TIMESTAMP
+                WHERE company_id IN (SELECT source_id FROM temp.merge_map)
+            ''')
+
+        # 보관된 상담 이력은 트리거가 없으므로 company_id까지 직접 지정
+        if with_archive:
+            conn.execute(f'''
+                UPDATE {ARCHIVE_SCHEMA}.consultations SET
+                company_code = (
+                    SELECT m.target_code FROM temp.merge_map m
+                    WHERE m.source_id = consultations.company_id
+                ),
+                company_id = (
+                    SELECT t.company_id FROM temp.merge_map m
+                    JOIN main.companies t ON t.company_code = m.target_code
+                    WHERE m.source_id = consultations.company_id
+                ),
+                updated_at = CURRENT_TIMESTAMP
+                WHERE company_id IN (SELECT source_id FROM temp.merge_map)
+            ''')
+
+        conn.execute(
+            "DELETE FROM companies WHERE company_code IN (SELECT source_code FROM temp.merge_map)"
+        )
+
+        totals = conn.execute('''
+            SELECT COUNT(*), COALESCE(SUM(contacts_moved), 0), COALESCE(SUM(contacts_deduplicated), 0),
+                   COALESCE(SUM(consultations_moved), 0)
+            FROM company_merge_log WHERE batch_id = ?
+        ''', (batch_id,)).fetchone()
+
+        conn.execute("DROP TABLE temp.merge_map")
+        conn.execute("DROP TABLE temp.merge_duplicates")
+
+    (result['merged'], result['contacts_moved'], result['contacts_deduplicated'],
+     result['consultations_moved']) = totals
+    return result
+
+
+def read_merge_mapping(source):
+    """
+    병합 매핑 파일(csv/xlsx) 읽기
+
+    Args:
+        source (str or file-like): 파일 경로 또는 업로드된 파일 객체
+
+    Returns:
+        list: (원본 업체코드, 대상 업체코드) 튜플 목록
+
+    Note:
+        - source_code/target_code 또는 원본업체코드/대상업체코드 헤더 인식
+        - 인식 가능한 헤더가 없으면 앞의 두 컬럼을 사용
+    """
+    name = source if isinstance(source, str) else getattr(source, 'name', '')
+    if os.path.splitext(str(name))[1].lower() == '.csv':
+        df = pd.read_csv(source, dtype=str)
+    else:
+        df = pd.read_excel(source, dtype=str)
+
+    columns = [str(col).strip() for col in df.columns]
+    df.columns = columns
+    for source_col, target_col in MAPPING_COLUMN_ALIASES:
+        if source_col in columns and target_col in columns:
+            break
+    else:
+        if len(columns) < 2:
+            raise ValueError("병합 매핑 파일에는 원본/대상 업체코드 두 컬럼이 필요합니다.")
+        source_col, target_col = columns[0], columns[1]
+
+    return list(zip(df[source_col], df[target_col]))
+
+
+def get_merge_history(conn, limit=50):
+    """
+    최근 병합 기록 조회
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        limit (int): 최대 조회 건수
+
+    Returns:
+        pandas.DataFrame: 병합 기록
+    """
+    ensure_merge_log(conn)
+    return pd.read_sql_query('''
+        SELECT
+            batch_id as 배치ID,
+            source_code as 원본업체코드,
+            source_name as 원본기업명,
+            target_code as 대상업체코드,
+            target_name as 대상기업명,
+            contacts_moved as 이전된연락처,
+            contacts_deduplicated as 중복삭제연락처,
+            consultations_moved as 이전된상담,
+            merged_at as 병합일시
+        FROM company_merge_log
+        ORDER BY id DESC
+        LIMIT ?
+    ''', conn, params=(limit,))
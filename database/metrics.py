@@ -0,0 +1,407 @@
+"""
+database/metrics.py
+
+프로세스 지표 (Prometheus 텍스트 형식 내보내기)
+- 카운터 / 게이지 / 히스토그램, 레이블 지원
+- 쿼리 지연, 적재 행 수, 내보내기 바이트, 캐시 적중, 잠금 대기, DB/WAL 크기, RSS
+- 내보내기: render_prometheus() 문자열, 파일(textfile collector), 로컬 HTTP /metrics
+
+Example:
+    >>> from database.metrics import INGEST_ROWS, render_prometheus
+    >>> INGEST_ROWS.inc(100, kind='companies')
+    >>> print(render_prometheus())
+"""
+
+import os
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# 초 단위 히스토그램 구간 (querylog.LATENCY_BUCKETS_MS와 같은 구간)
+DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5)
+
+PROMETHEUS_CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + list(extra or [])
+    if not pairs:
+        return ''
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs) + '}'
+
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    if isinstance(value, float) and value.is_integer():
+        return str(int(value))
+    return repr(value) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """지표 공통 (이름, 설명, 레이블, 레이블 값별 상태)"""
+
+    kind = None
+
+    def __init__(self, name, help_text, labels=()):
+        self.name = name
+        self.help = help_text
+        self.labels = tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels):
+        if set(labels) != set(self.labels):
+            raise ValueError(f"{self.name} 레이블은 {self.labels} 입니다: {tuple(labels)}")
+        return tuple(str(labels[name]) for name in self.labels)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+    def label_values(self):
+        """기록된 레이블 값 조합 목록"""
+        with self._lock:
+            return list(self._values)
+
+    def samples(self):
+        """(접미사, 레이블 값, 추가 레이블, 값) 목록"""
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """증가만 하는 누적 지표"""
+
+    kind = 'counter'
+
+    def inc(self, amount=1, **labels):
+        if amount < 0:
+            raise ValueError("카운터는 감소할 수 없습니다.")
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels), 0)
+
+    def samples(self):
+        with self._lock:
+            return [('_total', key, None, value) for key, value in self._values.items()]
+
+
+class Gauge(_Metric):
+    """현재 값 지표"""
+
+    kind = 'gauge'
+
+    def set(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = value
+
+    def get(self, **labels):
+        return self._values.get(self._key(labels))
+
+    def samples(self):
+        with self._lock:
+            return [('', key, None, value) for key, value in self._values.items()]
+
+
+class Histogram(_Metric):
+    """구간별 분포 지표 (누적 구간, 합계, 개수)"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state['counts'][i] += 1
+                    break
+            state['sum'] += value
+            state['count'] += 1
+
+    def samples(self):
+        rows = []
+        with self._lock:
+            for key, state in self._values.items():
+                cumulative = 0
+                for bound, count in zip(self.buckets, state['counts']):
+                    cumulative += count
+                    rows.append(('_bucket', key, [('le', _format_value(float(bound)))], cumulative))
+                rows.append(('_bucket', key, [('le', '+Inf')], state['count']))
+                rows.append(('_sum', key, None, state['sum']))
+                rows.append(('_count', key, None, state['count']))
+        return rows
+
+
+class MetricsRegistry:
+    """
+    지표 모음
+
+    Note:
+        - 수집 함수(add_collector)는 내보낼 때마다 호출되어 게이지 등을 갱신
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._collectors = []
+        self._lock = threading.Lock()
+
+    def _register(self, metric):
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+            return metric
+
+    def counter(self, name, help_text, labels=()):
+        return self._register(Counter(name, help_text, labels))
+
+    def gauge(self, name, help_text, labels=()):
+        return self._register(Gauge(name, help_text, labels))
+
+    def histogram(self, name, help_text, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, help_text, labels, buckets))
+
+    def add_collector(self, collector):
+        """내보내기 직전에 호출할 함수 등록 (인자 없음)"""
+        with self._lock:
+            if collector not in self._collectors:
+                self._collectors.append(collector)
+
+    def render(self):
+        """
+        Prometheus 텍스트 형식 (0.0.4) 문자열 생성
+
+        Returns:
+            str: 지표 텍스트
+        """
+        for collector in list(self._collectors):
+            try:
+                collector()
+            except Exception:
+                pass  # 수집 실패가 내보내기 전체를 막지 않도록
+
+        lines = []
+        for metric in sorted(self._metrics.values(), key=lambda m: m.name):
+            samples = metric.samples()
+            if not samples:
+                continue
+            lines.append(f"# HELP {metric.name} {_escape(metric.help)}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            for suffix, key, extra, value in samples:
+                if value is None:
+                    continue
+                labels = _format_labels(metric.labels, key, extra)
+                lines.append(f"{metric.name}{suffix}{labels} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+# 프로세스 전체에서 공유하는 기본 지표 모음
+REGISTRY = MetricsRegistry()
+
+QUERY_DURATION = REGISTRY.histogram(
+    'crm_query_duration_seconds', '저장소 쿼리 실행 시간', ('query', 'page')
+)
+QUERY_ROWS = REGISTRY.counter(
+    'crm_query_rows', '저장소 쿼리가 반환한 행 수', ('query',)
+)
+SLOW_QUERIES = REGISTRY.counter(
+    'crm_slow_queries', '느린 쿼리 기준을 넘은 호출 수', ('query',)
+)
+INGEST_ROWS = REGISTRY.counter(
+    'crm_ingest_rows', '가져오기로 처리한 행 수', ('kind',)
+)
+INGEST_SECONDS = REGISTRY.counter(
+    'crm_ingest_seconds', '가져오기에 걸린 시간 합계', ('kind',)
+)
+INGEST_ROWS_PER_SECOND = REGISTRY.gauge(
+    'crm_ingest_rows_per_second', '최근 가져오기의 초당 처리 행 수', ('kind',)
+)
+EXPORT_BYTES = REGISTRY.counter(
+    'crm_export_bytes', '내보낸 파일 크기 합계', ('format',)
+)
+CACHE_REQUESTS = REGISTRY.counter(
+    'crm_cache_requests', '앱 캐시 조회 수', ('cache',)
+)
+CACHE_MISSES = REGISTRY.counter(
+    'crm_cache_misses', '앱 캐시 미스 수 (실제 조회 실행)', ('cache',)
+)
+CACHE_HIT_RATIO = REGISTRY.gauge(
+    'crm_cache_hit_ratio', '앱 캐시 적중률', ('cache',)
+)
+LOCK_WAIT = REGISTRY.histogram(
+    'crm_db_lock_wait_seconds', '쓰기 트랜잭션 시작(BEGIN IMMEDIATE) 대기 시간'
+)
+DB_SIZE = REGISTRY.gauge(
+    'crm_db_size_bytes', '데이터베이스 파일 크기', ('file',)
+)
+PROCESS_RSS = REGISTRY.gauge(
+    'crm_process_resident_memory_bytes', '프로세스 상주 메모리(RSS)'
+)
+
+
+def record_ingest(kind, rows, seconds):
+    """
+    가져오기 처리량 기록
+
+    Args:
+        kind (str): 'companies', 'contacts', 'consultations'
+        rows (int): 처리한 행 수
+        seconds (float): 소요 시간
+    """
+    INGEST_ROWS.inc(rows, kind=kind)
+    INGEST_SECONDS.inc(seconds, kind=kind)
+    if seconds > 0:
+        INGEST_ROWS_PER_SECOND.set(round(rows / seconds, 1), kind=kind)
+
+
+def _collect_cache_ratios():
+    for (cache,) in CACHE_REQUESTS.label_values():
+        requests = CACHE_REQUESTS.get(cache=cache)
+        if requests:
+            CACHE_HIT_RATIO.set(round(1 - CACHE_MISSES.get(cache=cache) / requests, 4), cache=cache)
+
+
+def get_process_rss():
+    """
+    프로세스 상주 메모리(RSS) 바이트 (psutil이 없으면 /proc 사용, 둘 다 없으면 None)
+    """
+    try:
+        import psutil
+        return psutil.Process().memory_info().rss
+    except ImportError:
+        pass
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _collect_process():
+    rss = get_process_rss()
+    if rss is not None:
+        PROCESS_RSS.set(rss)
+
+
+# 크기를 내보낼 데이터베이스 파일 (watch_database_file로 지정)
+_watched_database = None
+
+
+def watch_database_file(db_path):
+    """
+    DB/WAL 파일 크기를 내보낼 때마다 갱신하도록 지정
+
+    Args:
+        db_path (str): 데이터베이스 파일 경로
+    """
+    global _watched_database
+    _watched_database = db_path
+
+
+def _collect_database_size():
+    if not _watched_database:
+        return
+    for file, path in (('db', _watched_database), ('wal', f"{_watched_database}-wal")):
+        DB_SIZE.set(os.path.getsize(path) if os.path.exists(path) else 0, file=file)
+
+
+REGISTRY.add_collector(_collect_cache_ratios)
+REGISTRY.add_collector(_collect_process)
+REGISTRY.add_collector(_collect_database_size)
+
+
+def render_prometheus():
+    """기본 지표 모음의 Prometheus 텍스트"""
+    return REGISTRY.render()
+
+
+def write_prometheus_file(path):
+    """
+    Prometheus 텍스트를 파일로 저장 (node_exporter textfile collector용)
+
+    Args:
+        path (str): 저장 경로 (임시 파일에 쓴 뒤 교체하므로 읽는 쪽이 중간 상태를 보지 않음)
+
+    Returns:
+        int: 저장한 바이트 수
+    """
+    data = render_prometheus().encode('utf-8')
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+    return len(data)
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?', 1)[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = render_prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', PROMETHEUS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def start_metrics_server(port, host='127.0.0.1'):
+    """
+    백그라운드 스레드에서 /metrics HTTP 서버 실행
+
+    Args:
+        port (int): 포트
+        host (str): 바인딩 주소 (기본값: 로컬만)
+
+    Returns:
+        ThreadingHTTPServer: 서버 객체
+    """
+    server = ThreadingHTTPServer((host, port), _MetricsHandler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name='crm-metrics-server', daemon=True).start()
+    return server
+
+
+def start_metrics_file_writer(path, interval=15):
+    """
+    백그라운드 스레드에서 주기적으로 지표 파일 저장
+
+    Args:
+        path (str): 저장 경로
+        interval (int): 저장 주기 (초)
+
+    Returns:
+        threading.Event: set()하면 중지
+    """
+    stop = threading.Event()
+
+    def loop():
+        while not stop.is_set():
+            try:
+                write_prometheus_file(path)
+            except OSError:
+                pass
+            stop.wait(interval)
+
+    threading.Thread(target=loop, name='crm-metrics-writer', daemon=True).start()
+    return stop
@@ -0,0 +1,180 @@
+"""
+database/pragmas.py
+
+SQLite 연결 PRAGMA 프로필
+- safe      : 정전/OS 장애에도 커밋 유실 없음 (synchronous=FULL), 메모리 사용 최소
+- balanced  : 기본값. WAL + synchronous=NORMAL, 캐시/메모리 맵으로 읽기 성능 확보
+- bulk-load : 대량 업로드 전용. 동기화/자동 체크포인트를 끄고 캐시를 키움 (bulk_load()로 잠시만 사용)
+
+Note:
+    - 프로필은 연결마다 적용 (database.connection.connect)
+    - 기본 프로필은 CRM_DB_PROFILE 환경변수로 변경
+    - page_size는 빈 데이터베이스에서만 적용됨 (WAL 모드에서는 VACUUM으로도 바뀌지 않음)
+"""
+
+import os
+from contextlib import contextmanager
+
+
+# 프로필별 설정 (cache_size_mib/mmap_size_mib는 MiB, busy_timeout은 ms)
+PRAGMA_PROFILES = {
+    'safe': {
+        'journal_mode': 'WAL',
+        'synchronous': 'FULL',
+        'cache_size_mib': 8,
+        'mmap_size_mib': 0,
+        'page_size': 4096,
+        'busy_timeout': 30000,
+        'wal_autocheckpoint': 1000,
+        'temp_store': 'DEFAULT'
+    },
+    'balanced': {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'cache_size_mib': 64,
+        'mmap_size_mib': 256,
+        'page_size': 4096,
+        'busy_timeout': 30000,
+        'wal_autocheckpoint': 1000,
+        'temp_store': 'MEMORY'
+    },
+    'bulk-load': {
+        'journal_mode': 'WAL',
+        'synchronous': 'OFF',
+        'cache_size_mib': 256,
+        'mmap_size_mib': 256,
+        'page_size': 4096,
+        'busy_timeout': 60000,
+        'wal_autocheckpoint': 0,
+        'temp_store': 'MEMORY'
+    }
+}
+
+# 기본 프로필 (CRM_DB_PROFILE 환경변수로 변경 가능)
+DB_PROFILE = os.environ.get('CRM_DB_PROFILE', 'balanced')
+
+# 이 행 수 이상을 저장하는 업로드는 bulk-load 프로필로 실행 (0이면 사용 안 함)
+BULK_LOAD_MIN_ROWS = int(os.environ.get('CRM_BULK_LOAD_ROWS', '10000'))
+
+# 연결별 설정에서 되돌릴 항목 (journal_mode/page_size는 파일 단위라 bulk_load()에서 바꾸지 않음)
+_CONNECTION_PRAGMAS = ['synchronous', 'cache_size', 'mmap_size', 'busy_timeout', 'wal_autocheckpoint', 'temp_store']
+
+
+def get_profile(name=None):
+    """
+    프로필 설정 조회
+
+    Args:
+        name (str): 프로필 이름 (기본값: DB_PROFILE)
+
+    Returns:
+        dict: 프로필 설정
+
+    Raises:
+        ValueError: 알 수 없는 프로필
+    """
+    name = name or DB_PROFILE
+    if name not in PRAGMA_PROFILES:
+        raise ValueError(f"알 수 없는 DB 프로필입니다: {name} (사용 가능: {', '.join(PRAGMA_PROFILES)})")
+    return PRAGMA_PROFILES[name]
+
+
+def apply_profile(conn, name=None):
+    """
+    연결에 PRAGMA 프로필 적용
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 호출)
+        name (str): 프로필 이름 (기본값: DB_PROFILE)
+
+    Returns:
+        dict: 적용 후 실제 설정 (get_pragma_settings())
+
+    Raises:
+        ValueError: 알 수 없는 프로필
+        sqlite3.Error: PRAGMA 실행 실패 (잠금 대기 초과 등)
+
+    Note:
+        - busy_timeout을 먼저 적용해서 journal_mode 전환이 잠금 때문에 바로 실패하지 않게 함
+        - 파일이 읽기 전용이거나 메모리 DB면 journal_mode가 WAL이 아닐 수 있으므로 반환값으로 확인
+    """
+    profile = get_profile(name)
+    conn.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout'])}")
+    if conn.execute("PRAGMA page_count").fetchone()[0] == 0:
+        conn.execute(f"PRAGMA page_size={int(profile['page_size'])}")
+    conn.execute(f"PRAGMA journal_mode={profile['journal_mode']}").fetchone()
+    conn.execute(f"PRAGMA synchronous={profile['synchronous']}")
+    conn.execute(f"PRAGMA cache_size={-int(profile['cache_size_mib'] * 1024)}")
+    conn.execute(f"PRAGMA mmap_size={int(profile['mmap_size_mib'] * 1024 * 1024)}").fetchall()
+    conn.execute(f"PRAGMA wal_autocheckpoint={int(profile['wal_autocheckpoint'])}").fetchall()
+    conn.execute(f"PRAGMA temp_store={profile['temp_store']}")
+    return get_pragma_settings(conn)
+
+
+def get_pragma_settings(conn):
+    """
+    연결의 현재 PRAGMA 설정
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        dict: journal_mode, synchronous, cache_size_mib, mmap_size_mib, page_size,
+              busy_timeout, wal_autocheckpoint, temp_store, foreign_keys
+    """
+    def value(pragma):
+        row = conn.execute(f"PRAGMA {pragma}").fetchone()
+        return row[0] if row else None
+
+    cache_size = value('cache_size')
+    page_size = value('page_size')
+    return {
+        'journal_mode': value('journal_mode').upper(),
+        'synchronous': ['OFF', 'NORMAL', 'FULL', 'EXTRA'][value('synchronous')],
+        # 음수는 KiB, 양수는 페이지 수
+        'cache_size_mib': round(-cache_size / 1024 if cache_size < 0 else cache_size * page_size / 1024 ** 2, 1),
+        'mmap_size_mib': round((value('mmap_size') or 0) / 1024 ** 2, 1),
+        'page_size': page_size,
+        'busy_timeout': value('busy_timeout'),
+        'wal_autocheckpoint': value('wal_autocheckpoint'),
+        'temp_store': ['DEFAULT', 'FILE', 'MEMORY'][value('temp_store')],
+        'foreign_keys': 'ON' if value('foreign_keys') else 'OFF'
+    }
+
+
+@contextmanager
+def bulk_load(conn, enabled=True):
+    """
+    대량 저장 동안만 bulk-load 프로필 적용 (끝나면 원래 설정으로 되돌리고 WAL 체크포인트)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결 (트랜잭션 밖에서 사용)
+        enabled (bool): False면 아무것도 바꾸지 않음 (호출부에서 행 수 기준으로 선택할 때 사용)
+
+    Example:
+        >>> with bulk_load(conn, len(frame) >= BULK_LOAD_MIN_ROWS):
+        ...     import_consultations(conn, frame, mapping)
+
+    Note:
+        - synchronous=OFF 동안 커밋된 내용은 OS 장애/정전 시 유실될 수 있음 (원본 파일로 다시 적재 가능한 업로드에만 사용)
+        - 자동 체크포인트를 끄므로 적재 중에는 WAL이 커지고, 끝날 때 한 번에 체크포인트
+        - 앱의 공유 연결에서 사용하면 적재 중 같은 연결의 다른 쓰기에도 적용됨
+    """
+    if not enabled:
+        yield conn
+        return
+
+    previous = {pragma: conn.execute(f"PRAGMA {pragma}").fetchone()[0] for pragma in _CONNECTION_PRAGMAS}
+    profile = get_profile('bulk-load')
+    conn.execute(f"PRAGMA synchronous={profile['synchronous']}")
+    conn.execute(f"PRAGMA cache_size={-int(profile['cache_size_mib'] * 1024)}")
+    conn.execute(f"PRAGMA mmap_size={int(profile['mmap_size_mib'] * 1024 * 1024)}").fetchall()
+    conn.execute(f"PRAGMA busy_timeout={int(profile['busy_timeout'])}")
+    conn.execute(f"PRAGMA wal_autocheckpoint={int(profile['wal_autocheckpoint'])}").fetchall()
+    conn.execute(f"PRAGMA temp_store={profile['temp_store']}")
+    try:
+        yield conn
+    finally:
+        for pragma, value in previous.items():
+            conn.execute(f"PRAGMA {pragma}={int(value)}").fetchall()
+        conn.execute("PRAGMA wal_checkpoint(PASSIVE)").fetchall()
@@ -0,0 +1,246 @@
+"""
+database/profiling.py
+
+화면 재실행(rerun) 구간별 소요 시간 프로파일러
+- 조회(fetch), DataFrame 구성(frame), 표 렌더링(render), 엑셀 생성(excel) 등 구간별 측정
+- 재실행 한 번의 측정값을 별도 지표 DB(crm_metrics.db)에 저장
+- 앱에서는 CRM_PROFILE=1 환경변수 또는 ?profile=1 쿼리 파라미터로 켬
+"""
+
+import os
+import sqlite3
+import threading
+import time
+import uuid
+from contextlib import contextmanager, nullcontext
+
+import pandas as pd
+
+
+# 지표 저장 DB (운영 DB와 분리)
+METRICS_DB_PATH = os.environ.get('CRM_METRICS_DB', 'crm_metrics.db')
+
+# 프로파일링 기본 활성화 여부
+PROFILE_ENABLED = os.environ.get('CRM_PROFILE', '').lower() in ('1', 'true', 'yes')
+
+# 보관 기간 (일) - 저장할 때 오래된 측정값 정리
+PROFILE_RETENTION_DAYS = 30
+
+_METRICS_LOCK = threading.Lock()
+
+# 현재 스레드에서 측정 중인 프로파일러 (저장소 계층이 구간 시간을 보고)
+_local = threading.local()
+
+
+def _metrics_connection(db_path=None):
+    conn = sqlite3.connect(db_path or METRICS_DB_PATH, timeout=5.0, isolation_level=None)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS render_profiles (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            run_id TEXT NOT NULL,
+            page TEXT NOT NULL,
+            section TEXT NOT NULL,
+            ms REAL NOT NULL,
+            rows INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_render_profiles_created ON render_profiles(created_at)"
+    )
+    return conn
+
+
+class RenderProfiler:
+    """
+    재실행 한 번의 구간별 소요 시간 측정기
+
+    Args:
+        page (str): 페이지 이름
+        enabled (bool): 측정 여부 (False면 모든 구간이 아무 일도 하지 않음)
+
+    Example:
+        >>> profiler = RenderProfiler("기업 목록 관리", enabled=True)
+        >>> with profiler.section("fetch"):
+        ...     df = repo.list_companies()
+        >>> profiler.finish()
+
+    Note:
+        - 같은 이름의 구간이 여러 번 실행되면 시간을 합산
+    """
+
+    def __init__(self, page, enabled=PROFILE_ENABLED):
+        self.page = page
+        self.enabled = enabled
+        self.run_id = uuid.uuid4().hex[:12]
+        self.sections = {}
+        self._started = time.perf_counter()
+
+    def activate(self):
+        """현재 스레드의 측정기로 등록 (profile_section()이 이 측정기에 기록)"""
+        _local.profiler = self if self.enabled else None
+        return self
+
+    def section(self, name, rows=None):
+        """
+        구간 측정 컨텍스트
+
+        Args:
+            name (str): 구간 이름 ('fetch', 'frame', 'render', 'excel' 등)
+            rows (int): 처리한 행 수 (선택)
+        """
+        if not self.enabled:
+            return nullcontext()
+        return self._measure(name, rows)
+
+    @contextmanager
+    def _measure(self, name, rows):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, (time.perf_counter() - started) * 1000, rows)
+
+    def add(self, name, elapsed_ms, rows=None):
+        """측정값 직접 추가"""
+        if not self.enabled:
+            return
+        total_ms, total_rows = self.sections.get(name, (0.0, None))
+        if rows is not None:
+            total_rows = (total_rows or 0) + rows
+        self.sections[name] = (total_ms + elapsed_ms, total_rows)
+
+    def finish(self, db_path=None):
+        """
+        전체 재실행 시간('total')을 더해 지표 DB에 저장
+
+        Returns:
+            dict: {구간: 밀리초} (비활성 상태면 빈 dict)
+        """
+        if getattr(_local, 'profiler', None) is self:
+            _local.profiler = None
+        if not self.enabled:
+            return {}
+        self.sections['total'] = ((time.perf_counter() - self._started) * 1000, None)
+        save_render_profile(self.run_id, self.page, self.sections, db_path)
+        return {name: round(ms, 2) for name, (ms, _) in self.sections.items()}
+
+
+def profile_section(name, rows=None):
+    """
+    현재 스레드에서 측정 중인 프로파일러의 구간 측정 (없으면 아무 일도 하지 않음)
+
+    Args:
+        name (str): 구간 이름
+        rows (int): 처리한 행 수 (선택)
+
+    Example:
+        >>> with profile_section("fetch"):
+        ...     rows = cursor.fetchall()
+    """
+    profiler = getattr(_local, 'profiler', None)
+    if profiler is None:
+        return nullcontext()
+    return profiler.section(name, rows)
+
+
+def save_render_profile(run_id, page, sections, db_path=None):
+    """
+    재실행 한 번의 구간별 측정값 저장
+
+    Args:
+        run_id (str): 재실행 ID
+        page (str): 페이지 이름
+        sections (dict): {구간: (밀리초, 행 수)}
+        db_path (str): 지표 DB 경로 (기본값: METRICS_DB_PATH)
+    """
+    rows = [(run_id, page, name, ms, count) for name, (ms, count) in sections.items()]
+    with _METRICS_LOCK:
+        conn = _metrics_connection(db_path)
+        try:
+            conn.execute("BEGIN")
+            conn.executemany(
+                "INSERT INTO render_profiles (run_id, page, section, ms, rows) VALUES (?, ?, ?, ?, ?)",
+                rows
+            )
+            conn.execute(
+                "DELETE FROM render_profiles WHERE created_at < datetime('now', ?)",
+                (f"-{PROFILE_RETENTION_DAYS} days",)
+            )
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+
+def get_render_summary(hours=24, db_path=None):
+    """
+    페이지/구간별 소요 시간 요약
+
+    Args:
+        hours (int): 최근 몇 시간의 측정값을 볼지
+        db_path (str): 지표 DB 경로
+
+    Returns:
+        pandas.DataFrame: 페이지, 구간, 재실행수, 평균_ms, p50_ms, p95_ms, 최대_ms, 평균_행수
+    """
+    conn = _metrics_connection(db_path)
+    try:
+        df = pd.read_sql_query('''
+            SELECT page, section, ms, rows FROM render_profiles
+            WHERE created_at >= datetime('now', ?)
+        ''', conn, params=(f"-{int(hours)} hours",))
+    finally:
+        conn.close()
+
+    columns = ['페이지', '구간', '재실행수', '평균_ms', 'p50_ms', 'p95_ms', '최대_ms', '평균_행수']
+    if df.empty:
+        return pd.DataFrame(columns=columns)
+
+    summary = df.groupby(['page', 'section']).agg(
+        재실행수=('ms', 'size'),
+        평균_ms=('ms', 'mean'),
+        p50_ms=('ms', lambda s: s.quantile(0.5)),
+        p95_ms=('ms', lambda s: s.quantile(0.95)),
+        최대_ms=('ms', 'max'),
+        평균_행수=('rows', 'mean')
+    ).reset_index().rename(columns={'page': '페이지', 'section': '구간'})
+    return summary.round(2).sort_values(['페이지', '평균_ms'], ascending=[True, False], ignore_index=True)
+
+
+def get_recent_runs(limit=50, db_path=None):
+    """
+    최근 재실행별 구간 소요 시간 (재실행 한 건이 한 행)
+
+    Args:
+        limit (int): 최대 재실행 수
+        db_path (str): 지표 DB 경로
+
+    Returns:
+        pandas.DataFrame: 시각, 페이지, 구간별 밀리초 컬럼
+    """
+    conn = _metrics_connection(db_path)
+    try:
+        df = pd.read_sql_query('''
+            SELECT run_id, page, section, ms, created_at FROM render_profiles
+            WHERE run_id IN (
+                SELECT run_id FROM render_profiles
+                WHERE section = 'total'
+                ORDER BY id DESC
+                LIMIT ?
+            )
+        ''', conn, params=(limit,))
+    finally:
+        conn.close()
+
+    if df.empty:
+        return pd.DataFrame(columns=['시각', '페이지'])
+
+    runs = df.pivot_table(index=['run_id', 'page'], columns='section', values='ms', aggfunc='sum')
+    times = df.groupby('run_id')['created_at'].max()
+    runs = runs.reset_index()
+    runs.columns.name = None
+    runs.insert(0, '시각', runs['run_id'].map(times))
+    runs = runs.drop(columns=['run_id']).rename(columns={'page': '페이지'})
+    return runs.round(2).sort_values('시각', ascending=False, ignore_index=True)
@@ -0,0 +1,354 @@
+"""
+database/querylog.py
+
+쿼리 계측 및 느린 쿼리 로그
+- 연결마다 set_trace_callback으로 실제 실행된 SQL 수집
+- 저장소 메서드 단위로 실행 시간 히스토그램/행 수/호출 페이지 기록
+- 기준 시간(CRM_SLOW_QUERY_MS)을 넘는 쿼리는 회전 로그 파일에 JSON 한 줄로 기록
+
+Note:
+    - 추적 콜백은 바인딩 값이 채워진 SQL을 넘기므로 수집할 때 리터럴을 ?로 바꿔 보관
+      (이메일/전화번호/상담 내용이 통계, 관리 화면, 로그 파일에 남지 않음)
+"""
+
+import functools
+import json
+import logging
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from logging.handlers import RotatingFileHandler
+
+import pandas as pd
+
+from .connection import DB_PATH
+from .metrics import QUERY_DURATION, QUERY_ROWS, SLOW_QUERIES
+
+
+# 느린 쿼리 기준 (밀리초)
+SLOW_QUERY_MS = float(os.environ.get('CRM_SLOW_QUERY_MS', 200))
+
+# 느린 쿼리 로그 파일 (기본값: DB 파일과 같은 폴더의 절대 경로 - 실행 위치와 무관,
+# 빈 값이면 파일에 기록하지 않음), 1MB 단위로 회전, 3개 보관
+SLOW_QUERY_LOG = os.environ.get(
+    'CRM_SLOW_QUERY_LOG', os.path.join(os.path.dirname(os.path.abspath(DB_PATH)), 'crm_slow_queries.log')
+)
+SLOW_QUERY_LOG_BYTES = 1024 * 1024
+SLOW_QUERY_LOG_BACKUPS = 3
+
+# 실행 시간 히스토그램 구간 상한 (밀리초, 마지막 구간은 그 이상 전부)
+LATENCY_BUCKETS_MS = (1, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000)
+
+# 호출 한 번에 보관할 SQL 문 최대 개수 (executemany는 행마다 호출되므로 제한)
+MAX_CAPTURED_STATEMENTS = 20
+
+# 페이지가 지정되지 않은 호출 (CLI, API 등)
+DEFAULT_PAGE = '-'
+
+# {(페이지, 쿼리명): 통계}
+_STATS = {}
+_STATS_LOCK = threading.Lock()
+
+# 최근 느린 쿼리 (관리 화면용)
+_SLOW_QUERIES = deque(maxlen=200)
+
+# SQL 리터럴 (문자열, BLOB, 숫자) - 바인딩 값이 채워진 자리
+_SQL_LITERAL = re.compile(
+    r"[xX]'[0-9a-fA-F]*'"
+    r"|'(?:[^']|'')*'"
+    r"|(?<![\w.\"])\d+(?:\.\d+)?(?:[eE][-+]?\d+)?(?![\w\"])"
+)
+
+_local = threading.local()
+_slow_logger = None
+
+
+def set_query_page(page):
+    """
+    현재 스레드에서 실행되는 쿼리의 호출 페이지 지정
+
+    Args:
+        page (str): 페이지 이름 (예: "기업 목록 관리")
+    """
+    _local.page = page
+
+
+def get_query_page():
+    """현재 스레드의 호출 페이지 (지정되지 않았으면 '-')"""
+    return getattr(_local, 'page', DEFAULT_PAGE)
+
+
+def redact_sql(statement):
+    """
+    SQL의 리터럴 값을 ?로 바꿈
+
+    Args:
+        statement (str): 추적 콜백이 넘겨준 SQL (바인딩 값이 채워진 문장)
+
+    Returns:
+        str: 리터럴을 ?로 바꾼 SQL
+
+    Example:
+        >>> redact_sql("SELECT * FROM customer_contacts WHERE email = 'a@b.com' LIMIT 10")
+        'SELECT * FROM customer_contacts WHERE email = ? LIMIT ?'
+    """
+    return _SQL_LITERAL.sub('?', statement)
+
+
+def _trace(statement):
+    """set_trace_callback 콜백 - 계측 중인 호출이 있을 때만 SQL 수집 (리터럴은 ?로 바꿈)"""
+    captured = getattr(_local, 'statements', None)
+    if captured is not None and len(captured) < MAX_CAPTURED_STATEMENTS:
+        captured.append(redact_sql(statement))
+
+
+def install_query_trace(conn):
+    """
+    연결에 SQL 추적 콜백 설치
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Note:
+        - database.connection.connect()에서 자동으로 호출
+        - 계측 중이 아닐 때는 콜백이 바로 반환되어 부담이 거의 없음
+    """
+    conn.set_trace_callback(_trace)
+    return conn
+
+
+def _get_slow_logger():
+    global _slow_logger
+    if _slow_logger is None:
+        logger = logging.getLogger('crm.slow_query')
+        logger.setLevel(logging.INFO)
+        logger.propagate = False
+        # 경로를 바꿔 다시 만들 때 이전 파일 핸들러 정리
+        for handler in list(logger.handlers):
+            logger.removeHandler(handler)
+            handler.close()
+        if not SLOW_QUERY_LOG:
+            logger.addHandler(logging.NullHandler())
+            _slow_logger = logger
+            return logger
+        try:
+            handler = RotatingFileHandler(
+                SLOW_QUERY_LOG,
+                maxBytes=SLOW_QUERY_LOG_BYTES,
+                backupCount=SLOW_QUERY_LOG_BACKUPS,
+                encoding='utf-8'
+            )
+            handler.setFormatter(logging.Formatter('%(message)s'))
+            logger.addHandler(handler)
+        except OSError:
+            logger.addHandler(logging.NullHandler())  # 로그 파일을 만들 수 없어도 계속 진행
+        _slow_logger = logger
+    return _slow_logger
+
+
+def _bucket_index(elapsed_ms):
+    for i, bound in enumerate(LATENCY_BUCKETS_MS):
+        if elapsed_ms <= bound:
+            return i
+    return len(LATENCY_BUCKETS_MS)
+
+
+def record_query(name, elapsed_ms, rows=None, statements=None, page=None):
+    """
+    쿼리 실행 결과 기록
+
+    Args:
+        name (str): 쿼리(저장소 메서드) 이름
+        elapsed_ms (float): 실행 시간 (밀리초)
+        rows (int): 반환 행 수
+        statements (list): 실행된 SQL 문 목록
+        page (str): 호출 페이지 (기본값: 현재 스레드의 페이지)
+    """
+    page = page or get_query_page()
+    statements = statements or []
+    with _STATS_LOCK:
+        stats = _STATS.setdefault((page, name), {
+            'calls': 0, 'total_ms': 0.0, 'max_ms': 0.0, 'last_ms': 0.0, 'rows': 0,
+            'buckets': [0] * (len(LATENCY_BUCKETS_MS) + 1), 'sql': None
+        })
+        stats['calls'] += 1
+        stats['total_ms'] += elapsed_ms
+        stats['max_ms'] = max(stats['max_ms'], elapsed_ms)
+        stats['last_ms'] = elapsed_ms
+        stats['rows'] += rows or 0
+        stats['buckets'][_bucket_index(elapsed_ms)] += 1
+        sql = _representative_sql(statements)
+        if sql:
+            stats['sql'] = sql
+
+    QUERY_DURATION.observe(elapsed_ms / 1000, query=name, page=page)
+    QUERY_ROWS.inc(rows or 0, query=name)
+
+    if elapsed_ms >= SLOW_QUERY_MS:
+        SLOW_QUERIES.inc(query=name)
+        entry = {
+            'time': datetime.now().isoformat(timespec='seconds'),
+            'page': page,
+            'query': name,
+            'ms': round(elapsed_ms, 2),
+            'rows': rows,
+            'sql': statements
+        }
+        _SLOW_QUERIES.append(entry)
+        _get_slow_logger().info(json.dumps(entry, ensure_ascii=False))
+
+
+def _representative_sql(statements):
+    """통계에 보관할 대표 SQL (첫 SELECT, 없으면 트랜잭션 제어문이 아닌 첫 문장)"""
+    for statement in statements:
+        if statement.lstrip().upper().startswith(('SELECT', 'WITH')):
+            return statement.strip()
+    for statement in statements:
+        if not statement.lstrip().upper().startswith(('BEGIN', 'COMMIT', 'ROLLBACK')):
+            return statement.strip()
+    return None
+
+
+def _count_rows(result):
+    """반환값의 행 수 (DataFrame/list, 그리고 DataFrame을 담은 tuple/dict 집계)"""
+    if isinstance(result, (pd.DataFrame, list)):
+        return len(result)
+    if isinstance(result, (tuple, dict)):
+        values = result.values() if isinstance(result, dict) else result
+        frames = [value for value in values if isinstance(value, pd.DataFrame)]
+        return sum(len(frame) for frame in frames) if frames else None
+    return None
+
+
+def timed(method):
+    """
+    저장소 메서드 계측 데코레이터 (실행 시간, 행 수, 실행된 SQL 기록)
+
+    Note:
+        - 중첩 호출 시 안쪽 메서드가 실행한 SQL은 바깥 메서드에도 포함
+    """
+    name = method.__name__
+
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        outermost = getattr(_local, 'statements', None) is None
+        if outermost:
+            _local.statements = []
+        start_index = len(_local.statements)
+        started = time.perf_counter()
+        try:
+            result = method(self, *args, **kwargs)
+        finally:
+            elapsed_ms = (time.perf_counter() - started) * 1000
+            statements = _local.statements[start_index:]
+            if outermost:
+                _local.statements = None
+        record_query(name, elapsed_ms, _count_rows(result), statements)
+        return result
+
+    return wrapper
+
+
+def _percentile(buckets, calls, q):
+    """히스토그램에서 백분위 구간 상한 추정"""
+    threshold = calls * q
+    cumulative = 0
+    for i, count in enumerate(buckets):
+        cumulative += count
+        if cumulative >= threshold:
+            return LATENCY_BUCKETS_MS[i] if i < len(LATENCY_BUCKETS_MS) else float('inf')
+    return float('inf')
+
+
+def get_query_timings():
+    """
+    페이지/쿼리별 실행 시간 통계 조회 (누적 실행 시간 순)
+
+    Returns:
+        pandas.DataFrame: page, query, calls, total_ms, avg_ms, p50_ms, p95_ms, max_ms, rows, sql
+
+    Note:
+        - p50_ms/p95_ms는 히스토그램 구간 상한 기준 추정값
+    """
+    with _STATS_LOCK:
+        rows = [
+            {
+                'page': page,
+                'query': name,
+                'calls': stats['calls'],
+                'total_ms': round(stats['total_ms'], 2),
+                'avg_ms': round(stats['total_ms'] / stats['calls'], 2),
+                'p50_ms': _percentile(stats['buckets'], stats['calls'], 0.5),
+                'p95_ms': _percentile(stats['buckets'], stats['calls'], 0.95),
+                'max_ms': round(stats['max_ms'], 2),
+                'rows': stats['rows'],
+                'sql': stats['sql']
+            }
+            for (page, name), stats in _STATS.items()
+        ]
+    columns = ['page', 'query', 'calls', 'total_ms', 'avg_ms', 'p50_ms', 'p95_ms', 'max_ms', 'rows', 'sql']
+    return pd.DataFrame(rows, columns=columns).sort_values('total_ms', ascending=False, ignore_index=True)
+
+
+def get_latency_histogram(name, page=None):
+    """
+    쿼리의 실행 시간 히스토그램
+
+    Args:
+        name (str): 쿼리 이름
+        page (str): 페이지 (None이면 모든 페이지 합계)
+
+    Returns:
+        pandas.DataFrame: 구간(≤ms), 호출 수
+    """
+    labels = [f"≤{bound}" for bound in LATENCY_BUCKETS_MS] + [f">{LATENCY_BUCKETS_MS[-1]}"]
+    counts = [0] * len(labels)
+    with _STATS_LOCK:
+        for (stats_page, stats_name), stats in _STATS.items():
+            if stats_name == name and (page is None or stats_page == page):
+                counts = [a + b for a, b in zip(counts, stats['buckets'])]
+    return pd.DataFrame({'구간(ms)': labels, '호출 수': counts})
+
+
+def get_slow_queries(limit=50):
+    """
+    최근 느린 쿼리 목록 (최신 순)
+
+    Args:
+        limit (int): 최대 건수
+
+    Returns:
+        list: 느린 쿼리 기록 dict 목록
+    """
+    return list(_SLOW_QUERIES)[::-1][:limit]
+
+
+def reset_query_timings():
+    """쿼리 통계와 최근 느린 쿼리 목록 초기화 (로그 파일은 유지)"""
+    with _STATS_LOCK:
+        _STATS.clear()
+    _SLOW_QUERIES.clear()
+
+
+def explain_query_plan(conn, sql):
+    """
+    SQL의 EXPLAIN QUERY PLAN 조회
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        sql (str): 수집된 SQL (리터럴이 ?로 바뀐 문장)
+
+    Returns:
+        pandas.DataFrame: id, parent, detail (SELECT가 아니면 빈 DataFrame)
+
+    Note:
+        - ? 자리에는 NULL을 바인딩 (값에 따라 달라지는 최적화는 실제 실행과 다를 수 있음)
+    """
+    columns = ['id', 'parent', 'detail']
+    if not sql or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return pd.DataFrame(columns=columns)
+    rows = conn.execute(f"EXPLAIN QUERY PLAN {sql}", [None] * sql.count('?')).fetchall()
+    return pd.DataFrame([row[:2] + row[-1:] for row in rows], columns=columns)
@@ -0,0 +1,473 @@
+"""
+database/repository.py
+
+화면에서 사용하는 모든 조회/저장 쿼리를 모아 둔 데이터 접근 계층
+- 페이지 코드에는 SQL 없이 CRMRepository 메서드 호출만 남김
+- 메서드마다 실행 시간, 반환 행 수, 실행된 SQL을 기록 (database.querylog)
+"""
+
+import pandas as pd
+
+from .archive import attach_archive, archive_consultations, consultations_source, get_archive_status
+from .connection import transaction, allocate_company_codes, parse_revenue
+from .dates import to_iso_date
+from .dtypes import COMPACT_DTYPES, compact_frame
+from .export import export_query, backup_queries
+from .integrity import get_integrity_status, get_integrity_issues, run_integrity_check
+from .ingest import (
+    import_companies, import_contacts, import_consultations, ingest_files, plan_ingest, commit_ingest_plan
+)
+from .merge import merge_companies, get_merge_history
+from .maintenance import get_file_sizes, get_fragmentation, plan_maintenance, run_maintenance, get_maintenance_log
+from .mappings import find_mapping_profile, save_mapping_profile, get_mapping_profiles, delete_mapping_profile
+from .querylog import timed
+from .sync import read_delta, save_watermark, get_sync_status
+from .pragmas import get_pragma_settings
+from .profiling import profile_section
+
+
+class CRMRepository:
+    """
+    CRM 데이터 접근 계층
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        compact_dtypes (bool): 읽기 전용 조회 결과에 dtype 정책 적용 여부
+            (None이면 CRM_COMPACT_DTYPES 설정, database.dtypes 참고)
+
+    Example:
+        >>> repo = CRMRepository(init_database())
+        >>> companies_df = repo.list_companies()
+        >>> repo.counts()['companies']
+        25
+    """
+
+    def __init__(self, conn, compact_dtypes=None):
+        self.conn = conn
+        self.compact_dtypes = COMPACT_DTYPES if compact_dtypes is None else compact_dtypes
+
+    def _read(self, query, params=(), compact=False):
+        # 조회와 DataFrame 구성을 나눠서 측정 (database.profiling)
+        with profile_section('fetch'):
+            cursor = self.conn.execute(query, params)
+            rows = cursor.fetchall()
+        with profile_section('frame', len(rows)):
+            columns = [col[0] for col in cursor.description]
+            df = pd.DataFrame.from_records(rows, columns=columns, coerce_float=True)
+            # 읽기 전용 결과만 category/Arrow 문자열/nullable 정수로 변환 (편집 그리드는 제외)
+            return compact_frame(df) if compact and self.compact_dtypes else df
+
+    def _column(self, query):
+        with profile_section('fetch'):
+            return [row[0] for row in self.conn.execute(query).fetchall()]
+
+    # ------------------------------------------------------------------
+    # 자동완성 / 사이드바
+
+    @timed
+    def company_names(self):
+        """기업명 목록 (자동완성용)"""
+        return self._column(
+            "SELECT DISTINCT company_name FROM companies WHERE company_name IS NOT NULL ORDER BY company_name"
+        )
+
+    @timed
+    def customer_names(self):
+        """고객명 목록 (자동완성용)"""
+        return self._column(
+            "SELECT DISTINCT customer_name FROM customer_contacts WHERE customer_name IS NOT NULL ORDER BY customer_name"
+        )
+
+    @timed
+    def industries(self):
+        """업종 목록 (자동완성용)"""
+        return self._column(
+            "SELECT DISTINCT industry FROM companies WHERE industry IS NOT NULL ORDER BY industry"
+        )
+
+    @timed
+    def positions(self):
+        """직위 목록 (자동완성용)"""
+        return self._column(
+            "SELECT DISTINCT position FROM customer_contacts WHERE position IS NOT NULL ORDER BY position"
+        )
+
+    @timed
+    def counts(self):
+        """
+        테이블별 레코드 수
+
+        Returns:
+            dict: {'companies': int, 'contacts': int, 'consultations': int}
+        """
+        return {
+            'companies': self.conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0],
+            'contacts': self.conn.execute("SELECT COUNT(*) FROM customer_contacts").fetchone()[0],
+            'consultations': self.conn.execute("SELECT COUNT(*) FROM consultations").fetchone()[0]
+        }
+
+    def file_sizes(self):
+        """데이터베이스/WAL 파일 크기 {'db_bytes', 'wal_bytes'}"""
+        return get_file_sizes(self.conn)
+
+    # ------------------------------------------------------------------
+    # 목록 조회
+
+    @timed
+    def list_companies(self):
+        """기업 목록 (최근 수정 순)"""
+        return self._read("SELECT * FROM companies ORDER BY updated_at DESC", compact=True)
+
+    @timed
+    def company_choices(self):
+        """업체코드/기업명 목록 (기업 선택 위젯용)"""
+        return self._read("SELECT company_code, company_name FROM companies ORDER BY company_name")
+
+    @timed
+    def list_contacts(self):
+        """연락처 목록 (기업명 포함, 최근 수정 순 - 기업이 없는 연락처는 기업명 없이 포함)"""
+        return self._read('''
+            SELECT cc.*, c.company_name
+            FROM customer_contacts cc
+            LEFT JOIN companies c ON cc.company_id = c.company_id
+            ORDER BY cc.updated_at DESC
+        ''', compact=True)
+
+    @timed
+    def list_consultations(self, start_day=None, end_day=None, include_archive=False):
+        """
+        상담 이력 목록 (상담 날짜 최신 순)
+
+        Args:
+            start_day (str): 시작일 YYYY-MM-DD (None이면 기간 제한 없음)
+            end_day (str): 종료일 YYYY-MM-DD
+            include_archive (bool): 보관된 이력까지 포함 (기본값: 운영 테이블만)
+
+        Returns:
+            pandas.DataFrame: 상담 이력
+        """
+        if include_archive:
+            attach_archive(self.conn)
+        source = consultations_source(include_archive)
+
+        if start_day is None:
+            return self._read(f'''
+                SELECT c.company_name, con.customer_name, con.consultation_date,
+                       con.consultation_content, con.project_name, con.created_at
+                FROM {source} con
+                LEFT JOIN companies c ON con.company_id = c.company_id
+                ORDER BY con.consultation_day DESC, con.created_at DESC
+            ''', compact=True)
+
+        # consultation_day 인덱스 범위 조회 (아카이브 포함 시 양쪽 인덱스 각각 사용)
+        return self._read(f'''
+            SELECT c.company_name, con.customer_name, con.consultation_date,
+                   con.consultation_content, con.project_name, con.created_at
+            FROM {source} con
+            LEFT JOIN companies c ON con.company_id = c.company_id
+            WHERE con.consultation_day BETWEEN ? AND ?
+            ORDER BY con.consultation_day DESC, con.created_at DESC
+        ''', (start_day, end_day), compact=True)
+
+    @timed
+    def monthly_consultation_counts(self, start_day, end_day, include_archive=False):
+        """
+        월별 상담 건수 (인덱스만으로 집계)
+
+        Args:
+            start_day (str): 시작일 YYYY-MM-DD
+            end_day (str): 종료일 YYYY-MM-DD
+            include_archive (bool): 보관된 이력까지 포함
+
+        Returns:
+            pandas.DataFrame: 월, 상담건수
+        """
+        if include_archive:
+            attach_archive(self.conn)
+        return self._read(f'''
+            SELECT substr(consultation_day, 1, 7) as 월, COUNT(*) as 상담건수
+            FROM {consultations_source(include_archive)}
+            WHERE consultation_day BETWEEN ? AND ?
+            GROUP BY substr(consultation_day, 1, 7)
+            ORDER BY 월
+        ''', (start_day, end_day))
+
+    @timed
+    def integrated_view(self):
+        """기업 + 연락처 + 상담 이력 통합 데이터 (운영 테이블만)"""
+        _, query = export_query(self.conn, 'integrated', include_archive=False)
+        return self._read(query, compact=True)
+
+    @timed
+    def companies_for_edit(self):
+        """편집 그리드용 기업 데이터 (한글 컬럼명)"""
+        return self._read('''
+            SELECT
+                company_code as 업체코드,
+                company_name as 기업명,
+                revenue_2024 as 매출액_2024,
+                industry as 업종,
+                employee_count as 종업원수,
+                address as 주소,
+                products as 상품,
+                customer_category as 고객구분
+            FROM companies
+            ORDER BY company_name
+        ''')
+
+    @timed
+    def recent_consultations(self, limit=10):
+        """최근 등록된 상담 이력"""
+        return self._read('''
+            SELECT
+                c.company_name as 기업명,
+                con.customer_name as 고객명,
+                con.consultation_date as 상담날짜,
+                con.consultation_content as 상담내역,
+                con.project_name as 프로젝트명,
+                con.created_at as 등록일시
+            FROM consultations con
+            LEFT JOIN companies c ON con.company_id = c.company_id
+            ORDER BY con.created_at DESC
+            LIMIT ?
+        ''', (limit,), compact=True)
+
+    # ------------------------------------------------------------------
+    # 내보내기
+
+    @timed
+    def export(self, dataset):
+        """
+        다운로드용 데이터셋 조회
+
+        Args:
+            dataset (str): 'integrated', 'companies', 'contacts', 'consultations'
+
+        Returns:
+            tuple: (시트명, DataFrame) - 상담 이력은 보관된 이력 포함
+        """
+        sheet_name, query = export_query(self.conn, dataset)
+        return sheet_name, self._read(query, compact=True)
+
+    @timed
+    def backup(self):
+        """전체 백업용 시트 {시트명: DataFrame} (통합 데이터 + 원본 테이블 + 보관된 상담 이력)"""
+        return {sheet_name: self._read(query, compact=True) for sheet_name, query in backup_queries(self.conn)}
+
+    # ------------------------------------------------------------------
+    # 저장
+
+    @timed
+    def find_company_code(self, company_name):
+        """기업명으로 업체코드를 찾고, 없으면 새로 생성"""
+        result = self.conn.execute(
+            "SELECT company_code FROM companies WHERE company_name = ?", (company_name,)
+        ).fetchone()
+        return result[0] if result else allocate_company_codes(self.conn, 1)[0]
+
+    @timed
+    def update_company(self, company_code, updated_data):
+        """
+        기업 데이터 업데이트
+
+        Args:
+            company_code (str): 업체코드
+            updated_data (dict): 한글 키(기업명, 매출액_2024, ...)로 된 변경 값
+
+        Returns:
+            tuple: (성공 여부, 메시지)
+        """
+        try:
+            with transaction(self.conn):
+                self.conn.execute('''
+                    UPDATE companies SET
+                    company_name = ?, revenue_2024 = ?, industry = ?,
+                    employee_count = ?, address = ?, products = ?,
+                    customer_category = ?, updated_at = CURRENT_TIMESTAMP
+                    WHERE company_code = ?
+                ''', (
+                    updated_data.get('기업명'),
+                    parse_revenue(updated_data.get('매출액_2024')),
+                    updated_data.get('업종'),
+                    int(updated_data.get('종업원수')) if updated_data.get('종업원수') else None,
+                    updated_data.get('주소'),
+                    updated_data.get('상품'),
+                    updated_data.get('고객구분'),
+                    company_code
+                ))
+            return True, "기업 정보가 업데이트되었습니다."
+        except Exception as e:
+            return False, f"업데이트 실패: {str(e)}"
+
+    @timed
+    def insert_consultation(self, consultation_data):
+        """
+        새로운 상담 이력 추가 (기업이 없으면 기본 정보로 생성)
+
+        Args:
+            consultation_data (dict): 기업명, 고객명, 상담날짜, 상담내역, 프로젝트명
+
+        Returns:
+            tuple: (성공 여부, 메시지)
+        """
+        try:
+            company_name = consultation_data.get('기업명')
+            with transaction(self.conn):
+                company_code = self.find_company_code(company_name)
+
+                existing_company = self.conn.execute(
+                    "SELECT company_code FROM companies WHERE company_code = ?", (company_code,)
+                ).fetchone()
+                if not existing_company:
+                    self.conn.execute('''
+                        INSERT INTO companies (company_code, company_name)
+                        VALUES (?, ?)
+                    ''', (company_code, company_name))
+
+                self.conn.execute('''
+                    INSERT INTO consultations
+                    (company_code, customer_name, consultation_date, consultation_day, consultation_content, project_name)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                ''', (
+                    company_code,
+                    consultation_data.get('고객명'),
+                    consultation_data.get('상담날짜'),
+                    to_iso_date(consultation_data.get('상담날짜')),
+                    consultation_data.get('상담내역'),
+                    consultation_data.get('프로젝트명')
+                ))
+            return True, "새로운 상담 이력이 추가되었습니다."
+        except Exception as e:
+            return False, f"추가 실패: {str(e)}"
+
+    @timed
+    def import_companies(self, df, mapping):
+        """기업 목록 일괄 저장 (database.ingest.import_companies)"""
+        return import_companies(self.conn, df, mapping)
+
+    @timed
+    def import_contacts(self, df, mapping):
+        """고객 연락처 일괄 저장 (database.ingest.import_contacts)"""
+        return import_contacts(self.conn, df, mapping)
+
+    @timed
+    def import_consultations(self, df, mapping):
+        """상담 이력 일괄 저장 (database.ingest.import_consultations)"""
+        return import_consultations(self.conn, df, mapping)
+
+    @timed
+    def ingest_files(self, sources, kind, mapping, sheet_name=None):
+        """여러 파일/시트 일괄 저장 (database.ingest.ingest_files)"""
+        return ingest_files(self.conn, sources, kind, mapping, sheet_name=sheet_name)
+
+    @timed
+    def plan_ingest(self, sources, kind, mapping, sheet_name=None):
+        """여러 파일/시트 적재 계획 (dry-run, database.ingest.plan_ingest)"""
+        return plan_ingest(self.conn, sources, kind, mapping, sheet_name=sheet_name)
+
+    @timed
+    def commit_ingest_plan(self, plan):
+        """계산해 둔 적재 계획 저장 (database.ingest.commit_ingest_plan)"""
+        return commit_ingest_plan(self.conn, plan)
+
+    @timed
+    def find_mapping_profile(self, kind, columns):
+        """파일 헤더에 맞는 저장된 매핑 프로필 (database.mappings.find_mapping_profile)"""
+        return find_mapping_profile(self.conn, kind, columns)
+
+    @timed
+    def save_mapping_profile(self, kind, columns, mapping, name=None):
+        """매핑 프로필 저장 (database.mappings.save_mapping_profile)"""
+        return save_mapping_profile(self.conn, kind, columns, mapping, name)
+
+    @timed
+    def mapping_profiles(self, kind=None):
+        """저장된 매핑 프로필 목록"""
+        return get_mapping_profiles(self.conn, kind)
+
+    def delete_mapping_profile(self, profile_id):
+        """매핑 프로필 삭제"""
+        return delete_mapping_profile(self.conn, profile_id)
+
+    @timed
+    def merge_companies(self, pairs):
+        """중복 기업 병합 (database.merge.merge_companies)"""
+        return merge_companies(self.conn, pairs)
+
+    @timed
+    def merge_history(self, limit=50):
+        """최근 병합 기록"""
+        return get_merge_history(self.conn, limit)
+
+    @timed
+    def delta(self, consumer, dataset, since=None):
+        """마지막 동기화 이후 변경분 (database.sync.read_delta)"""
+        return read_delta(self.conn, consumer, dataset, since)
+
+    def save_sync_watermark(self, consumer, dataset, delta):
+        """변경분 전달 완료 후 기준 시각 갱신 (database.sync.save_watermark)"""
+        save_watermark(self.conn, consumer, dataset, delta)
+
+    @timed
+    def sync_status(self):
+        """소비자별 동기화 현황"""
+        return get_sync_status(self.conn)
+
+    # ------------------------------------------------------------------
+    # 상담 이력 보관
+
+    @timed
+    def archive_status(self):
+        """아카이브 현황 {'path', 'rows', 'oldest_day', 'newest_day', 'file_bytes'}"""
+        return get_archive_status(self.conn)
+
+    def archive_consultations(self, before_day=None):
+        """기준일 이전 상담 이력을 아카이브 DB로 이동 (database.archive 참고)"""
+        return archive_consultations(self.conn, before_day)
+
+    # ------------------------------------------------------------------
+    # 유지보수
+
+    def maintenance_status(self):
+        """
+        유지보수 판단 정보
+
+        Returns:
+            dict: {'db_bytes', 'wal_bytes', 'freelist_ratio', 'planned': [(작업, 이유)]}
+        """
+        status = dict(get_file_sizes(self.conn))
+        status['freelist_ratio'] = get_fragmentation(self.conn)['freelist_ratio']
+        status['planned'] = plan_maintenance(self.conn)
+        return status
+
+    def pragma_settings(self):
+        """연결에 적용된 PRAGMA 설정 (database.pragmas)"""
+        return get_pragma_settings(self.conn)
+
+    def run_maintenance(self, tasks=None):
+        """유지보수 실행 (tasks가 None이면 기준을 넘은 작업만, database.maintenance 참고)"""
+        return run_maintenance(self.conn, tasks)
+
+    def maintenance_log(self, limit=50):
+        """최근 유지보수 기록 (최신 순)"""
+        return pd.DataFrame(
+            get_maintenance_log(self.conn, limit),
+            columns=[
+                '작업', '이유', '소요시간(초)', 'DB크기_전', 'DB크기_후', 'WAL크기_전', 'WAL크기_후', '실행일시', '오류'
+            ]
+        )
+
+    def integrity_status(self):
+        """저장된 참조 무결성 점검 결과 요약 (database.integrity.get_integrity_status)"""
+        return get_integrity_status(self.conn)
+
+    def integrity_issues(self, limit=100):
+        """기업이 없거나 company_id가 어긋난 연락처/상담 이력 행"""
+        return pd.DataFrame(
+            get_integrity_issues(self.conn, limit),
+            columns=['테이블', 'ID', '업체코드', 'company_id', '문제', '발견일시']
+        )
+
+    def run_integrity_check(self):
+        """참조 무결성 전체 점검을 지금 실행 (database.integrity 참고)"""
+        return run_integrity_check(self.conn)
@@ -0,0 +1,563 @@
+"""
+database/schema.py
+
+데이터베이스 스키마 정의 및 마이그레이션
+- 기본 테이블 생성
+- PRAGMA user_version 기반 순차 마이그레이션
+"""
+
+import pandas as pd
+
+from .changelog import install_change_log_triggers
+from .connection import transaction
+from .dates import normalize_dates
+from .validation import build_contact_keys
+
+
+# 기본 테이블 (최초 버전 스키마)
+BASE_TABLES = [
+    '''
+    CREATE TABLE IF NOT EXISTS companies (
+        company_code TEXT PRIMARY KEY,
+        company_name TEXT NOT NULL,
+        revenue_2024 REAL,
+        industry TEXT,
+        employee_count INTEGER,
+        address TEXT,
+        products TEXT,
+        customer_category TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS customer_contacts (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        company_code TEXT,
+        customer_name TEXT NOT NULL,
+        position TEXT,
+        phone TEXT,
+        email TEXT,
+        acquisition_path TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (company_code) REFERENCES companies(company_code)
+    )
+    ''',
+    '''
+    CREATE TABLE IF NOT EXISTS consultations (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        company_code TEXT,
+        customer_name TEXT,
+        consultation_date TEXT,
+        consultation_content TEXT NOT NULL,
+        project_name TEXT,
+        created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (company_code) REFERENCES companies(company_code)
+    )
+    '''
+]
+
+# 마이그레이션 백필 시 한 번에 처리할 행 수
+BACKFILL_CHUNK_SIZE = 50000
+
+
+def get_columns(conn, table):
+    """
+    테이블 컬럼명 목록 조회
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        table (str): 테이블명
+
+    Returns:
+        list: 컬럼명 목록
+    """
+    return [row[1] for row in conn.execute(f"PRAGMA table_info({table})").fetchall()]
+
+
+def get_schema_version(conn):
+    """
+    현재 스키마 버전 조회 (PRAGMA user_version)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        int: 스키마 버전
+    """
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def _migrate_consultation_day(conn):
+    """
+    v1: 정규화된 상담 날짜 컬럼(consultation_day) 추가 및 백필
+
+    - consultation_date는 화면 표시용 원본 값으로 유지
+    - consultation_day는 YYYY-MM-DD 형식으로 정렬/기간 조회/월별 집계에 사용
+    """
+    if 'consultation_day' not in get_columns(conn, 'consultations'):
+        conn.execute("ALTER TABLE consultations ADD COLUMN consultation_day TEXT")
+
+    # 기존 데이터 백필 (id 순서로 청크 단위 벡터 변환)
+    last_id = 0
+    while True:
+        chunk = pd.read_sql_query(
+            '''
+            SELECT id, consultation_date FROM consultations
+            WHERE id > ? ORDER BY id LIMIT ?
+            ''',
+            conn,
+            params=(last_id, BACKFILL_CHUNK_SIZE)
+        )
+        if chunk.empty:
+            break
+        last_id = int(chunk['id'].iloc[-1])
+
+        chunk['consultation_day'] = normalize_dates(chunk['consultation_date'])
+        chunk = chunk[chunk['consultation_day'].notna()]
+        conn.executemany(
+            "UPDATE consultations SET consultation_day = ? WHERE id = ?",
+            list(zip(chunk['consultation_day'], chunk['id'].astype(int).tolist()))
+        )
+
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultations_company_day
+        ON consultations(company_code, consultation_day)
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultations_day
+        ON consultations(consultation_day)
+    ''')
+
+
+# 연락처 중복 정리 시 비어 있는 값을 다른 중복 행에서 채울 컬럼
+CONTACT_FILL_COLUMNS = ['position', 'phone', 'email', 'acquisition_path']
+
+
+def _migrate_contact_key(conn):
+    """
+    v2: 연락처 식별 키(contact_key) 추가, 기존 중복 연락처 정리, 기업별 고유 인덱스 생성
+
+    - 키는 정규화된 이메일, 없으면 정규화된 전화번호 + 이름 (build_contact_keys)
+    - 같은 기업에 같은 키가 여러 개면 가장 먼저 등록된 행을 남기고,
+      남긴 행의 빈 값은 가장 최근 중복 행의 값으로 채운 뒤 나머지 삭제
+    - 상담 이력은 연락처를 id가 아닌 이름으로 참조하므로 삭제해도 끊어지는 참조 없음
+    """
+    if 'contact_key' not in get_columns(conn, 'customer_contacts'):
+        conn.execute("ALTER TABLE customer_contacts ADD COLUMN contact_key TEXT")
+
+    # 기존 데이터 백필 (id 순서로 청크 단위 벡터 변환)
+    last_id = 0
+    while True:
+        chunk = pd.read_sql_query(
+            '''
+            SELECT id, customer_name, phone, email FROM customer_contacts
+            WHERE id > ? ORDER BY id LIMIT ?
+            ''',
+            conn,
+            params=(last_id, BACKFILL_CHUNK_SIZE)
+        )
+        if chunk.empty:
+            break
+        last_id = int(chunk['id'].iloc[-1])
+
+        chunk['contact_key'] = build_contact_keys(chunk['customer_name'], chunk['phone'], chunk['email'])
+        chunk = chunk[chunk['contact_key'].notna()]
+        conn.executemany(
+            "UPDATE customer_contacts SET contact_key = ? WHERE id = ?",
+            list(zip(chunk['contact_key'].tolist(), chunk['id'].astype(int).tolist()))
+        )
+
+    conn.execute('''
+        CREATE TEMP TABLE contact_keepers AS
+        SELECT company_code, contact_key, MIN(id) AS keep_id
+        FROM customer_contacts
+        WHERE contact_key IS NOT NULL AND company_code IS NOT NULL
+        GROUP BY company_code, contact_key
+        HAVING COUNT(*) > 1
+    ''')
+    fill_sql = ",\n".join(
+        f'''{col} = COALESCE({col}, (
+                SELECT d.{col} FROM customer_contacts d
+                WHERE d.company_code = customer_contacts.company_code
+                  AND d.contact_key = customer_contacts.contact_key
+                  AND d.{col} IS NOT NULL
+                ORDER BY d.id DESC LIMIT 1))'''
+        for col in CONTACT_FILL_COLUMNS
+    )
+    conn.execute(f'''
+        UPDATE customer_contacts SET
+        {fill_sql}
+        WHERE id IN (SELECT keep_id FROM temp.contact_keepers)
+    ''')
+    conn.execute('''
+        DELETE FROM customer_contacts
+        WHERE id IN (
+            SELECT cc.id FROM customer_contacts cc
+            JOIN temp.contact_keepers k
+              ON k.company_code = cc.company_code AND k.contact_key = cc.contact_key
+            WHERE cc.id <> k.keep_id
+        )
+    ''')
+    conn.execute("DROP TABLE temp.contact_keepers")
+
+    conn.execute('''
+        CREATE UNIQUE INDEX IF NOT EXISTS idx_contacts_company_key
+        ON customer_contacts(company_code, contact_key)
+        WHERE contact_key IS NOT NULL
+    ''')
+
+
+# 변경분 내보내기 대상 (데이터셋, 테이블, 삭제 기록에 남길 키 컬럼)
+SYNC_TABLES = [
+    ('companies', 'companies', 'company_code'),
+    ('contacts', 'customer_contacts', 'id'),
+    ('consultations', 'consultations', 'id'),
+]
+
+
+def _migrate_sync_tracking(conn):
+    """
+    v3: 변경분 내보내기(database.sync)용 updated_at 인덱스와 삭제 기록
+
+    - updated_at이 비어 있는 행은 created_at으로 채워 범위 조회에서 빠지지 않게 함
+    - 삭제 트리거가 deleted_rows에 (데이터셋, 키, 삭제 시각)을 남김
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS deleted_rows (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            dataset TEXT NOT NULL,
+            row_key TEXT NOT NULL,
+            deleted_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_deleted_rows_dataset_time
+        ON deleted_rows(dataset, deleted_at)
+    ''')
+
+    for dataset, table, key in SYNC_TABLES:
+        conn.execute(f'''
+            UPDATE {table} SET updated_at = COALESCE(created_at, CURRENT_TIMESTAMP)
+            WHERE updated_at IS NULL
+        ''')
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_updated ON {table}(updated_at)")
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_tombstone
+            AFTER DELETE ON {table}
+            BEGIN
+                INSERT INTO deleted_rows (dataset, row_key) VALUES ('{dataset}', OLD.{key});
+            END
+        ''')
+
+
+def _backfill_change_seq(conn, table, order_by, next_seq):
+    """change_seq가 없는 행에 order_by 순서로 next_seq + 1부터 번호 부여, 마지막 번호 반환"""
+    conn.execute("CREATE TEMP TABLE seq_backfill (rid INTEGER PRIMARY KEY, seq INTEGER)")
+    conn.execute(f'''
+        INSERT INTO temp.seq_backfill (rid, seq)
+        SELECT rowid, ? + ROW_NUMBER() OVER (ORDER BY {order_by})
+        FROM {table} WHERE change_seq IS NULL
+    ''', (next_seq,))
+    conn.execute(f'''
+        UPDATE {table} SET change_seq = (SELECT seq FROM temp.seq_backfill WHERE rid = {table}.rowid)
+        WHERE change_seq IS NULL
+    ''')
+    last = conn.execute("SELECT MAX(seq) FROM temp.seq_backfill").fetchone()[0]
+    conn.execute("DROP TABLE temp.seq_backfill")
+    return last or next_seq
+
+
+def _migrate_change_tracking(conn):
+    """
+    v4: 모든 테이블의 updated_at / change_seq 자동 갱신 트리거
+
+    - change_seq: 전체 테이블 공통으로 단조 증가하는 변경 번호 (change_counter 한 행에서 발급)
+    - INSERT 후 트리거가 새 번호를 부여하고, UPDATE 후 트리거는 새 번호와 updated_at을 함께 갱신
+      (UPDATE 문에서 updated_at을 빠뜨려도 항상 갱신됨)
+    - 트리거 안의 UPDATE는 change_seq를 바꾸므로 WHEN 조건에 걸려 다시 실행되지 않음
+    - 삭제 기록(deleted_rows)에도 번호를 남겨 변경분 내보내기가 번호 하나로 추가/수정/삭제를 조회
+    - 기존 행은 updated_at 순서로 번호를 매기고, 시각 기준으로 저장된 동기화 기준점은 번호로 변환
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_counter (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            value INTEGER NOT NULL
+        )
+    ''')
+    conn.execute("INSERT OR IGNORE INTO change_counter (id, value) VALUES (1, 0)")
+    next_seq = conn.execute("SELECT value FROM change_counter WHERE id = 1").fetchone()[0]
+
+    for dataset, table, key in SYNC_TABLES:
+        if 'change_seq' not in get_columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN change_seq INTEGER")
+        next_seq = _backfill_change_seq(conn, table, "updated_at, rowid", next_seq)
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_change_seq ON {table}(change_seq)")
+
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_insert_seq
+            AFTER INSERT ON {table}
+            BEGIN
+                UPDATE change_counter SET value = value + 1 WHERE id = 1;
+                UPDATE {table} SET change_seq = (SELECT value FROM change_counter WHERE id = 1)
+                WHERE rowid = NEW.rowid;
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS trg_{table}_update_seq
+            AFTER UPDATE ON {table}
+            WHEN NEW.change_seq IS OLD.change_seq
+            BEGIN
+                UPDATE change_counter SET value = value + 1 WHERE id = 1;
+                UPDATE {table} SET
+                    change_seq = (SELECT value FROM change_counter WHERE id = 1),
+                    updated_at = CURRENT_TIMESTAMP
+                WHERE rowid = NEW.rowid;
+            END
+        ''')
+
+        # v3 삭제 트리거를 번호를 남기는 트리거로 교체
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_tombstone")
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_tombstone
+            AFTER DELETE ON {table}
+            BEGIN
+                UPDATE change_counter SET value = value + 1 WHERE id = 1;
+                INSERT INTO deleted_rows (dataset, row_key, change_seq)
+                VALUES ('{dataset}', OLD.{key}, (SELECT value FROM change_counter WHERE id = 1));
+            END
+        ''')
+
+    if 'change_seq' not in get_columns(conn, 'deleted_rows'):
+        conn.execute("ALTER TABLE deleted_rows ADD COLUMN change_seq INTEGER")
+    next_seq = _backfill_change_seq(conn, 'deleted_rows', "deleted_at, id", next_seq)
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_deleted_rows_dataset_seq ON deleted_rows(dataset, change_seq)")
+    conn.execute("UPDATE change_counter SET value = ? WHERE id = 1", (next_seq,))
+
+    # v3 동기화 기준점(UTC 시각)을 그 시각 이전에 바뀐 행의 마지막 번호로 변환
+    if 'sync_watermarks' in [row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]:
+        tables = {dataset: table for dataset, table, _ in SYNC_TABLES}
+        for consumer, dataset, watermark in conn.execute(
+            "SELECT consumer, dataset, watermark FROM sync_watermarks"
+        ).fetchall():
+            seq = conn.execute(
+                f"SELECT MAX(change_seq) FROM {tables[dataset]} WHERE updated_at < ?", (watermark,)
+            ).fetchone()[0]
+            conn.execute(
+                "UPDATE sync_watermarks SET watermark = ? WHERE consumer = ? AND dataset = ?",
+                (seq or 0, consumer, dataset)
+            )
+
+
+def _migrate_change_log(conn):
+    """
+    v5: 변경 로그(change_log) 테이블과 기록 트리거 (database.changelog)
+
+    - id가 소비자 오프셋 (AUTOINCREMENT라 정리 후에도 번호를 다시 쓰지 않음)
+    - 기존 데이터는 기록하지 않음 (처음 연결하는 소비자는 변경분 내보내기로 전체를 받은 뒤 시작)
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS change_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            table_name TEXT NOT NULL,
+            op TEXT NOT NULL,
+            row_key TEXT,
+            changed TEXT,
+            changed_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_change_log_changed_at ON change_log(changed_at)")
+    install_change_log_triggers(conn)
+
+
+# 기업을 참조하는 하위 테이블 (company_id로 조인)
+COMPANY_CHILD_TABLES = ['customer_contacts', 'consultations']
+
+
+def _migrate_company_id(conn):
+    """
+    v6: 기업 정수 대리 키(company_id) 추가 및 하위 테이블 조인 키 전환
+
+    - companies를 company_id INTEGER PRIMARY KEY(rowid 별칭) + company_code UNIQUE 구조로 재생성
+      (기존 rowid를 그대로 company_id로 사용, rowid 별칭이라 VACUUM 후에도 바뀌지 않음)
+    - 연락처/상담 이력에 company_id 추가 후 업체코드로 백필
+    - 하위 테이블의 company_code는 업무 키로 유지 (저장 코드/내보내기/변경 로그는 그대로 업체코드 사용)
+    - company_id는 v4 change_seq 트리거가 같은 UPDATE에서 company_code 기준으로 채움
+      (INSERT/UPDATE 문에서 company_id를 지정하지 않아도 됨, 기업이 없는 업체코드는 NULL)
+    - 기업별 상담 인덱스를 (company_id, consultation_day)로 교체, 연락처에 company_id 인덱스 추가
+    """
+    # 재생성 전에 companies의 인덱스/트리거 정의 보관 (자동 인덱스 제외)
+    saved = conn.execute('''
+        SELECT sql FROM sqlite_master
+        WHERE tbl_name = 'companies' AND type IN ('index', 'trigger') AND sql IS NOT NULL
+    ''').fetchall()
+
+    if 'company_id' not in get_columns(conn, 'companies'):
+        conn.execute('''
+            CREATE TABLE companies_new (
+                company_id INTEGER PRIMARY KEY,
+                company_code TEXT NOT NULL UNIQUE,
+                company_name TEXT NOT NULL,
+                revenue_2024 REAL,
+                industry TEXT,
+                employee_count INTEGER,
+                address TEXT,
+                products TEXT,
+                customer_category TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                change_seq INTEGER
+            )
+        ''')
+        conn.execute('''
+            INSERT INTO companies_new (
+                company_id, company_code, company_name, revenue_2024, industry, employee_count,
+                address, products, customer_category, created_at, updated_at, change_seq
+            )
+            SELECT rowid, company_code, company_name, revenue_2024, industry, employee_count,
+                   address, products, customer_category, created_at, updated_at, change_seq
+            FROM companies
+            ORDER BY rowid
+        ''')
+        conn.execute("DROP TABLE companies")
+        conn.execute("ALTER TABLE companies_new RENAME TO companies")
+        for (sql,) in saved:
+            conn.execute(sql)
+
+    for table in COMPANY_CHILD_TABLES:
+        if 'company_id' not in get_columns(conn, table):
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN company_id INTEGER REFERENCES companies(company_id)")
+
+        # 백필이 change_seq/updated_at을 바꾸지 않도록 트리거를 지우고 백필한 뒤 다시 생성
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_insert_seq")
+        conn.execute(f"DROP TRIGGER IF EXISTS trg_{table}_update_seq")
+        conn.execute(f'''
+            UPDATE {table} SET company_id = (
+                SELECT c.company_id FROM companies c WHERE c.company_code = {table}.company_code
+            )
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_insert_seq
+            AFTER INSERT ON {table}
+            BEGIN
+                UPDATE change_counter SET value = value + 1 WHERE id = 1;
+                UPDATE {table} SET
+                    change_seq = (SELECT value FROM change_counter WHERE id = 1),
+                    company_id = (SELECT company_id FROM companies WHERE company_code = NEW.company_code)
+                WHERE rowid = NEW.rowid;
+            END
+        ''')
+        conn.execute(f'''
+            CREATE TRIGGER trg_{table}_update_seq
+            AFTER UPDATE ON {table}
+            WHEN NEW.change_seq IS OLD.change_seq
+            BEGIN
+                UPDATE change_counter SET value = value + 1 WHERE id = 1;
+                UPDATE {table} SET
+                    change_seq = (SELECT value FROM change_counter WHERE id = 1),
+                    updated_at = CURRENT_TIMESTAMP,
+                    company_id = (SELECT company_id FROM companies WHERE company_code = NEW.company_code)
+                WHERE rowid = NEW.rowid;
+            END
+        ''')
+
+    conn.execute("DROP INDEX IF EXISTS idx_consultations_company_day")
+    conn.execute('''
+        CREATE INDEX IF NOT EXISTS idx_consultations_company_id_day
+        ON consultations(company_id, consultation_day)
+    ''')
+    conn.execute("CREATE INDEX IF NOT EXISTS idx_customer_contacts_company_id ON customer_contacts(company_id)")
+
+    # 변경 로그 트리거를 새 컬럼 기준으로 다시 설치 (company_id는 기록하지 않음)
+    install_change_log_triggers(conn)
+
+
+def _migrate_foreign_key_indexes(conn):
+    """
+    v7: 외래키 강제(PRAGMA foreign_keys=ON)용 하위 테이블 참조 컬럼 인덱스
+
+    - 기업 삭제/업체코드 변경 시 SQLite가 참조하는 하위 행을 찾을 때 사용
+      (인덱스가 없으면 기업 한 건마다 하위 테이블 전체를 읽음)
+    - 연락처의 (company_code, contact_key) 인덱스는 부분 인덱스라 외래키 조회에 쓰이지 않음
+    - company_id 인덱스는 v6에서 생성 (consultations는 (company_id, consultation_day) 앞부분 사용)
+    """
+    for table in COMPANY_CHILD_TABLES:
+        conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_company_code ON {table}(company_code)")
+
+
+# (버전, 마이그레이션 함수) 목록 - 반드시 버전 순서대로 추가
+MIGRATIONS = [
+    (1, _migrate_consultation_day),
+    (2, _migrate_contact_key),
+    (3, _migrate_sync_tracking),
+    (4, _migrate_change_tracking),
+    (5, _migrate_change_log),
+    (6, _migrate_company_id),
+    (7, _migrate_foreign_key_indexes),
+]
+
+
+def create_tables(conn):
+    """
+    기본 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    for ddl in BASE_TABLES:
+        conn.execute(ddl)
+    if conn.in_transaction:
+        conn.commit()
+
+
+def apply_migrations(conn):
+    """
+    아직 적용되지 않은 마이그레이션을 순서대로 실행
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        list: 이번에 적용된 마이그레이션 버전 목록
+
+    Note:
+        - 마이그레이션마다 별도 트랜잭션으로 실행하고 user_version을 함께 갱신
+        - 실패한 마이그레이션은 롤백되고 다음 실행 시 다시 시도
+        - 테이블 재생성(v6) 중 부모 테이블 DROP이 외래키에 걸리지 않도록 마이그레이션 동안만 외래키를 끔
+          (PRAGMA foreign_keys는 트랜잭션 안에서 바뀌지 않으므로 트랜잭션 밖에서 전환,
+          마이그레이션 후 참조 무결성은 database.integrity 점검으로 확인)
+    """
+    applied = []
+    current = get_schema_version(conn)
+    pending = [(version, migration) for version, migration in MIGRATIONS if version > current]
+    if not pending:
+        return applied
+
+    foreign_keys = conn.execute("PRAGMA foreign_keys").fetchone()[0]
+    conn.execute("PRAGMA foreign_keys=OFF")
+    try:
+        for version, migration in pending:
+            with transaction(conn):
+                migration(conn)
+                conn.execute(f"PRAGMA user_version = {int(version)}")
+            applied.append(version)
+    finally:
+        conn.execute(f"PRAGMA foreign_keys={'ON' if foreign_keys else 'OFF'}")
+
+    return applied
+
+
+def init_schema(conn):
+    """
+    테이블 생성과 마이그레이션을 한 번에 수행
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        list: 이번에 적용된 마이그레이션 버전 목록
+    """
+    create_tables(conn)
+    return apply_migrations(conn)
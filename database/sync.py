@@ -0,0 +1,265 @@
+"""
+database/sync.py
+
+변경분(delta) 내보내기
+- 소비자(다운스트림 팀/시스템)별로 데이터셋마다 마지막으로 받은 변경 번호(watermark) 저장
+- change_seq 인덱스 범위 조회로 기준 번호 이후 추가/수정된 행만 조회
+- 삭제된 행은 삭제 트리거가 남기는 삭제 기록(deleted_rows)에서 조회
+
+Note:
+    - change_seq는 INSERT/UPDATE/DELETE 트리거가 전체 테이블 공통으로 발급하는 단조 증가 번호 (schema v4)
+    - 번호는 트랜잭션 안에서 발급되므로 같은 번호가 두 번 전달되거나 빠지지 않음
+"""
+
+import pandas as pd
+
+from .connection import transaction
+
+
+# 변경분 데이터셋별 (시트명, 키 컬럼, 쿼리) - 쿼리 파라미터는 기준 변경 번호
+DELTA_QUERIES = {
+    'companies': ("기업목록", '업체코드', '''
+        SELECT
+            company_code as 업체코드,
+            company_name as 기업명,
+            revenue_2024 as 매출액_2024,
+            industry as 업종,
+            employee_count as 종업원수,
+            address as 주소,
+            products as 상품,
+            customer_category as 고객구분,
+            created_at as 등록일,
+            updated_at as 수정일,
+            change_seq as 변경번호
+        FROM companies
+        WHERE change_seq > ?
+        ORDER BY change_seq
+    '''),
+    'contacts': ("고객연락처", 'ID', '''
+        SELECT
+            cc.id as ID,
+            cc.company_code as 업체코드,
+            c.company_name as 기업명,
+            cc.customer_name as 고객명,
+            cc.position as 직위,
+            cc.phone as 전화,
+            cc.email as 이메일,
+            cc.acquisition_path as 획득경로,
+            cc.created_at as 등록일,
+            cc.updated_at as 수정일,
+            cc.change_seq as 변경번호
+        FROM customer_contacts cc
+        LEFT JOIN companies c ON c.company_id = cc.company_id
+        WHERE cc.change_seq > ?
+        ORDER BY cc.change_seq
+    '''),
+    'consultations': ("상담이력", 'ID', '''
+        SELECT
+            con.id as ID,
+            con.company_code as 업체코드,
+            c.company_name as 기업명,
+            con.customer_name as 고객명,
+            con.consultation_date as 상담날짜,
+            con.consultation_content as 상담내역,
+            con.project_name as 프로젝트명,
+            con.created_at as 등록일,
+            con.updated_at as 수정일,
+            con.change_seq as 변경번호
+        FROM consultations con
+        LEFT JOIN companies c ON c.company_id = con.company_id
+        WHERE con.change_seq > ?
+        ORDER BY con.change_seq
+    ''')
+}
+
+# 삭제 기록 시트명
+DELETED_SHEET = "삭제"
+
+
+def ensure_sync_watermarks(conn):
+    """
+    동기화 기준 번호 테이블 생성 (없을 때만)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+    """
+    conn.execute('''
+        CREATE TABLE IF NOT EXISTS sync_watermarks (
+            consumer TEXT NOT NULL,
+            dataset TEXT NOT NULL,
+            watermark INTEGER NOT NULL,
+            changed_rows INTEGER DEFAULT 0,
+            deleted_rows INTEGER DEFAULT 0,
+            synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (consumer, dataset)
+        )
+    ''')
+
+
+def get_watermark(conn, consumer, dataset):
+    """
+    소비자가 마지막으로 받은 변경 번호
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        consumer (str): 소비자 이름
+        dataset (str): 'companies', 'contacts', 'consultations'
+
+    Returns:
+        int: 변경 번호, 동기화 기록이 없으면 None
+    """
+    ensure_sync_watermarks(conn)
+    row = conn.execute(
+        "SELECT watermark FROM sync_watermarks WHERE consumer = ? AND dataset = ?",
+        (consumer, dataset)
+    ).fetchone()
+    return int(row[0]) if row else None
+
+
+def current_change_seq(conn):
+    """
+    마지막으로 발급된 변경 번호 (전체 테이블 공통)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        int: 변경 번호 (변경이 없으면 0)
+
+    Note:
+        - 번호가 같으면 그 사이에 어떤 테이블도 바뀌지 않은 것이므로 캐시 키로도 사용 가능
+    """
+    row = conn.execute("SELECT value FROM change_counter WHERE id = 1").fetchone()
+    return row[0] if row else 0
+
+
+def read_delta(conn, consumer, dataset, since=None):
+    """
+    마지막 동기화 이후 추가/수정/삭제된 행 조회 (기준 번호는 갱신하지 않음)
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        consumer (str): 소비자 이름
+        dataset (str): 'companies', 'contacts', 'consultations'
+        since (int): 기준 변경 번호 직접 지정 (None이면 저장된 기준 번호, 기록이 없으면 전체)
+
+    Returns:
+        dict: {
+            'since': 사용한 기준 번호 (전체면 None),
+            'watermark': 다음 동기화에 쓸 기준 번호 (조회 시점의 마지막 변경 번호),
+            'changed': 추가/수정된 행 DataFrame,
+            'deleted': 삭제된 행 DataFrame (키, 삭제일시, 변경번호)
+        }
+
+    Example:
+        >>> delta = read_delta(conn, "erp", "companies")
+        >>> write_export({"기업목록": delta['changed'], "삭제": delta['deleted']}, "delta.xlsx")
+        >>> save_watermark(conn, "erp", "companies", delta)
+
+    Note:
+        - 파일 저장이 끝난 뒤 save_watermark()를 호출해야 실패 시 변경분을 잃지 않음
+        - 받는 쪽은 변경번호 순서대로 키 기준 덮어쓰기/삭제로 반영
+        - 처음 동기화(전체)에는 삭제 기록을 넣지 않음
+    """
+    _, key, query = DELTA_QUERIES[dataset]
+    if since is None:
+        since = get_watermark(conn, consumer, dataset)
+
+    # 마지막 변경 번호와 조회 결과가 어긋나지 않도록 한 트랜잭션에서 읽음
+    with transaction(conn):
+        watermark = current_change_seq(conn)
+        changed = pd.read_sql_query(query, conn, params=(since or 0,))
+        if since is None:
+            deleted = pd.DataFrame(columns=[key, '삭제일시', '변경번호'])
+        else:
+            deleted = pd.read_sql_query(f'''
+                SELECT row_key as {key}, deleted_at as 삭제일시, change_seq as 변경번호
+                FROM deleted_rows
+                WHERE dataset = ? AND change_seq > ?
+                ORDER BY change_seq
+            ''', conn, params=(dataset, int(since)))
+
+    return {'since': since, 'watermark': watermark, 'changed': changed, 'deleted': deleted}
+
+
+def delta_sheets(dataset, delta):
+    """
+    변경분을 내보내기용 시트 구성으로 변환
+
+    Args:
+        dataset (str): 'companies', 'contacts', 'consultations'
+        delta (dict): read_delta() 결과
+
+    Returns:
+        dict: {시트명: 변경 행, '삭제': 삭제 행}
+    """
+    sheet_name, _, _ = DELTA_QUERIES[dataset]
+    return {sheet_name: delta['changed'], DELETED_SHEET: delta['deleted']}
+
+
+def save_watermark(conn, consumer, dataset, delta):
+    """
+    변경분 전달 완료 후 소비자의 기준 번호 갱신
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+        consumer (str): 소비자 이름
+        dataset (str): 'companies', 'contacts', 'consultations'
+        delta (dict): read_delta() 결과
+    """
+    ensure_sync_watermarks(conn)
+    with transaction(conn):
+        conn.execute('''
+            INSERT INTO sync_watermarks (consumer, dataset, watermark, changed_rows, deleted_rows)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(consumer, dataset) DO UPDATE SET
+                watermark = excluded.watermark,
+                changed_rows = excluded.changed_rows,
+                deleted_rows = excluded.deleted_rows,
+                synced_at = CURRENT_TIMESTAMP
+        ''', (consumer, dataset, delta['watermark'], len(delta['changed']), len(delta['deleted'])))
+
+
+def get_sync_status(conn):
+    """
+    소비자별 동기화 현황
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        pandas.DataFrame: 소비자, 데이터셋, 기준번호, 변경행수, 삭제행수, 동기화일시
+    """
+    ensure_sync_watermarks(conn)
+    return pd.read_sql_query('''
+        SELECT consumer as 소비자, dataset as 데이터셋, watermark as 기준번호,
+               changed_rows as 변경행수, deleted_rows as 삭제행수, synced_at as 동기화일시
+        FROM sync_watermarks
+        ORDER BY consumer, dataset
+    ''', conn)
+
+
+def prune_tombstones(conn):
+    """
+    모든 소비자가 이미 받아 간 삭제 기록 정리
+
+    Args:
+        conn (sqlite3.Connection): 데이터베이스 연결
+
+    Returns:
+        int: 삭제한 기록 수
+
+    Note:
+        - 데이터셋별로 가장 늦은 소비자의 기준 번호 이하 기록만 삭제
+        - 동기화 기록이 없는 데이터셋의 삭제 기록은 유지 (새 소비자는 전체 내보내기부터 시작)
+    """
+    ensure_sync_watermarks(conn)
+    with transaction(conn):
+        deleted = conn.execute('''
+            DELETE FROM deleted_rows
+            WHERE change_seq <= (
+                SELECT MIN(w.watermark) FROM sync_watermarks w
+                WHERE w.dataset = deleted_rows.dataset
+            )
+        ''').rowcount
+    return deleted
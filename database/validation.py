@@ -0,0 +1,222 @@
+"""
+database/validation.py
+
+업로드 데이터 검증 (컬럼 단위 벡터 연산)
+- 매핑된 컬럼마다 오류 마스크를 만들어 행별 오류 메시지로 합침
+- 전화번호/이메일은 저장 형식으로 일괄 정규화
+- 오류 행은 원본 값과 사유를 담은 엑셀 보고서로 내려받고, 정상 행만 저장
+"""
+
+import pandas as pd
+
+from .dates import parse_dates
+
+
+# 이메일 형식 (정규화 후 소문자 기준)
+EMAIL_PATTERN = r'^[a-z0-9._%+-]+@[a-z0-9.-]+\.[a-z]{2,}$'
+
+# 필드별 오류 메시지에 쓰는 이름
+FIELD_LABELS = {
+    'company_name': '기업명',
+    'company_code': '업체코드',
+    'revenue_2024': '매출액',
+    'industry': '업종',
+    'employee_count': '종업원수',
+    'address': '주소',
+    'products': '상품',
+    'customer_category': '고객구분',
+    'customer_name': '고객명',
+    'position': '직위',
+    'phone': '전화',
+    'email': '이메일',
+    'acquisition_path': '획득경로',
+    'consultation_date': '상담날짜',
+    'consultation_content': '상담내역',
+    'project_name': '프로젝트명'
+}
+
+def _text(values):
+    """값을 앞뒤 공백을 제거한 문자열로 변환 (빈 값은 NA, 엑셀 숫자의 '.0' 제거)"""
+    if pd.api.types.is_float_dtype(values):
+        values = values.astype(object).map(lambda v: int(v) if pd.notna(v) and float(v).is_integer() else v)
+    text = values.astype(object).where(values.notna()).astype('string').str.strip()
+    return text.mask(text == '')
+
+
+def normalize_phone_numbers(values):
+    """
+    전화번호 일괄 정규화
+
+    Args:
+        values (pandas.Series): 전화번호 원본 값
+
+    Returns:
+        tuple: (정규화된 번호 Series - 빈 값/형식 오류는 NA, 형식 오류 마스크)
+
+    Example:
+        >>> normalize_phone_numbers(pd.Series(["01012345678", "+82 2-123-4567", "1234"]))[0].tolist()
+        ['010-1234-5678', '02-123-4567', <NA>]
+
+    Note:
+        - 엑셀에서 숫자로 읽혀 앞자리 0이 빠진 번호(1012345678)와 +82 국가번호를 보정
+        - 휴대폰/지역번호 10~11자리, 02 국번 9~10자리, 대표번호(15xx 등) 8자리만 허용
+    """
+    text = _text(values)
+    digits = text.str.replace(r'\.0$', '', regex=True).str.replace(r'\D', '', regex=True)
+    international = text.str.startswith('+82') & digits.str.startswith('82')
+    digits = digits.mask(international, '0' + digits.str.slice(2))
+
+    length = digits.str.len()
+    missing_zero = ~digits.str.startswith('0') & (
+        ((length == 10) & digits.str.startswith('1'))
+        | (length.isin([8, 9]) & digits.str.startswith('2'))
+        | ((length == 9) & digits.str.match(r'[3-6]'))
+    )
+    digits = digits.mask(missing_zero, '0' + digits)
+    length = digits.str.len()
+
+    seoul = digits.str.startswith('02')
+    area = digits.str.startswith('0') & ~seoul
+    formatted = pd.Series(pd.NA, index=values.index, dtype='string')
+    rules = [
+        (seoul & (length == 9), r'^(\d{2})(\d{3})(\d{4})$', r'\1-\2-\3'),
+        (seoul & (length == 10), r'^(\d{2})(\d{4})(\d{4})$', r'\1-\2-\3'),
+        (area & (length == 10), r'^(\d{3})(\d{3})(\d{4})$', r'\1-\2-\3'),
+        (area & (length == 11), r'^(\d{3})(\d{4})(\d{4})$', r'\1-\2-\3'),
+        (digits.str.match(r'1[5-9]') & (length == 8), r'^(\d{4})(\d{4})$', r'\1-\2'),
+    ]
+    for mask, pattern, replacement in rules:
+        mask = mask.fillna(False).astype(bool)
+        formatted = formatted.mask(mask, digits.str.replace(pattern, replacement, regex=True))
+
+    invalid = text.notna() & formatted.isna()
+    return formatted, invalid.astype(bool)
+
+
+def normalize_emails(values):
+    """
+    이메일 일괄 정규화 (앞뒤 공백/mailto: 제거, 소문자)
+
+    Args:
+        values (pandas.Series): 이메일 원본 값
+
+    Returns:
+        tuple: (정규화된 이메일 Series - 빈 값/형식 오류는 NA, 형식 오류 마스크)
+    """
+    text = _text(values).str.lower().str.replace(r'^mailto:', '', regex=True)
+    valid = text.str.match(EMAIL_PATTERN).fillna(False).astype(bool)
+    invalid = text.notna() & ~valid
+    return text.where(valid), invalid.astype(bool)
+
+
+def build_contact_keys(customer_names, phones, emails):
+    """
+    연락처 식별 키 일괄 생성 (같은 기업 안에서 같은 사람인지 판단하는 기준)
+
+    Args:
+        customer_names (pandas.Series): 고객명
+        phones (pandas.Series): 전화번호 (원본 또는 정규화된 값)
+        emails (pandas.Series): 이메일 (원본 또는 정규화된 값)
+
+    Returns:
+        pandas.Series: 'email:<이메일>' 또는 'phone:<숫자>:<이름>' (둘 다 없으면 NA)
+
+    Example:
+        >>> build_contact_keys(pd.Series(["홍길동", "김철수"]),
+        ...                    pd.Series(["010-1234-5678", "02 123 4567"]),
+        ...                    pd.Series(["Hong@A.com", None])).tolist()
+        ['email:hong@a.com', 'phone:021234567:김철수']
+
+    Note:
+        - 이메일이 있으면 이메일만 사용 (직함이 붙는 등 이름 표기가 달라도 같은 사람)
+        - 이메일이 없으면 전화번호 + 이름 (대표번호를 여러 명이 함께 쓰는 경우 구분)
+        - 형식이 틀린 전화번호/이메일로는 키를 만들지 않음 (키가 없는 행은 중복 판단 없이 추가)
+    """
+    email, _ = normalize_emails(emails)
+    phone, _ = normalize_phone_numbers(phones)
+    digits = phone.str.replace('-', '', regex=False)
+    name = _text(customer_names).str.replace(r'\s+', '', regex=True).str.lower()
+
+    keys = ('phone:' + digits + ':' + name).where(digits.notna() & name.notna())
+    return ('email:' + email).where(email.notna(), keys)
+
+
+def validate_frame(df, mapping, required_fields):
+    """
+    업로드 데이터 검증 및 정규화
+
+    Args:
+        df (pandas.DataFrame): 업로드 데이터 (인덱스 = 원본 행 순서)
+        mapping (dict): {필드: 원본 컬럼명}
+        required_fields (list): 비어 있으면 안 되는 필드
+
+    Returns:
+        tuple: (정상 행 DataFrame - 전화/이메일 정규화, 오류 행 DataFrame - '오류' 컬럼 포함)
+
+    Note:
+        - 행별로 모든 오류를 모아 "; "로 연결 (첫 오류에서 멈추지 않음)
+        - 정상 행 DataFrame은 같은 매핑으로 적재 함수에 그대로 넘길 수 있음
+    """
+    checks = []
+    cleaned = df.copy()
+
+    for field in required_fields:
+        checks.append((_text(df[mapping[field]]).isna(), f"{FIELD_LABELS[field]}은(는) 필수입니다."))
+
+    column = mapping.get('revenue_2024')
+    if column:
+        text = _text(df[column])
+        parsed = pd.to_numeric(text.str.replace(r'[,\s]', '', regex=True), errors='coerce')
+        checks.append((text.notna() & parsed.isna(), "매출액은 숫자여야 합니다."))
+
+    column = mapping.get('employee_count')
+    if column:
+        text = _text(df[column])
+        parsed = pd.to_numeric(text.str.replace(',', '', regex=False), errors='coerce')
+        bad = text.notna() & (parsed.isna() | (parsed % 1 != 0) | (parsed < 0))
+        checks.append((bad, "종업원수는 0 이상의 정수여야 합니다."))
+
+    column = mapping.get('phone')
+    if column:
+        cleaned[column], bad = normalize_phone_numbers(df[column])
+        checks.append((bad, "전화번호 형식이 올바르지 않습니다."))
+
+    column = mapping.get('email')
+    if column:
+        cleaned[column], bad = normalize_emails(df[column])
+        checks.append((bad, "올바른 이메일 형식이 아닙니다."))
+
+    column = mapping.get('consultation_date')
+    if column:
+        bad = _text(df[column]).notna() & parse_dates(df[column]).isna()
+        checks.append((bad, "상담날짜 형식을 인식할 수 없습니다."))
+
+    messages = pd.Series('', index=df.index, dtype=object)
+    for mask, message in checks:
+        mask = mask.fillna(False).astype(bool)
+        messages[mask] = messages[mask] + message + "; "
+    invalid = messages != ''
+
+    errors = df[invalid].copy()
+    errors.insert(0, '오류', messages[invalid].str.rstrip('; '))
+    return cleaned[~invalid], errors
+
+
+def build_error_report(errors, file=None, sheet=None):
+    """
+    오류 행에 위치 정보(파일, 시트, 엑셀 행 번호) 추가
+
+    Args:
+        errors (pandas.DataFrame): validate_frame()의 오류 행 (인덱스 = 0부터 시작하는 데이터 행 순서)
+        file (str): 파일명
+        sheet (str or int): 시트
+
+    Returns:
+        pandas.DataFrame: 파일, 시트, 행, 오류, 원본 컬럼...
+    """
+    report = errors.copy()
+    # 엑셀 1행은 헤더이므로 데이터 첫 행이 2행
+    report.insert(0, '행', errors.index + 2)
+    report.insert(0, '시트', sheet)
+    report.insert(0, '파일', file)
+    return report.reset_index(drop=True)
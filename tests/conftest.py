@@ -0,0 +1,57 @@
+"""
+tests/conftest.py
+
+공통 fixture
+- 테스트마다 임시 폴더에 새 DB를 만들어 사용 (저장소의 crm_database.db는 건드리지 않음)
+- 느린 쿼리 로그도 임시 폴더에 기록 (저장소 폴더에 로그 파일을 만들지 않음)
+"""
+
+import logging
+
+import pandas as pd
+import pytest
+
+from database import CRMRepository, init_database, querylog
+
+
+@pytest.fixture(autouse=True)
+def slow_query_log(tmp_path, monkeypatch):
+    """느린 쿼리 로그 파일 경로 (테스트마다 임시 폴더)"""
+    path = tmp_path / "crm_slow_queries.log"
+    monkeypatch.setattr(querylog, 'SLOW_QUERY_LOG', str(path))
+    monkeypatch.setattr(querylog, '_slow_logger', None)
+    yield path
+    logger = logging.getLogger('crm.slow_query')
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    """임시 DB 파일 경로"""
+    return str(tmp_path / "crm.db")
+
+
+@pytest.fixture
+def conn(db_path):
+    """스키마/마이그레이션이 적용된 연결"""
+    conn = init_database(db_path)
+    yield conn
+    conn.close()
+
+
+@pytest.fixture
+def repo(conn):
+    """CRMRepository"""
+    return CRMRepository(conn)
+
+
+@pytest.fixture
+def write_csv(tmp_path):
+    """행 목록(dict)을 업로드용 CSV 파일로 저장하고 경로 반환"""
+    def write(rows, name="upload.csv"):
+        path = tmp_path / name
+        pd.DataFrame(rows).to_csv(path, index=False, encoding="utf-8-sig")
+        return str(path)
+    return write
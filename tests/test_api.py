@@ -0,0 +1,202 @@
+"""crm/api.py - 로컬 JSON HTTP API"""
+
+import http.client
+import json
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from crm import api, cli
+from database.connection import connect
+
+
+@pytest.fixture
+def server(db_path, monkeypatch):
+    monkeypatch.setenv('CRM_API_TOKEN', 'secret')
+    server = api.create_server(db_path, port=0, quiet=True)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    yield server
+    server.shutdown()
+    server.server_close()
+
+
+def request(server, method, path, body=None, token='secret'):
+    client = http.client.HTTPConnection(*server.server_address[:2], timeout=10)
+    headers = {'Authorization': f'Bearer {token}'} if token else {}
+    try:
+        client.request(method, path, body=body, headers=headers)
+        response = client.getresponse()
+        return response, response.read().decode('utf-8')
+    finally:
+        client.close()
+
+
+def ndjson(records):
+    return '\n'.join(json.dumps(record, ensure_ascii=False) for record in records).encode('utf-8')
+
+
+def parse_lines(text):
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+def test_token_required(server):
+    response, _ = request(server, 'GET', '/health', token=None)
+    assert response.status == 401
+    response, _ = request(server, 'GET', '/health', token='wrong')
+    assert response.status == 401
+    response, body = request(server, 'GET', '/health')
+    assert response.status == 200
+    assert json.loads(body) == {'status': 'ok'}
+
+
+def test_post_rejects_invalid_rows(server, conn):
+    body = ndjson([
+        {'기업명': '가나', '고객명': '김철수', '이메일': 'KIM@Example.com', '전화번호': '010 1234 5678'},
+        {'기업명': '가나', '고객명': '이영희', '이메일': 'not-an-email'},
+        {'기업명': '가나'},
+    ])
+    response, text = request(server, 'POST', '/contacts', body)
+    batch, summary = parse_lines(text)
+
+    assert response.status == 200
+    assert batch['rejected'] == 2
+    assert [error['line'] for error in batch['errors']] == [2, 3]
+    assert '이메일' in batch['errors'][0]['error']
+    assert '고객명' in batch['errors'][1]['error']
+    assert summary['done'] and summary['rows'] == 3 and summary['rejected'] == 2
+
+    rows = conn.execute("SELECT customer_name, email, phone FROM customer_contacts").fetchall()
+    # 정상 행은 파일 업로드와 같이 정규화되어 저장
+    assert rows == [('김철수', 'kim@example.com', '010-1234-5678')]
+
+
+def test_post_without_required_field_rejects_all_rows(server, conn):
+    response, text = request(server, 'POST', '/companies', ndjson([{'업종': 'IT'}, {'업종': '제조'}]))
+    batch, summary = parse_lines(text)
+    assert batch['rejected'] == 2
+    assert summary['rejected'] == 2
+    assert conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 0
+
+
+def test_post_imports_in_batches(server, conn, monkeypatch):
+    monkeypatch.setattr(api, 'BATCH_SIZE', 2)
+    body = ndjson([{'기업명': '가나', '고객명': name} for name in ('김철수', '이영희', '박민수')])
+    response, text = request(server, 'POST', '/contacts', body)
+    *batches, summary = parse_lines(text)
+
+    assert response.status == 200
+    assert [batch['rows'] for batch in batches] == [2, 1]
+    assert summary['done'] and summary['rows'] == 3 and summary['batches'] == 2
+    assert conn.execute("SELECT COUNT(*) FROM customer_contacts").fetchone()[0] == 3
+
+
+def test_get_pages_and_changes(server):
+    request(server, 'POST', '/companies', ndjson([{'기업명': f'기업{i}'} for i in range(5)]))
+
+    response, text = request(server, 'GET', '/companies?limit=3')
+    first = parse_lines(text)
+    assert len(first) == 3
+    after = response.getheader('X-Next-After')
+    assert after == first[-1]['company_code']
+
+    response, text = request(server, 'GET', f'/companies?limit=3&after={after}')
+    second = parse_lines(text)
+    assert len(second) == 2
+    assert {row['company_name'] for row in first + second} == {f'기업{i}' for i in range(5)}
+
+    response, text = request(server, 'GET', '/changes?table=companies')
+    changes = parse_lines(text)
+    assert len(changes) == 5
+    assert int(response.getheader('X-Next-After')) == changes[-1]['id']
+
+
+def test_request_connections_are_closed(server, monkeypatch):
+    opened = []
+
+    def tracking_connect(*args, **kwargs):
+        opened.append(connect(*args, **kwargs))
+        return opened[-1]
+
+    monkeypatch.setattr(api, 'connect', tracking_connect)
+    request(server, 'GET', '/companies')
+    request(server, 'GET', '/companies')
+    assert len(opened) == 2
+
+    def is_closed(db):
+        try:
+            db.execute("SELECT 1")
+        except sqlite3.ProgrammingError:
+            return True
+        return False
+
+    # 응답을 받은 뒤 서버 스레드가 연결을 정리하므로 잠시 대기
+    deadline = time.monotonic() + 5
+    while not all(map(is_closed, opened)) and time.monotonic() < deadline:
+        time.sleep(0.01)
+    assert all(map(is_closed, opened))
+
+
+def test_profile_is_applied(db_path, monkeypatch):
+    monkeypatch.delenv('CRM_API_TOKEN', raising=False)
+    profiles = []
+
+    def tracking_connect(path, profile=None):
+        profiles.append(profile)
+        return connect(path, profile)
+
+    monkeypatch.setattr(api, 'connect', tracking_connect)
+
+    server = api.create_server(db_path, port=0, quiet=True, profile='safe')
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        response, _ = request(server, 'GET', '/companies', token=None)
+        assert response.status == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+    assert profiles == ['safe']
+
+    with pytest.raises(ValueError):
+        api.create_server(db_path, port=0, quiet=True, profile='unknown')
+
+
+def test_cli_serve_passes_profile(db_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(api, 'run_server', lambda *args: calls.append(args))
+    assert cli.main(['--db', db_path, '--profile', 'safe', 'serve', '--port', '9999']) == 0
+    assert calls == [(db_path, '127.0.0.1', 9999, 'safe')]
+
+
+def test_repost_is_idempotent(server, conn):
+    body = ndjson([
+        {'기업명': '가나', '고객명': '김철수', '상담날짜': '2025-01-02', '상담내역': '견적 요청'},
+        {'기업명': '가나', '고객명': '김철수', '상담날짜': '2025-01-03', '상담내역': '계약'},
+    ])
+    _, text = request(server, 'POST', '/consultations', body)
+    assert parse_lines(text)[-1]['written'] == 2
+
+    # ERP가 같은 배치를 다시 보내도 중복 저장하지 않음
+    _, text = request(server, 'POST', '/consultations', body)
+    batch, summary = parse_lines(text)
+    assert batch['written'] == 0 and batch['unchanged'] == 2
+    assert summary['written'] == 0 and summary['unchanged'] == 2
+    assert conn.execute("SELECT COUNT(*) FROM consultations").fetchone()[0] == 2
+
+
+def test_failure_reports_written_rows(server, conn, monkeypatch):
+    monkeypatch.setattr(api, 'BATCH_SIZE', 2)
+    body = ndjson([
+        {'기업명': '가나', '고객명': '김철수', '이메일': 'kim@example.com'},
+        {'기업명': '가나', '고객명': '이영희', '이메일': 'not-an-email'},
+    ]) + b'\n{"broken'
+    _, text = request(server, 'POST', '/contacts', body)
+    batch, error = parse_lines(text)
+
+    assert batch['written'] == 1 and batch['rejected'] == 1
+    # 검증에서 거부된 행은 저장된 행 수에 넣지 않음
+    assert error['committed_rows'] == 1 and error['rejected'] == 1
+    assert conn.execute("SELECT COUNT(*) FROM customer_contacts").fetchone()[0] == 1
@@ -0,0 +1,133 @@
+"""
+상담 이력 보관 (database.archive)
+- 기준일 이전 이력 이동, 전체 이력 조회, 보관 후 기업 병합
+"""
+
+import pytest
+
+from database import CRMRepository, archive, init_database, merge_companies
+from database.export import ARCHIVE_BACKUP_SHEET, read_backup, read_export
+from database.maintenance import snapshot, snapshot_archive_path
+
+
+@pytest.fixture(autouse=True)
+def archive_next_to_db(monkeypatch):
+    """CRM_ARCHIVE_DB_PATH가 설정된 환경에서도 임시 DB 옆 파일을 사용"""
+    monkeypatch.setattr(archive, 'ARCHIVE_DB_PATH', None)
+
+
+def add_consultation(repo, company_name, day, content):
+    ok, message = repo.insert_consultation({
+        '기업명': company_name, '고객명': '담당자', '상담날짜': day, '상담내역': content, '프로젝트명': None
+    })
+    assert ok, message
+
+
+def company_code(conn, name):
+    return conn.execute("SELECT company_code FROM companies WHERE company_name = ?", (name,)).fetchone()[0]
+
+
+def test_archive_moves_rows_before_cutoff(conn, repo):
+    add_consultation(repo, '가나', '2019-03-01', '오래된 상담')
+    add_consultation(repo, '가나', '2025-03-01', '최근 상담')
+
+    result = archive.archive_consultations(conn, before_day='2020-01-01', batch_rows=1)
+
+    assert result == {'cutoff': '2020-01-01', 'archived': 1, 'batches': 1, 'remaining': 0}
+    assert len(repo.list_consultations()) == 1
+    everything = repo.list_consultations(include_archive=True)
+    assert sorted(everything['consultation_content']) == ['오래된 상담', '최근 상담']
+    assert archive.get_archive_status(conn)['rows'] == 1
+
+    # 보관 이동은 삭제 기록을 남기지 않고 변경 로그에 ARCHIVE로 기록
+    assert conn.execute("SELECT COUNT(*) FROM deleted_rows WHERE dataset = 'consultations'").fetchone()[0] == 0
+    assert conn.execute(
+        "SELECT COUNT(*) FROM change_log WHERE table_name = 'consultations' AND op = 'ARCHIVE'"
+    ).fetchone()[0] == 1
+
+
+def test_archive_is_rerunnable(conn, repo):
+    add_consultation(repo, '가나', '2019-03-01', '오래된 상담')
+    archive.archive_consultations(conn, before_day='2020-01-01')
+
+    again = archive.archive_consultations(conn, before_day='2020-01-01')
+
+    assert again['archived'] == 0
+    assert archive.get_archive_status(conn)['rows'] == 1
+
+
+def test_merge_repoints_archived_consultations(conn, repo):
+    add_consultation(repo, '원본', '2019-03-01', '보관될 상담')
+    add_consultation(repo, '원본', '2025-03-01', '운영 상담')
+    add_consultation(repo, '대상', '2025-04-01', '대상 상담')
+    archive.archive_consultations(conn, before_day='2020-01-01')
+    source, target = company_code(conn, '원본'), company_code(conn, '대상')
+    target_id = conn.execute("SELECT company_id FROM companies WHERE company_code = ?", (target,)).fetchone()[0]
+
+    result = merge_companies(conn, [(source, target)])
+
+    assert result['merged'] == 1
+    assert result['consultations_moved'] == 2
+    assert conn.execute(
+        "SELECT company_code, company_id FROM archive.consultations"
+    ).fetchall() == [(target, target_id)]
+    everything = repo.list_consultations(include_archive=True)
+    assert everything['company_name'].notna().all()
+    assert set(everything['company_name']) == {'대상'}
+
+
+def test_merge_attaches_existing_archive_file(db_path, repo):
+    add_consultation(repo, '원본', '2019-03-01', '보관될 상담')
+    add_consultation(repo, '대상', '2025-04-01', '대상 상담')
+    archive.archive_consultations(repo.conn, before_day='2020-01-01')
+    source, target = company_code(repo.conn, '원본'), company_code(repo.conn, '대상')
+
+    # 아카이브를 붙이지 않은 새 연결에서 병합
+    conn = init_database(db_path)
+    try:
+        result = merge_companies(conn, [(source, target)])
+        assert result['consultations_moved'] == 1
+        assert conn.execute("SELECT company_code FROM archive.consultations").fetchall() == [(target,)]
+    finally:
+        conn.close()
+
+
+def test_backup_and_export_include_archived_rows(conn, repo):
+    add_consultation(repo, '가나', '2019-03-01', '오래된 상담')
+    add_consultation(repo, '가나', '2025-03-01', '최근 상담')
+    archive.archive_consultations(conn, before_day='2020-01-01')
+
+    for sheets in (read_backup(conn), repo.backup()):
+        assert list(sheets['상담이력']['consultation_content']) == ['최근 상담']
+        assert list(sheets[ARCHIVE_BACKUP_SHEET]['consultation_content']) == ['오래된 상담']
+        assert sorted(sheets['통합데이터']['상담내역']) == ['오래된 상담', '최근 상담']
+
+    _, exported = repo.export('consultations')
+    assert list(exported['상담내역']) == ['최근 상담', '오래된 상담']
+    assert sorted(read_export(conn, 'consultations')['상담내역']) == ['오래된 상담', '최근 상담']
+    # 화면 통합 조회는 운영 테이블만
+    assert list(repo.integrated_view()['상담내역']) == ['최근 상담']
+
+
+def test_backup_without_archive_has_no_archive_sheet(conn, repo):
+    add_consultation(repo, '가나', '2025-03-01', '최근 상담')
+    assert ARCHIVE_BACKUP_SHEET not in read_backup(conn)
+    assert not archive.has_archive(conn)
+
+
+def test_snapshot_copies_archive(conn, repo, tmp_path):
+    add_consultation(repo, '가나', '2019-03-01', '오래된 상담')
+    add_consultation(repo, '가나', '2025-03-01', '최근 상담')
+    archive.archive_consultations(conn, before_day='2020-01-01')
+
+    path = snapshot(conn, str(tmp_path / 'snap.db'))
+    assert snapshot_archive_path(path) == str(tmp_path / 'snap_archive.db')
+
+    # 스냅샷을 운영 DB로 열면 보관된 이력까지 이어짐
+    restored = init_database(path)
+    try:
+        assert sorted(
+            CRMRepository(restored).list_consultations(include_archive=True)['consultation_content']
+        ) == ['오래된 상담', '최근 상담']
+    finally:
+        restored.close()
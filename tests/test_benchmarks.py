@@ -0,0 +1,69 @@
+"""benchmarks/runner.py, benchmarks/synthetic.py - 벤치마크 실행기와 가상 데이터"""
+
+import json
+
+import pandas as pd
+
+from benchmarks import runner
+from benchmarks.synthetic import generate_dataset
+from database import pragmas, querylog
+
+
+def result(medians, companies=2000, profile='balanced', machine=None):
+    return {
+        'params': {'companies': companies, 'profile': profile},
+        'machine': machine or {'platform': 'test', 'python': '3.11', 'sqlite': '3.40'},
+        'benchmarks': {name: {'median': median} for name, median in medians.items()}
+    }
+
+
+def test_generate_dataset_is_seeded():
+    first = generate_dataset(20, seed=7)
+    second = generate_dataset(20, seed=7)
+    for kind in ('companies', 'contacts', 'consultations'):
+        pd.testing.assert_frame_equal(first[kind], second[kind])
+    assert len(first['companies']) == 20
+    assert not first['companies']['기업명'].duplicated().any()
+
+
+def test_compare_results_flags_regressions():
+    baseline = result({'fast': 0.100, 'slow': 0.100, 'removed': 0.1})
+    current = result({'fast': 0.110, 'slow': 0.200, 'added': 0.1})
+
+    comparison = runner.compare_results(current, baseline, threshold=0.25)
+
+    assert comparison['벤치마크'].tolist() == ['fast', 'slow']
+    assert comparison['회귀'].tolist() == [False, True]
+    assert comparison['비율'].tolist() == [1.1, 2.0]
+
+
+def test_baseline_warnings():
+    baseline = result({})
+    assert runner.baseline_warnings(result({}), baseline) == []
+    warnings = runner.baseline_warnings(
+        result({}, companies=100, profile='safe', machine={'platform': 'other'}), baseline
+    )
+    assert len(warnings) == 3
+
+
+def test_committed_baseline_covers_registered_benchmarks():
+    with open(runner.DEFAULT_BASELINE, encoding='utf-8') as f:
+        baseline = json.load(f)
+    assert baseline['params']['companies'] == 2000
+    assert set(baseline['benchmarks']) == {name for name, _, _ in runner.BENCHMARKS}
+
+
+def test_main_compare_exit_code(tmp_path, monkeypatch):
+    # run_benchmarks()가 바꾸는 전역 설정은 테스트 후 되돌림
+    monkeypatch.setattr(querylog, 'SLOW_QUERY_MS', querylog.SLOW_QUERY_MS)
+    monkeypatch.setattr(pragmas, 'DB_PROFILE', pragmas.DB_PROFILE)
+    args = ['--companies', '20', '--rounds', '1', '--warmup', '0', '-k', 'autocomplete']
+    path = tmp_path / 'baseline.json'
+
+    path.write_text(json.dumps(result({'autocomplete': 1e-9}, companies=20)), encoding='utf-8')
+    assert runner.main(args + ['--compare', str(path)]) == 1
+
+    path.write_text(json.dumps(result({'autocomplete': 1e3}, companies=20)), encoding='utf-8')
+    assert runner.main(args + ['--compare', str(path)]) == 0
+
+    assert runner.main(args + ['--compare', str(tmp_path / 'missing.json')]) == 2
@@ -0,0 +1,68 @@
+"""database/changelog.py - 변경 로그(CDC)"""
+
+from database.changelog import (
+    compact_change_log, get_change_log_offset, read_change_log, save_change_log_offset
+)
+
+
+def test_records_inserts_updates_and_deletes(conn):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('A', '김철수')")
+    conn.execute("UPDATE companies SET industry = 'IT', company_name = '가나' WHERE company_code = 'A'")
+    # 값이 바뀌지 않은 수정은 기록하지 않음
+    conn.execute("UPDATE companies SET company_name = '가나' WHERE company_code = 'A'")
+    conn.execute("DELETE FROM customer_contacts")
+
+    rows = read_change_log(conn)['rows']
+    assert [(row['table'], row['op'], row['key']) for row in rows] == [
+        ('companies', 'INSERT', 'A'),
+        ('customer_contacts', 'INSERT', '1'),
+        ('companies', 'UPDATE', 'A'),
+        ('customer_contacts', 'DELETE', '1'),
+    ]
+    assert rows[0]['changed']['company_name'] == '가나'
+    assert 'updated_at' not in rows[0]['changed'] and 'change_seq' not in rows[0]['changed']
+    # 수정은 바뀐 컬럼만
+    assert rows[2]['changed'] == {'industry': 'IT'}
+    assert rows[3]['changed'] is None
+
+
+def test_pages_and_table_filter(conn):
+    for i in range(5):
+        conn.execute("INSERT INTO companies (company_code, company_name) VALUES (?, ?)", (f'C{i}', str(i)))
+    conn.execute("INSERT INTO consultations (company_code, consultation_content) VALUES ('C0', '상담')")
+
+    page = read_change_log(conn, after=0, limit=2)
+    assert [row['id'] for row in page['rows']] == [1, 2]
+    page = read_change_log(conn, after=page['next_after'], limit=10)
+    assert [row['id'] for row in page['rows']] == [3, 4, 5, 6]
+    empty = read_change_log(conn, after=page['next_after'])
+    assert empty['rows'] == [] and empty['next_after'] == 6 and empty['oldest'] == 1
+
+    page = read_change_log(conn, tables=['consultations'])
+    assert [(row['id'], row['table']) for row in page['rows']] == [(6, 'consultations')]
+
+
+def test_offsets(conn):
+    assert get_change_log_offset(conn, 'dw') == 0
+    save_change_log_offset(conn, 'dw', 3)
+    save_change_log_offset(conn, 'dw', 5)
+    assert get_change_log_offset(conn, 'dw') == 5
+    assert get_change_log_offset(conn, 'other') == 0
+
+
+def test_compact_respects_consumer_offsets(conn):
+    for i in range(4):
+        conn.execute("INSERT INTO companies (company_code, company_name) VALUES (?, ?)", (f'C{i}', str(i)))
+    conn.execute("UPDATE change_log SET changed_at = datetime('now', '-10 days') WHERE id <= 3")
+    save_change_log_offset(conn, 'dw', 2)
+    save_change_log_offset(conn, 'erp', 4)
+
+    # 가장 늦은 소비자(dw)가 읽은 2번까지만 정리
+    assert compact_change_log(conn, retention_days=7, max_days=90) == {'acknowledged': 2, 'expired': 0}
+    page = read_change_log(conn, after=0)
+    assert page['oldest'] == 3
+
+    # 최대 보관 기간이 지나면 읽지 않은 기록도 정리
+    assert compact_change_log(conn, retention_days=7, max_days=5) == {'acknowledged': 0, 'expired': 1}
+    assert read_change_log(conn)['oldest'] == 4
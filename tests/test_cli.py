@@ -0,0 +1,212 @@
+"""crm/cli.py - 명령줄 도구 (가져오기/내보내기/유지보수)"""
+
+import json
+import sqlite3
+
+import pandas as pd
+import pytest
+
+from crm import cli
+
+
+@pytest.fixture
+def run(db_path, capsys):
+    """CLI 실행 후 (종료 코드, 표준 출력, 표준 오류) 반환"""
+    def invoke(*argv):
+        code = cli.main(['--db', db_path, *argv])
+        out, err = capsys.readouterr()
+        return code, out, err
+    return invoke
+
+
+def count(db_path, table):
+    conn = sqlite3.connect(db_path)
+    try:
+        return conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    finally:
+        conn.close()
+
+
+def test_import_dry_run_then_commit(run, db_path, write_csv):
+    path = write_csv([{'기업명': '가나', '매출액': '1,000'}, {'기업명': '다라', '매출액': 'abc'}])
+
+    code, out, err = run('import', 'companies', path, '--dry-run')
+    assert code == 0
+    assert 'insert=1' in out and 'rejected=1' in out
+    assert count(db_path, 'companies') == 0
+
+    errors = str(db_path) + '.errors.xlsx'
+    code, out, err = run('import', 'companies', path, '--errors', errors)
+    assert code == 0
+    assert count(db_path, 'companies') == 1
+    report = pd.read_excel(errors)
+    assert report['오류'].tolist() == ['매출액은 숫자여야 합니다.']
+    assert report['행'].tolist() == [3]
+
+
+def test_import_with_mapping_override(run, db_path, write_csv):
+    run('import', 'companies', write_csv([{'기업명': '가나'}], 'companies.csv'))
+    path = write_csv([{'기업명': '가나', '메모': '첫 미팅'}], 'consultations.csv')
+
+    code, _, _ = run('import', 'consultations', path, '--map', 'consultation_content=메모')
+    assert code == 0
+    conn = sqlite3.connect(db_path)
+    assert conn.execute("SELECT consultation_content FROM consultations").fetchall() == [('첫 미팅',)]
+    conn.close()
+
+    code, _, err = run('import', 'consultations', path, '--map', 'consultation_content')
+    assert code == 1
+    assert '--map 형식' in err
+
+
+def test_export_csv(run, tmp_path, write_csv):
+    run('import', 'companies', write_csv([{'기업명': '가나'}, {'기업명': '다라'}]))
+    output = tmp_path / 'companies.csv'
+
+    code, out, _ = run('export', 'companies', '--format', 'csv', '-o', str(output))
+    assert code == 0
+    assert str(output) in out
+    assert sorted(pd.read_csv(output, encoding='utf-8-sig')['기업명']) == ['가나', '다라']
+
+
+def test_maintenance_commands(run, tmp_path, write_csv):
+    run('import', 'companies', write_csv([{'기업명': '가나'}]))
+    snapshot = tmp_path / 'snapshot.db'
+
+    assert run('snapshot', '-o', str(snapshot))[0] == 0
+    assert count(str(snapshot), 'companies') == 1
+    for command in ('vacuum', 'analyze', 'reindex', 'pragmas'):
+        assert run(command)[0] == 0
+
+
+def test_merge_command(run, db_path, tmp_path, write_csv):
+    run('import', 'companies', write_csv([
+        {'업체코드': 'A', '기업명': '가나(주)'}, {'업체코드': 'B', '기업명': '가나'}
+    ]))
+    mapping = tmp_path / 'merge.csv'
+    pd.DataFrame({'source_code': ['A'], 'target_code': ['B']}).to_csv(mapping, index=False)
+
+    code, out, _ = run('merge', str(mapping))
+    assert code == 0
+    assert count(db_path, 'companies') == 1
+
+
+def test_delta_command(run, tmp_path, write_csv):
+    run('import', 'companies', write_csv([{'기업명': '가나'}, {'기업명': '다라'}]))
+    output = tmp_path / 'delta.csv'
+
+    code, out, _ = run('delta', 'companies', '--consumer', 'erp', '--format', 'csv', '-o', str(output), '--no-commit')
+    assert code == 0
+    assert '(전체)' in out and '변경 2행' in out
+    code, out, _ = run('delta', 'companies', '--consumer', 'erp', '--format', 'csv', '-o', str(output))
+    assert '(전체)' in out
+
+    # 기준 번호가 저장된 뒤에는 변경분이 없음
+    code, out, _ = run('delta', 'companies', '--consumer', 'erp', '--format', 'csv', '-o', str(output))
+    assert code == 0
+    assert '변경 0행, 삭제 0행' in out
+
+
+def test_changes_command(run, db_path, write_csv):
+    run('import', 'companies', write_csv([{'기업명': '가나'}, {'기업명': '다라'}]))
+
+    code, out, _ = run('changes', '--consumer', 'dw', '--limit', '1')
+    assert code == 0
+    changes = [json.loads(line) for line in out.splitlines()]
+    assert [(row['id'], row['op']) for row in changes] == [(1, 'INSERT'), (2, 'INSERT')]
+
+    # 저장된 오프셋 이후부터 이어서 읽음
+    run('import', 'companies', write_csv([{'기업명': '마바'}]))
+    code, out, _ = run('changes', '--consumer', 'dw')
+    assert [json.loads(line)['changed']['company_name'] for line in out.splitlines()] == ['마바']
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("UPDATE change_log SET changed_at = datetime('now', '-10 days')")
+    conn.commit()
+    conn.close()
+    code, out, _ = run('compact-changes', '--retention-days', '7')
+    assert code == 0
+    assert '읽음 처리 3건' in out
+    # 이미 정리된 구간부터 읽으면 재동기화 경고
+    run('import', 'companies', write_csv([{'기업명': '사아'}]))
+    code, out, err = run('changes', '--after', '0')
+    assert [json.loads(line)['id'] for line in out.splitlines()] == [4]
+    assert '1~3번 기록은 이미 정리' in err
+
+
+def test_changes_follow_stops_on_interrupt(run, db_path, write_csv, monkeypatch):
+    from database.changelog import get_change_log_offset
+
+    run('import', 'companies', write_csv([{'기업명': '가나'}, {'기업명': '다라'}, {'기업명': '마바'}]))
+
+    def interrupt(seconds):
+        raise KeyboardInterrupt
+
+    monkeypatch.setattr(cli.time, 'sleep', interrupt)
+    code, out, _ = run('changes', '--consumer', 'dw', '--follow')
+    assert code == 0
+    assert len(out.splitlines()) == 3
+
+    # 페이지 중간에 멈추면 출력한 기록까지만 오프셋 저장
+    run('import', 'companies', write_csv([{'기업명': '사아'}, {'기업명': '자차'}]))
+    dumps = cli.json.dumps
+    printed = []
+
+    def dumps_then_interrupt(row, **kwargs):
+        if printed:
+            raise KeyboardInterrupt
+        printed.append(row['id'])
+        return dumps(row, **kwargs)
+
+    monkeypatch.setattr(cli.json, 'dumps', dumps_then_interrupt)
+    code, out, _ = run('changes', '--consumer', 'dw', '--follow')
+    assert code == 0
+    assert [json.loads(line)['id'] for line in out.splitlines()] == [4]
+    monkeypatch.setattr(cli.json, 'dumps', dumps)
+
+    conn = sqlite3.connect(db_path)
+    try:
+        assert get_change_log_offset(conn, 'dw') == 4
+    finally:
+        conn.close()
+
+
+def test_maintain_command(run):
+    code, out, _ = run('maintain', '--task', 'analyze', '--task', 'checkpoint')
+    assert code == 0
+    assert out.count('[manual]') == 2
+
+    code, out, _ = run('maintain', '--log')
+    lines = out.splitlines()
+    assert [line.split()[2] for line in lines] == ['checkpoint', 'analyze']
+
+
+def test_maintain_failure_exits_nonzero(run, monkeypatch):
+    from database import maintenance
+
+    def locked(conn):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setitem(maintenance.MAINTENANCE_FUNCTIONS, 'analyze', locked)
+    code, out, _ = run('maintain', '--task', 'analyze')
+    assert code == 1
+    assert '실패' in out and 'database is locked' in out
+
+    code, out, _ = run('maintain', '--log')
+    assert '실패: OperationalError: database is locked' in out
+
+
+def test_integrity_command(run, db_path, write_csv):
+    run('import', 'companies', write_csv([{'업체코드': 'A', '기업명': '가나'}]))
+    code, out, _ = run('integrity')
+    assert code == 0 and '아직 없음' in out
+
+    conn = sqlite3.connect(db_path)
+    conn.execute("INSERT INTO consultations (company_code, consultation_content) VALUES ('GONE', '상담')")
+    conn.commit()
+    conn.close()
+
+    # 문제 행이 있으면 종료 코드 1
+    code, out, _ = run('integrity', '--run')
+    assert code == 1
+    assert '문제 행 1건' in out and 'consultations id=1 업체코드=GONE' in out
@@ -0,0 +1,76 @@
+"""database/connection.py - 자동 업체코드 발급 (allocate_company_codes)"""
+
+import threading
+
+import pytest
+
+from database.connection import allocate_company_codes, connect, transaction
+from database.ingest import guess_mapping, ingest_files
+
+
+def codes(*values):
+    return [f"AUTO{value:010d}" for value in values]
+
+
+def test_sequential_blocks(conn):
+    assert allocate_company_codes(conn, 0) == []
+    assert allocate_company_codes(conn, 3) == codes(1, 2, 3)
+    assert allocate_company_codes(conn, 2) == codes(4, 5)
+    assert conn.execute("SELECT next_value FROM code_sequences WHERE name = 'company'").fetchone()[0] == 6
+
+
+def test_skips_codes_already_taken(conn):
+    conn.executemany(
+        "INSERT INTO companies (company_code, company_name) VALUES (?, ?)",
+        [(code, '직접 입력') for code in codes(2, 3)]
+    )
+    # 건너뛴 만큼 다음 블록을 다시 예약
+    assert allocate_company_codes(conn, 3) == codes(1, 4, 5)
+
+
+def test_rollback_releases_block(conn):
+    with pytest.raises(RuntimeError):
+        with transaction(conn):
+            assert allocate_company_codes(conn, 2) == codes(1, 2)
+            raise RuntimeError
+    assert allocate_company_codes(conn, 1) == codes(1)
+
+
+def test_concurrent_connections_get_distinct_codes(db_path, conn):
+    allocated = []
+    lock = threading.Lock()
+
+    def worker():
+        worker_conn = connect(db_path)
+        try:
+            for _ in range(20):
+                block = allocate_company_codes(worker_conn, 5)
+                with lock:
+                    allocated.extend(block)
+        finally:
+            worker_conn.close()
+
+    threads = [threading.Thread(target=worker) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(allocated) == len(set(allocated)) == 400
+    assert sorted(allocated) == codes(*range(1, 401))
+
+
+def test_ingest_assigns_codes_to_new_companies(conn, write_csv):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES (?, '직접 입력')", codes(1))
+    path = write_csv([{'기업명': '가나', '고객명': '김철수'}, {'기업명': '다라', '고객명': '이영희'}])
+    ingest_files(conn, [path], 'contacts', guess_mapping(['기업명', '고객명'], 'contacts'), max_workers=1)
+
+    rows = conn.execute("SELECT company_name, company_code FROM companies ORDER BY company_code").fetchall()
+    assert rows == [('직접 입력', codes(1)[0]), ('가나', codes(2)[0]), ('다라', codes(3)[0])]
+
+
+def test_find_company_code(repo, conn):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    assert repo.find_company_code('가나') == 'A'
+    assert repo.find_company_code('다라') == codes(1)[0]
+    assert repo.find_company_code('마바') == codes(2)[0]
@@ -0,0 +1,57 @@
+"""연락처 중복 방지 (기업별 contact_key 기준 upsert, 업로드 경로)"""
+
+import pandas as pd
+import pytest
+
+from database.ingest import guess_mapping, ingest_files
+
+
+@pytest.fixture
+def load(conn, write_csv):
+    """업로드 파일과 같은 경로(검증/정규화 후 저장)로 적재"""
+    def ingest(rows):
+        path = write_csv(rows)
+        mapping = guess_mapping(pd.DataFrame(rows).columns, 'contacts')
+        return ingest_files(conn, [path], 'contacts', mapping, max_workers=1)
+    return ingest
+
+
+def contacts(conn):
+    return conn.execute('''
+        SELECT c.company_name, cc.customer_name, cc.position, cc.phone, cc.email
+        FROM customer_contacts cc JOIN companies c ON c.company_id = cc.company_id
+        ORDER BY cc.id
+    ''').fetchall()
+
+
+def test_same_email_is_merged(conn, load):
+    load([{'기업명': '가나', '고객명': '김철수', '이메일': 'kim@example.com', '직위': '과장'}])
+    result = load([
+        {'기업명': '가나', '고객명': '김철수 부장', '이메일': ' KIM@Example.com', '직위': None, '전화번호': '01012345678'}
+    ])
+
+    assert (result['inserted'], result['merged'], result['new_companies']) == (0, 1, 0)
+    # 값이 있는 컬럼만 덮어씀 (빈 직위로 지우지 않음)
+    assert contacts(conn) == [('가나', '김철수 부장', '과장', '010-1234-5678', 'kim@example.com')]
+
+
+def test_phone_and_name_key_without_email(conn, load):
+    load([
+        {'기업명': '가나', '고객명': '김철수', '전화번호': '02-123-4567'},
+        {'기업명': '가나', '고객명': '이영희', '전화번호': '02-123-4567'},
+    ])
+    # 대표번호를 함께 쓰는 다른 사람은 구분, 같은 이름 + 번호는 합침
+    result = load([{'기업명': '가나', '고객명': '김 철수', '전화번호': '021234567', '직위': '대리'}])
+    assert result['merged'] == 1
+    assert [row[1:3] for row in contacts(conn)] == [('김 철수', '대리'), ('이영희', None)]
+
+
+def test_same_person_in_different_companies_and_keyless_rows(conn, load):
+    result = load([
+        {'기업명': '가나', '고객명': '김철수', '이메일': 'kim@example.com'},
+        {'기업명': '다라', '고객명': '김철수', '이메일': 'kim@example.com'},
+        {'기업명': '가나', '고객명': '담당자'},
+        {'기업명': '가나', '고객명': '담당자'},
+    ])
+    assert (result['inserted'], result['merged'], result['new_companies']) == (4, 0, 2)
+    assert len(contacts(conn)) == 4
@@ -0,0 +1,28 @@
+"""상담 날짜 정규화 (database.dates)"""
+
+from datetime import date, datetime
+
+import pandas as pd
+
+from database.dates import format_display_dates, normalize_dates, to_iso_date
+
+
+def test_normalize_dates_mixed_formats():
+    values = pd.Series([
+        '2024.03.05', '2024-3-5', '2024/03/05', '20240305', '2024.03.05.', 45356,
+        '2024-03-05 14:30', datetime(2024, 3, 5, 9), date(2024, 3, 5), 'March 5, 2024'
+    ])
+    assert normalize_dates(values).tolist() == ['2024-03-05'] * len(values)
+
+
+def test_normalize_dates_invalid_values():
+    assert normalize_dates(['미정', None, '', '2024-13-40', 12]).tolist() == [None] * 5
+    assert to_iso_date('2024.12.31') == '2024-12-31'
+    assert to_iso_date(None) is None
+
+
+def test_format_display_dates_keeps_unparsed_text():
+    values = pd.Series([pd.Timestamp('2024-03-05'), '2024-3-5', '협의 중', None], index=[10, 11, 12, 13])
+    result = format_display_dates(values)
+    assert result.tolist() == ['2024.03.05', '2024.03.05', '협의 중', None]
+    assert result.index.tolist() == [10, 11, 12, 13]
@@ -0,0 +1,59 @@
+"""
+조회 화면용 dtype 정책 (database.dtypes.compact_frame)
+"""
+
+import pandas as pd
+import pytest
+
+from database.dtypes import STRING_DTYPE, compact_frame, frame_memory
+from database.export import write_export
+
+
+def test_repeated_text_becomes_category_and_unique_text_stays_text():
+    df = pd.DataFrame({
+        '업종': ['제조', '제조', 'IT', '제조'],
+        '주소': ['서울 1', '서울 2', '부산 3', '대구 4'],
+    })
+
+    compact = compact_frame(df)
+
+    assert isinstance(compact['업종'].dtype, pd.CategoricalDtype)
+    assert not isinstance(compact['주소'].dtype, pd.CategoricalDtype)
+    assert compact.astype(object).equals(df.astype(object))
+
+
+def test_integer_columns_use_smallest_nullable_int():
+    df = pd.DataFrame({'종업원수': [10.0, None, 120.0], 'id': [1.0, 2.0, 70000.0]})
+
+    compact = compact_frame(df)
+
+    assert str(compact['종업원수'].dtype) == 'Int8'
+    assert str(compact['id'].dtype) == 'Int32'
+    assert compact['종업원수'].isna().tolist() == [False, True, False]
+
+
+def test_revenue_stays_float64():
+    df = pd.DataFrame({'매출액_2024': [1234567890.12, None]})
+
+    assert compact_frame(df)['매출액_2024'].dtype == 'float64'
+
+
+def test_arrow_strings_when_pyarrow_installed():
+    pytest.importorskip('pyarrow')
+    df = pd.DataFrame({'상담내역': [f'상담 {i}' for i in range(10)]})
+
+    compact = compact_frame(df)
+
+    assert STRING_DTYPE == 'string[pyarrow]'
+    assert str(compact['상담내역'].dtype) == 'string'
+    assert frame_memory(compact) <= frame_memory(df)
+
+
+def test_parquet_export_round_trip(tmp_path):
+    pytest.importorskip('pyarrow')
+    frame = compact_frame(pd.DataFrame({'업종': ['제조', '제조', 'IT'], '종업원수': [1.0, None, 3.0]}))
+    path = str(tmp_path / 'out.parquet')
+
+    written = write_export({'기업목록': frame}, path, fmt='parquet')
+
+    assert pd.read_parquet(written[0][0])['업종'].astype(str).tolist() == ['제조', '제조', 'IT']
@@ -0,0 +1,71 @@
+"""
+여러 파일/시트 적재 (database.ingest.ingest_files)
+- 파일/시트 순서, 설명 시트 건너뛰기, 읽기 실패 파일, 프로세스 풀 읽기
+"""
+
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from database.ingest import ingest_files, read_upload_columns
+
+
+def write_xlsx(path, sheets):
+    with pd.ExcelWriter(path) as writer:
+        for name, rows in sheets.items():
+            pd.DataFrame(rows).to_excel(writer, sheet_name=name, index=False)
+    return str(path)
+
+
+MAPPING = {'company_name': '기업명', 'consultation_content': '상담내역', 'consultation_date': '상담날짜'}
+
+
+@pytest.fixture
+def companies(conn):
+    conn.executemany(
+        "INSERT INTO companies (company_code, company_name) VALUES (?, ?)", [('A', '가나'), ('B', '다라')]
+    )
+
+
+@pytest.mark.parametrize('max_workers', [1, 2])
+def test_ingest_multiple_files_and_sheets(conn, companies, tmp_path, write_csv, max_workers):
+    first = write_xlsx(tmp_path / '지점A.xlsx', {
+        '1월': [{'기업명': '가나', '상담내역': '1월 상담', '상담날짜': '2024.01.10'}],
+        '2월': [{'기업명': '다라', '상담내역': '2월 상담', '상담날짜': '2024.02.10'}],
+        '설명': [{'안내': '이 시트는 설명입니다.'}],
+    })
+    second = write_csv([{'기업명': '가나', '상담내역': '지점B 상담', '상담날짜': '20240315'}], '지점B.csv')
+    broken = tmp_path / '깨진파일.xlsx'
+    broken.write_bytes(b'not a workbook')
+
+    result = ingest_files(conn, [first, second, str(broken)], 'consultations', MAPPING,
+                          sheet_name=None, max_workers=max_workers)
+
+    assert result['inserted'] == 3
+    sheets = {(os.path.basename(item['file']), item['sheet']): item for item in result['sheets']}
+    assert sheets[('지점A.xlsx', '1월')]['rows'] == 1
+    assert sheets[('지점A.xlsx', '설명')]['error'].startswith('필수 컬럼 없음')
+    assert sheets[('깨진파일.xlsx', None)]['error'].startswith('파일 읽기 오류')
+    # 파일 순서, 시트 순서대로 저장
+    contents = [row[0] for row in conn.execute("SELECT consultation_content FROM consultations ORDER BY id")]
+    assert contents == ['1월 상담', '2월 상담', '지점B 상담']
+    days = [row[0] for row in conn.execute("SELECT consultation_day FROM consultations ORDER BY id")]
+    assert days == ['2024-01-10', '2024-02-10', '2024-03-15']
+
+
+def test_ingest_uploaded_file_objects(conn, companies):
+    upload = io.BytesIO()
+    pd.DataFrame([{' 기업명 ': '가나', '상담내역': '업로드'}]).to_excel(upload, index=False)
+    upload.name = '업로드.xlsx'
+
+    # 헤더 앞뒤 공백은 무시
+    assert read_upload_columns(upload) == ['기업명', '상담내역']
+    result = ingest_files(conn, [upload], 'consultations', MAPPING, max_workers=1)
+    assert result['inserted'] == 1
+
+
+def test_missing_required_mapping(conn):
+    with pytest.raises(ValueError, match='필수 컬럼 매핑'):
+        ingest_files(conn, [], 'consultations', {'company_name': '기업명'})
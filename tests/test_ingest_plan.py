@@ -0,0 +1,76 @@
+"""
+업로드 dry-run 계획 (database.ingest.plan_ingest / commit_ingest_plan)
+- 계획의 처리 방식별 건수가 실제 저장 결과와 같아야 함
+"""
+
+import pandas as pd
+
+from database.ingest import _plan_companies, commit_ingest_plan, plan_ingest
+
+
+COMPANY_MAPPING = {'company_name': '기업명', 'industry': '업종'}
+
+
+def test_plan_companies_marks_in_file_duplicates_of_new_company_skipped(conn):
+    prepared = pd.DataFrame({'company_code': [None, None, None], 'company_name': ['가나', '가나', '마바']})
+
+    actions = _plan_companies(conn, prepared, {'company_name': '기업명'})
+
+    assert actions.tolist() == ['skipped', 'insert', 'insert']
+
+
+def test_plan_counts_match_commit_for_duplicate_new_companies(conn, write_csv):
+    path = write_csv([
+        {'기업명': '가나', '업종': '제조'},
+        {'기업명': '가나', '업종': '유통'},
+        {'기업명': '마바', '업종': 'IT'},
+    ])
+
+    plan = plan_ingest(conn, [path], 'companies', COMPANY_MAPPING, max_workers=1)
+    result = commit_ingest_plan(conn, plan)
+
+    assert plan['counts']['insert'] == 2
+    assert plan['counts']['skipped'] == 1
+    assert result['inserted'] == plan['counts']['insert']
+    assert result['updated'] == plan['counts']['update']
+    assert conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 2
+    # 파일 안 중복은 마지막 행 값으로 저장
+    assert conn.execute("SELECT industry FROM companies WHERE company_name = '가나'").fetchone()[0] == '유통'
+
+
+def test_plan_counts_match_commit_with_existing_and_new_companies(conn, write_csv):
+    first = write_csv([{'기업명': '가나', '업종': '제조'}], name="first.csv")
+    commit_ingest_plan(conn, plan_ingest(conn, [first], 'companies', COMPANY_MAPPING, max_workers=1))
+
+    second = write_csv([
+        {'기업명': '가나', '업종': '제조'},
+        {'기업명': '다라', '업종': 'IT'},
+        {'기업명': '다라', '업종': 'IT'},
+    ], name="second.csv")
+    plan = plan_ingest(conn, [second], 'companies', COMPANY_MAPPING, max_workers=1)
+    result = commit_ingest_plan(conn, plan)
+
+    assert plan['counts'] == {'insert': 1, 'update': 0, 'unchanged': 1, 'skipped': 1, 'rejected': 0}
+    assert result['inserted'] == 1
+
+
+def test_plan_new_contacts_and_consultations_are_inserts(conn, write_csv):
+    contacts = write_csv([
+        {'기업명': '신규', '고객명': '홍길동', '이메일': 'hong@example.com'},
+    ], name="contacts.csv")
+    plan = plan_ingest(conn, [contacts], 'contacts',
+                       {'company_name': '기업명', 'customer_name': '고객명', 'email': '이메일'}, max_workers=1)
+    assert plan['counts']['insert'] == 1
+    assert commit_ingest_plan(conn, plan)['inserted'] == 1
+
+    consultations = write_csv([
+        {'기업명': '또신규', '상담내역': '첫 상담', '상담날짜': '2025-01-02'},
+    ], name="consultations.csv")
+    mapping = {'company_name': '기업명', 'consultation_content': '상담내역', 'consultation_date': '상담날짜'}
+    plan = plan_ingest(conn, [consultations], 'consultations', mapping, max_workers=1)
+    assert plan['counts']['insert'] == 1
+    assert commit_ingest_plan(conn, plan)['inserted'] == 1
+
+    # 같은 파일을 다시 올리면 중복 저장하지 않음
+    plan = plan_ingest(conn, [consultations], 'consultations', mapping, max_workers=1)
+    assert plan['counts']['unchanged'] == 1
@@ -0,0 +1,158 @@
+"""
+참조 무결성 (외래키 강제 + database/integrity.py 점검)
+- 외래키를 끈 연결로 고아 행을 넣어 마이그레이션/이전 버전에서 생긴 행을 재현
+"""
+
+import sqlite3
+import threading
+import time
+
+import pytest
+
+from database.connection import check_database_health
+from database.integrity import (
+    MISSING_COMPANY, STALE_COMPANY_ID, get_integrity_issues, get_integrity_status,
+    pending_checks, run_integrity_check, scan_chunk, start_integrity_checker
+)
+
+
+@pytest.fixture
+def orphans(conn):
+    """기업 A + 정상 연락처 2건, 기업 없는 연락처 1건, company_id가 어긋난 연락처 1건, 고아 상담 1건"""
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('A', '정상1'), ('A', '정상2')")
+    conn.execute("PRAGMA foreign_keys=OFF")
+    conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('GONE', '고아')")
+    conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('A', '어긋남')")
+    # change_seq를 함께 바꾸면 갱신 트리거가 company_id를 다시 채우지 않음
+    conn.execute(
+        "UPDATE customer_contacts SET company_id = 99, change_seq = change_seq + 100 WHERE customer_name = '어긋남'"
+    )
+    conn.execute("INSERT INTO consultations (company_code, consultation_content) VALUES ('GONE', '상담')")
+    conn.execute("PRAGMA foreign_keys=ON")
+    return conn
+
+
+def test_foreign_keys_are_enforced(conn):
+    assert conn.execute("PRAGMA foreign_keys").fetchone()[0] == 1
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('GONE', '김철수')")
+
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    conn.execute("INSERT INTO consultations (company_code, consultation_content) VALUES ('A', '상담')")
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute("DELETE FROM companies WHERE company_code = 'A'")
+
+
+def test_v7_indexes_foreign_key_columns(conn):
+    for table in ('customer_contacts', 'consultations'):
+        indexes = {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+        assert f'idx_{table}_company_code' in indexes
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT 1 FROM consultations WHERE company_code = ?", ('A',)
+    ).fetchall()
+    assert any('idx_consultations_company_code' in row[-1] for row in plan)
+
+
+def test_full_check_finds_orphans(orphans):
+    assert get_integrity_status(orphans)['checked_at'] is None
+
+    results = {result['check']: result for result in run_integrity_check(orphans, chunk_rows=2)}
+    assert results['contacts_company']['scanned'] == 4
+    assert results['contacts_company']['chunks'] == 3
+    assert results['contacts_company']['issues'] == 2
+    assert results['consultations_company']['issues'] == 1
+
+    issues = get_integrity_issues(orphans)
+    assert [(table, row_id, problem) for table, row_id, _, _, problem, _ in issues] == [
+        ('consultations', 1, MISSING_COMPANY),
+        ('customer_contacts', 3, MISSING_COMPANY),
+        ('customer_contacts', 4, STALE_COMPANY_ID),
+    ]
+
+    status = get_integrity_status(orphans)
+    assert status['issues'] == 3 and status['checked_at'] is not None
+    health = check_database_health(orphans)
+    assert health['status'] == 'foreign_key_errors' and health['foreign_key_errors'] == 3
+
+
+def test_next_pass_drops_fixed_rows(orphans):
+    run_integrity_check(orphans)
+    orphans.execute("DELETE FROM customer_contacts WHERE customer_name = '고아'")
+    orphans.execute("UPDATE customer_contacts SET position = '과장' WHERE customer_name = '어긋남'")
+    orphans.execute("DELETE FROM consultations")
+
+    run_integrity_check(orphans)
+    assert get_integrity_issues(orphans) == []
+    assert check_database_health(orphans)['status'] == 'healthy'
+
+
+def test_chunks_resume_from_cursor(orphans):
+    chunk = scan_chunk(orphans, 'contacts_company', chunk_rows=3)
+    assert chunk == {'check': 'contacts_company', 'scanned': 3, 'issues': 1, 'completed': False}
+    checks = {check['check']: check for check in get_integrity_status(orphans)['checks']}
+    assert checks['contacts_company']['in_progress_id'] == 3
+    # 진행 중인 점검은 간격과 관계없이 계속
+    assert 'contacts_company' in pending_checks(orphans, pass_interval=3600)
+
+    chunk = scan_chunk(orphans, 'contacts_company', chunk_rows=3)
+    assert chunk['completed'] and chunk['scanned'] == 1
+    assert get_integrity_status(orphans)['checks'][0]['in_progress_id'] is None
+
+    run_integrity_check(orphans, checks=['consultations_company'])
+    assert pending_checks(orphans, pass_interval=3600) == []
+
+
+def test_background_checker(db_path, orphans):
+    stop = start_integrity_checker(db_path, interval=0.01, chunk_rows=2, pass_interval=3600)
+    try:
+        deadline = time.monotonic() + 5
+        while get_integrity_status(orphans)['checked_at'] is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+    assert get_integrity_status(orphans)['issues'] == 3
+
+
+def test_background_checker_records_errors(db_path, orphans, monkeypatch, caplog):
+    from database import integrity
+
+    def broken(conn, check_name, chunk_rows=None):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(integrity, 'scan_chunk', broken)
+    stop = start_integrity_checker(db_path, interval=0.01, pass_interval=3600)
+    try:
+        deadline = time.monotonic() + 5
+        while get_integrity_status(orphans)['last_error'] is None and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+    # 스레드가 끝난 뒤에 결과 확인
+    for thread in threading.enumerate():
+        if thread.name == 'crm-integrity':
+            thread.join(5)
+    monkeypatch.setattr(integrity, 'scan_chunk', scan_chunk)
+
+    error = get_integrity_status(orphans)['last_error']
+    assert error['check'] == 'contacts_company' and error['error'] == 'RuntimeError: boom'
+    assert error['at'] is not None
+    assert check_database_health(orphans)['integrity_error'] == error
+    assert "참조 무결성 점검 실패" in caplog.text
+
+    # 다음 청크가 성공하면 오류를 지움
+    run_integrity_check(orphans)
+    assert get_integrity_status(orphans)['last_error'] is None
+    assert check_database_health(orphans)['integrity_error'] is None
+
+
+def test_old_checks_table_gains_error_columns(conn):
+    conn.execute('''
+        CREATE TABLE integrity_checks (
+            check_name TEXT PRIMARY KEY, last_id INTEGER NOT NULL DEFAULT 0, pass_started_at TIMESTAMP,
+            last_issues INTEGER, last_completed_at TIMESTAMP, last_seconds REAL
+        )
+    ''')
+    assert get_integrity_status(conn)['last_error'] is None
+    run_integrity_check(conn)
+    assert get_integrity_status(conn)['checked_at'] is not None
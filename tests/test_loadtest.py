@@ -0,0 +1,21 @@
+"""benchmarks/loadtest.py - 저장소 동시 실행 부하 측정"""
+
+from benchmarks.loadtest import REPOSITORY_JOURNEYS, run_repository_level
+from benchmarks.synthetic import build_database, generate_dataset
+
+
+def test_repository_level_runs_all_journeys_concurrently(tmp_path):
+    db_path = str(tmp_path / 'load.db')
+    build_database(generate_dataset(30, seed=1), db_path)
+    upload_data = generate_dataset(10, seed=2)['consultations']
+
+    journeys = list(REPOSITORY_JOURNEYS)
+    summary, records = run_repository_level(4, 1, journeys, 42, upload_data, db_path)
+
+    assert [record[4] for record in records if record[4]] == []
+    assert summary['users'] == 4
+    assert summary['errors'] == 0
+    assert summary['steps'] == len(records)
+    # 사용자마다 다른 시나리오로 시작하므로 네 시나리오가 모두 실행됨
+    assert {record[0] for record in records} == set(journeys)
+    assert summary['p50_ms'] <= summary['p95_ms'] <= summary['max_ms']
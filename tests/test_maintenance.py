@@ -0,0 +1,160 @@
+"""database/maintenance.py - 유지보수 작업과 스케줄러"""
+
+import sqlite3
+import time
+from datetime import datetime
+
+import pytest
+
+from database import maintenance
+from database.maintenance import (
+    get_fragmentation, get_maintenance_log, plan_maintenance, run_maintenance, snapshot
+)
+
+
+# 기본 설정의 한가한 시간대(02~05시) 안/밖
+IN_WINDOW = datetime.now().replace(hour=3)
+OUT_OF_WINDOW = datetime.now().replace(hour=12)
+
+
+@pytest.fixture(autouse=True)
+def thresholds(monkeypatch):
+    monkeypatch.setattr(maintenance, 'MAINTENANCE_HOURS', '2-5')
+    monkeypatch.setattr(maintenance, 'WAL_CHECKPOINT_MB', 64.0)
+    monkeypatch.setattr(maintenance, 'ANALYZE_AFTER_CHANGES', 20000)
+    monkeypatch.setattr(maintenance, 'VACUUM_FREELIST_RATIO', 0.2)
+
+
+def fill_and_delete(conn, rows=500):
+    conn.executemany(
+        "INSERT INTO companies (company_code, company_name, address) VALUES (?, ?, ?)",
+        [(f'C{i}', f'기업{i}', 'x' * 500) for i in range(rows)]
+    )
+    conn.execute("DELETE FROM companies")
+
+
+def test_nothing_planned_outside_window(conn):
+    assert plan_maintenance(conn, OUT_OF_WINDOW) == []
+
+
+def test_thresholds_apply_outside_window(conn, monkeypatch):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    monkeypatch.setattr(maintenance, 'WAL_CHECKPOINT_MB', 0.0)
+    monkeypatch.setattr(maintenance, 'ANALYZE_AFTER_CHANGES', 1)
+
+    planned = dict(plan_maintenance(conn, OUT_OF_WINDOW))
+    assert list(planned) == ['checkpoint', 'analyze']
+    assert planned['checkpoint'].startswith('WAL')
+    assert planned['analyze'] == '변경 1건'
+
+    run_maintenance(conn, now=OUT_OF_WINDOW)
+    # ANALYZE 이후 변경이 없으면 다시 계획하지 않음
+    assert 'analyze' not in dict(plan_maintenance(conn, OUT_OF_WINDOW))
+
+
+def test_window_tasks_run_once_a_day(conn):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+
+    tasks = [task for task, _ in plan_maintenance(conn, IN_WINDOW)]
+    assert tasks == ['cleanup', 'checkpoint', 'optimize']
+    results = run_maintenance(conn, now=IN_WINDOW)
+    assert [(result['task'], result['reason']) for result in results] == [
+        (task, '한가한 시간대') for task in tasks
+    ]
+    assert plan_maintenance(conn, IN_WINDOW) == []
+
+    log = get_maintenance_log(conn)
+    assert [row[0] for row in log] == list(reversed(tasks))
+
+
+def test_vacuum_when_fragmented(conn):
+    fill_and_delete(conn)
+    assert get_fragmentation(conn)['freelist_ratio'] >= 0.2
+
+    planned = dict(plan_maintenance(conn, IN_WINDOW))
+    assert planned['vacuum'].startswith('빈 페이지')
+    # VACUUM이 ANALYZE까지 실행하므로 optimize는 빠짐
+    assert 'optimize' not in planned
+
+    run_maintenance(conn, ['vacuum'])
+    assert get_fragmentation(conn)['freelist_count'] == 0
+    task, reason, seconds, db_before, db_after = get_maintenance_log(conn, 1)[0][:5]
+    assert (task, reason) == ('vacuum', 'manual')
+    assert db_after < db_before
+
+
+def test_snapshot_is_consistent_copy(conn, tmp_path):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    path = snapshot(conn, str(tmp_path / 'snapshot.db'))
+
+    copy = sqlite3.connect(path)
+    try:
+        assert copy.execute("SELECT company_name FROM companies").fetchall() == [('가나',)]
+    finally:
+        copy.close()
+
+
+def test_scheduler_runs_and_stops(db_path, conn, monkeypatch):
+    monkeypatch.setattr(maintenance, 'ANALYZE_AFTER_CHANGES', 1)
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+
+    stop = maintenance.start_maintenance_scheduler(db_path, interval=0.05)
+    try:
+        deadline = time.monotonic() + 5
+        while not get_maintenance_log(conn) and time.monotonic() < deadline:
+            time.sleep(0.05)
+    finally:
+        stop.set()
+    assert 'analyze' in [row[0] for row in get_maintenance_log(conn)]
+
+
+def test_failed_task_is_logged_and_retried(conn, monkeypatch):
+    def locked(conn):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setitem(maintenance.MAINTENANCE_FUNCTIONS, 'cleanup', locked)
+    results = run_maintenance(conn, now=IN_WINDOW)
+
+    # 실패해도 다음 작업은 계속 실행
+    assert [(result['task'], result.get('error')) for result in results] == [
+        ('cleanup', 'OperationalError: database is locked'), ('checkpoint', None), ('optimize', None)
+    ]
+    assert [(row[0], row[-1]) for row in get_maintenance_log(conn)] == [
+        ('optimize', None), ('checkpoint', None), ('cleanup', 'OperationalError: database is locked')
+    ]
+    # 실패한 작업은 다음 점검에서 다시 계획
+    assert [task for task, _ in plan_maintenance(conn, IN_WINDOW)] == ['cleanup']
+
+
+def test_log_table_gains_error_column(conn):
+    conn.execute('''
+        CREATE TABLE maintenance_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, task TEXT NOT NULL, reason TEXT, seconds REAL,
+            db_bytes_before INTEGER, db_bytes_after INTEGER, wal_bytes_before INTEGER, wal_bytes_after INTEGER,
+            change_seq INTEGER, started_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    conn.execute("INSERT INTO maintenance_log (task, reason, seconds) VALUES ('analyze', 'manual', 0.1)")
+    assert get_maintenance_log(conn)[0][-1] is None
+    run_maintenance(conn, ['analyze'])
+    assert len(get_maintenance_log(conn)) == 2
+
+
+def test_scheduler_survives_errors(db_path, conn, monkeypatch, caplog):
+    calls = []
+
+    def flaky(conn):
+        calls.append(1)
+        if len(calls) == 1:
+            raise RuntimeError("boom")
+
+    monkeypatch.setattr(maintenance, 'run_maintenance', flaky)
+    stop = maintenance.start_maintenance_scheduler(db_path, interval=0.02)
+    try:
+        deadline = time.monotonic() + 5
+        while len(calls) < 2 and time.monotonic() < deadline:
+            time.sleep(0.02)
+    finally:
+        stop.set()
+    assert len(calls) >= 2
+    assert "유지보수 점검 실패" in caplog.text and "boom" in caplog.text
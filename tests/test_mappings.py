@@ -0,0 +1,64 @@
+"""database/mappings.py - 컬럼 매핑 프로필"""
+
+from crm import cli
+from database.ingest import guess_mapping
+from database.mappings import (
+    delete_mapping_profile, find_mapping_profile, get_mapping_profiles, header_fingerprint, save_mapping_profile
+)
+
+
+def test_header_fingerprint_ignores_order_case_and_spaces():
+    assert header_fingerprint(['기업명', ' Memo ']) == header_fingerprint(['memo', '기업명'])
+    assert header_fingerprint(['기업명']) != header_fingerprint(['기업명', '메모'])
+
+
+def test_guess_mapping_uses_aliases():
+    assert guess_mapping(['회사명', ' 매출액 ', 'E-Mail'], 'companies') == {
+        'company_name': '회사명', 'revenue_2024': ' 매출액 '
+    }
+    assert guess_mapping(['업체명', '담당자', 'E-mail'], 'contacts') == {
+        'company_name': '업체명', 'customer_name': '담당자', 'email': 'E-mail'
+    }
+
+
+def test_save_and_find_profile(conn):
+    columns = ['거래처', '메모', '날짜']
+    mapping = {'company_name': '거래처', 'consultation_content': '메모', 'consultation_date': None}
+    save_mapping_profile(conn, 'consultations', columns, mapping, name='지점A.xlsx')
+
+    # 같은 헤더 (순서/대소문자/공백 다름)
+    profile = find_mapping_profile(conn, 'consultations', [' 날짜', '메모 ', '거래처'])
+    assert profile['name'] == '지점A.xlsx'
+    assert profile['mapping'] == {'company_name': '거래처', 'consultation_content': '메모 '}
+
+    # 참고용 컬럼이 더 붙은 파일은 매핑 컬럼이 모두 있으면 사용
+    assert find_mapping_profile(conn, 'consultations', ['거래처', '메모', '비고'])['name'] == '지점A.xlsx'
+    # 매핑 컬럼이 없거나 대상이 다르면 None
+    assert find_mapping_profile(conn, 'consultations', ['거래처', '날짜']) is None
+    assert find_mapping_profile(conn, 'contacts', columns) is None
+
+
+def test_save_again_updates_mapping_and_use_count(conn):
+    columns = ['거래처', '메모']
+    save_mapping_profile(conn, 'consultations', columns, {'company_name': '거래처'}, name='처음')
+    save_mapping_profile(conn, 'consultations', columns, {'company_name': '거래처', 'consultation_content': '메모'})
+
+    profiles = get_mapping_profiles(conn, 'consultations')
+    assert len(profiles) == 1
+    assert profiles.loc[0, '이름'] == '처음'
+    assert profiles.loc[0, '사용횟수'] == 2
+    assert find_mapping_profile(conn, 'consultations', columns)['mapping']['consultation_content'] == '메모'
+
+    assert delete_mapping_profile(conn, int(profiles.loc[0, 'ID']))
+    assert get_mapping_profiles(conn).empty
+
+
+def test_cli_import_uses_saved_profile(db_path, conn, write_csv, capsys):
+    conn.execute("INSERT INTO companies (company_code, company_name) VALUES ('A', '가나')")
+    save_mapping_profile(conn, 'consultations', ['거래처', '메모'],
+                         {'company_name': '거래처', 'consultation_content': '메모'}, name='지점 양식')
+    path = write_csv([{'거래처': '가나', '메모': '프로필로 매핑'}])
+
+    assert cli.main(['--db', db_path, 'import', 'consultations', path]) == 0
+    assert '지점 양식' in capsys.readouterr().err
+    assert conn.execute("SELECT consultation_content FROM consultations").fetchall() == [('프로필로 매핑',)]
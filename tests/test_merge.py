@@ -0,0 +1,138 @@
+"""
+기업 병합 (database.merge)
+- 병합 쌍 정리, 참조 재지정, 빈 속성 보완, 감사 기록
+"""
+
+import json
+
+import pandas as pd
+
+from database import merge_companies
+from database.merge import get_merge_history, read_merge_mapping, resolve_merge_pairs
+
+
+def add_company(conn, code, name, **fields):
+    columns = ['company_code', 'company_name', *fields]
+    conn.execute(
+        f"INSERT INTO companies ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+        (code, name, *fields.values())
+    )
+
+
+def add_contact(conn, code, name, email=None):
+    conn.execute(
+        "INSERT INTO customer_contacts (company_code, customer_name, email, contact_key) VALUES (?, ?, ?, ?)",
+        (code, name, email, f"email:{email}" if email else None)
+    )
+
+
+def add_consultation(conn, code, content):
+    conn.execute(
+        "INSERT INTO consultations (company_code, consultation_content) VALUES (?, ?)", (code, content)
+    )
+
+
+def test_resolve_merge_pairs():
+    resolved, skipped = resolve_merge_pairs([
+        ('A', 'B'), ('B', 'C'), ('D', 'D'), ('A', 'E'), ('X', 'Y'), ('Y', 'X'), (None, 'C')
+    ])
+    assert resolved == {'A': 'C', 'B': 'C'}
+    assert sorted(reason for *_, reason in skipped) == sorted([
+        '자기 자신으로 병합', '중복 지정 (이미 B로 병합)', '순환 병합', '순환 병합', '업체코드 누락'
+    ])
+
+
+def test_merge_moves_references_and_fills_target(conn):
+    add_company(conn, 'SRC', '가나(주)', industry='제조', address='서울')
+    add_company(conn, 'DST', '가나', address='부산')
+    add_contact(conn, 'SRC', '김철수', 'kim@example.com')
+    add_contact(conn, 'SRC', '이영희', 'lee@example.com')
+    add_contact(conn, 'DST', '김철수', 'kim@example.com')
+    add_consultation(conn, 'SRC', '원본 상담')
+    add_consultation(conn, 'DST', '대상 상담')
+
+    result = merge_companies(conn, [('SRC', 'DST'), ('NONE', 'DST')])
+
+    assert result['merged'] == 1
+    # 대상에 이미 있는 김철수는 옮기지 않고 삭제
+    assert result['contacts_moved'] == 1
+    assert result['contacts_deduplicated'] == 1
+    assert result['consultations_moved'] == 1
+    assert [row[:2] for row in result['skipped']] == [('NONE', 'DST')]
+
+    assert conn.execute("SELECT company_code FROM companies").fetchall() == [('DST',)]
+    # 대상의 빈 속성만 원본 값으로 보완
+    assert conn.execute("SELECT industry, address FROM companies").fetchone() == ('제조', '부산')
+    target_id = conn.execute("SELECT company_id FROM companies").fetchone()[0]
+    # 같은 식별 키의 연락처는 대상 쪽 하나만 남김
+    contacts = conn.execute(
+        "SELECT customer_name, company_code, company_id FROM customer_contacts ORDER BY customer_name"
+    ).fetchall()
+    assert contacts == [('김철수', 'DST', target_id), ('이영희', 'DST', target_id)]
+    consultations = conn.execute("SELECT DISTINCT company_code, company_id FROM consultations").fetchall()
+    assert consultations == [('DST', target_id)]
+    assert conn.execute("PRAGMA foreign_key_check").fetchall() == []
+
+    history = get_merge_history(conn)
+    assert len(history) == 1
+    assert (history.loc[0, '이전된연락처'], history.loc[0, '중복삭제연락처']) == (1, 1)
+    log = conn.execute("SELECT source_name, target_name, source_snapshot FROM company_merge_log").fetchone()
+    assert log[:2] == ('가나(주)', '가나')
+    assert json.loads(log[2])['industry'] == '제조'
+
+
+def test_merge_chain_into_final_target(conn):
+    for code in ('A', 'B', 'C'):
+        add_company(conn, code, f'기업{code}')
+        add_consultation(conn, code, f'상담{code}')
+
+    result = merge_companies(conn, [('A', 'B'), ('B', 'C')])
+
+    assert result['merged'] == 2
+    assert conn.execute("SELECT company_code FROM companies").fetchall() == [('C',)]
+    assert conn.execute("SELECT COUNT(*) FROM consultations WHERE company_code = 'C'").fetchone()[0] == 3
+
+
+def test_merge_without_valid_pairs_changes_nothing(conn):
+    add_company(conn, 'A', '기업A')
+    result = merge_companies(conn, [('A', 'A')])
+    assert result['merged'] == 0
+    assert conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 1
+
+
+def test_read_merge_mapping(tmp_path):
+    path = tmp_path / 'merge.csv'
+    pd.DataFrame({'원본업체코드': ['0012', 'B'], '대상업체코드': ['C', 'D']}).to_csv(path, index=False)
+    # 업체코드의 앞자리 0은 유지
+    assert read_merge_mapping(str(path)) == [('0012', 'C'), ('B', 'D')]
+
+
+def test_sources_sharing_contact_are_deduplicated(conn):
+    for code in ('A', 'B', 'C'):
+        add_company(conn, code, f'기업{code}')
+    add_contact(conn, 'A', '김철수', 'kim@example.com')
+    add_contact(conn, 'B', '김철수', 'kim@example.com')
+    add_contact(conn, 'B', '이영희', 'lee@example.com')
+
+    # A, B가 같은 대상(C)으로 합쳐지면 먼저 들어온 A의 연락처만 남김
+    result = merge_companies(conn, [('A', 'C'), ('B', 'C')])
+    assert (result['contacts_moved'], result['contacts_deduplicated']) == (2, 1)
+    assert conn.execute("SELECT COUNT(*) FROM customer_contacts WHERE company_code = 'C'").fetchone()[0] == 2
+    log = conn.execute(
+        "SELECT source_code, contacts_moved, contacts_deduplicated FROM company_merge_log ORDER BY source_code"
+    ).fetchall()
+    assert log == [('A', 1, 0), ('B', 1, 1)]
+
+
+def test_old_merge_log_gains_deduplicated_column(conn):
+    conn.execute('''
+        CREATE TABLE company_merge_log (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, batch_id TEXT NOT NULL, source_code TEXT NOT NULL,
+            target_code TEXT NOT NULL, source_name TEXT, target_name TEXT, contacts_moved INTEGER DEFAULT 0,
+            consultations_moved INTEGER DEFAULT 0, source_snapshot TEXT, merged_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    add_company(conn, 'A', '기업A')
+    add_company(conn, 'B', '기업B')
+    assert merge_companies(conn, [('A', 'B')])['merged'] == 1
+    assert get_merge_history(conn).loc[0, '중복삭제연락처'] == 0
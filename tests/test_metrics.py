@@ -0,0 +1,105 @@
+"""database/metrics.py - Prometheus 지표"""
+
+import urllib.error
+import urllib.request
+
+import pandas as pd
+import pytest
+
+from database import metrics
+from database.export import write_export
+from database.ingest import guess_mapping, import_companies
+
+
+def test_render_counter_gauge_histogram():
+    registry = metrics.MetricsRegistry()
+    counter = registry.counter('t_rows', '행 수', ('kind',))
+    gauge = registry.gauge('t_ratio', '비율', ('cache',))
+    histogram = registry.histogram('t_seconds', '시간', buckets=(0.1, 1))
+
+    counter.inc(3, kind='a"b')
+    counter.inc(kind='a"b')
+    gauge.set(0.5, cache='x')
+    for value in (0.05, 0.5, 3):
+        histogram.observe(value)
+
+    lines = registry.render().splitlines()
+    assert '# TYPE t_rows counter' in lines
+    assert 't_rows_total{kind="a\\"b"} 4' in lines
+    assert 't_ratio{cache="x"} 0.5' in lines
+    # 히스토그램 구간은 누적
+    assert 't_seconds_bucket{le="0.1"} 1' in lines
+    assert 't_seconds_bucket{le="1"} 2' in lines
+    assert 't_seconds_bucket{le="+Inf"} 3' in lines
+    assert 't_seconds_count 3' in lines
+    assert registry.counter('t_rows', '다시 등록') is counter
+
+
+def test_label_and_counter_validation():
+    counter = metrics.MetricsRegistry().counter('t_total', '합계', ('kind',))
+    with pytest.raises(ValueError):
+        counter.inc(kind='a', extra='b')
+    with pytest.raises(ValueError):
+        counter.inc(-1, kind='a')
+
+
+def test_ingest_export_and_queries_are_recorded(conn, repo, tmp_path):
+    before_rows = metrics.INGEST_ROWS.get(kind='companies')
+    before_bytes = metrics.EXPORT_BYTES.get(format='csv')
+
+    df = pd.DataFrame({'기업명': ['가나', '다라']})
+    import_companies(conn, df, guess_mapping(df.columns, 'companies'))
+    repo.list_companies()
+    write_export({'기업': repo.list_companies()}, str(tmp_path / 'out.csv'), 'csv')
+
+    assert metrics.INGEST_ROWS.get(kind='companies') == before_rows + 2
+    assert metrics.EXPORT_BYTES.get(format='csv') > before_bytes
+    assert metrics.INGEST_ROWS_PER_SECOND.get(kind='companies') > 0
+    text = metrics.render_prometheus()
+    assert 'crm_query_duration_seconds_count{query="list_companies"' in text
+
+
+def test_database_size_and_file_writer(db_path, conn, tmp_path, monkeypatch):
+    monkeypatch.setattr(metrics, '_watched_database', None)
+    metrics.watch_database_file(db_path)
+    output = tmp_path / 'crm.prom'
+
+    size = metrics.write_prometheus_file(str(output))
+
+    text = output.read_text(encoding='utf-8')
+    assert len(text.encode('utf-8')) == size
+    assert 'crm_db_size_bytes{file="db"}' in text
+    assert not (tmp_path / 'crm.prom.tmp').exists()
+
+
+def test_metrics_server():
+    server = metrics.start_metrics_server(0)
+    try:
+        host, port = server.server_address[:2]
+        with urllib.request.urlopen(f'http://{host}:{port}/metrics', timeout=10) as response:
+            assert response.headers['Content-Type'] == metrics.PROMETHEUS_CONTENT_TYPE
+            assert b'# TYPE' in response.read()
+        with pytest.raises(urllib.error.HTTPError):
+            urllib.request.urlopen(f'http://{host}:{port}/other', timeout=10)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_cache_hit_ratio():
+    from database_utils import cached_data
+
+    calls = []
+
+    @cached_data('test_cache')
+    def load(value):
+        calls.append(value)
+        return value * 2
+
+    load.clear()
+    assert [load(1), load(1), load(1), load(2)] == [2, 2, 2, 4]
+    assert calls == [1, 2]
+    assert metrics.CACHE_REQUESTS.get(cache='test_cache') == 4
+    assert metrics.CACHE_MISSES.get(cache='test_cache') == 2
+    metrics.render_prometheus()
+    assert metrics.CACHE_HIT_RATIO.get(cache='test_cache') == 0.5
@@ -0,0 +1,68 @@
+"""database/pragmas.py - 연결 PRAGMA 프로필과 대량 적재 모드"""
+
+import pytest
+
+from database import ingest, pragmas
+from database.connection import connect
+from database.ingest import guess_mapping, ingest_files
+from database.pragmas import PRAGMA_PROFILES, bulk_load, get_pragma_settings, get_profile
+
+
+@pytest.mark.parametrize('name', sorted(PRAGMA_PROFILES))
+def test_profile_is_applied_per_connection(db_path, name):
+    conn = connect(db_path, name)
+    try:
+        settings = get_pragma_settings(conn)
+    finally:
+        conn.close()
+
+    profile = PRAGMA_PROFILES[name]
+    for key in ('journal_mode', 'synchronous', 'cache_size_mib', 'mmap_size_mib', 'page_size',
+                'busy_timeout', 'wal_autocheckpoint', 'temp_store'):
+        assert settings[key] == profile[key], key
+    assert settings['foreign_keys'] == 'ON'
+
+
+def test_default_profile(monkeypatch):
+    monkeypatch.setattr(pragmas, 'DB_PROFILE', 'safe')
+    assert get_profile() is PRAGMA_PROFILES['safe']
+    with pytest.raises(ValueError, match='알 수 없는 DB 프로필'):
+        get_profile('fast')
+
+
+def test_bulk_load_restores_settings(conn):
+    before = get_pragma_settings(conn)
+    with bulk_load(conn):
+        during = get_pragma_settings(conn)
+        assert during['synchronous'] == 'OFF'
+        assert during['wal_autocheckpoint'] == 0
+        assert during['cache_size_mib'] == PRAGMA_PROFILES['bulk-load']['cache_size_mib']
+    assert get_pragma_settings(conn) == before
+
+    # 적재 중 오류가 나도 원래 설정으로 되돌림
+    with pytest.raises(RuntimeError):
+        with bulk_load(conn):
+            raise RuntimeError
+    assert get_pragma_settings(conn) == before
+
+    with bulk_load(conn, enabled=False):
+        assert get_pragma_settings(conn) == before
+
+
+def test_large_ingest_uses_bulk_load(conn, write_csv, monkeypatch):
+    before = get_pragma_settings(conn)
+    enabled = []
+
+    def tracking_bulk_load(conn, enabled_flag=True):
+        enabled.append(bool(enabled_flag))
+        return bulk_load(conn, enabled_flag)
+
+    monkeypatch.setattr(ingest, 'bulk_load', tracking_bulk_load)
+    monkeypatch.setattr(ingest, 'BULK_LOAD_MIN_ROWS', 3)
+    for rows in (2, 3):
+        path = write_csv([{'기업명': f'기업{rows}-{i}'} for i in range(rows)])
+        ingest_files(conn, [path], 'companies', guess_mapping(['기업명'], 'companies'), max_workers=1)
+
+    assert enabled == [False, True]
+    assert conn.execute("SELECT COUNT(*) FROM companies").fetchone()[0] == 5
+    assert get_pragma_settings(conn) == before
@@ -0,0 +1,41 @@
+"""database/profiling.py - 재실행 구간별 프로파일러"""
+
+from database.profiling import RenderProfiler, get_recent_runs, get_render_summary, profile_section
+
+
+def test_disabled_profiler_records_nothing(tmp_path):
+    metrics_db = str(tmp_path / 'metrics.db')
+    profiler = RenderProfiler('기업 목록', enabled=False).activate()
+    with profile_section('fetch'):
+        pass
+    assert profiler.finish(metrics_db) == {}
+    assert get_render_summary(db_path=metrics_db).empty
+
+
+def test_sections_are_summed_and_saved(tmp_path, repo):
+    metrics_db = str(tmp_path / 'metrics.db')
+    profiler = RenderProfiler('기업 목록', enabled=True).activate()
+    # 저장소 조회는 활성화된 측정기에 fetch/frame 구간을 보고
+    repo.list_companies()
+    repo.list_companies()
+    with profiler.section('render', rows=5):
+        pass
+    profiler.add('render', 10.0, rows=3)
+
+    sections = profiler.finish(metrics_db)
+
+    assert {'fetch', 'frame', 'render', 'total'} <= set(sections)
+    assert sections['render'] >= 10.0
+    assert profiler.sections['render'][1] == 8
+
+    # finish() 후에는 같은 스레드의 구간이 더 이상 기록되지 않음
+    fetch = profiler.sections['fetch']
+    repo.list_companies()
+    assert profiler.sections['fetch'] == fetch
+
+    summary = get_render_summary(db_path=metrics_db)
+    assert set(summary['구간']) == {'fetch', 'frame', 'render', 'total'}
+    assert (summary['재실행수'] == 1).all()
+    runs = get_recent_runs(db_path=metrics_db)
+    assert runs['페이지'].tolist() == ['기업 목록']
+    assert runs.loc[0, 'render'] >= 10.0
@@ -0,0 +1,75 @@
+"""
+쿼리 계측 / 느린 쿼리 로그 (database.querylog)
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from database import querylog
+
+
+@pytest.fixture
+def slow_log(slow_query_log, monkeypatch):
+    """모든 쿼리를 느린 쿼리로 기록하고 임시 로그 파일 경로 반환 (conftest의 slow_query_log)"""
+    monkeypatch.setattr(querylog, 'SLOW_QUERY_MS', 0)
+    querylog.reset_query_timings()
+    yield slow_query_log
+    querylog.reset_query_timings()
+
+
+def test_redact_sql_replaces_literals_only():
+    sql = "SELECT c.company_name FROM companies c WHERE c.email = 'it''s@x.com' AND c.id > 12 LIMIT 10"
+
+    assert querylog.redact_sql(sql) == "SELECT c.company_name FROM companies c WHERE c.email = ? AND c.id > ? LIMIT ?"
+
+
+def test_slow_query_log_has_no_bound_values(repo, slow_log):
+    ok, _ = repo.insert_consultation({
+        '기업명': '비밀기업', '고객명': '홍길동', '상담날짜': '2025-01-02',
+        '상담내역': '010-1234-5678 hong@example.com', '프로젝트명': None
+    })
+    assert ok
+    repo.recent_consultations(limit=5)
+
+    text = slow_log.read_text(encoding='utf-8')
+    entries = [json.loads(line) for line in text.splitlines()]
+    assert {entry['query'] for entry in entries} >= {'insert_consultation', 'recent_consultations'}
+    for secret in ('비밀기업', '홍길동', '010-1234-5678', 'hong@example.com'):
+        assert secret not in text
+    assert secret not in str(querylog.get_query_timings()['sql'].tolist())
+
+
+def test_timings_record_calls_rows_and_plan(conn, repo, slow_log):
+    repo.recent_consultations(limit=5)
+    repo.recent_consultations(limit=5)
+
+    timings = querylog.get_query_timings().set_index('query')
+    assert timings.loc['recent_consultations', 'calls'] == 2
+    sql = timings.loc['recent_consultations', 'sql']
+    assert 'LIMIT ?' in sql
+    assert not querylog.explain_query_plan(conn, sql).empty
+
+
+def test_empty_log_path_disables_file(repo, slow_log, monkeypatch, tmp_path):
+    monkeypatch.setattr(querylog, 'SLOW_QUERY_LOG', '')
+
+    repo.recent_consultations(limit=5)
+
+    assert not slow_log.exists()
+    assert querylog.get_slow_queries()[0]['query'] == 'recent_consultations'
+
+
+def test_default_log_path_follows_db_folder(tmp_path):
+    # 실행 위치가 아니라 DB 파일이 있는 폴더 기준 절대 경로
+    env = {key: value for key, value in os.environ.items() if key != 'CRM_SLOW_QUERY_LOG'}
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    env.update(CRM_DB_PATH=os.path.join('data', 'crm.db'), PYTHONPATH=root)
+    output = subprocess.run(
+        [sys.executable, '-c', 'from database import querylog; print(querylog.SLOW_QUERY_LOG)'],
+        cwd=tmp_path, env=env, capture_output=True, text=True, check=True
+    ).stdout.strip()
+    assert output == str(tmp_path / 'data' / 'crm_slow_queries.log')
@@ -0,0 +1,82 @@
+"""database/repository.py - 화면용 조회/저장 (CRMRepository)"""
+
+import pandas as pd
+import pytest
+
+from database import CRMRepository
+
+
+@pytest.fixture
+def filled(repo, conn):
+    """기업 2, 연락처 2, 상담 3건"""
+    conn.executemany(
+        "INSERT INTO companies (company_code, company_name, industry, revenue_2024) VALUES (?, ?, ?, ?)",
+        [('A', '가나', '제조', 100.0), ('B', '다라', 'IT', None)]
+    )
+    conn.executemany(
+        "INSERT INTO customer_contacts (company_code, customer_name, position) VALUES (?, ?, ?)",
+        [('A', '김철수', '과장'), ('B', '이영희', None)]
+    )
+    for company, day, content in [('가나', '2024.01.05', '첫 상담'), ('가나', '2024.02.01', '후속'),
+                                  ('다라', '2023.12.20', '소개')]:
+        assert repo.insert_consultation({'기업명': company, '상담날짜': day, '상담내역': content})[0]
+    return repo
+
+
+def test_counts_and_autocomplete(filled):
+    assert filled.counts() == {'companies': 2, 'contacts': 2, 'consultations': 3}
+    assert filled.company_names() == ['가나', '다라']
+    assert filled.customer_names() == ['김철수', '이영희']
+    assert filled.industries() == ['IT', '제조']
+    assert filled.positions() == ['과장']
+
+
+def test_lists_join_company_names(filled):
+    contacts = filled.list_contacts()
+    assert dict(zip(contacts['customer_name'], contacts['company_name'])) == {'김철수': '가나', '이영희': '다라'}
+
+    consultations = filled.list_consultations()
+    # 상담 날짜 최신 순
+    assert consultations['consultation_content'].tolist() == ['후속', '첫 상담', '소개']
+    assert filled.company_choices()['company_name'].tolist() == ['가나', '다라']
+    assert len(filled.integrated_view()) == 3
+    assert len(filled.recent_consultations(limit=2)) == 2
+
+
+def test_insert_consultation_creates_missing_company(repo, conn):
+    ok, _ = repo.insert_consultation({'기업명': '신규기업', '상담내역': '문의'})
+    assert ok
+    code, name = conn.execute("SELECT company_code, company_name FROM companies").fetchone()
+    assert name == '신규기업' and code.startswith('AUTO')
+    assert conn.execute("SELECT company_code FROM consultations").fetchone() == (code,)
+
+
+def test_update_company(filled, conn):
+    edited = filled.companies_for_edit()
+    row = edited[edited['업체코드'] == 'A'].iloc[0].to_dict()
+
+    ok, _ = filled.update_company('A', {**row, '매출액_2024': '2,500', '종업원수': 12, '고객구분': 'VIP'})
+    assert ok
+    assert conn.execute(
+        "SELECT revenue_2024, employee_count, customer_category FROM companies WHERE company_code = 'A'"
+    ).fetchone() == (2500.0, 12, 'VIP')
+
+    ok, message = filled.update_company('A', {**row, '기업명': None})
+    assert not ok and message.startswith('업데이트 실패')
+
+
+def test_export_and_backup(filled):
+    sheet_name, df = filled.export('companies')
+    assert isinstance(sheet_name, str) and len(df) == 2
+    sheets = filled.backup()
+    assert len(sheets) >= 4
+    assert all(isinstance(df, pd.DataFrame) for df in sheets.values())
+
+
+def test_compact_dtypes_only_for_read_only_views(conn, filled):
+    raw = CRMRepository(conn, compact_dtypes=False).list_companies()
+    compact = CRMRepository(conn, compact_dtypes=True).list_companies()
+    assert raw['company_name'].tolist() == compact['company_name'].tolist()
+    # 편집 그리드는 항상 기본 dtype
+    edit = CRMRepository(conn, compact_dtypes=True).companies_for_edit()
+    assert not isinstance(edit['기업명'].dtype, pd.CategoricalDtype)
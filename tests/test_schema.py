@@ -0,0 +1,252 @@
+"""
+스키마 마이그레이션 (database.schema)
+- 최초 버전 스키마(user_version 0)의 DB를 만든 뒤 init_database()로 올려서 확인
+"""
+
+import sqlite3
+
+import pytest
+
+from database import CRMRepository, init_database
+from database import schema
+from database.schema import BASE_TABLES, MIGRATIONS, get_schema_version
+
+
+@pytest.fixture
+def legacy_db(db_path):
+    """최초 버전 스키마로 DB를 만들고 rows {테이블: [dict, ...]}를 넣은 뒤 경로 반환"""
+    def create(rows):
+        raw = sqlite3.connect(db_path)
+        for ddl in BASE_TABLES:
+            raw.execute(ddl)
+        for table, records in rows.items():
+            for record in records:
+                raw.execute(
+                    f"INSERT INTO {table} ({', '.join(record)}) VALUES ({', '.join('?' * len(record))})",
+                    tuple(record.values())
+                )
+        raw.commit()
+        raw.close()
+        return db_path
+    return create
+
+
+def index_names(conn, table):
+    return {row[1] for row in conn.execute(f"PRAGMA index_list({table})")}
+
+
+def test_new_database_is_at_latest_version(conn):
+    assert get_schema_version(conn) == MIGRATIONS[-1][0]
+    assert [version for version, _ in MIGRATIONS] == list(range(1, len(MIGRATIONS) + 1))
+
+
+def test_migration_is_idempotent(db_path, conn):
+    again = init_database(db_path)
+    try:
+        assert get_schema_version(again) == MIGRATIONS[-1][0]
+    finally:
+        again.close()
+
+
+def test_v1_backfills_consultation_day(legacy_db):
+    path = legacy_db({
+        'companies': [{'company_code': 'A', 'company_name': '가나'}],
+        'consultations': [
+            {'company_code': 'A', 'consultation_date': date, 'consultation_content': str(i)}
+            for i, date in enumerate(['2024.03.05', '20240306', '45358', '미정', None])
+        ]
+    })
+    conn = init_database(path)
+    try:
+        days = conn.execute("SELECT consultation_day FROM consultations ORDER BY id").fetchall()
+        assert [day for (day,) in days] == ['2024-03-05', '2024-03-06', '2024-03-07', None, None]
+        assert 'idx_consultations_day' in index_names(conn, 'consultations')
+
+        # 기간 조회와 월별 집계는 consultation_day 기준
+        repo = CRMRepository(conn)
+        assert len(repo.list_consultations('2024-03-06', '2024-03-31')) == 2
+        monthly = repo.monthly_consultation_counts('2024-01-01', '2024-12-31')
+        assert monthly.to_dict('records') == [{'월': '2024-03', '상담건수': 3}]
+        plan = conn.execute(
+            "EXPLAIN QUERY PLAN SELECT COUNT(*) FROM consultations WHERE consultation_day BETWEEN ? AND ?",
+            ('2024-01-01', '2024-12-31')
+        ).fetchall()
+        assert any('idx_consultations_day' in row[-1] for row in plan)
+    finally:
+        conn.close()
+
+
+def test_new_consultation_gets_consultation_day(repo, conn):
+    ok, _ = repo.insert_consultation({'기업명': '가나', '상담날짜': '2025.1.2', '상담내역': '신규'})
+    assert ok
+    assert conn.execute("SELECT consultation_date, consultation_day FROM consultations").fetchone() == (
+        '2025.1.2', '2025-01-02'
+    )
+
+
+def test_v2_deduplicates_contacts(legacy_db):
+    path = legacy_db({
+        'companies': [{'company_code': 'A', 'company_name': '가나'}, {'company_code': 'B', 'company_name': '다라'}],
+        'customer_contacts': [
+            {'company_code': 'A', 'customer_name': '김철수', 'email': 'Kim@Example.com', 'position': '과장'},
+            {'company_code': 'A', 'customer_name': '김철수', 'email': 'kim@example.com', 'phone': '010-1111-2222'},
+            {'company_code': 'A', 'customer_name': '김철수', 'email': 'KIM@example.com', 'phone': '010-3333-4444'},
+            {'company_code': 'B', 'customer_name': '김철수', 'email': 'kim@example.com'},
+            {'company_code': 'A', 'customer_name': '담당자'},
+            {'company_code': 'A', 'customer_name': '담당자'},
+        ]
+    })
+    conn = init_database(path)
+    try:
+        rows = conn.execute(
+            "SELECT id, company_code, position, phone, contact_key FROM customer_contacts ORDER BY id"
+        ).fetchall()
+        # 가장 먼저 등록된 행을 남기고 빈 값은 가장 최근 중복 행의 값으로 채움
+        assert rows[0] == (1, 'A', '과장', '010-3333-4444', 'email:kim@example.com')
+        assert [row[:2] for row in rows[1:]] == [(4, 'B'), (5, 'A'), (6, 'A')]
+        assert 'idx_contacts_company_key' in index_names(conn, 'customer_contacts')
+        with pytest.raises(sqlite3.IntegrityError):
+            conn.execute(
+                "INSERT INTO customer_contacts (company_code, customer_name, contact_key) VALUES ('A', 'x', ?)",
+                ('email:kim@example.com',)
+            )
+    finally:
+        conn.close()
+
+
+def test_v3_tombstones_and_updated_at(legacy_db):
+    path = legacy_db({
+        'companies': [{'company_code': 'A', 'company_name': '가나', 'created_at': '2024-01-02 03:04:05'}],
+        'customer_contacts': [{'company_code': 'A', 'customer_name': '김철수'}]
+    })
+    raw = sqlite3.connect(path)
+    raw.execute("UPDATE companies SET updated_at = NULL")
+    raw.commit()
+    raw.close()
+
+    conn = init_database(path)
+    try:
+        # 수정일이 없던 기존 행은 등록일로 채움
+        assert conn.execute("SELECT updated_at FROM companies").fetchone()[0] == '2024-01-02 03:04:05'
+        for table in ('companies', 'customer_contacts', 'consultations'):
+            assert f'idx_{table}_updated' in index_names(conn, table)
+
+        conn.execute("DELETE FROM customer_contacts")
+        conn.execute("DELETE FROM companies")
+        rows = conn.execute("SELECT dataset, row_key FROM deleted_rows ORDER BY change_seq").fetchall()
+        assert rows == [('contacts', '1'), ('companies', 'A')]
+    finally:
+        conn.close()
+
+
+def test_update_bumps_updated_at_and_change_seq(conn):
+    conn.execute(
+        "INSERT INTO companies (company_code, company_name, updated_at) VALUES ('A', '가나', '2000-01-01 00:00:00')"
+    )
+    conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('A', '김철수')")
+    before = conn.execute("SELECT change_seq FROM companies").fetchone()[0]
+    assert conn.execute("SELECT change_seq FROM customer_contacts").fetchone()[0] == before + 1
+
+    # updated_at을 빠뜨린 UPDATE도 트리거가 갱신
+    conn.execute("UPDATE companies SET industry = 'IT'")
+    updated_at, seq = conn.execute("SELECT updated_at, change_seq FROM companies").fetchone()
+    assert updated_at > '2000-01-01 00:00:00'
+    assert seq == before + 2
+    assert conn.execute("SELECT value FROM change_counter").fetchone()[0] == seq
+
+    conn.execute("DELETE FROM customer_contacts")
+    assert conn.execute("SELECT change_seq FROM deleted_rows").fetchone()[0] == seq + 1
+
+
+def test_v4_numbers_existing_rows_and_converts_watermarks(legacy_db, monkeypatch):
+    path = legacy_db({
+        'companies': [
+            {'company_code': 'A', 'company_name': '가나', 'updated_at': '2024-01-03 00:00:00'},
+            {'company_code': 'B', 'company_name': '다라', 'updated_at': '2024-01-01 00:00:00'},
+            {'company_code': 'C', 'company_name': '마바', 'updated_at': '2024-01-05 00:00:00'},
+        ]
+    })
+    # v3까지만 올린 뒤 시각 기준 동기화 기준점을 저장
+    monkeypatch.setattr(schema, 'MIGRATIONS', MIGRATIONS[:3])
+    conn = init_database(path)
+    conn.execute('''
+        CREATE TABLE sync_watermarks (
+            consumer TEXT NOT NULL, dataset TEXT NOT NULL, watermark, changed_rows INTEGER DEFAULT 0,
+            deleted_rows INTEGER DEFAULT 0, synced_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            PRIMARY KEY (consumer, dataset)
+        )
+    ''')
+    conn.execute("INSERT INTO sync_watermarks (consumer, dataset, watermark) VALUES ('erp', 'companies', '2024-01-04 00:00:00')")
+    conn.close()
+    monkeypatch.setattr(schema, 'MIGRATIONS', MIGRATIONS)
+
+    conn = init_database(path)
+    try:
+        rows = conn.execute("SELECT company_code, change_seq FROM companies ORDER BY change_seq").fetchall()
+        assert rows == [('B', 1), ('A', 2), ('C', 3)]
+        assert conn.execute("SELECT value FROM change_counter").fetchone()[0] == 3
+        # 기준 시각 이전에 바뀐 마지막 행의 번호로 변환되어 C만 다시 받음
+        assert conn.execute("SELECT watermark FROM sync_watermarks").fetchone()[0] == 2
+    finally:
+        conn.close()
+
+
+def test_v5_logs_only_new_changes(legacy_db):
+    path = legacy_db({'companies': [{'company_code': 'A', 'company_name': '가나'}]})
+    conn = init_database(path)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 0
+        conn.execute("UPDATE companies SET industry = 'IT'")
+        assert conn.execute("SELECT op, row_key, changed FROM change_log").fetchall() == [
+            ('UPDATE', 'A', '{"industry":"IT"}')
+        ]
+    finally:
+        conn.close()
+
+
+def test_v6_adds_company_id_and_backfills_children(legacy_db):
+    path = legacy_db({
+        'companies': [
+            {'company_code': 'A', 'company_name': '가나'},
+            {'company_code': 'X', 'company_name': '삭제'},
+            {'company_code': 'B', 'company_name': '다라'},
+        ],
+        'customer_contacts': [
+            {'company_code': 'B', 'customer_name': '김철수'},
+            {'company_code': 'NONE', 'customer_name': '이영희'},
+        ],
+        'consultations': [{'company_code': 'A', 'consultation_date': '2024-01-02', 'consultation_content': '상담'}]
+    })
+    raw = sqlite3.connect(path)
+    raw.execute("DELETE FROM companies WHERE company_code = 'X'")
+    raw.commit()
+    raw.close()
+
+    conn = init_database(path)
+    try:
+        # 기존 rowid를 그대로 company_id로 사용
+        assert conn.execute("SELECT company_code, company_id FROM companies ORDER BY company_id").fetchall() == [
+            ('A', 1), ('B', 3)
+        ]
+        assert conn.execute("SELECT customer_name, company_id FROM customer_contacts ORDER BY id").fetchall() == [
+            ('김철수', 3), ('이영희', None)
+        ]
+        assert conn.execute("SELECT company_id FROM consultations").fetchone()[0] == 1
+        # 백필은 변경 번호와 변경 로그를 남기지 않음
+        assert conn.execute("SELECT value FROM change_counter").fetchone()[0] == 5
+        assert conn.execute("SELECT COUNT(*) FROM change_log").fetchone()[0] == 0
+        assert 'idx_consultations_company_id_day' in index_names(conn, 'consultations')
+        assert 'idx_customer_contacts_company_id' in index_names(conn, 'customer_contacts')
+        assert 'idx_companies_change_seq' in index_names(conn, 'companies')
+
+        # 새 행과 업체코드 변경은 트리거가 company_id를 채움
+        conn.execute("INSERT INTO customer_contacts (company_code, customer_name) VALUES ('A', '박민수')")
+        conn.execute("UPDATE customer_contacts SET company_code = 'A' WHERE customer_name = '김철수'")
+        assert conn.execute(
+            "SELECT customer_name, company_id FROM customer_contacts WHERE company_code = 'A' ORDER BY id"
+        ).fetchall() == [('김철수', 1), ('박민수', 1)]
+        assert 'company_id' not in conn.execute(
+            "SELECT changed FROM change_log WHERE op = 'INSERT'"
+        ).fetchone()[0]
+    finally:
+        conn.close()
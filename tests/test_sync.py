@@ -0,0 +1,102 @@
+"""database/sync.py - 소비자별 변경분(delta) 내보내기"""
+
+import pandas as pd
+
+from database.connection import transaction
+from database.sync import (
+    DELETED_SHEET, delta_sheets, get_sync_status, prune_tombstones, read_delta, save_watermark
+)
+
+
+def add_companies(conn, *codes):
+    with transaction(conn):
+        conn.executemany(
+            "INSERT INTO companies (company_code, company_name) VALUES (?, ?)",
+            [(code, f"기업{code}") for code in codes]
+        )
+
+
+def test_first_sync_is_full_without_tombstones(conn):
+    add_companies(conn, 'A', 'B')
+    with transaction(conn):
+        conn.execute("DELETE FROM companies WHERE company_code = 'B'")
+
+    delta = read_delta(conn, 'erp', 'companies')
+    assert delta['since'] is None
+    assert list(delta['changed']['업체코드']) == ['A']
+    assert delta['deleted'].empty
+    assert delta['watermark'] == conn.execute("SELECT value FROM change_counter").fetchone()[0]
+
+
+def test_delta_after_watermark(conn):
+    add_companies(conn, 'A', 'B', 'C')
+    save_watermark(conn, 'erp', 'companies', read_delta(conn, 'erp', 'companies'))
+
+    # 저장한 기준 번호 이후 변경이 없으면 빈 변경분
+    assert read_delta(conn, 'erp', 'companies')['changed'].empty
+    with transaction(conn):
+        conn.execute("UPDATE companies SET industry = 'IT' WHERE company_code = 'A'")
+        conn.execute("DELETE FROM companies WHERE company_code = 'B'")
+    add_companies(conn, 'D')
+
+    delta = read_delta(conn, 'erp', 'companies')
+    assert list(delta['changed']['업체코드']) == ['A', 'D']
+    assert delta['changed']['업종'].iloc[0] == 'IT'
+    assert list(delta['deleted']['업체코드']) == ['B']
+    assert read_delta(conn, 'erp', 'companies')['since'] == delta['since']
+
+    save_watermark(conn, 'erp', 'companies', delta)
+    after = read_delta(conn, 'erp', 'companies')
+    assert after['since'] == delta['watermark']
+    assert after['changed'].empty and after['deleted'].empty
+
+    status = get_sync_status(conn)
+    assert status[['소비자', '데이터셋', '변경행수', '삭제행수']].values.tolist() == [['erp', 'companies', 2, 1]]
+
+
+def test_watermarks_are_per_consumer(conn):
+    add_companies(conn, 'A')
+    save_watermark(conn, 'erp', 'companies', read_delta(conn, 'erp', 'companies'))
+    add_companies(conn, 'B')
+
+    assert list(read_delta(conn, 'erp', 'companies')['changed']['업체코드']) == ['B']
+    assert list(read_delta(conn, 'dw', 'companies')['changed']['업체코드']) == ['A', 'B']
+    assert list(read_delta(conn, 'erp', 'companies', since=0)['changed']['업체코드']) == ['A', 'B']
+
+
+def test_contact_delta_and_sheets(conn):
+    add_companies(conn, 'A')
+    with transaction(conn):
+        conn.execute(
+            "INSERT INTO customer_contacts (company_code, customer_name) VALUES ('A', '김철수'), ('A', '이영희')"
+        )
+    delta = read_delta(conn, 'erp', 'contacts', since=0)
+    assert list(delta['changed']['고객명']) == ['김철수', '이영희']
+    assert set(delta['changed']['기업명']) == {'기업A'}
+
+    with transaction(conn):
+        conn.execute("DELETE FROM customer_contacts WHERE customer_name = '김철수'")
+    delta = read_delta(conn, 'erp', 'contacts', since=delta['watermark'])
+    assert delta['changed'].empty
+    assert list(delta['deleted']['ID']) == ['1']
+
+    sheets = delta_sheets('contacts', delta)
+    assert list(sheets) == ['고객연락처', DELETED_SHEET]
+    assert isinstance(sheets[DELETED_SHEET], pd.DataFrame)
+
+
+def test_prune_tombstones_keeps_unread(conn):
+    add_companies(conn, 'A', 'B', 'C')
+    save_watermark(conn, 'erp', 'companies', read_delta(conn, 'erp', 'companies'))
+    save_watermark(conn, 'dw', 'companies', read_delta(conn, 'dw', 'companies'))
+    with transaction(conn):
+        conn.execute("DELETE FROM companies WHERE company_code = 'A'")
+    save_watermark(conn, 'erp', 'companies', read_delta(conn, 'erp', 'companies'))
+
+    # dw가 아직 받지 않은 삭제 기록은 남김
+    assert prune_tombstones(conn) == 0
+    save_watermark(conn, 'dw', 'companies', read_delta(conn, 'dw', 'companies'))
+    with transaction(conn):
+        conn.execute("DELETE FROM companies WHERE company_code = 'B'")
+    assert prune_tombstones(conn) == 1
+    assert conn.execute("SELECT row_key FROM deleted_rows").fetchall() == [('B',)]
@@ -0,0 +1,79 @@
+"""database/validation.py - 업로드 검증과 정규화"""
+
+import pandas as pd
+
+from database.validation import (
+    build_contact_keys, build_error_report, normalize_emails, normalize_phone_numbers, validate_frame
+)
+
+
+def test_normalize_phone_numbers():
+    values = pd.Series([
+        '01012345678', '010 1234 5678', '+82 10-1234-5678', 1012345678.0, '02-123-4567',
+        '0212345678', '031-123-4567', '1588-1234', '1234', None, ''
+    ])
+    formatted, invalid = normalize_phone_numbers(values)
+    assert formatted.tolist()[:8] == [
+        '010-1234-5678', '010-1234-5678', '010-1234-5678', '010-1234-5678', '02-123-4567',
+        '02-1234-5678', '031-123-4567', '1588-1234'
+    ]
+    assert formatted[8:].isna().all()
+    # 빈 값은 오류가 아님
+    assert invalid.tolist() == [False] * 8 + [True, False, False]
+
+
+def test_normalize_emails():
+    emails, invalid = normalize_emails(pd.Series([' Kim@Example.COM ', 'mailto:lee@a.co.kr', 'kim@', None]))
+    assert emails.tolist()[:2] == ['kim@example.com', 'lee@a.co.kr']
+    assert emails[2:].isna().all()
+    assert invalid.tolist() == [False, False, True, False]
+
+
+def test_build_contact_keys():
+    keys = build_contact_keys(
+        pd.Series(['홍 길동', '김철수', '이영희', None]),
+        pd.Series(['010-1234-5678', '02 123 4567', 'bad', '010-1111-2222']),
+        pd.Series(['Hong@A.com', None, None, None])
+    )
+    assert keys.tolist()[:2] == ['email:hong@a.com', 'phone:021234567:김철수']
+    # 형식이 틀린 번호나 이름 없는 번호로는 키를 만들지 않음
+    assert keys[2:].isna().all()
+
+
+def test_validate_frame_collects_all_errors_per_row():
+    df = pd.DataFrame({
+        '기업명': ['가나', None, '다라', '마바'],
+        '매출액': ['1,000', 'abc', None, '2000'],
+        '종업원수': ['10', '1.5', '-1', '3'],
+        '전화': ['010-1234-5678', None, '12', '02 123 4567'],
+        '이메일': ['A@B.COM', 'x@', None, None],
+        '상담날짜': ['2024.01.01', '미정', None, '20240101'],
+    })
+    mapping = {
+        'company_name': '기업명', 'revenue_2024': '매출액', 'employee_count': '종업원수',
+        'phone': '전화', 'email': '이메일', 'consultation_date': '상담날짜'
+    }
+
+    valid, errors = validate_frame(df, mapping, ['company_name'])
+
+    assert valid.index.tolist() == [0, 3]
+    assert valid['전화'].tolist() == ['010-1234-5678', '02-123-4567']
+    assert valid['이메일'].tolist()[0] == 'a@b.com'
+    assert errors.index.tolist() == [1, 2]
+    assert errors.loc[1, '오류'].split('; ') == [
+        '기업명은(는) 필수입니다.', '매출액은 숫자여야 합니다.', '종업원수는 0 이상의 정수여야 합니다.',
+        '올바른 이메일 형식이 아닙니다.', '상담날짜 형식을 인식할 수 없습니다.'
+    ]
+    assert errors.loc[2, '오류'].split('; ') == [
+        '종업원수는 0 이상의 정수여야 합니다.', '전화번호 형식이 올바르지 않습니다.'
+    ]
+    # 오류 행은 정규화 전 원본 값 유지
+    assert errors.loc[1, '이메일'] == 'x@'
+
+
+def test_build_error_report_adds_location():
+    errors = pd.DataFrame({'오류': ['필수'], '기업명': [None]}, index=[3])
+    report = build_error_report(errors, '지점A.xlsx', '1월')
+    assert report.columns.tolist() == ['파일', '시트', '행', '오류', '기업명']
+    # 헤더가 1행이므로 데이터 인덱스 3은 엑셀 5행
+    assert report.iloc[0][['파일', '시트', '행']].tolist() == ['지점A.xlsx', '1월', 5]